@@ -19,21 +19,37 @@ import globalVar  # noqa: E402
 from middleware.tenant_context import TenantContextMiddleware  # noqa: E402
 from routes.demo_codex_vertice360 import router as codex_demo_router  # noqa: E402
 from routes.demo_codex_chat import router as codex_chat_router  # noqa: E402
+from services.demo_codex_chat import warm_demo_context  # noqa: E402
 from routes.demo_ag_vertice360 import router as ag_demo_router  # noqa: E402
 from routes.health import health_check  # noqa: E402
 from routes.version import version  # noqa: E402
-from backend.modules.agui_stream import agui_stream, debug_trigger_event  # noqa: E402
+from backend.modules.agui_stream import (  # noqa: E402
+    agui_stream,
+    close_broadcast_transport,
+    debug_stream_subscribers,
+    debug_trigger_event,
+    open_broadcast_transport,
+)
 from backend.modules.crm_demo import crm_router  # noqa: E402
 from routes.demo_sse_test import SseTestController  # noqa: E402
 from backend.modules.messaging.webhooks import webhook_router  # noqa: E402
 from backend.telemetry.logging import setup_logging  # noqa: E402
 from backend.middleware.telemetry_middleware import TelemetryMiddleware  # noqa: E402
 from backend.routes.messaging import messaging_router  # noqa: E402
+from backend.services.llm_client import close_llm_client  # noqa: E402
+from backend.modules.messaging.providers.http_pool import (  # noqa: E402
+    close_provider_clients,
+    open_provider_clients,
+)
 from routes.demo_vertice360_workflow import router as workflow_demo_router  # noqa: E402
 from routes.demo_vertice360_ai_workflow import router as ai_workflow_demo_router  # noqa: E402
 from routes.demo_vertice360_orquestador import (  # noqa: E402
     router as orquestador_demo_router,
 )
+from backend.modules.vertice360_orquestador_demo.delivery_status import (  # noqa: E402
+    close_delivery_status_ingestor,
+)
+from backend.modules.vertice360_workflow_demo.store import flush_ticket_writes  # noqa: E402
 
 
 def create_app() -> Litestar:
@@ -46,6 +62,7 @@ def create_app() -> Litestar:
         ag_demo_router,
         agui_stream,
         debug_trigger_event,
+        debug_stream_subscribers,
         crm_router,
         SseTestController,
         webhook_router,
@@ -71,7 +88,19 @@ def create_app() -> Litestar:
         allow_credentials=False,  # poné True sólo si usás cookies/sesión en navegador
         max_age=86400,
     )
-    return Litestar(route_handlers=route_handlers, middleware=middleware, cors_config=cors_config)
+    return Litestar(
+        route_handlers=route_handlers,
+        middleware=middleware,
+        cors_config=cors_config,
+        on_startup=[warm_demo_context, open_provider_clients, open_broadcast_transport],
+        on_shutdown=[
+            close_broadcast_transport,
+            flush_ticket_writes,
+            close_llm_client,
+            close_delivery_status_ingestor,
+            close_provider_clients,
+        ],
+    )
 
 
 app = create_app()
@@ -1,6 +1,26 @@
 """AG-UI global streaming utilities."""
 
-from backend.modules.agui_stream.broadcaster import broadcaster
-from backend.modules.agui_stream.routes import agui_stream, debug_trigger_event
+from backend.modules.agui_stream.broadcaster import (
+    broadcaster,
+    close_broadcast_transport,
+    open_broadcast_transport,
+)
+from backend.modules.agui_stream.routes import (
+    agui_stream,
+    build_sse_headers,
+    debug_stream_subscribers,
+    debug_trigger_event,
+)
+from backend.modules.agui_stream.text_message import static_text_message, stream_text_message
 
-__all__ = ["agui_stream", "debug_trigger_event", "broadcaster"]
+__all__ = [
+    "agui_stream",
+    "build_sse_headers",
+    "debug_stream_subscribers",
+    "debug_trigger_event",
+    "broadcaster",
+    "close_broadcast_transport",
+    "open_broadcast_transport",
+    "static_text_message",
+    "stream_text_message",
+]
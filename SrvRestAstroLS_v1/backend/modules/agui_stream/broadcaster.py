@@ -1,55 +1,532 @@
-"""Simple in-memory broadcaster for AG-UI Server-Sent Events."""
+"""Simple in-memory broadcaster for AG-UI Server-Sent Events.
+
+Every subscriber gets a bounded queue and ``publish`` never waits on a reader:
+messages are enqueued with ``put_nowait``. When a slow tab lets its queue fill
+up, the configured overflow policy decides what gives:
+
+- ``drop_oldest``: discard the oldest queued message (default);
+- ``coalesce``: replace the queued message with the same ``correlationId``
+  (falls back to ``drop_oldest`` when there is none);
+- ``disconnect``: close the subscription; the stream ends and the browser's
+  EventSource reconnects with a fresh queue.
+
+Subscribers may also pass a ``SubscriptionFilter`` (event-name prefixes,
+correlation/ticket ids, domains). Filtered subscribers are indexed by
+correlation id or domain, so ``publish`` only looks at the subscribers that
+can match and skips serializing events nobody asked for.
+
+With several workers, an attached transport (see ``transport.py``) forwards
+each published event to the other processes, which deliver it to their own
+subscribers.
+
+Every event gets a monotonic SSE ``id`` (``<epoch>-<seq>``) and is kept in a
+size- and age-capped ring buffer. A client reconnecting with ``Last-Event-ID``
+gets the frames it missed; when they are no longer buffered (or the id comes
+from another process) it receives a single ``agui.resync`` event instead and
+refetches its views.
+"""
 
 from __future__ import annotations
 
 import asyncio
+import itertools
 import json
-from typing import Any
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+from backend import globalVar
+from backend.modules.agui_stream.transport import (
+    DEFAULT_BATCH_WINDOW_MS,
+    DEFAULT_CHANNEL,
+    DEFAULT_MAX_BATCH,
+    BroadcastTransport,
+    PostgresNotifyTransport,
+)
+from backend.telemetry import metrics
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+DEFAULT_QUEUE_SIZE = 256
+DEFAULT_REPLAY_EVENTS = 1000
+DEFAULT_REPLAY_AGE_SECONDS = 300
+RESYNC_EVENT = "agui.resync"
 
 
-def format_sse_message(event_type: str, payload: dict[str, Any]) -> str:
-    """Render a minimal SSE message with ``event`` and JSON ``data`` lines."""
+def format_sse_message(event_type: str, payload: dict[str, Any], event_id: str | None = None) -> str:
+    """Render a minimal SSE message with optional ``id``, ``event`` and JSON ``data`` lines."""
     data = json.dumps(payload, separators=(",", ":"))
+    if event_id is not None:
+        return f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
     return f"event: {event_type}\ndata: {data}\n\n"
 
 
+def event_domain(event_type: str) -> str:
+    """First dotted segment of an event name: ``ticket.updated`` -> ``ticket``."""
+    return event_type.split(".", 1)[0]
+
+
+def _clean_values(values: Iterable[Any] | None) -> frozenset[str]:
+    return frozenset(str(value).strip() for value in values or () if str(value).strip())
+
+
+@dataclass(frozen=True, slots=True)
+class SubscriptionFilter:
+    """What a subscriber wants; values within a field are OR-ed, fields are AND-ed.
+
+    ``correlation_ids`` match the payload ``correlationId`` or ``value.ticketId``.
+    An empty field places no constraint.
+    """
+
+    prefixes: tuple[str, ...] = ()
+    correlation_ids: frozenset[str] = frozenset()
+    domains: frozenset[str] = frozenset()
+
+    @classmethod
+    def build(
+        cls,
+        *,
+        prefixes: Iterable[str] | None = None,
+        correlation_ids: Iterable[Any] | None = None,
+        domains: Iterable[str] | None = None,
+    ) -> SubscriptionFilter | None:
+        """Normalize raw values; returns ``None`` when nothing was requested."""
+        built = cls(
+            prefixes=tuple(sorted(_clean_values(prefixes))),
+            correlation_ids=_clean_values(correlation_ids),
+            domains=frozenset(domain.lower() for domain in _clean_values(domains)),
+        )
+        return built if built.prefixes or built.correlation_ids or built.domains else None
+
+    def matches(self, event_type: str, keys: tuple[str, ...]) -> bool:
+        if self.domains and event_domain(event_type).lower() not in self.domains:
+            return False
+        if self.prefixes and not event_type.startswith(self.prefixes):
+            return False
+        if self.correlation_ids and not any(key in self.correlation_ids for key in keys):
+            return False
+        return True
+
+    def as_dict(self) -> dict[str, list[str]]:
+        return {
+            "prefixes": list(self.prefixes),
+            "correlationIds": sorted(self.correlation_ids),
+            "domains": sorted(self.domains),
+        }
+
+
+def _event_keys(payload: Any) -> tuple[str, ...]:
+    """Correlation keys of a payload: its ``correlationId`` and ``value.ticketId``."""
+    if not isinstance(payload, dict):
+        return ()
+    keys: list[str] = []
+    correlation_id = payload.get("correlationId")
+    if correlation_id not in (None, ""):
+        keys.append(str(correlation_id))
+    value = payload.get("value")
+    ticket_id = value.get("ticketId") if isinstance(value, dict) else None
+    if ticket_id not in (None, "") and str(ticket_id) not in keys:
+        keys.append(str(ticket_id))
+    return tuple(keys)
+
+
+@dataclass(frozen=True, slots=True)
+class ReplayEntry:
+    seq: int
+    recorded_at: float
+    event_type: str
+    keys: tuple[str, ...]
+    frame: str
+
+
+class ReplayBuffer:
+    """Ring buffer of recent events for ``Last-Event-ID`` resume.
+
+    Entries keep the frame rendered at publish time: payloads can hold live
+    objects (a ticket dict) that change afterwards, and a replay must send the
+    event as it was. The same frame is what live subscribers receive.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_events: int = DEFAULT_REPLAY_EVENTS,
+        max_age_seconds: float = DEFAULT_REPLAY_AGE_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_events = max(0, int(max_events))
+        self.max_age_seconds = float(max_age_seconds)
+        self.epoch = format(int(time.time() * 1000), "x")
+        self._clock = clock
+        self._entries: deque[ReplayEntry] = deque(maxlen=self.max_events or None)
+        self._seq = 0
+        self._replays = 0
+        self._replayed = 0
+        self._resyncs = 0
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    @property
+    def last_id(self) -> str | None:
+        return self.event_id(self._seq) if self._seq else None
+
+    def record(self, event_type: str, keys: tuple[str, ...], payload: dict[str, Any]) -> tuple[str, str | None]:
+        """Assign the next id to an event and keep it for replay; returns ``(event_id, frame)``.
+
+        ``frame`` is ``None`` when replay is disabled: nothing is rendered then.
+        """
+        self._seq += 1
+        event_id = self.event_id(self._seq)
+        if not self.max_events:
+            return event_id, None
+        now = self._clock()
+        self._expire(now)
+        frame = format_sse_message(event_type, payload, event_id)
+        self._entries.append(ReplayEntry(self._seq, now, event_type, keys, frame))
+        return event_id, frame
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.max_age_seconds
+        entries = self._entries
+        while entries and entries[0].recorded_at < cutoff:
+            entries.popleft()
+
+    def since(self, last_event_id: str) -> list[ReplayEntry] | None:
+        """Entries after ``last_event_id``; ``None`` when the gap cannot be covered."""
+        epoch, _, raw_seq = str(last_event_id).strip().rpartition("-")
+        if epoch != self.epoch or not raw_seq.isdigit() or int(raw_seq) > self._seq:
+            self._resyncs += 1
+            return None
+        seq = int(raw_seq)
+        self._expire(self._clock())
+        entries = self._entries
+        # Nothing missed, or the first missed event is still buffered.
+        if seq < self._seq and (not entries or entries[0].seq > seq + 1):
+            self._resyncs += 1
+            return None
+        missed = [entry for entry in entries if entry.seq > seq]
+        self._replays += 1
+        self._replayed += len(missed)
+        return missed
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "max_events": self.max_events,
+            "max_age_seconds": self.max_age_seconds,
+            "size": len(self._entries),
+            "last_id": self.last_id,
+            "oldest_id": self.event_id(self._entries[0].seq) if self._entries else None,
+            "replays": self._replays,
+            "replayed_events": self._replayed,
+            "resyncs": self._resyncs,
+        }
+
+
+class SubscriberQueue(asyncio.Queue):
+    """Bounded subscriber queue; ``get()`` yields SSE strings, or ``None`` once disconnected."""
+
+    def __init__(
+        self,
+        maxsize: int,
+        policy: str,
+        subscriber_id: int,
+        filters: SubscriptionFilter | None = None,
+    ) -> None:
+        super().__init__(maxsize=maxsize)
+        self.policy = policy
+        self.subscriber_id = subscriber_id
+        self.filters = filters
+        self.closed = False
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_lag = 0
+
+    # asyncio.Queue storage hooks (same extension point as PriorityQueue/LifoQueue).
+    def _init(self, maxsize: int) -> None:
+        self._queue: deque[tuple[str | None, str | None]] = deque()
+
+    def _put(self, item: tuple[str | None, str | None]) -> None:
+        self._queue.append(item)
+
+    def _get(self) -> str | None:
+        message = self._queue.popleft()[1]
+        if message is not None:
+            self.delivered += 1
+        return message
+
+    def offer(self, message: str, correlation_id: str | None = None) -> bool:
+        """Enqueue without waiting; returns False when this subscriber was disconnected."""
+        if self.closed:
+            return False
+        if self.full() and not self._make_room(correlation_id, message):
+            return not self.closed
+        self.put_nowait((correlation_id, message))
+        self.max_lag = max(self.max_lag, self.qsize())
+        return True
+
+    def _make_room(self, correlation_id: str | None, message: str) -> bool:
+        """Apply the overflow policy; False when ``message`` was already absorbed in place."""
+        if self.policy == "disconnect":
+            self.close()
+            metrics.inc("agui.subscriber.disconnected", {"policy": self.policy})
+            return False
+        if self.policy == "coalesce" and correlation_id is not None:
+            for index, (queued_id, _) in enumerate(self._queue):
+                if queued_id == correlation_id:
+                    del self._queue[index]
+                    self._queue.append((correlation_id, message))
+                    self.coalesced += 1
+                    metrics.inc("agui.subscriber.coalesced", {"policy": self.policy})
+                    return False
+        self._queue.popleft()
+        self.dropped += 1
+        metrics.inc("agui.subscriber.dropped", {"policy": self.policy})
+        return True
+
+    def close(self) -> None:
+        """Drop anything queued and wake the reader with the ``None`` end marker."""
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.clear()
+        self.put_nowait((None, None))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "id": self.subscriber_id,
+            "policy": self.policy,
+            "filters": self.filters.as_dict() if self.filters else None,
+            "lag": self.qsize(),
+            "max_lag": self.max_lag,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "closed": self.closed,
+        }
+
+
 class AGUIBroadcaster:
     """Global multi-subscriber broadcaster for AG-UI SSE events."""
 
-    def __init__(self) -> None:
-        self._subscribers: set[asyncio.Queue[str]] = set()
-        self._lock = asyncio.Lock()
+    def __init__(
+        self,
+        *,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        policy: str = "drop_oldest",
+        replay: ReplayBuffer | None = None,
+    ) -> None:
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"unknown overflow policy: {policy!r}")
+        self.queue_size = max(1, int(queue_size))
+        self.policy = policy
+        self._subscribers: set[SubscriberQueue] = set()
+        # Topic index: every subscriber sits in exactly one bucket, keyed by the
+        # most selective field of its filter.
+        self._wildcard: set[SubscriberQueue] = set()
+        self._by_correlation: dict[str, set[SubscriberQueue]] = {}
+        self._by_domain: dict[str, set[SubscriberQueue]] = {}
+        self._prefix_only: set[SubscriberQueue] = set()
+        self._ids = itertools.count(1)
+        self._disconnected = 0
+        self._published = 0
+        self._skipped = 0
+        self.transport: BroadcastTransport | None = None
+        self.replay = replay if replay is not None else ReplayBuffer()
 
-    async def subscribe(self) -> asyncio.Queue[str]:
-        """Register a new subscriber and return its queue."""
-        queue: asyncio.Queue[str] = asyncio.Queue()
-        async with self._lock:
-            self._subscribers.add(queue)
+    async def subscribe(
+        self,
+        filters: SubscriptionFilter | None = None,
+        last_event_id: str | None = None,
+    ) -> SubscriberQueue:
+        """Register a new subscriber and return its queue.
+
+        With ``last_event_id`` the queue starts with the missed events matching
+        ``filters``, or with one ``agui.resync`` event when they are gone.
+        """
+        queue = SubscriberQueue(self.queue_size, self.policy, next(self._ids), filters)
+        self._subscribers.add(queue)
+        for bucket in self._buckets(queue, create=True):
+            bucket.add(queue)
+        if last_event_id:
+            self._replay_into(queue, last_event_id)
         return queue
 
-    async def unsubscribe(self, queue: asyncio.Queue[str]) -> None:
+    def _replay_into(self, queue: SubscriberQueue, last_event_id: str) -> None:
+        missed = self.replay.since(last_event_id)
+        if missed is not None:
+            frames = [
+                (entry, entry.frame)
+                for entry in missed
+                if queue.filters is None or queue.filters.matches(entry.event_type, entry.keys)
+            ]
+            if len(frames) <= self.queue_size:
+                for entry, frame in frames:
+                    queue.offer(frame, entry.keys[0] if entry.keys else None)
+                return
+        # Too much (or unknown) history: tell the client to refetch instead of replaying.
+        metrics.inc("agui.replay.resync")
+        queue.offer(
+            format_sse_message(
+                RESYNC_EVENT,
+                {
+                    "type": "CUSTOM",
+                    "timestamp": int(time.time() * 1000),
+                    "name": RESYNC_EVENT,
+                    "value": {"lastEventId": last_event_id},
+                },
+                # Resuming from "now" after the client has refetched.
+                self.replay.last_id,
+            )
+        )
+
+    async def unsubscribe(self, queue: SubscriberQueue) -> None:
         """Remove a subscriber queue when the stream closes."""
-        async with self._lock:
-            self._subscribers.discard(queue)
+        self._remove(queue)
+
+    def _buckets(self, queue: SubscriberQueue, *, create: bool = False) -> list[set[SubscriberQueue]]:
+        filters = queue.filters
+        if filters is None:
+            return [self._wildcard]
+        if filters.correlation_ids:
+            index, keys = self._by_correlation, filters.correlation_ids
+        elif filters.domains:
+            index, keys = self._by_domain, filters.domains
+        else:
+            return [self._prefix_only]
+        if create:
+            return [index.setdefault(key, set()) for key in keys]
+        return [index[key] for key in keys if key in index]
+
+    def _remove(self, queue: SubscriberQueue) -> None:
+        if queue not in self._subscribers:
+            return
+        self._subscribers.discard(queue)
+        for bucket in self._buckets(queue):
+            bucket.discard(queue)
+        for index in (self._by_correlation, self._by_domain):
+            for key in [key for key, bucket in index.items() if not bucket]:
+                del index[key]
+
+    def _interested(self, event_type: str, keys: tuple[str, ...]) -> list[SubscriberQueue]:
+        candidates = set(self._wildcard)
+        candidates.update(self._prefix_only)
+        domain_bucket = self._by_domain.get(event_domain(event_type).lower())
+        if domain_bucket:
+            candidates.update(domain_bucket)
+        for key in keys:
+            bucket = self._by_correlation.get(key)
+            if bucket:
+                candidates.update(bucket)
+        return [
+            queue
+            for queue in candidates
+            if queue.filters is None or queue.filters.matches(event_type, keys)
+        ]
+
+    async def attach_transport(self, transport: BroadcastTransport) -> None:
+        """Start forwarding published events to other workers through ``transport``."""
+        await transport.start(self.publish_local)
+        self.transport = transport
+
+    async def detach_transport(self) -> None:
+        transport, self.transport = self.transport, None
+        if transport is not None:
+            await transport.aclose()
 
     async def publish(self, event_type: str, payload: dict[str, Any]) -> None:
-        """Broadcast an event payload to all subscribers."""
-        message = format_sse_message(event_type, payload)
-        async with self._lock:
-            subscribers = list(self._subscribers)
-        for queue in subscribers:
-            await queue.put(message)
+        """Deliver an event to matching local subscribers and forward it to other workers."""
+        await self.publish_local(event_type, payload)
+        if self.transport is not None:
+            self.transport.send(event_type, payload)
+
+    async def publish_local(self, event_type: str, payload: dict[str, Any]) -> None:
+        """Serialize and deliver an event to the subscribers whose filters match it."""
+        keys = _event_keys(payload)
+        event_id, frame = self.replay.record(event_type, keys, payload)
+        targets = self._interested(event_type, keys)
+        if not targets:
+            self._skipped += 1
+            return
+        self._published += 1
+        if frame is None:
+            frame = format_sse_message(event_type, payload, event_id)
+        self._fan_out(targets, frame, keys[0] if keys else None)
 
     async def publish_raw(self, message: str) -> None:
-        """Broadcast a pre-rendered SSE message to all subscribers."""
-        async with self._lock:
-            subscribers = list(self._subscribers)
-        for queue in subscribers:
-            await queue.put(message)
+        """Broadcast a pre-rendered SSE message to unfiltered subscribers."""
+        self._fan_out(list(self._wildcard), message, None)
+
+    def _fan_out(self, targets: list[SubscriberQueue], message: str, correlation_id: str | None) -> None:
+        for queue in targets:
+            if not queue.offer(message, correlation_id):
+                self._remove(queue)
+                self._disconnected += 1
 
     def subscriber_count(self) -> int:
         return len(self._subscribers)
 
+    def stats(self) -> dict[str, Any]:
+        subscribers = sorted((queue.stats() for queue in self._subscribers), key=lambda item: item["id"])
+        return {
+            "policy": self.policy,
+            "queue_size": self.queue_size,
+            "subscribers": len(subscribers),
+            "disconnected": self._disconnected,
+            "filtered": len(self._subscribers) - len(self._wildcard),
+            "published": self._published,
+            "skipped_unmatched": self._skipped,
+            "dropped": sum(item["dropped"] for item in subscribers),
+            "coalesced": sum(item["coalesced"] for item in subscribers),
+            "max_lag": max((item["max_lag"] for item in subscribers), default=0),
+            "per_subscriber": subscribers,
+            "transport": self.transport.stats() if self.transport is not None else None,
+            "replay": self.replay.stats(),
+        }
+
+
+def _policy_from_env() -> str:
+    policy = globalVar.get_env_str("V360_SSE_OVERFLOW_POLICY", "drop_oldest").strip().lower()
+    return policy if policy in OVERFLOW_POLICIES else "drop_oldest"
+
+
+broadcaster = AGUIBroadcaster(
+    queue_size=globalVar.get_env_int("V360_SSE_QUEUE_SIZE", DEFAULT_QUEUE_SIZE, minimum=1),
+    policy=_policy_from_env(),
+    replay=ReplayBuffer(
+        max_events=globalVar.get_env_int("V360_SSE_REPLAY_MAX_EVENTS", DEFAULT_REPLAY_EVENTS, minimum=0),
+        max_age_seconds=globalVar.get_env_int(
+            "V360_SSE_REPLAY_MAX_AGE_SECONDS", DEFAULT_REPLAY_AGE_SECONDS, minimum=1
+        ),
+    ),
+)
+
+
+async def open_broadcast_transport() -> None:
+    """App startup: attach the transport selected by ``V360_SSE_TRANSPORT`` (``memory`` or ``postgres``)."""
+    kind = globalVar.get_env_str("V360_SSE_TRANSPORT", "memory").strip().lower()
+    if kind in ("", "memory"):
+        return
+    if kind != "postgres":
+        raise ValueError(f"unknown SSE transport: {kind}")
+    transport = PostgresNotifyTransport(
+        globalVar.get_env_str("V360_SSE_PG_URL", "").strip() or globalVar.get_v360_db_url(),
+        channel=globalVar.get_env_str("V360_SSE_PG_CHANNEL", DEFAULT_CHANNEL).strip() or DEFAULT_CHANNEL,
+        batch_window_ms=globalVar.get_env_int("V360_SSE_PG_BATCH_WINDOW_MS", DEFAULT_BATCH_WINDOW_MS, minimum=0),
+        max_batch=globalVar.get_env_int("V360_SSE_PG_MAX_BATCH", DEFAULT_MAX_BATCH, minimum=1),
+    )
+    try:
+        await broadcaster.attach_transport(transport)
+    except Exception as exc:  # noqa: BLE001 - a single worker still serves its own clients
+        logger.warning("AGUI_TRANSPORT_UNAVAILABLE kind=%s error=%s", kind, exc)
 
-broadcaster = AGUIBroadcaster()
 
+async def close_broadcast_transport() -> None:
+    await broadcaster.detach_transport()
@@ -9,7 +9,7 @@ from litestar.response import Response, Stream
 from pydantic import BaseModel
 
 from backend import globalVar
-from backend.modules.agui_stream.broadcaster import broadcaster
+from backend.modules.agui_stream.broadcaster import SubscriptionFilter, broadcaster
 
 BASE_SSE_HEADERS = {
     "Content-Type": "text/event-stream; charset=utf-8",
@@ -36,12 +36,33 @@ def build_sse_headers(origin: str | None) -> dict[str, str]:
     return headers
 
 
+def _query_values(request: Request, *names: str) -> list[str]:
+    """Collect repeated and comma-separated values of the given query params."""
+    values: list[str] = []
+    for name in names:
+        for raw in request.query_params.getall(name, []):
+            values.extend(part for part in str(raw).split(",") if part.strip())
+    return values
+
+
+def parse_stream_filters(request: Request) -> SubscriptionFilter | None:
+    """``?events=ticket.,messaging.inbound&ticketId=T-1`` or ``?domain=ai_workflow`` -> filter."""
+    return SubscriptionFilter.build(
+        prefixes=_query_values(request, "events", "prefix"),
+        correlation_ids=_query_values(request, "correlationId", "ticketId"),
+        domains=_query_values(request, "domain"),
+    )
+
+
 @get("/api/agui/stream", media_type="text/event-stream", status_code=200)
 async def agui_stream(request: Request) -> Stream:
-    """Global AG-UI Server-Sent Events stream."""
+    """Global AG-UI Server-Sent Events stream, optionally filtered via query params."""
+    filters = parse_stream_filters(request)
+    # EventSource resends the last ``id:`` it saw; the query param covers manual reconnects.
+    last_event_id = request.headers.get("last-event-id") or request.query_params.get("lastEventId")
 
     async def event_publisher() -> AsyncGenerator[str, None]:
-        queue = await broadcaster.subscribe()
+        queue = await broadcaster.subscribe(filters, last_event_id=last_event_id)
         try:
             # 1. Handshake immediately
             yield ": connected\n\n"
@@ -50,10 +71,14 @@ async def agui_stream(request: Request) -> Stream:
                 try:
                     # 2. Wait for message or timeout for heartbeat
                     message = await asyncio.wait_for(queue.get(), timeout=20.0)
-                    yield message
                 except asyncio.TimeoutError:
                     # 3. Heartbeat
                     yield ": ping\n\n"
+                    continue
+                if message is None:
+                    # Disconnected as a slow consumer; EventSource reconnects with a fresh queue.
+                    break
+                yield message
         except asyncio.CancelledError:  # pragma: no cover - transport driven
             raise
         finally:
@@ -72,6 +97,12 @@ async def agui_stream_preflight(request: Request) -> Response:
 
 # --- Debug / Verification ---
 
+@get("/api/agui/debug/subscribers")
+async def debug_stream_subscribers() -> dict:
+    """Per-subscriber queue lag, drops and coalesces of the global stream."""
+    return broadcaster.stats()
+
+
 class TriggerRequest(BaseModel):
     name: str = "task.created"
     value: dict | None = None
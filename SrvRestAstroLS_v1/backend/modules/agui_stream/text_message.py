@@ -0,0 +1,95 @@
+"""Render a streamed LLM completion as AG-UI text-message SSE events."""
+
+from __future__ import annotations
+
+import logging
+import time
+import uuid
+from typing import Any, AsyncGenerator, Awaitable, Callable
+
+from backend.modules.agui_stream.broadcaster import format_sse_message
+from backend.services.llm_client import LLMStream
+from backend.telemetry import metrics
+
+logger = logging.getLogger(__name__)
+
+TEXT_MESSAGE_START = "TEXT_MESSAGE_START"
+TEXT_MESSAGE_CONTENT = "TEXT_MESSAGE_CONTENT"
+TEXT_MESSAGE_END = "TEXT_MESSAGE_END"
+RUN_ERROR = "RUN_ERROR"
+
+# Receives the assembled text and returns the final payload fields to report
+# (it may replace the text, e.g. with a validated fallback).
+CompleteHook = Callable[[str, LLMStream], Awaitable[dict[str, Any]]]
+
+
+def _epoch_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _event(event_type: str, message_id: str, correlation_id: str | None, **fields: Any) -> str:
+    payload = {
+        "type": event_type,
+        "timestamp": _epoch_ms(),
+        "messageId": message_id,
+        "correlationId": correlation_id,
+        **fields,
+    }
+    return format_sse_message(event_type, payload)
+
+
+async def stream_text_message(
+    llm_stream: LLMStream,
+    *,
+    message_id: str | None = None,
+    correlation_id: str | None = None,
+    on_complete: CompleteHook | None = None,
+) -> AsyncGenerator[str, None]:
+    """Yield START, one CONTENT per delta and END; ``on_complete`` runs once.
+
+    When the client disconnects the server closes this generator, which closes
+    ``llm_stream`` and aborts the upstream request; ``on_complete`` is then
+    never called, so a half-streamed reply is not persisted.
+    """
+    message_id = message_id or f"msg-{uuid.uuid4().hex[:12]}"
+    tags = {"purpose": llm_stream.request.purpose}
+    yield _event(TEXT_MESSAGE_START, message_id, correlation_id, role="assistant")
+    completed = False
+    try:
+        async for delta in llm_stream:
+            yield _event(TEXT_MESSAGE_CONTENT, message_id, correlation_id, delta=delta)
+        final: dict[str, Any] = {"content": llm_stream.content}
+        if on_complete is not None:
+            final = await on_complete(llm_stream.content, llm_stream)
+        completed = True
+        yield _event(
+            TEXT_MESSAGE_END,
+            message_id,
+            correlation_id,
+            model=llm_stream.model,
+            firstTokenMs=round(llm_stream.first_token_ms or 0.0, 1),
+            latencyMs=round(llm_stream.latency_ms or 0.0, 1),
+            **final,
+        )
+    except Exception as exc:  # noqa: BLE001 - surfaced to the client as RUN_ERROR
+        logger.warning("TEXT_STREAM_FAILED message_id=%s error=%s", message_id, exc)
+        yield _event(RUN_ERROR, message_id, correlation_id, message=str(exc))
+    finally:
+        if not completed:
+            await llm_stream.aclose()
+            if llm_stream.status == "cancelled":
+                metrics.inc("llm.stream.disconnected", tags)
+
+
+async def static_text_message(
+    text: str,
+    *,
+    message_id: str | None = None,
+    correlation_id: str | None = None,
+    **final: Any,
+) -> AsyncGenerator[str, None]:
+    """Same event sequence for a reply that needs no LLM (templates, fallbacks)."""
+    message_id = message_id or f"msg-{uuid.uuid4().hex[:12]}"
+    yield _event(TEXT_MESSAGE_START, message_id, correlation_id, role="assistant")
+    yield _event(TEXT_MESSAGE_CONTENT, message_id, correlation_id, delta=text)
+    yield _event(TEXT_MESSAGE_END, message_id, correlation_id, content=text, **final)
@@ -0,0 +1,334 @@
+"""Cross-process transports for the AG-UI broadcaster.
+
+The broadcaster always delivers to its own subscribers first; a transport only
+forwards the event to the other worker processes. ``PostgresNotifyTransport``
+uses ``LISTEN/NOTIFY`` on a dedicated async connection per worker:
+
+- events published within a short window are packed into as few ``NOTIFY``
+  payloads as fit under Postgres' 8000-byte limit;
+- an event too large for a notification is written to ``agui_event_spill``
+  and the notification carries only its row id;
+- every event carries ``(origin, seq)``; receivers skip their own origin and
+  ids already seen, so batches re-sent after a reconnect are not delivered
+  twice.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Protocol
+
+from backend.telemetry import metrics
+
+try:
+    import psycopg  # type: ignore
+    from psycopg import sql  # type: ignore
+except ImportError:  # pragma: no cover - depends on runtime env
+    psycopg = None
+    sql = None
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[str, dict[str, Any]], Awaitable[None]]
+
+DEFAULT_CHANNEL = "v360_agui"
+DEFAULT_BATCH_WINDOW_MS = 20
+DEFAULT_MAX_BATCH = 200
+# Postgres rejects NOTIFY payloads of 8000 bytes or more; leave room for the wrapper.
+NOTIFY_PAYLOAD_LIMIT = 7800
+DEFAULT_SPILL_TTL_SECONDS = 300
+DEFAULT_SEEN_IDS = 4096
+RECONNECT_DELAY_SECONDS = (0.5, 1.0, 2.0, 5.0)
+_CHANNEL_RE = re.compile(r"^[a-z_][a-z0-9_]{0,62}$")
+
+
+class BroadcastTransport(Protocol):
+    async def start(self, deliver: Deliver) -> None: ...
+
+    def send(self, event_type: str, payload: dict[str, Any]) -> None: ...
+
+    async def aclose(self) -> None: ...
+
+    def stats(self) -> dict[str, Any]: ...
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+class PostgresNotifyTransport:
+    """Fan events out to the other workers through ``LISTEN/NOTIFY``."""
+
+    def __init__(
+        self,
+        conninfo: str,
+        *,
+        channel: str = DEFAULT_CHANNEL,
+        batch_window_ms: int = DEFAULT_BATCH_WINDOW_MS,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        payload_limit: int = NOTIFY_PAYLOAD_LIMIT,
+        spill_ttl_seconds: int = DEFAULT_SPILL_TTL_SECONDS,
+        seen_ids: int = DEFAULT_SEEN_IDS,
+        origin: str | None = None,
+    ) -> None:
+        if not _CHANNEL_RE.match(channel):
+            raise ValueError(f"invalid NOTIFY channel: {channel!r}")
+        if conninfo.startswith("postgresql+psycopg://"):
+            conninfo = "postgresql://" + conninfo[len("postgresql+psycopg://") :]
+        self.conninfo = conninfo
+        self.channel = channel
+        self.window_seconds = max(0, int(batch_window_ms)) / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        self.payload_limit = max(256, min(int(payload_limit), NOTIFY_PAYLOAD_LIMIT))
+        self.spill_ttl_seconds = max(1, int(spill_ttl_seconds))
+        self.origin = origin or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._deliver: Deliver | None = None
+        self._listen_conn: Any | None = None
+        self._notify_conn: Any | None = None
+        self._listener: asyncio.Task[None] | None = None
+        self._flusher: asyncio.Task[None] | None = None
+        self._inflight: set[asyncio.Task[int]] = set()
+        # Flushes share ``_notify_conn``; one transaction at a time on it.
+        self._flush_lock = asyncio.Lock()
+        self._pending: list[dict[str, Any]] = []
+        self._seq = 0
+        self._seen: OrderedDict[tuple[str, int], None] = OrderedDict()
+        self._max_seen = max(1, int(seen_ids))
+        self._closing = False
+        self._counters = {
+            "sent_events": 0,
+            "notifications": 0,
+            "spilled": 0,
+            "received_events": 0,
+            "duplicates": 0,
+            "send_errors": 0,
+            "dropped": 0,
+            "reconnects": 0,
+        }
+
+    # --- lifecycle -----------------------------------------------------------
+
+    async def start(self, deliver: Deliver) -> None:
+        if psycopg is None:
+            raise RuntimeError(
+                "psycopg is required for the postgres SSE transport. Install with: uv add psycopg[binary]"
+            )
+        self._deliver = deliver
+        self._closing = False
+        self._flush_lock = asyncio.Lock()
+        await self._connect()
+        self._listener = asyncio.get_running_loop().create_task(self._listen_forever())
+        logger.info("AGUI_TRANSPORT_STARTED channel=%s origin=%s", self.channel, self.origin)
+
+    async def _connect(self) -> None:
+        self._listen_conn = await psycopg.AsyncConnection.connect(self.conninfo, autocommit=True)
+        self._notify_conn = await psycopg.AsyncConnection.connect(self.conninfo, autocommit=True)
+        await self._notify_conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS agui_event_spill (
+                id bigserial PRIMARY KEY,
+                body text NOT NULL,
+                created_at timestamptz NOT NULL DEFAULT now()
+            )
+            """
+        )
+        await self._listen_conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+
+    async def _close_connections(self) -> None:
+        for conn in (self._listen_conn, self._notify_conn):
+            if conn is not None:
+                try:
+                    await conn.close()
+                except Exception:  # noqa: BLE001 - already broken
+                    pass
+        self._listen_conn = None
+        self._notify_conn = None
+
+    async def aclose(self) -> None:
+        """Flush what is buffered, stop listening and close both connections."""
+        self._closing = True
+        # Let a flush already in progress finish; cancelling it would lose its batch.
+        pending = [task for task in (self._flusher, *self._inflight) if task is not None and not task.done()]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        await self.flush()
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+        self._listener = None
+        await self._close_connections()
+
+    # --- sending -------------------------------------------------------------
+
+    def send(self, event_type: str, payload: dict[str, Any]) -> None:
+        """Buffer an event for the next ``NOTIFY`` batch; never waits on the database."""
+        self._seq += 1
+        self._pending.append({"i": self._seq, "n": event_type, "p": payload})
+        loop = asyncio.get_running_loop()
+        if len(self._pending) >= self.max_batch:
+            task = loop.create_task(self.flush())
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+        elif self._flusher is None or self._flusher.done() or self._flusher.get_loop() is not loop:
+            self._flusher = loop.create_task(self._flush_after(self.window_seconds))
+
+    async def _flush_after(self, delay: float) -> None:
+        # Events sent while a batch is in flight see this timer still running and
+        # schedule nothing, so keep going until the buffer drains. After a failed
+        # send stop: the listener's reconnect (or the next send) flushes again.
+        while True:
+            await asyncio.sleep(delay)
+            errors = self._counters["send_errors"]
+            await self.flush()
+            if not self._pending or self._closing or self._counters["send_errors"] != errors:
+                return
+
+    async def flush(self) -> int:
+        """Send everything buffered; returns how many notifications went out."""
+        async with self._flush_lock:
+            return await self._send_pending()
+
+    async def _send_pending(self) -> int:
+        if not self._pending or self._notify_conn is None:
+            return 0
+        batch, self._pending = self._pending, []
+        try:
+            notifications = await self._encode(batch)
+            async with self._notify_conn.transaction():
+                for body in notifications:
+                    await self._notify_conn.execute("SELECT pg_notify(%s, %s)", (self.channel, body))
+        except Exception as exc:  # noqa: BLE001 - keep the batch for the next attempt
+            self._counters["send_errors"] += 1
+            # Put it back in front; receivers drop whatever already went out.
+            # While Postgres is down keep only the newest events.
+            self._pending[:0] = batch
+            overflow = len(self._pending) - self.max_batch * 10
+            if overflow > 0:
+                del self._pending[:overflow]
+                self._counters["dropped"] += overflow
+            logger.warning("AGUI_TRANSPORT_SEND_FAILED events=%s error=%s", len(batch), exc)
+            return 0
+        self._counters["sent_events"] += len(batch)
+        self._counters["notifications"] += len(notifications)
+        metrics.observe("agui.transport.batch_size", len(batch))
+        return len(notifications)
+
+    async def _encode(self, batch: list[dict[str, Any]]) -> list[str]:
+        """Pack events into notification bodies under ``payload_limit`` bytes."""
+        wrapper = len(_dumps({"o": self.origin, "e": []}).encode())
+        bodies: list[str] = []
+        chunk: list[str] = []
+        size = wrapper
+        for event in batch:
+            encoded = _dumps(event)
+            if wrapper + len(encoded.encode()) > self.payload_limit:
+                spill_id = await self._spill(encoded)
+                self._counters["spilled"] += 1
+                encoded = _dumps({"i": event["i"], "s": spill_id})
+            encoded_size = len(encoded.encode()) + 1
+            if chunk and size + encoded_size > self.payload_limit:
+                bodies.append(self._wrap(chunk))
+                chunk, size = [], wrapper
+            chunk.append(encoded)
+            size += encoded_size
+        if chunk:
+            bodies.append(self._wrap(chunk))
+        return bodies
+
+    def _wrap(self, encoded_events: list[str]) -> str:
+        return '{"o":' + _dumps(self.origin) + ',"e":[' + ",".join(encoded_events) + "]}"
+
+    async def _spill(self, body: str) -> int:
+        conn = self._notify_conn
+        await conn.execute(
+            "DELETE FROM agui_event_spill WHERE created_at < now() - make_interval(secs => %s)",
+            (float(self.spill_ttl_seconds),),
+        )
+        cursor = await conn.execute("INSERT INTO agui_event_spill (body) VALUES (%s) RETURNING id", (body,))
+        row = await cursor.fetchone()
+        return int(row[0])
+
+    # --- receiving -----------------------------------------------------------
+
+    async def _listen_forever(self) -> None:
+        attempt = 0
+        while not self._closing:
+            try:
+                async for notify in self._listen_conn.notifies():
+                    attempt = 0
+                    await self.handle_notification(notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001 - reconnect and keep serving
+                if self._closing:
+                    return
+                delay = RECONNECT_DELAY_SECONDS[min(attempt, len(RECONNECT_DELAY_SECONDS) - 1)]
+                attempt += 1
+                self._counters["reconnects"] += 1
+                logger.warning("AGUI_TRANSPORT_LISTEN_FAILED retry_in=%.1fs error=%s", delay, exc)
+                await self._close_connections()
+                await asyncio.sleep(delay)
+                try:
+                    await self._connect()
+                except Exception as connect_exc:  # noqa: BLE001
+                    logger.warning("AGUI_TRANSPORT_RECONNECT_FAILED error=%s", connect_exc)
+                    continue
+                await self.flush()
+
+    async def handle_notification(self, body: str) -> int:
+        """Deliver the events of one notification locally; returns how many were new."""
+        try:
+            message = json.loads(body)
+            origin = str(message["o"])
+            events = list(message["e"])
+        except (ValueError, KeyError, TypeError) as exc:
+            logger.warning("AGUI_TRANSPORT_BAD_NOTIFY error=%s", exc)
+            return 0
+        if origin == self.origin:
+            return 0
+        delivered = 0
+        for event in events:
+            key = (origin, int(event.get("i") or 0))
+            if key in self._seen:
+                self._counters["duplicates"] += 1
+                continue
+            self._remember(key)
+            if "s" in event:
+                try:
+                    event = json.loads(await self._fetch_spill(int(event["s"])))
+                except Exception as exc:  # noqa: BLE001 - expired or unreachable spill row
+                    logger.warning("AGUI_TRANSPORT_SPILL_MISSING id=%s error=%s", event.get("s"), exc)
+                    continue
+            self._counters["received_events"] += 1
+            delivered += 1
+            if self._deliver is not None:
+                await self._deliver(str(event["n"]), event["p"])
+        return delivered
+
+    def _remember(self, key: tuple[str, int]) -> None:
+        self._seen[key] = None
+        while len(self._seen) > self._max_seen:
+            self._seen.popitem(last=False)
+
+    async def _fetch_spill(self, spill_id: int) -> str:
+        cursor = await self._notify_conn.execute("SELECT body FROM agui_event_spill WHERE id = %s", (spill_id,))
+        row = await cursor.fetchone()
+        if row is None:
+            raise LookupError(spill_id)
+        return str(row[0])
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "kind": "postgres",
+            "channel": self.channel,
+            "origin": self.origin,
+            "connected": self._listen_conn is not None,
+            "buffered": len(self._pending),
+            **self._counters,
+        }
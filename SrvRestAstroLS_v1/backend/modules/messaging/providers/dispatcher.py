@@ -0,0 +1,346 @@
+"""Outbound send dispatcher: per-line rate limits, retries and circuit breaking.
+
+Every outbound WhatsApp send goes through ``outbound_dispatcher.dispatch``:
+
+* a token bucket per ``inbound_line_key`` smooths bursts to the provider's
+  per-number throughput (waiting sends are reported as ``queued``);
+* sends rejected with 429/5xx, or that never reached the provider (connect
+  errors), are retried with full-jitter exponential backoff. Timeouts after
+  the request was sent are *not* retried, since the message may have gone out;
+* a circuit breaker per provider fails sends fast after repeated provider-side
+  failures, so an outage does not pile up in-flight requests.
+
+``on_pending`` lets callers persist that a send is waiting (e.g. in
+``messages.provider_status``) before the final result is known.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, TypeVar
+
+import httpx
+
+from backend import globalVar
+from backend.telemetry import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+PendingHook = Callable[[str, int], Awaitable[None] | None]
+
+DEFAULT_RATE_PER_SECOND = {"gupshup": 20, "meta": 80}
+DEFAULT_BURST = 10
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BACKOFF_BASE_MS = 250
+DEFAULT_BACKOFF_MAX_MS = 4000
+DEFAULT_MAX_QUEUE_WAIT_SECONDS = 30
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_COOLDOWN_SECONDS = 30
+# Line buckets idle for this long are dropped so the table stays bounded.
+BUCKET_IDLE_SECONDS = 600
+
+
+class OutboundSendError(RuntimeError):
+    """Raised by the dispatcher itself (the provider was not called)."""
+
+
+class CircuitOpenError(OutboundSendError):
+    def __init__(self, provider: str, retry_in_seconds: float) -> None:
+        super().__init__(f"{provider} circuit open (retry in {retry_in_seconds:.1f}s)")
+        self.provider = provider
+        self.retry_in_seconds = retry_in_seconds
+
+
+class SendQueueTimeout(OutboundSendError):
+    def __init__(self, line_key: str, wait_seconds: float) -> None:
+        super().__init__(f"send queue for {line_key} is {wait_seconds:.1f}s deep")
+        self.line_key = line_key
+        self.wait_seconds = wait_seconds
+
+
+def retry_reason(exc: BaseException) -> str | None:
+    """Why ``exc`` is safe to retry, or ``None`` when it is not."""
+    for candidate in (exc, exc.__cause__):
+        if candidate is None:
+            continue
+        if isinstance(candidate, (httpx.ConnectError, httpx.ConnectTimeout)):
+            return "connect"
+        status = getattr(candidate, "upstream_status", None) or getattr(candidate, "status_code", None)
+        if isinstance(status, int) and (status == 429 or status >= 500):
+            return f"http_{status}"
+    return None
+
+
+class TokenBucket:
+    """Reservation-based bucket: callers are told how long to wait for their token."""
+
+    def __init__(self, rate_per_second: float, burst: int, now: float) -> None:
+        self.rate = max(0.001, float(rate_per_second))
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.updated_at = now
+
+    def reserve(self, now: float) -> float:
+        self.tokens = min(float(self.burst), self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.tokens -= 1.0
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def release(self) -> None:
+        self.tokens = min(float(self.burst), self.tokens + 1.0)
+
+
+@dataclass(slots=True)
+class CircuitBreaker:
+    threshold: int
+    cooldown_seconds: float
+    state: str = "closed"
+    failures: int = 0
+    opened_at: float = 0.0
+    probing: bool = False
+    opens: int = 0
+
+    def check(self, now: float) -> float:
+        """Seconds until a send may be attempted (0 when allowed); does not claim the probe."""
+        if self.state == "closed":
+            return 0.0
+        remaining = self.opened_at + self.cooldown_seconds - now
+        if remaining > 0:
+            return remaining
+        if self.probing:
+            return self.cooldown_seconds
+        return 0.0
+
+    def begin_probe(self, now: float) -> float:
+        """Claim the single half-open probe; same return value as ``check``."""
+        retry_in = self.check(now)
+        if retry_in > 0 or self.state == "closed":
+            return retry_in
+        self.state = "half_open"
+        self.probing = True
+        return 0.0
+
+    def abandon_probe(self) -> None:
+        """The probe ended without an answer (cancelled): let the next caller probe."""
+        if self.probing:
+            self.state = "open"
+            self.probing = False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self.probing = False
+
+    def record_failure(self, now: float) -> bool:
+        """Count a provider-side failure; returns True when the breaker opens."""
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.threshold:
+            opened = self.state != "open"
+            self.state = "open"
+            self.opened_at = now
+            self.probing = False
+            if opened:
+                self.opens += 1
+            return opened
+        return False
+
+
+class OutboundDispatcher:
+    def __init__(
+        self,
+        *,
+        rate_per_second: dict[str, float] | None = None,
+        burst: int = DEFAULT_BURST,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        backoff_base_ms: float = DEFAULT_BACKOFF_BASE_MS,
+        backoff_max_ms: float = DEFAULT_BACKOFF_MAX_MS,
+        max_queue_wait_seconds: float = DEFAULT_MAX_QUEUE_WAIT_SECONDS,
+        breaker_threshold: int = DEFAULT_BREAKER_THRESHOLD,
+        breaker_cooldown_seconds: float = DEFAULT_BREAKER_COOLDOWN_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+        rng: random.Random | None = None,
+    ) -> None:
+        self.rate_per_second = dict(rate_per_second or DEFAULT_RATE_PER_SECOND)
+        self.burst = max(1, int(burst))
+        self.max_attempts = max(1, int(max_attempts))
+        self.backoff_base_ms = float(backoff_base_ms)
+        self.backoff_max_ms = float(backoff_max_ms)
+        self.max_queue_wait_seconds = float(max_queue_wait_seconds)
+        self.breaker_threshold = max(1, int(breaker_threshold))
+        self.breaker_cooldown_seconds = float(breaker_cooldown_seconds)
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self._buckets: dict[str, TokenBucket] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._counters: dict[str, dict[str, int]] = {}
+
+    def _count(self, provider: str, field: str) -> None:
+        row = self._counters.get(provider)
+        if row is None:
+            row = {"sent": 0, "failed": 0, "retried": 0, "queued": 0, "rejected_open": 0, "rejected_queue": 0}
+            self._counters[provider] = row
+        row[field] += 1
+
+    def _breaker(self, provider: str) -> CircuitBreaker:
+        breaker = self._breakers.get(provider)
+        if breaker is None:
+            breaker = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown_seconds)
+            self._breakers[provider] = breaker
+        return breaker
+
+    def _bucket(self, provider: str, line_key: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(line_key)
+        if bucket is None:
+            if len(self._buckets) > 1024:
+                self._drop_idle_buckets(now)
+            rate = self.rate_per_second.get(provider) or DEFAULT_RATE_PER_SECOND.get(provider, 10)
+            bucket = TokenBucket(rate, self.burst, now)
+            self._buckets[line_key] = bucket
+        return bucket
+
+    def _drop_idle_buckets(self, now: float) -> None:
+        for key in [key for key, bucket in self._buckets.items() if now - bucket.updated_at > BUCKET_IDLE_SECONDS]:
+            del self._buckets[key]
+
+    def backoff_seconds(self, attempt: int) -> float:
+        ceiling = min(self.backoff_max_ms, self.backoff_base_ms * (2 ** max(0, attempt - 1)))
+        return self._rng.uniform(0, ceiling) / 1000.0
+
+    async def _notify(self, on_pending: PendingHook | None, status: str, attempt: int) -> None:
+        if on_pending is None:
+            return
+        try:
+            result = on_pending(status, attempt)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as exc:  # noqa: BLE001 - bookkeeping must not fail the send
+            logger.warning("OUTBOUND_PENDING_HOOK_FAILED status=%s attempt=%s error=%s", status, attempt, exc)
+
+    async def _take_token(self, provider: str, line_key: str, attempt: int, on_pending: PendingHook | None) -> None:
+        bucket = self._bucket(provider, line_key, self._clock())
+        wait = bucket.reserve(self._clock())
+        if wait <= 0:
+            return
+        if wait > self.max_queue_wait_seconds:
+            bucket.release()
+            self._count(provider, "rejected_queue")
+            raise SendQueueTimeout(line_key, wait)
+        self._count(provider, "queued")
+        metrics.observe("outbound.queue_wait_ms", wait * 1000.0, {"provider": provider})
+        await self._notify(on_pending, "queued", attempt)
+        await self._sleep(wait)
+
+    def _circuit_open(self, provider: str, retry_in: float) -> CircuitOpenError:
+        self._count(provider, "rejected_open")
+        metrics.inc("outbound.circuit_open", {"provider": provider})
+        return CircuitOpenError(provider, retry_in)
+
+    async def dispatch(
+        self,
+        provider: str,
+        line_key: str | None,
+        send: Callable[[], Awaitable[T]],
+        *,
+        on_pending: PendingHook | None = None,
+    ) -> T:
+        """Run ``send`` under the line's rate limit and the provider's breaker.
+
+        Returns ``send``'s result; re-raises its last exception, or raises an
+        ``OutboundSendError`` when the dispatcher refused to call the provider.
+        """
+        line_key = line_key or f"{provider}:default"
+        breaker = self._breaker(provider)
+        attempt = 1
+        while True:
+            retry_in = breaker.check(self._clock())
+            if retry_in > 0:
+                raise self._circuit_open(provider, retry_in)
+            # Queue for the token before claiming the probe, so a queue timeout
+            # or a cancelled wait never leaves the breaker stuck half-open.
+            await self._take_token(provider, line_key, attempt, on_pending)
+            retry_in = breaker.begin_probe(self._clock())
+            if retry_in > 0:
+                self._bucket(provider, line_key, self._clock()).release()
+                raise self._circuit_open(provider, retry_in)
+            try:
+                result = await send()
+            except Exception as exc:
+                reason = retry_reason(exc)
+                if reason is None:
+                    # The provider answered (e.g. 4xx): it is healthy, the request is not.
+                    if breaker.state == "half_open":
+                        breaker.record_success()
+                    self._count(provider, "failed")
+                    raise
+                if breaker.record_failure(self._clock()):
+                    logger.warning("OUTBOUND_CIRCUIT_OPEN provider=%s reason=%s", provider, reason)
+                if attempt >= self.max_attempts or breaker.state == "open":
+                    self._count(provider, "failed")
+                    raise
+                self._count(provider, "retried")
+                metrics.inc("outbound.retry", {"provider": provider, "reason": reason})
+                await self._notify(on_pending, "retrying", attempt)
+                await self._sleep(self.backoff_seconds(attempt))
+                attempt += 1
+                continue
+            except BaseException:
+                breaker.abandon_probe()
+                raise
+            breaker.record_success()
+            self._count(provider, "sent")
+            return result
+
+    def reset(self) -> None:
+        self._buckets.clear()
+        self._breakers.clear()
+        self._counters.clear()
+
+    def stats(self) -> dict[str, Any]:
+        now = self._clock()
+        return {
+            "lines": len(self._buckets),
+            "max_attempts": self.max_attempts,
+            "rate_per_second": dict(self.rate_per_second),
+            "burst": self.burst,
+            "providers": {
+                provider: {
+                    **self._counters.get(provider, {}),
+                    "circuit": breaker.state,
+                    "consecutive_failures": breaker.failures,
+                    "opens": breaker.opens,
+                    "retry_in_seconds": round(max(0.0, breaker.opened_at + breaker.cooldown_seconds - now), 3)
+                    if breaker.state == "open"
+                    else 0.0,
+                }
+                for provider, breaker in self._breakers.items()
+            },
+        }
+
+
+outbound_dispatcher = OutboundDispatcher(
+    rate_per_second={
+        "gupshup": globalVar.get_env_int(
+            "V360_GUPSHUP_SEND_RATE_PER_SECOND", DEFAULT_RATE_PER_SECOND["gupshup"], minimum=1
+        ),
+        "meta": globalVar.get_env_int("V360_META_SEND_RATE_PER_SECOND", DEFAULT_RATE_PER_SECOND["meta"], minimum=1),
+    },
+    burst=globalVar.get_env_int("V360_OUTBOUND_BURST", DEFAULT_BURST, minimum=1),
+    max_attempts=globalVar.get_env_int("V360_OUTBOUND_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS, minimum=1),
+    backoff_base_ms=globalVar.get_env_int("V360_OUTBOUND_BACKOFF_BASE_MS", DEFAULT_BACKOFF_BASE_MS, minimum=1),
+    backoff_max_ms=globalVar.get_env_int("V360_OUTBOUND_BACKOFF_MAX_MS", DEFAULT_BACKOFF_MAX_MS, minimum=1),
+    max_queue_wait_seconds=globalVar.get_env_int(
+        "V360_OUTBOUND_MAX_QUEUE_WAIT_SECONDS", DEFAULT_MAX_QUEUE_WAIT_SECONDS, minimum=1
+    ),
+    breaker_threshold=globalVar.get_env_int("V360_OUTBOUND_BREAKER_THRESHOLD", DEFAULT_BREAKER_THRESHOLD, minimum=1),
+    breaker_cooldown_seconds=globalVar.get_env_int(
+        "V360_OUTBOUND_BREAKER_COOLDOWN_SECONDS", DEFAULT_BREAKER_COOLDOWN_SECONDS, minimum=1
+    ),
+)
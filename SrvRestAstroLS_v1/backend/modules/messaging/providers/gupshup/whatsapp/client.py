@@ -10,6 +10,9 @@ from typing import Any
 
 import httpx
 import globalVar
+
+from ...http_pool import get_provider_client, get_provider_pool, record_send_latency
+
 MESSAGE_PATH = "/wa/api/v1/msg"
 MAX_ERROR_BODY_CHARS = 2000
 logger = logging.getLogger(__name__)
@@ -66,33 +69,37 @@ class GupshupWhatsAppClient:
             "src.name": self._config.app_name,
         }
 
-        async def _post(http_client: httpx.AsyncClient) -> dict[str, Any]:
-            started_at = time.perf_counter()
-            response = await http_client.post(url, data=_encode_payload(payload), headers=headers, timeout=15.0)
-            duration_ms = int((time.perf_counter() - started_at) * 1000)
-            logger.info(
-                "GUPSHUP_HTTP_SEND sender=%s source=%s url=%s status=%s duration_ms=%s",
-                self._config.sender_e164 or "-",
-                self._config.source_number or "-",
+        http_client = self._client or get_provider_client("gupshup")
+        started_at = time.perf_counter()
+        try:
+            response = await http_client.post(
                 url,
-                response.status_code,
-                duration_ms,
+                data=_encode_payload(payload),
+                headers=headers,
+                timeout=get_provider_pool("gupshup").timeout,
+            )
+        except httpx.HTTPError:
+            record_send_latency("gupshup", started_at, "error")
+            raise
+        duration_ms = int(record_send_latency("gupshup", started_at, response.status_code))
+        logger.info(
+            "GUPSHUP_HTTP_SEND sender=%s source=%s url=%s status=%s duration_ms=%s",
+            self._config.sender_e164 or "-",
+            self._config.source_number or "-",
+            url,
+            response.status_code,
+            duration_ms,
+        )
+        if response.status_code >= 400:
+            raise GupshupHTTPError(
+                status_code=response.status_code,
+                response_text=_truncate_error_text(response.text),
+                url=str(response.request.url),
             )
-            if response.status_code >= 400:
-                raise GupshupHTTPError(
-                    status_code=response.status_code,
-                    response_text=_truncate_error_text(response.text),
-                    url=str(response.request.url),
-                )
-            try:
-                return response.json()
-            except ValueError:
-                return {"raw": response.text}
-
-        if self._client is None:
-            async with httpx.AsyncClient() as http_client:
-                return await _post(http_client)
-        return await _post(self._client)
+        try:
+            return response.json()
+        except ValueError:
+            return {"raw": response.text}
 
 
 def _join_url(base: str, path: str) -> str:
@@ -36,7 +36,7 @@ _NON_STATUS_TYPES = {
 }
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class NormalizedInbound:
     provider: str
     service: str
@@ -49,7 +49,7 @@ class NormalizedInbound:
     raw: dict[str, Any]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class NormalizedStatus:
     provider: str
     service: str
@@ -63,139 +63,146 @@ def parse_inbound(payload: dict[str, Any]) -> list[NormalizedInbound]:
     messages = _collect_messages(payload)
     if not messages and _looks_like_message(payload):
         messages = [payload]
-
-    results: list[NormalizedInbound] = []
-    for message in messages:
-        payload_level_1 = message.get("payload") if isinstance(message.get("payload"), dict) else {}
-        payload_level_2 = (
-            payload_level_1.get("payload") if isinstance(payload_level_1.get("payload"), dict) else {}
-        )
-        wa_id = _first_non_empty(
-            message.get("wa_id"),
-            message.get("from"),
-            message.get("sender"),
-            message.get("source"),
-            payload_level_1.get("wa_id"),
-            payload_level_1.get("from"),
-            payload_level_1.get("sender"),
-            payload_level_1.get("source"),
-        )
-        from_Candidate = _first_non_empty(
-            message.get("from"),
-            message.get("sender"),
-            message.get("source"),
-            payload_level_1.get("from"),
-            payload_level_1.get("sender"),
-            payload_level_1.get("source"),
-            wa_id,
-        )
-        # Fix for Gupshup v2 where sender is a dict {"phone": "...", ...}
-        if isinstance(from_Candidate, dict):
-            from_ = str(from_Candidate.get("phone") or from_Candidate.get("from") or "")
-        else:
-            from_ = from_Candidate
-        to = _first_non_empty(
-            message.get("to"),
-            message.get("destination"),
-            message.get("dest"),
-            message.get("recipient"),
-            payload_level_1.get("to"),
-            payload_level_1.get("destination"),
-            payload_level_1.get("dest"),
-            payload_level_1.get("recipient"),
-        )
-        text = _extract_text(message)
-        timestamp = _first_non_empty(
-            message.get("timestamp"),
-            message.get("time"),
-            message.get("ts"),
-            payload_level_1.get("timestamp"),
-            payload_level_1.get("time"),
-            payload_level_1.get("ts"),
-        )
-        message_id = _first_non_empty(
-            message.get("message_id"),
-            message.get("messageId"),
-            message.get("id"),
-            message.get("mid"),
-            payload_level_1.get("message_id"),
-            payload_level_1.get("messageId"),
-            payload_level_1.get("id"),
-            payload_level_1.get("mid"),
-            payload_level_2.get("message_id"),
-            payload_level_2.get("messageId"),
-            payload_level_2.get("id"),
-            payload_level_2.get("mid"),
-        )
-        results.append(
-            NormalizedInbound(
-                provider="gupshup",
-                service="whatsapp",
-                wa_id=_as_str(wa_id),
-                from_=_as_str(from_),
-                to=_as_str(to),
-                text=_as_str(text),
-                timestamp=timestamp,
-                message_id=_as_str(message_id),
-                raw=message,
-            )
-        )
-    return results
+    return [_build_inbound(message) for message in messages]
 
 
 def parse_status(payload: dict[str, Any]) -> list[NormalizedStatus]:
     statuses = _collect_statuses(payload)
     if not statuses and _looks_like_status(payload):
         statuses = [payload]
+    return [item for item in map(_build_status, statuses) if item is not None]
 
-    results: list[NormalizedStatus] = []
-    for status in statuses:
-        status_payload = status.get("payload") if isinstance(status.get("payload"), dict) else {}
-        message_id = _first_non_empty(
-            status.get("gsId"),
-            status.get("message_id"),
-            status.get("messageId"),
-            status.get("id"),
-            status.get("mid"),
-            status_payload.get("gsId"),
-            status_payload.get("message_id"),
-            status_payload.get("messageId"),
-            status_payload.get("id"),
-            status_payload.get("whatsappMessageId"),
-        )
-        raw_status = _first_non_empty(
-            status.get("status"),
-            status.get("state"),
-            status.get("event"),
-            status.get("type"),
-            status_payload.get("status"),
-            status_payload.get("state"),
-            status_payload.get("event"),
-            status_payload.get("type"),
-        )
-        normalized_status = _normalize_status(_as_str(raw_status))
-        # Wrapper events such as "message-event" are transport markers, not delivery states.
-        if normalized_status == "message-event":
-            continue
-        timestamp = _first_non_empty(
-            status.get("timestamp"),
-            status.get("time"),
-            status.get("ts"),
-            status_payload.get("timestamp"),
-            status_payload.get("time"),
-            status_payload.get("ts"),
-        )
-        results.append(
-            NormalizedStatus(
-                provider="gupshup",
-                service="whatsapp",
-                message_id=_as_str(message_id),
-                status=normalized_status,
-                timestamp=timestamp,
-                raw=status,
-            )
-        )
-    return results
+
+def parse_events(payload: dict[str, Any]) -> tuple[list[NormalizedInbound], list[NormalizedStatus]]:
+    """``(parse_inbound(payload), parse_status(payload))`` from a single walk of the tree."""
+    messages, statuses = _collect_messages_and_statuses(payload)
+    if not messages and _looks_like_message(payload):
+        messages = [payload]
+    if not statuses and _looks_like_status(payload):
+        statuses = [payload]
+    inbound = [_build_inbound(message) for message in messages]
+    return inbound, [item for item in map(_build_status, statuses) if item is not None]
+
+
+def _build_inbound(message: dict[str, Any]) -> NormalizedInbound:
+    payload_level_1 = message.get("payload") if isinstance(message.get("payload"), dict) else {}
+    payload_level_2 = (
+        payload_level_1.get("payload") if isinstance(payload_level_1.get("payload"), dict) else {}
+    )
+    wa_id = _first_non_empty(
+        message.get("wa_id"),
+        message.get("from"),
+        message.get("sender"),
+        message.get("source"),
+        payload_level_1.get("wa_id"),
+        payload_level_1.get("from"),
+        payload_level_1.get("sender"),
+        payload_level_1.get("source"),
+    )
+    from_Candidate = _first_non_empty(
+        message.get("from"),
+        message.get("sender"),
+        message.get("source"),
+        payload_level_1.get("from"),
+        payload_level_1.get("sender"),
+        payload_level_1.get("source"),
+        wa_id,
+    )
+    # Fix for Gupshup v2 where sender is a dict {"phone": "...", ...}
+    if isinstance(from_Candidate, dict):
+        from_ = str(from_Candidate.get("phone") or from_Candidate.get("from") or "")
+    else:
+        from_ = from_Candidate
+    to = _first_non_empty(
+        message.get("to"),
+        message.get("destination"),
+        message.get("dest"),
+        message.get("recipient"),
+        payload_level_1.get("to"),
+        payload_level_1.get("destination"),
+        payload_level_1.get("dest"),
+        payload_level_1.get("recipient"),
+    )
+    text = _extract_text(message)
+    timestamp = _first_non_empty(
+        message.get("timestamp"),
+        message.get("time"),
+        message.get("ts"),
+        payload_level_1.get("timestamp"),
+        payload_level_1.get("time"),
+        payload_level_1.get("ts"),
+    )
+    message_id = _first_non_empty(
+        message.get("message_id"),
+        message.get("messageId"),
+        message.get("id"),
+        message.get("mid"),
+        payload_level_1.get("message_id"),
+        payload_level_1.get("messageId"),
+        payload_level_1.get("id"),
+        payload_level_1.get("mid"),
+        payload_level_2.get("message_id"),
+        payload_level_2.get("messageId"),
+        payload_level_2.get("id"),
+        payload_level_2.get("mid"),
+    )
+    return NormalizedInbound(
+        provider="gupshup",
+        service="whatsapp",
+        wa_id=_as_str(wa_id),
+        from_=_as_str(from_),
+        to=_as_str(to),
+        text=_as_str(text),
+        timestamp=timestamp,
+        message_id=_as_str(message_id),
+        raw=message,
+    )
+
+
+def _build_status(status: dict[str, Any]) -> NormalizedStatus | None:
+    status_payload = status.get("payload") if isinstance(status.get("payload"), dict) else {}
+    message_id = _first_non_empty(
+        status.get("gsId"),
+        status.get("message_id"),
+        status.get("messageId"),
+        status.get("id"),
+        status.get("mid"),
+        status_payload.get("gsId"),
+        status_payload.get("message_id"),
+        status_payload.get("messageId"),
+        status_payload.get("id"),
+        status_payload.get("whatsappMessageId"),
+    )
+    raw_status = _first_non_empty(
+        status.get("status"),
+        status.get("state"),
+        status.get("event"),
+        status.get("type"),
+        status_payload.get("status"),
+        status_payload.get("state"),
+        status_payload.get("event"),
+        status_payload.get("type"),
+    )
+    normalized_status = _normalize_status(_as_str(raw_status))
+    # Wrapper events such as "message-event" are transport markers, not delivery states.
+    if normalized_status == "message-event":
+        return None
+    timestamp = _first_non_empty(
+        status.get("timestamp"),
+        status.get("time"),
+        status.get("ts"),
+        status_payload.get("timestamp"),
+        status_payload.get("time"),
+        status_payload.get("ts"),
+    )
+    return NormalizedStatus(
+        provider="gupshup",
+        service="whatsapp",
+        message_id=_as_str(message_id),
+        status=normalized_status,
+        timestamp=timestamp,
+        raw=status,
+    )
 
 
 def build_text_payload(to: str, text: str) -> dict[str, Any]:
@@ -221,6 +228,21 @@ def _collect_statuses(payload: Any) -> list[dict[str, Any]]:
     )
 
 
+def _classify_message_or_status(node: dict[str, Any]) -> tuple[bool, bool]:
+    # _looks_like_message() already evaluates _looks_like_status(); do it once per node.
+    is_status = _looks_like_status(node)
+    return (not is_status and _has_message_shape(node)), is_status
+
+
+def _collect_messages_and_statuses(payload: Any) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    messages, statuses = _collect_many(
+        payload,
+        (("messages", "message"), ("statuses", "status")),
+        _classify_message_or_status,
+    )
+    return messages, statuses
+
+
 def _collect_items(
     payload: Any,
     *,
@@ -228,15 +250,28 @@ def _collect_items(
     single_key: str,
     looks_like: Callable[[dict[str, Any]], bool] | None = None,
 ) -> list[dict[str, Any]]:
-    items: list[dict[str, Any]] = []
-    seen: set[int] = set()
+    classify = (lambda node: (looks_like(node),)) if looks_like is not None else None
+    return _collect_many(payload, ((item_key, single_key),), classify)[0]
+
 
-    def _append(item: dict[str, Any]) -> None:
+def _collect_many(
+    payload: Any,
+    keys: tuple[tuple[str, str], ...],
+    classify: Callable[[dict[str, Any]], tuple[bool, ...]] | None = None,
+) -> list[list[dict[str, Any]]]:
+    """Walk ``payload`` once, collecting items for every ``(item_key, single_key)`` pair.
+
+    ``classify(node)`` returns one flag per pair saying whether ``node`` itself is such an item.
+    """
+    buckets: list[list[dict[str, Any]]] = [[] for _ in keys]
+    seen: list[set[int]] = [set() for _ in keys]
+
+    def _append(index: int, item: dict[str, Any]) -> None:
         item_id = id(item)
-        if item_id in seen:
+        if item_id in seen[index]:
             return
-        seen.add(item_id)
-        items.append(item)
+        seen[index].add(item_id)
+        buckets[index].append(item)
 
     def _walk(node: Any) -> None:
         if isinstance(node, list):
@@ -245,27 +280,34 @@ def _collect_items(
             return
         if not isinstance(node, dict):
             return
-        if item_key in node and isinstance(node[item_key], list):
-            for item in node[item_key]:
-                if isinstance(item, dict):
-                    _append(item)
-        if single_key in node and isinstance(node[single_key], dict):
-            _append(node[single_key])
+        for index, (item_key, single_key) in enumerate(keys):
+            if item_key in node and isinstance(node[item_key], list):
+                for item in node[item_key]:
+                    if isinstance(item, dict):
+                        _append(index, item)
+            if single_key in node and isinstance(node[single_key], dict):
+                _append(index, node[single_key])
         if "payload" in node:
             _walk(node.get("payload"))
         if "data" in node and isinstance(node["data"], list):
             for item in node["data"]:
                 _walk(item)
-        if looks_like is not None and looks_like(node):
-            _append(node)
+        if classify is not None:
+            for index, matched in enumerate(classify(node)):
+                if matched:
+                    _append(index, node)
 
     _walk(payload)
-    return items
+    return buckets
 
 
 def _looks_like_message(payload: dict[str, Any]) -> bool:
     if _looks_like_status(payload):
         return False
+    return _has_message_shape(payload)
+
+
+def _has_message_shape(payload: dict[str, Any]) -> bool:
     has_sender = any(key in payload for key in ("from", "sender", "source", "wa_id"))
     has_content = any(key in payload for key in ("text", "message"))
     
@@ -0,0 +1,147 @@
+"""Long-lived pooled HTTP clients for outbound provider sends.
+
+Each provider (Gupshup, Meta) gets one ``httpx.AsyncClient`` per event loop
+with explicit connection limits, keep-alive and timeouts, so consecutive sends
+reuse DNS/TCP/TLS instead of paying setup per message. The app opens the pools
+on startup and closes them on shutdown; a pool first used on a new loop (tests,
+scripts) is rebuilt transparently. HTTP/2 is used when ``V360_PROVIDER_HTTP2``
+is set and the ``h2`` package is installed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+import httpx
+
+from backend import globalVar
+from backend.services.stale_clients import close_stale_client
+from backend.telemetry import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_CONNECTIONS = 10
+DEFAULT_KEEPALIVE_EXPIRY_SECONDS = 30
+
+try:
+    import h2  # type: ignore  # noqa: F401
+except ImportError:  # pragma: no cover - optional dependency
+    HTTP2_AVAILABLE = False
+else:  # pragma: no cover - depends on installed lib
+    HTTP2_AVAILABLE = True
+
+
+class ProviderHTTPPool:
+    def __init__(
+        self,
+        provider: str,
+        *,
+        timeout_seconds: float,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        keepalive_connections: int = DEFAULT_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry_seconds: float = DEFAULT_KEEPALIVE_EXPIRY_SECONDS,
+        http2: bool = False,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.provider = provider
+        self.timeout = float(timeout_seconds)
+        self.limits = httpx.Limits(
+            max_connections=max(1, int(max_connections)),
+            max_keepalive_connections=max(0, int(keepalive_connections)),
+            keepalive_expiry=float(keepalive_expiry_seconds),
+        )
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("PROVIDER_HTTP2_UNAVAILABLE provider=%s (install httpx[http2])", provider)
+        self.http2 = bool(http2 and HTTP2_AVAILABLE)
+        self.transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.created = 0
+
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is loop and not self._client.is_closed:
+            return self._client
+        # Connections opened on another loop are unusable here; close them and pool afresh.
+        if self._client is not None and not self._client.is_closed:
+            close_stale_client(self._client.aclose, self._loop, kind=f"provider:{self.provider}")
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout, limits=self.limits, http2=self.http2, transport=self.transport
+        )
+        self._loop = loop
+        self.created += 1
+        return self._client
+
+    async def aclose(self) -> None:
+        client, self._client, self._loop = self._client, None, None
+        if client is not None and not client.is_closed:
+            await client.aclose()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "provider": self.provider,
+            "open": self._client is not None and not self._client.is_closed,
+            "http2": self.http2,
+            "timeout_seconds": self.timeout,
+            "max_connections": self.limits.max_connections,
+            "keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry_seconds": self.limits.keepalive_expiry,
+            "created": self.created,
+        }
+
+
+def _pool_from_env(provider: str, default_timeout_seconds: int) -> ProviderHTTPPool:
+    prefix = f"V360_{provider.upper()}"
+    return ProviderHTTPPool(
+        provider,
+        timeout_seconds=globalVar.get_env_int(f"{prefix}_TIMEOUT_SECONDS", default_timeout_seconds, minimum=1),
+        max_connections=globalVar.get_env_int(
+            "V360_PROVIDER_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS, minimum=1
+        ),
+        keepalive_connections=globalVar.get_env_int(
+            "V360_PROVIDER_KEEPALIVE_CONNECTIONS", DEFAULT_KEEPALIVE_CONNECTIONS, minimum=0
+        ),
+        keepalive_expiry_seconds=globalVar.get_env_int(
+            "V360_PROVIDER_KEEPALIVE_EXPIRY_SECONDS", DEFAULT_KEEPALIVE_EXPIRY_SECONDS, minimum=1
+        ),
+        http2=globalVar.get_env_bool("V360_PROVIDER_HTTP2", False),
+    )
+
+
+provider_pools: dict[str, ProviderHTTPPool] = {
+    "gupshup": _pool_from_env("gupshup", 15),
+    "meta": _pool_from_env("meta", 20),
+}
+
+
+def get_provider_pool(provider: str) -> ProviderHTTPPool:
+    return provider_pools[provider]
+
+
+def get_provider_client(provider: str) -> httpx.AsyncClient:
+    return provider_pools[provider].client()
+
+
+def record_send_latency(provider: str, started_at: float, status: int | str) -> float:
+    """Observe ``messaging.send_ms`` for one provider call; returns elapsed ms."""
+    elapsed_ms = (time.perf_counter() - started_at) * 1000.0
+    metrics.observe("messaging.send_ms", elapsed_ms, {"provider": provider, "status": str(status)})
+    return elapsed_ms
+
+
+async def open_provider_clients() -> None:
+    for pool in provider_pools.values():
+        pool.client()
+
+
+async def close_provider_clients() -> None:
+    for pool in provider_pools.values():
+        await pool.aclose()
+
+
+def provider_http_stats() -> dict[str, Any]:
+    return {name: pool.stats() for name, pool in provider_pools.items()}
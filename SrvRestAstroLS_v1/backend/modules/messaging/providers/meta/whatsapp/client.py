@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 import logging
+import time
 import uuid
 from typing import Any
 
 import httpx
 import globalVar
 
+from ...http_pool import get_provider_client, get_provider_pool, record_send_latency
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,29 +34,30 @@ async def post_message(payload: dict[str, Any], *, client: httpx.AsyncClient | N
         "Content-Type": "application/json",
     }
     
-    async def _post(http_client: httpx.AsyncClient) -> dict[str, Any]:
-        response = await http_client.post(url, json=payload, headers=headers, timeout=20.0)
-
-        if response.status_code >= 400:
-            try:
-                err = response.json()
-            except ValueError:
-                err = {"raw": response.text}
-            logger.error(
-                "Meta WhatsApp send failed phone_number_id=%s to=%s status_code=%s err=%s",
-                globalVar.META_VERTICE360_PHONE_NUMBER_ID,
-                payload.get("to"),
-                response.status_code,
-                err,
-            )
-            raise MetaWhatsAppSendError(response.status_code, err)
-
-        return response.json()
-
-    if client is None:
-        async with httpx.AsyncClient() as http_client:
-            return await _post(http_client)
-    return await _post(client)
+    http_client = client or get_provider_client("meta")
+    started_at = time.perf_counter()
+    try:
+        response = await http_client.post(url, json=payload, headers=headers, timeout=get_provider_pool("meta").timeout)
+    except httpx.HTTPError:
+        record_send_latency("meta", started_at, "error")
+        raise
+    record_send_latency("meta", started_at, response.status_code)
+
+    if response.status_code >= 400:
+        try:
+            err = response.json()
+        except ValueError:
+            err = {"raw": response.text}
+        logger.error(
+            "Meta WhatsApp send failed phone_number_id=%s to=%s status_code=%s err=%s",
+            globalVar.META_VERTICE360_PHONE_NUMBER_ID,
+            payload.get("to"),
+            response.status_code,
+            err,
+        )
+        raise MetaWhatsAppSendError(response.status_code, err)
+
+    return response.json()
 
 
 async def send_message(to: str, text: str) -> dict[str, Any]:
@@ -1,8 +1,31 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from typing import Any, Iterable
 
 
+@dataclass(frozen=True, slots=True)
+class MetaStatus:
+    wa_id: str | None
+    message_id: str | None
+    status: str | None
+    timestamp: str | int | None
+    phone_number_id: str | None
+    raw: dict[str, Any]
+
+    def as_dict(self) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "wa_id": self.wa_id,
+            "message_id": self.message_id,
+            "status": self.status,
+            "timestamp": self.timestamp,
+            "phone_number_id": self.phone_number_id,
+        }
+        if self.raw:
+            data["raw"] = self.raw
+        return data
+
+
 def normalize_wa_to(to: str) -> str:
     normalized = str(to or "").strip()
     if normalized.startswith("+"):
@@ -27,48 +50,54 @@ def waid_to_graph_to(wa_id: str) -> str:
 
 
 def extract_inbound_messages(payload: dict[str, Any]) -> list[dict[str, Any]]:
-    messages: list[dict[str, Any]] = []
-    for value in _iter_change_values(payload):
-        metadata = _extract_metadata(value)
-        contacts = _extract_contact_wa_ids(value)
-        for message in value.get("messages", []) or []:
-            if not isinstance(message, dict):
-                continue
-            wa_id = message.get("from") or message.get("wa_id") or _first_contact(contacts)
-            to = metadata.get("phone_number_id") or metadata.get("display_phone_number")
-            data: dict[str, Any] = {
-                "wa_id": wa_id,
-                "from": message.get("from") or wa_id,
-                "to": to,
-                "text": _extract_text(message),
-                "timestamp": message.get("timestamp"),
-                "message_id": message.get("id"),
-                "media_count": _count_media(message),
-            }
-            raw = _message_raw(message)
-            if raw:
-                data["raw"] = raw
-            messages.append(data)
-    return messages
+    return extract_events(payload)[0]
 
 
 def extract_status_updates(payload: dict[str, Any]) -> list[dict[str, Any]]:
-    statuses: list[dict[str, Any]] = []
+    return [status.as_dict() for status in extract_events(payload)[1]]
+
+
+def extract_events(payload: dict[str, Any]) -> tuple[list[dict[str, Any]], list[MetaStatus]]:
+    """Inbound messages and status updates from one pass over ``entry[].changes[].value``."""
+    messages: list[dict[str, Any]] = []
+    statuses: list[MetaStatus] = []
     for value in _iter_change_values(payload):
-        for status in value.get("statuses", []) or []:
+        metadata = _extract_metadata(value)
+        raw_messages = value.get("messages") or []
+        if raw_messages:
+            contacts = _extract_contact_wa_ids(value)
+            to = metadata.get("phone_number_id") or metadata.get("display_phone_number")
+            for message in raw_messages:
+                if not isinstance(message, dict):
+                    continue
+                wa_id = message.get("from") or message.get("wa_id") or _first_contact(contacts)
+                data: dict[str, Any] = {
+                    "wa_id": wa_id,
+                    "from": message.get("from") or wa_id,
+                    "to": to,
+                    "text": _extract_text(message),
+                    "timestamp": message.get("timestamp"),
+                    "message_id": message.get("id"),
+                    "media_count": _count_media(message),
+                }
+                raw = _message_raw(message)
+                if raw:
+                    data["raw"] = raw
+                messages.append(data)
+        for status in value.get("statuses") or []:
             if not isinstance(status, dict):
                 continue
-            data: dict[str, Any] = {
-                "wa_id": status.get("recipient_id"),
-                "message_id": status.get("id"),
-                "status": status.get("status"),
-                "timestamp": status.get("timestamp"),
-            }
-            raw = _status_raw(status)
-            if raw:
-                data["raw"] = raw
-            statuses.append(data)
-    return statuses
+            statuses.append(
+                MetaStatus(
+                    wa_id=status.get("recipient_id"),
+                    message_id=status.get("id"),
+                    status=status.get("status"),
+                    timestamp=status.get("timestamp"),
+                    phone_number_id=metadata.get("phone_number_id"),
+                    raw=_status_raw(status),
+                )
+            )
+    return messages, statuses
 
 
 def _iter_change_values(payload: dict[str, Any]) -> Iterable[dict[str, Any]]:
@@ -0,0 +1,95 @@
+"""Single-pass decoding of provider webhook bodies into typed structs.
+
+The raw request ``bytes`` are parsed once (``orjson`` when installed, else the
+stdlib parser straight from bytes, without an intermediate ``str``) and the
+provider mappers walk the tree once, so every downstream step of the webhook
+handler reads the same frozen, slotted struct instead of re-walking dicts.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from .gupshup.whatsapp.mapper import NormalizedInbound, NormalizedStatus, parse_events, parse_status
+from .meta.whatsapp.mapper import MetaStatus, extract_events
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class WebhookDecodeError(ValueError):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class GupshupWebhook:
+    event_type: str
+    app: str | None
+    payload_type: str
+    inbound_text: str
+    inbound: tuple[NormalizedInbound, ...]
+    statuses: tuple[NormalizedStatus, ...]
+    payload: dict[str, Any]
+
+
+@dataclass(frozen=True, slots=True)
+class MetaWebhook:
+    inbound: tuple[dict[str, Any], ...]
+    statuses: tuple[MetaStatus, ...]
+    payload: dict[str, Any]
+
+
+def loads_body(raw: bytes) -> dict[str, Any]:
+    try:
+        payload = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    except ValueError as exc:  # JSONDecodeError, orjson.JSONDecodeError and UnicodeDecodeError
+        raise WebhookDecodeError("Invalid JSON") from exc
+    if not isinstance(payload, dict):
+        raise WebhookDecodeError("Webhook body must be a JSON object")
+    return payload
+
+
+def _gupshup_inbound_text(body: dict[str, Any], payload_type: str) -> str:
+    if payload_type != "text":
+        return ""
+    nested = body.get("payload")
+    if isinstance(nested, dict):
+        text = nested.get("text") or nested.get("body")
+    else:
+        text = body.get("text") or body.get("body")
+    return str(text or "").strip()
+
+
+def decode_gupshup_webhook(raw: bytes) -> GupshupWebhook:
+    """Decode a Gupshup callback; only the parts its event type needs are mapped."""
+    payload = loads_body(raw)
+    event_type = str(payload.get("type") or "").strip().lower()
+    body = payload.get("payload") if isinstance(payload.get("payload"), dict) else {}
+    payload_type = str(body.get("type") or "").strip().lower()
+    inbound_text = _gupshup_inbound_text(body, payload_type) if event_type == "message" else ""
+    inbound: tuple[NormalizedInbound, ...] = ()
+    statuses: tuple[NormalizedStatus, ...] = ()
+    if event_type == "message-event":
+        statuses = tuple(parse_status(payload))
+    elif inbound_text:
+        messages, status_items = parse_events(payload)
+        inbound, statuses = tuple(messages), tuple(status_items)
+    return GupshupWebhook(
+        event_type=event_type,
+        app=str(payload.get("app") or "").strip() or None,
+        payload_type=payload_type,
+        inbound_text=inbound_text,
+        inbound=inbound,
+        statuses=statuses,
+        payload=payload,
+    )
+
+
+def decode_meta_webhook(raw: bytes) -> MetaWebhook:
+    payload = loads_body(raw)
+    messages, statuses = extract_events(payload)
+    return MetaWebhook(inbound=tuple(messages), statuses=tuple(statuses), payload=payload)
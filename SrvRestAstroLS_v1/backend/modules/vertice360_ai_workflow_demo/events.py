@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import asyncio
 import datetime as dt
+import logging
 from typing import Any
 
 from backend.modules.agui_stream import broadcaster
 
+logger = logging.getLogger(__name__)
+
 
 RUN_STARTED = "ai_workflow.run.started"
 RUN_STEP = "ai_workflow.run.step"
@@ -76,6 +80,80 @@ async def emit_run_step(
     await emit_event(RUN_STEP, run_id, value)
 
 
+class StepEmitter:
+    """Publishes a run's step events from a background task, in submit order.
+
+    Nodes only append to a list; the drain task picks up everything queued
+    since its last pass, so graph nodes never wait on SSE fan-out.
+    """
+
+    def __init__(self, run_id: str) -> None:
+        self.run_id = run_id
+        self.batches = 0
+        self.emitted = 0
+        self._pending: list[tuple[str, str, int, int, str, dict[str, Any] | None]] = []
+        self._task: asyncio.Task[None] | None = None
+
+    def submit(
+        self,
+        node_id: str,
+        status: str,
+        started_at: int,
+        ended_at: int,
+        summary: str,
+        data: dict[str, Any] | None = None,
+    ) -> None:
+        self._pending.append((node_id, status, started_at, ended_at, summary, data))
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._drain())
+
+    async def _drain(self) -> None:
+        while self._pending:
+            batch, self._pending = self._pending, []
+            self.batches += 1
+            for item in batch:
+                try:
+                    await emit_run_step(self.run_id, *item)
+                    self.emitted += 1
+                except Exception as exc:  # noqa: BLE001 - events must not fail the run
+                    logger.warning("AI_WORKFLOW_STEP_EMIT_FAILED runId=%s error=%s", self.run_id, exc)
+
+    async def flush(self) -> None:
+        while self._task is not None and not self._task.done():
+            await self._task
+
+
+_step_emitters: dict[str, StepEmitter] = {}
+
+
+def queue_run_step(
+    run_id: str,
+    node_id: str,
+    status: str,
+    started_at: int,
+    ended_at: int,
+    summary: str,
+    data: dict[str, Any] | None = None,
+) -> None:
+    run_id = _normalize_run_id(run_id)
+    emitter = _step_emitters.get(run_id)
+    if emitter is None:
+        emitter = _step_emitters[run_id] = StepEmitter(run_id)
+    emitter.submit(node_id, status, started_at, ended_at, summary, data)
+
+
+async def flush_run_steps(run_id: str) -> StepEmitter | None:
+    """Wait until every queued step of ``run_id`` is published, then forget the run."""
+    emitter = _step_emitters.get(run_id)
+    if emitter is None:
+        return None
+    try:
+        await emitter.flush()
+    finally:
+        _step_emitters.pop(run_id, None)
+    return emitter
+
+
 async def emit_run_completed(run_id: str, output: dict[str, Any], ended_at: int) -> None:
     run_id = _normalize_run_id(run_id)
     value = {"runId": run_id, "output": output, "endedAt": ended_at}
@@ -3,6 +3,8 @@ from __future__ import annotations
 import datetime as dt
 import re
 import unicodedata
+from contextvars import ContextVar
+from time import perf_counter
 from typing import Any, TypedDict
 
 from langgraph.graph import END, StateGraph
@@ -16,11 +18,18 @@ from backend.modules.vertice360_ai_workflow_demo import (
     templates,
 )
 from backend.modules.vertice360_workflow_demo import commercial_memory
+from backend.services.llm_client import llm_client
 
 
 WORKFLOW_ID = "vertice360-ai-workflow"
 WORKFLOW_NAME = "AI Workflow Studio"
 WORKFLOW_DESCRIPTION = "Deterministic demo workflow with step-by-step execution."
+# Set by batch evaluation: steps and node latencies go to this dict instead
+# of the run store, and no SSE events are emitted.
+detached_run: ContextVar[dict[str, Any] | None] = ContextVar(
+    "ai_workflow_detached_run", default=None
+)
+
 WORKFLOW_NODES = [
     "normalize_input",
     "intent_classify",
@@ -245,14 +254,9 @@ def _build_template_next_best_question(missing_slots: list[str]) -> str:
     return "Que dato adicional podes compartir para avanzar?"
 
 
-def _build_openai_next_best_question(
+async def _build_openai_next_best_question(
     missing_slots: list[str],
 ) -> tuple[str, str | None]:
-    try:
-        from openai import OpenAI
-    except Exception:
-        return "", None
-
     ordered_missing = [
         slot for slot in COMMERCIAL_SLOT_PRIORITY if slot in missing_slots
     ]
@@ -272,23 +276,24 @@ def _build_openai_next_best_question(
         "Responde solo con la pregunta, sin comillas."
     )
 
-    client = OpenAI(api_key=globalVar.OpenAI_Key)
-    response = client.chat.completions.create(
-        model=globalVar.OpenAI_Model or "gpt-4o-mini",
-        messages=[
+    result = await llm_client.chat(
+        [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ],
         temperature=0,
         max_tokens=60,
+        purpose="ai_workflow.next_best_question",
+        cache=True,
     )
-    if not response.choices:
-        return "", response.model
-    content = response.choices[0].message.content or ""
-    return _sanitize_question(content), response.model
+    if not result.content:
+        return "", result.model
+    return _sanitize_question(result.content), result.model
 
 
-def _build_next_best_question(missing_slots: list[str]) -> tuple[str, bool, str | None]:
+async def _build_next_best_question(
+    missing_slots: list[str],
+) -> tuple[str, bool, str | None]:
     ordered_missing = [
         slot for slot in COMMERCIAL_SLOT_PRIORITY if slot in missing_slots
     ]
@@ -298,7 +303,7 @@ def _build_next_best_question(missing_slots: list[str]) -> tuple[str, bool, str
     if not _allow_ai_question():
         return template_question, False, None
     try:
-        question, model = _build_openai_next_best_question(
+        question, model = await _build_openai_next_best_question(
             ordered_missing or missing_slots
         )
     except Exception:
@@ -649,7 +654,7 @@ def _build_event_data(
     return event_data
 
 
-async def _record_step(
+def _record_step(
     run_id: str,
     node_id: str,
     status: str,
@@ -669,12 +674,16 @@ async def _record_step(
         "summary": summary,
         "data": data or {},
     }
+    detached = detached_run.get()
+    if detached is not None:
+        detached["steps"].append(step)
+        return
     store.add_step(run_id, step)
     emit_summary = _shorten_text(summary)
     emit_data = _build_event_data(
         state or {}, event_data if event_data is not None else data
     )
-    await events.emit_run_step(
+    events.queue_run_step(
         run_id, node_id, status, started_at, ended_at, emit_summary, emit_data
     )
 
@@ -705,7 +714,7 @@ async def normalize_input(state: AiWorkflowState) -> dict[str, Any]:
         summary = f"normalized length={len(clean_input)}"
         data = {"cleanInput": clean_input, "normalizedInput": normalized}
         ended_at = _epoch_ms()
-        await _record_step(
+        _record_step(
             run_id,
             "normalize_input",
             "completed",
@@ -723,7 +732,7 @@ async def normalize_input(state: AiWorkflowState) -> dict[str, Any]:
         }
     except Exception as exc:
         ended_at = _epoch_ms()
-        await _record_step(
+        _record_step(
             run_id,
             "normalize_input",
             "failed",
@@ -783,7 +792,7 @@ async def intent_classify(state: AiWorkflowState) -> dict[str, Any]:
 
         summary = f"primary={primary_intent} intents={len(scored)}"
         ended_at = _epoch_ms()
-        await _record_step(
+        _record_step(
             run_id,
             "intent_classify",
             "completed",
@@ -805,7 +814,7 @@ async def intent_classify(state: AiWorkflowState) -> dict[str, Any]:
         }
     except Exception as exc:
         ended_at = _epoch_ms()
-        await _record_step(
+        _record_step(
             run_id,
             "intent_classify",
             "failed",
@@ -882,7 +891,7 @@ async def extract_entities(state: AiWorkflowState) -> dict[str, Any]:
             summary += " +visit"
 
         ended_at = _epoch_ms()
-        await _record_step(
+        _record_step(
             run_id,
             "extract_entities",
             "completed",
@@ -895,7 +904,7 @@ async def extract_entities(state: AiWorkflowState) -> dict[str, Any]:
         return {"entities": entities}
     except Exception as exc:
         ended_at = _epoch_ms()
-        await _record_step(
+        _record_step(
             run_id,
             "extract_entities",
             "failed",
@@ -1083,7 +1092,7 @@ async def pragmatics(state: AiWorkflowState) -> dict[str, Any]:
             state["recommended_question"] = recommended_questions[0]
 
         ended_at = _epoch_ms()
-        await _record_step(
+        _record_step(
             run_id,
             "pragmatics",
             "completed",
@@ -1101,7 +1110,7 @@ async def pragmatics(state: AiWorkflowState) -> dict[str, Any]:
         }
     except Exception as exc:
         ended_at = _epoch_ms()
-        await _record_step(
+        _record_step(
             run_id,
             "pragmatics",
             "failed",
@@ -1207,7 +1216,7 @@ async def decide_next(state: AiWorkflowState) -> dict[str, Any]:
             step_data["optionsCount"] = len(options)
         if missing_slots_count > 0:
             step_data["missingSlotsCount"] = missing_slots_count
-        await _record_step(
+        _record_step(
             run_id,
             "decide_next",
             "completed",
@@ -1249,7 +1258,7 @@ async def decide_next(state: AiWorkflowState) -> dict[str, Any]:
         return payload
     except Exception as exc:
         ended_at = _epoch_ms()
-        await _record_step(
+        _record_step(
             run_id,
             "decide_next",
             "failed",
@@ -1285,20 +1294,21 @@ async def build_response(state: AiWorkflowState) -> dict[str, Any]:
                     "ticket_id": state.get("ticket_id"),
                     "provider": _normalize_provider(state.get("provider")),
                 }
-            await events.emit_human_action_required(
-                run_id,
-                reason=str(
-                    human_action_required.get("reason") or SCHEDULE_VISIT_REASON
-                ),
-                summary=human_action_required.get("summary")
-                or _build_schedule_visit_summary(comm_slots),
-                suggested_next_message=str(
-                    human_action_required.get("suggested_next_message")
-                    or SCHEDULE_VISIT_SUGGESTED_NEXT_MESSAGE
-                ),
-                ticket_id=human_action_required.get("ticket_id"),
-                provider=human_action_required.get("provider"),
-            )
+            if detached_run.get() is None:
+                await events.emit_human_action_required(
+                    run_id,
+                    reason=str(
+                        human_action_required.get("reason") or SCHEDULE_VISIT_REASON
+                    ),
+                    summary=human_action_required.get("summary")
+                    or _build_schedule_visit_summary(comm_slots),
+                    suggested_next_message=str(
+                        human_action_required.get("suggested_next_message")
+                        or SCHEDULE_VISIT_SUGGESTED_NEXT_MESSAGE
+                    ),
+                    ticket_id=human_action_required.get("ticket_id"),
+                    provider=human_action_required.get("provider"),
+                )
         elif decision == "ask_next_best_question":
             response_text = (
                 state.get("recommended_question")
@@ -1350,7 +1360,7 @@ async def build_response(state: AiWorkflowState) -> dict[str, Any]:
 
         summary = f"response len={len(response_text)}"
         ended_at = _epoch_ms()
-        await _record_step(
+        _record_step(
             run_id,
             "build_response",
             "completed",
@@ -1368,7 +1378,7 @@ async def build_response(state: AiWorkflowState) -> dict[str, Any]:
         return payload
     except Exception as exc:
         ended_at = _epoch_ms()
-        await _record_step(
+        _record_step(
             run_id,
             "build_response",
             "failed",
@@ -1381,19 +1391,42 @@ async def build_response(state: AiWorkflowState) -> dict[str, Any]:
         raise
 
 
+def _timed(node_id: str, node: Any) -> Any:
+    async def run(state: AiWorkflowState) -> dict[str, Any]:
+        started = perf_counter()
+        try:
+            return await node(state)
+        finally:
+            elapsed_ms = (perf_counter() - started) * 1000.0
+            detached = detached_run.get()
+            if detached is not None:
+                detached["nodeLatencyMs"][node_id] = round(elapsed_ms, 3)
+            elif state.get("run_id"):
+                store.record_node_latency(state["run_id"], node_id, elapsed_ms)
+
+    run.__name__ = node_id
+    return run
+
+
 def build_graph() -> Any:
     graph = StateGraph(AiWorkflowState)
-    graph.add_node("normalize_input", normalize_input)
-    graph.add_node("intent_classify", intent_classify)
-    graph.add_node("extract_entities", extract_entities)
-    graph.add_node("pragmatics", pragmatics)
-    graph.add_node("decide_next", decide_next)
-    graph.add_node("build_response", build_response)
-
+    for node_id, node in (
+        ("normalize_input", normalize_input),
+        ("intent_classify", intent_classify),
+        ("extract_entities", extract_entities),
+        ("pragmatics", pragmatics),
+        ("decide_next", decide_next),
+        ("build_response", build_response),
+    ):
+        graph.add_node(node_id, _timed(node_id, node))
+
+    # intent_classify and extract_entities only read what normalize_input
+    # produced and write disjoint keys, so they run in the same superstep and
+    # pragmatics waits for both.
     graph.set_entry_point("normalize_input")
     graph.add_edge("normalize_input", "intent_classify")
-    graph.add_edge("intent_classify", "extract_entities")
-    graph.add_edge("extract_entities", "pragmatics")
+    graph.add_edge("normalize_input", "extract_entities")
+    graph.add_edge(["intent_classify", "extract_entities"], "pragmatics")
     graph.add_edge("pragmatics", "decide_next")
     graph.add_edge("decide_next", "build_response")
     graph.add_edge("build_response", END)
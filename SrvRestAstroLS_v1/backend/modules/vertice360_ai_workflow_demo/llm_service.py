@@ -6,11 +6,12 @@ from typing import Any
 
 from backend import globalVar
 from backend.modules.vertice360_ai_workflow_demo import llm_prompts
+from backend.services.llm_client import LLMStream, llm_client
 
 _UNIT_CODE_PATTERN = re.compile(r"\b\d{1,2}[A-Z]\b")
 
 
-def generate_human_reply(
+async def generate_human_reply(
     *,
     user_text: str,
     nlu: dict[str, Any],
@@ -19,7 +20,6 @@ def generate_human_reply(
     max_chars: int,
 ) -> dict[str, Any]:
     resolved_max = _resolve_max_chars(max_chars)
-    allowed_codes = _extract_option_codes(options)
 
     if not globalVar.OpenAI_Key:
         return _fallback(
@@ -31,7 +31,7 @@ def generate_human_reply(
 
     model = globalVar.OpenAI_Model or "gpt-4o-mini"
     try:
-        response_text = _call_openai(
+        response_text = await _call_openai(
             user_text=user_text,
             nlu=nlu,
             options=options,
@@ -47,6 +47,48 @@ def generate_human_reply(
             max_chars=resolved_max,
         )
 
+    return finalize_human_reply(
+        response_text,
+        options=options,
+        missing_slots=missing_slots,
+        max_chars=resolved_max,
+        model=model,
+    )
+
+
+def stream_human_reply(
+    *,
+    user_text: str,
+    nlu: dict[str, Any],
+    options: dict[str, Any] | None,
+    missing_slots: dict[str, Any],
+    max_chars: int,
+) -> LLMStream | None:
+    """Open a token stream for the reply, or None when only the fallback applies.
+
+    The assembled text must go through ``finalize_human_reply`` before it is
+    stored or sent, exactly like ``generate_human_reply`` output.
+    """
+    if not globalVar.OpenAI_Key:
+        return None
+    return llm_client.stream(
+        _build_messages(user_text=user_text, nlu=nlu, options=options, missing_slots=missing_slots),
+        model=globalVar.OpenAI_Model or "gpt-4o-mini",
+        temperature=0.4,
+        max_tokens=max(64, int(_resolve_max_chars(max_chars) / 4)),
+        purpose="ai_workflow.human_reply",
+    )
+
+
+def finalize_human_reply(
+    response_text: str,
+    *,
+    options: dict[str, Any] | None,
+    missing_slots: dict[str, Any],
+    max_chars: int,
+    model: str | None,
+) -> dict[str, Any]:
+    resolved_max = _resolve_max_chars(max_chars)
     response_text = _normalize_text(response_text)
     response_text = _truncate(response_text, resolved_max)
     if not response_text:
@@ -57,7 +99,7 @@ def generate_human_reply(
             max_chars=resolved_max,
         )
 
-    if _mentions_unknown_unit_code(response_text, allowed_codes):
+    if _mentions_unknown_unit_code(response_text, _extract_option_codes(options)):
         return _fallback(
             reason="unknown_unit_code",
             options=options,
@@ -73,7 +115,22 @@ def generate_human_reply(
     }
 
 
-def _call_openai(
+def fallback_human_reply(
+    *,
+    reason: str,
+    options: dict[str, Any] | None,
+    missing_slots: dict[str, Any],
+    max_chars: int,
+) -> dict[str, Any]:
+    return _fallback(
+        reason=reason,
+        options=options,
+        missing_slots=missing_slots,
+        max_chars=_resolve_max_chars(max_chars),
+    )
+
+
+async def _call_openai(
     *,
     user_text: str,
     nlu: dict[str, Any],
@@ -82,13 +139,26 @@ def _call_openai(
     model: str,
     max_chars: int,
 ) -> str:
-    try:
-        from openai import OpenAI
-    except Exception as exc:  # pragma: no cover - depends on installed lib
-        raise RuntimeError("openai_not_available") from exc
+    messages = _build_messages(user_text=user_text, nlu=nlu, options=options, missing_slots=missing_slots)
+    max_tokens = max(64, int(max_chars / 4))
+    result = await llm_client.chat(
+        messages,
+        model=model,
+        temperature=0.4,
+        max_tokens=max_tokens,
+        purpose="ai_workflow.human_reply",
+    )
+    return result.content
 
-    client = OpenAI(api_key=globalVar.OpenAI_Key)
-    messages = [
+
+def _build_messages(
+    *,
+    user_text: str,
+    nlu: dict[str, Any],
+    options: dict[str, Any] | None,
+    missing_slots: dict[str, Any],
+) -> list[dict[str, str]]:
+    return [
         {"role": "system", "content": llm_prompts.system_prompt},
         {
             "role": "user",
@@ -100,17 +170,6 @@ def _call_openai(
             ),
         },
     ]
-    max_tokens = max(64, int(max_chars / 4))
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        temperature=0.4,
-        max_tokens=max_tokens,
-    )
-    if not response.choices:
-        return ""
-    content = response.choices[0].message.content
-    return content or ""
 
 
 def _build_user_prompt(
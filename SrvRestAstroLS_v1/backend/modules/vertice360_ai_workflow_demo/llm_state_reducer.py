@@ -7,6 +7,7 @@ from typing import Any
 from jsonschema import ValidationError, validate
 
 from backend import globalVar
+from backend.services.llm_client import llm_client
 
 logger = logging.getLogger(__name__)
 
@@ -84,7 +85,7 @@ def _parse_json(content: str) -> dict[str, Any] | None:
         return None
 
 
-def reduce_state(
+async def reduce_state(
     previous_state: dict[str, Any],
     new_message_text: str,
     last_messages: list[str] | None = None,
@@ -117,26 +118,21 @@ def reduce_state(
     )
 
     try:
-        from openai import OpenAI
-
-        client = OpenAI(api_key=globalVar.OpenAI_Key)
-        response = client.chat.completions.create(
-            model=globalVar.OpenAI_Model or "gpt-4o-mini",
-            messages=[
+        result = await llm_client.chat(
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
             temperature=0,
             max_tokens=300,
+            purpose="ai_workflow.state_reducer",
+            cache=True,
         )
     except Exception as exc:  # noqa: BLE001
         logger.warning("llm_state_reducer_failed=%s", type(exc).__name__)
         return None
 
-    if not response.choices:
-        return None
-
-    content = response.choices[0].message.content or ""
+    content = result.content
     payload = _parse_json(content)
     if payload is None:
         return None
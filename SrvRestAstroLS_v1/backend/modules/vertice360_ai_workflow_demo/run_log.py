@@ -0,0 +1,235 @@
+"""Durable log of AI workflow runs.
+
+Each run is written to a SQLite table when it starts and again when it reaches
+a terminal state (or gets a reply). Rows are indexed by run id, inbound message
+id, ticket id and start time, so history survives restarts and can be paged
+through long after the in-memory hot cache in ``store`` has evicted a run.
+Rows older than the retention window, and the oldest rows beyond a hard row
+cap, are deleted periodically.
+
+``V360_AI_RUN_LOG_PATH`` selects the file (default
+``data/ai_workflow_runs.sqlite3``); ``:memory:`` keeps the log in process memory,
+lost on restart but still bounded by the row cap.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable
+
+from backend import globalVar
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = "data/ai_workflow_runs.sqlite3"
+DEFAULT_RETENTION_DAYS = 7
+DEFAULT_MAX_ROWS = 50_000
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Expired rows are purged once every N writes.
+TRIM_EVERY = 256
+
+
+def encode_cursor(started_at: int, run_id: str) -> str:
+    return f"{int(started_at)}:{run_id}"
+
+
+def decode_cursor(cursor: str) -> tuple[int, str]:
+    started_at, _, run_id = str(cursor).partition(":")
+    if not run_id:
+        raise ValueError("invalid cursor")
+    try:
+        return int(started_at), run_id
+    except ValueError as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+class RunLog:
+    def __init__(
+        self,
+        path: str = ":memory:",
+        *,
+        retention_seconds: float = DEFAULT_RETENTION_DAYS * 86400,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = str(path)
+        self.retention_seconds = float(retention_seconds)
+        self.max_rows = max(1, int(max_rows))
+        self._clock = clock
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._lock = Lock()
+        self._writes = 0
+        self._errors = 0
+        self._purged = 0
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ai_workflow_runs (
+                    run_id TEXT PRIMARY KEY,
+                    workflow_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    started_at INTEGER NOT NULL,
+                    updated_at INTEGER NOT NULL,
+                    inbound_message_id TEXT,
+                    ticket_id TEXT,
+                    payload TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_ai_runs_started ON ai_workflow_runs (started_at DESC, run_id DESC)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_ai_runs_inbound ON ai_workflow_runs (inbound_message_id)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_ai_runs_ticket ON ai_workflow_runs (ticket_id, started_at DESC)"
+            )
+
+    def write(self, run: dict[str, Any]) -> None:
+        """Insert or replace ``run``; failures are logged, never raised."""
+        metadata = run.get("metadata") or {}
+        inbound_message_id = metadata.get("inboundMessageId")
+        ticket_id = metadata.get("ticketId")
+        try:
+            payload = json.dumps(run, ensure_ascii=False, default=str)
+            with self._lock:
+                self._conn.execute(
+                    """
+                    INSERT INTO ai_workflow_runs
+                        (run_id, workflow_id, status, started_at, updated_at, inbound_message_id, ticket_id, payload)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (run_id) DO UPDATE SET
+                        status = excluded.status, updated_at = excluded.updated_at, payload = excluded.payload
+                    """,
+                    (
+                        run["runId"],
+                        run.get("workflowId") or "",
+                        run.get("status") or "",
+                        int(run.get("startedAt") or 0),
+                        int(run.get("updatedAt") or 0),
+                        str(inbound_message_id) if inbound_message_id else None,
+                        str(ticket_id) if ticket_id else None,
+                        payload,
+                    ),
+                )
+                self._writes += 1
+                if self._writes % TRIM_EVERY == 0:
+                    self._purge(self._clock())
+        except Exception as exc:  # noqa: BLE001 - the log must never fail a run
+            self._errors += 1
+            logger.warning("AI_RUN_LOG_WRITE_FAILED run_id=%s error=%s", run.get("runId"), exc)
+
+    def get(self, run_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM ai_workflow_runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_by_inbound_message(self, inbound_message_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT payload FROM ai_workflow_runs WHERE inbound_message_id = ?
+                ORDER BY started_at DESC LIMIT 1
+                """,
+                (str(inbound_message_id),),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query(
+        self,
+        *,
+        limit: int = DEFAULT_PAGE_SIZE,
+        before: str | None = None,
+        status: str | None = None,
+        ticket_id: str | None = None,
+        workflow_id: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Newest-first page of runs; ``before`` is the cursor of the previous page's last row."""
+        clauses: list[str] = []
+        params: list[Any] = []
+        if before:
+            started_at, run_id = decode_cursor(before)
+            clauses.append("(started_at < ? OR (started_at = ? AND run_id < ?))")
+            params.extend((started_at, started_at, run_id))
+        if status:
+            clauses.append("status = ?")
+            params.append(status.upper())
+        if ticket_id:
+            clauses.append("ticket_id = ?")
+            params.append(str(ticket_id))
+        if workflow_id:
+            clauses.append("workflow_id = ?")
+            params.append(workflow_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(max(1, min(int(limit), MAX_PAGE_SIZE)))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT payload FROM ai_workflow_runs {where} ORDER BY started_at DESC, run_id DESC LIMIT ?",
+                params,
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def _purge(self, now: float) -> int:
+        cutoff_ms = int((now - self.retention_seconds) * 1000)
+        purged = self._conn.execute("DELETE FROM ai_workflow_runs WHERE started_at < ?", (cutoff_ms,)).rowcount or 0
+        purged += (
+            self._conn.execute(
+                """
+                DELETE FROM ai_workflow_runs WHERE run_id IN (
+                    SELECT run_id FROM ai_workflow_runs ORDER BY started_at DESC, run_id DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_rows,),
+            ).rowcount
+            or 0
+        )
+        self._purged += purged
+        return int(purged)
+
+    def purge(self, now: float | None = None) -> int:
+        with self._lock:
+            return self._purge(self._clock() if now is None else now)
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM ai_workflow_runs").fetchone()[0])
+
+    def reset(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM ai_workflow_runs")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "path": self.path,
+            "rows": self.count(),
+            "retention_seconds": self.retention_seconds,
+            "max_rows": self.max_rows,
+            "writes": self._writes,
+            "errors": self._errors,
+            "purged": self._purged,
+        }
+
+
+run_log = RunLog(
+    globalVar.get_env_str("V360_AI_RUN_LOG_PATH", "").strip() or DEFAULT_PATH,
+    retention_seconds=globalVar.get_env_int("V360_AI_RUN_LOG_RETENTION_DAYS", DEFAULT_RETENTION_DAYS, minimum=1)
+    * 86400,
+    max_rows=globalVar.get_env_int("V360_AI_RUN_LOG_MAX_ROWS", DEFAULT_MAX_ROWS, minimum=1),
+)
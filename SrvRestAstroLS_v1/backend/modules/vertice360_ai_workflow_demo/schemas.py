@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Literal
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
@@ -11,6 +11,26 @@ class RunRequest(BaseModel):
     mode: str | None = "heuristic"
 
 
+class BatchItem(BaseModel):
+    input: str = Field(..., min_length=1)
+    id: str | None = None
+    context: dict[str, Any] | None = None
+    metadata: dict[str, Any] | None = None
+
+
+class BatchRunRequest(BaseModel):
+    workflowId: str = Field(..., min_length=1)
+    inputs: list[str | BatchItem] = Field(..., min_length=1)
+    mode: str | None = "heuristic"
+    concurrency: int = Field(8, ge=1, le=64)
+    record: bool = False
+    includeResults: bool = True
+
+
+class ReplyStreamRequest(BaseModel):
+    maxChars: int = Field(240, ge=40, le=1000)
+
+
 class ResetRequest(BaseModel):
     reason: str | None = None
 
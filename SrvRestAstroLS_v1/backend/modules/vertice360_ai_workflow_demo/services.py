@@ -1,18 +1,30 @@
 from __future__ import annotations
 
+import asyncio
 import datetime as dt
-from typing import Any
+import time
+import uuid
+from collections import Counter
+from typing import Any, AsyncGenerator
 
-from backend.modules.vertice360_ai_workflow_demo import events, store
+from backend.modules.agui_stream import static_text_message, stream_text_message
+from backend.modules.vertice360_ai_workflow_demo import events, llm_service, store
 from backend import globalVar
+from backend.services.llm_client import LLMStream
 from backend.modules.vertice360_ai_workflow_demo.langgraph_flow import (
+    COMMERCIAL_SLOT_PRIORITY,
     WORKFLOW_ID,
+    WORKFLOW_NODES,
+    detached_run,
     workflow_definition,
     workflow_graph,
 )
 
 DEFAULT_MODE = "heuristic"
 ALLOWED_MODES = {"heuristic", "llm"}
+DEFAULT_BATCH_CONCURRENCY = 8
+MAX_BATCH_CONCURRENCY = 64
+MAX_BATCH_ITEMS = globalVar.get_env_int("V360_AI_WORKFLOW_BATCH_MAX_ITEMS", 5000, minimum=1)
 
 
 def _epoch_ms() -> int:
@@ -33,29 +45,14 @@ def llm_provider_configured() -> bool:
     return bool(globalVar.OpenAI_Key)
 
 
-async def run_workflow(
+def _build_state(
+    run_id: str,
     workflow_id: str,
     input_text: str,
-    mode: str | None = None,
-    metadata: dict[str, Any] | None = None,
-    context: dict[str, Any] | None = None,
+    mode: str | None,
+    metadata: dict[str, Any] | None,
+    context: dict[str, Any] | None,
 ) -> dict[str, Any]:
-    if workflow_id != WORKFLOW_ID:
-        raise ValueError("workflow not found")
-
-    resolved_mode = (mode or DEFAULT_MODE).strip().lower()
-    if resolved_mode not in ALLOWED_MODES:
-        raise ValueError("invalid mode")
-
-    run = store.create_run(workflow_id, input_text, resolved_mode, metadata=metadata)
-    run_id = run["runId"]
-    inbound_message_id = None
-    if metadata:
-        inbound_message_id = metadata.get("inboundMessageId") or metadata.get("wamid")
-    if inbound_message_id:
-        print(f"INFO: AI workflow run started from inbound wamid={inbound_message_id} runId={run_id}")
-    await events.emit_run_started(run_id, workflow_id, input_text, run["startedAt"])
-
     state = {
         "run_id": run_id,
         "workflow_id": workflow_id,
@@ -76,21 +73,17 @@ async def run_workflow(
         provider = context.get("provider")
         if provider:
             state["provider"] = str(provider)
-    try:
-        final_state = await workflow_graph.ainvoke(state)
-    except Exception as exc:
-        error_message = str(exc)
-        failed = store.fail_run(run_id, error_message)
-        await events.emit_run_failed(run_id, error_message, failed.get("endedAt") or _epoch_ms())
-        raise
+    return state
 
+
+def _build_output(final_state: dict[str, Any]) -> dict[str, Any]:
     primary_intent = final_state.get("primary_intent") or final_state.get("intent") or "general"
     used_fallback = bool(final_state.get("used_fallback") or not llm_provider_configured())
     fallback_reason = final_state.get("fallback_reason")
     if used_fallback and not fallback_reason and not llm_provider_configured():
         fallback_reason = "openai_key_missing"
 
-    output = {
+    return {
         "responseText": final_state.get("response_text"),
         "intent": primary_intent,
         "primaryIntent": primary_intent,
@@ -115,11 +108,196 @@ async def run_workflow(
         "handoffRequired": bool(final_state.get("handoff_required")),
         "humanActionRequired": final_state.get("human_action_required"),
     }
+
+
+async def run_workflow(
+    workflow_id: str,
+    input_text: str,
+    mode: str | None = None,
+    metadata: dict[str, Any] | None = None,
+    context: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    if workflow_id != WORKFLOW_ID:
+        raise ValueError("workflow not found")
+
+    resolved_mode = (mode or DEFAULT_MODE).strip().lower()
+    if resolved_mode not in ALLOWED_MODES:
+        raise ValueError("invalid mode")
+
+    run = store.create_run(workflow_id, input_text, resolved_mode, metadata=metadata)
+    run_id = run["runId"]
+    inbound_message_id = None
+    if metadata:
+        inbound_message_id = metadata.get("inboundMessageId") or metadata.get("wamid")
+    if inbound_message_id:
+        print(f"INFO: AI workflow run started from inbound wamid={inbound_message_id} runId={run_id}")
+    await events.emit_run_started(run_id, workflow_id, input_text, run["startedAt"])
+
+    state = _build_state(run_id, workflow_id, input_text, mode, metadata, context)
+    try:
+        final_state = await workflow_graph.ainvoke(state)
+    except Exception as exc:
+        await events.flush_run_steps(run_id)
+        error_message = str(exc)
+        failed = store.fail_run(run_id, error_message)
+        await events.emit_run_failed(run_id, error_message, failed.get("endedAt") or _epoch_ms())
+        raise
+
+    output = _build_output(final_state)
+    # Step events are published off the graph's critical path; make sure they
+    # all reach subscribers before the completion event.
+    await events.flush_run_steps(run_id)
     completed = store.complete_run(run_id, output)
     await events.emit_run_completed(run_id, output, completed.get("endedAt") or _epoch_ms())
     return store.get_run(run_id) or completed
 
 
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return round(sorted_values[index], 3)
+
+
+async def _run_detached(
+    workflow_id: str,
+    item: dict[str, Any],
+    mode: str | None,
+) -> dict[str, Any]:
+    """Run one input through the graph without touching the run store or SSE."""
+    run_id = f"batch-{uuid.uuid4().hex[:8]}"
+    sink: dict[str, Any] = {"steps": [], "nodeLatencyMs": {}}
+    state = _build_state(run_id, workflow_id, item["input"], mode, item.get("metadata"), item.get("context"))
+    token = detached_run.set(sink)
+    try:
+        final_state = await workflow_graph.ainvoke(state)
+    finally:
+        detached_run.reset(token)
+    return {"runId": run_id, "output": _build_output(final_state), "nodeLatencyMs": sink["nodeLatencyMs"]}
+
+
+def _batch_stats(results: list[dict[str, Any]], elapsed_s: float) -> dict[str, Any]:
+    completed = [result for result in results if result["status"] == "COMPLETED"]
+    intents: Counter[str] = Counter()
+    decisions: Counter[str] = Counter()
+    fallback_reasons: Counter[str] = Counter()
+    slots: Counter[str] = Counter()
+    node_totals: Counter[str] = Counter()
+    used_fallback = 0
+    for result in completed:
+        output = result.get("output") or {}
+        intents[str(output.get("primaryIntent") or "general")] += 1
+        decisions[str(output.get("decision") or "none")] += 1
+        if output.get("usedFallback"):
+            used_fallback += 1
+            fallback_reasons[str(output.get("fallbackReason") or "unknown")] += 1
+        filled = {**(output.get("entities") or {}), **(output.get("commercial") or {})}
+        for slot in COMMERCIAL_SLOT_PRIORITY:
+            if filled.get(slot):
+                slots[slot] += 1
+        for node_id, elapsed_ms in (result.get("nodeLatencyMs") or {}).items():
+            node_totals[node_id] += elapsed_ms
+    latencies = sorted(result["latencyMs"] for result in results)
+    total = len(results)
+    return {
+        "total": total,
+        "completed": len(completed),
+        "failed": total - len(completed),
+        "elapsedMs": round(elapsed_s * 1000.0, 3),
+        "throughputPerSec": round(total / elapsed_s, 2) if elapsed_s > 0 else None,
+        "latencyMs": {
+            "p50": _percentile(latencies, 0.50),
+            "p95": _percentile(latencies, 0.95),
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+        "nodeLatencyMsAvg": {
+            node_id: round(node_totals[node_id] / len(completed), 3)
+            for node_id in WORKFLOW_NODES
+            if completed and node_id in node_totals
+        },
+        "intents": dict(intents.most_common()),
+        "decisions": dict(decisions.most_common()),
+        "slotsFilled": {slot: slots[slot] for slot in COMMERCIAL_SLOT_PRIORITY},
+        "usedFallback": used_fallback,
+        "fallbackReasons": dict(fallback_reasons.most_common()),
+    }
+
+
+async def run_workflow_batch(
+    workflow_id: str,
+    inputs: list[str | dict[str, Any]],
+    mode: str | None = None,
+    *,
+    concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    record: bool = False,
+    include_results: bool = True,
+) -> dict[str, Any]:
+    """Run many inputs through the workflow graph with a bounded worker pool.
+
+    ``record=False`` (the default) skips the run store and SSE events entirely,
+    which is what scoring rule or prompt changes against logged messages
+    needs. Results keep input order; failures are reported per item.
+    """
+    if workflow_id != WORKFLOW_ID:
+        raise ValueError("workflow not found")
+    resolved_mode = (mode or DEFAULT_MODE).strip().lower()
+    if resolved_mode not in ALLOWED_MODES:
+        raise ValueError("invalid mode")
+    if len(inputs) > MAX_BATCH_ITEMS:
+        raise ValueError(f"too many inputs (max {MAX_BATCH_ITEMS})")
+
+    items = [item if isinstance(item, dict) else {"input": str(item)} for item in inputs]
+    results: list[dict[str, Any] | None] = [None] * len(items)
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal next_index
+        while next_index < len(items):
+            index = next_index
+            next_index += 1
+            item = items[index]
+            started = time.perf_counter()
+            result: dict[str, Any] = {"index": index, "id": item.get("id"), "input": item["input"]}
+            try:
+                if record:
+                    run = await run_workflow(
+                        workflow_id,
+                        item["input"],
+                        mode,
+                        metadata=item.get("metadata"),
+                        context=item.get("context"),
+                    )
+                    result.update(
+                        runId=run["runId"],
+                        output=run.get("output"),
+                        nodeLatencyMs=run.get("nodeLatencyMs"),
+                    )
+                else:
+                    result.update(await _run_detached(workflow_id, item, mode))
+                result["status"] = "COMPLETED"
+            except Exception as exc:  # noqa: BLE001 - one bad input must not sink the batch
+                result.update(status="FAILED", error=str(exc))
+            result["latencyMs"] = round((time.perf_counter() - started) * 1000.0, 3)
+            results[index] = result
+
+    workers = max(1, min(int(concurrency), MAX_BATCH_CONCURRENCY, len(items) or 1))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    elapsed_s = time.perf_counter() - started
+
+    finished = [result for result in results if result is not None]
+    response: dict[str, Any] = {
+        "workflowId": workflow_id,
+        "mode": resolved_mode,
+        "recorded": record,
+        "concurrency": workers,
+        "stats": _batch_stats(finished, elapsed_s),
+    }
+    if include_results:
+        response["results"] = finished
+    return response
+
+
 async def start_run(
     workflow_id: str,
     input_text: str,
@@ -130,8 +308,79 @@ async def start_run(
     return await run_workflow(workflow_id, input_text, mode, metadata=metadata, context=context)
 
 
-def list_runs() -> list[dict[str, Any]]:
-    return store.list_runs()
+def stream_run_reply(run_id: str, max_chars: int = 240) -> AsyncGenerator[str, None]:
+    """Stream a human reply for a completed run as AG-UI SSE; stored on the run once done."""
+    run = store.get_run(run_id)
+    if not run:
+        raise KeyError("run not found")
+    if run.get("status") != "COMPLETED":
+        raise ValueError("run is not completed")
+    output = run.get("output") or {}
+    user_text = str(run.get("input") or "")
+    nlu = {
+        "intent": output.get("primaryIntent"),
+        "decision": output.get("decision"),
+        "entities": output.get("entities") or {},
+    }
+    missing_slots = (output.get("pragmatics") or {}).get("missingSlots") or {}
+
+    llm_stream = llm_service.stream_human_reply(
+        user_text=user_text,
+        nlu=nlu,
+        options=None,
+        missing_slots=missing_slots,
+        max_chars=max_chars,
+    )
+    if llm_stream is None:
+        reply = llm_service.fallback_human_reply(
+            reason="missing_openai_key",
+            options=None,
+            missing_slots=missing_slots,
+            max_chars=max_chars,
+        )
+        store.set_reply(run_id, reply)
+        return static_text_message(
+            reply["responseText"],
+            correlation_id=run_id,
+            usedFallback=True,
+            fallbackReason=reply["fallbackReason"],
+        )
+
+    async def persist(text: str, stream: LLMStream) -> dict[str, Any]:
+        reply = llm_service.finalize_human_reply(
+            text,
+            options=None,
+            missing_slots=missing_slots,
+            max_chars=max_chars,
+            model=stream.model,
+        )
+        reply["firstTokenMs"] = stream.first_token_ms
+        store.set_reply(run_id, reply)
+        return {
+            "content": reply["responseText"],
+            "usedFallback": reply["usedFallback"],
+            "fallbackReason": reply["fallbackReason"],
+        }
+
+    return stream_text_message(llm_stream, correlation_id=run_id, on_complete=persist)
+
+
+def list_runs(
+    *,
+    limit: int = store.DEFAULT_PAGE_SIZE,
+    before: str | None = None,
+    status: str | None = None,
+    ticket_id: str | None = None,
+) -> list[dict[str, Any]]:
+    return store.list_runs(limit=limit, before=before, status=status, ticket_id=ticket_id)
+
+
+def run_log_stats() -> dict[str, Any]:
+    return store.run_log_stats()
+
+
+def clear_run_log() -> dict[str, Any]:
+    return {"ok": True, "removed": store.clear_run_log()}
 
 
 def get_run(run_id: str) -> dict[str, Any] | None:
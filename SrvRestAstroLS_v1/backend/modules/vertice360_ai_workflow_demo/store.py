@@ -5,8 +5,11 @@ import uuid
 from collections import deque
 from typing import Any
 
+from backend import globalVar
+from backend.modules.vertice360_ai_workflow_demo.run_log import DEFAULT_PAGE_SIZE, encode_cursor, run_log
 
-MAX_RUNS = 50
+# In-memory hot cache of recent runs; older runs are served from ``run_log``.
+MAX_RUNS = globalVar.get_env_int("V360_AI_RUN_HOT_CACHE_SIZE", 50, minimum=1)
 runs: dict[str, dict[str, Any]] = {}
 inbound_message_index: dict[str, str] = {}
 _run_order: deque[str] = deque()
@@ -16,14 +19,28 @@ def _epoch_ms() -> int:
     return int(dt.datetime.now(dt.timezone.utc).timestamp() * 1000)
 
 
+def _inbound_key(run: dict[str, Any]) -> str | None:
+    inbound_message_id = (run.get("metadata") or {}).get("inboundMessageId")
+    return str(inbound_message_id) if inbound_message_id else None
+
+
 def _trim_runs() -> None:
+    # RUNNING runs are never evicted: their graph still writes steps to them.
+    # With more than MAX_RUNS runs in flight the cache holds them all until they end.
+    in_flight: list[str] = []
     while len(_run_order) > MAX_RUNS:
         run_id = _run_order.popleft()
-        runs.pop(run_id, None)
-        if inbound_message_index:
-            stale_keys = [key for key, value in inbound_message_index.items() if value == run_id]
-            for key in stale_keys:
-                inbound_message_index.pop(key, None)
+        run = runs.get(run_id)
+        if run is None:
+            continue
+        if run.get("status") == "RUNNING":
+            in_flight.append(run_id)
+            continue
+        del runs[run_id]
+        key = _inbound_key(run)
+        if key and inbound_message_index.get(key) == run_id:
+            del inbound_message_index[key]
+    _run_order.extendleft(reversed(in_flight))
 
 
 def create_run(
@@ -44,6 +61,7 @@ def create_run(
         "endedAt": None,
         "updatedAt": now_ms,
         "steps": [],
+        "nodeLatencyMs": {},
         "output": None,
         "error": None,
     }
@@ -55,47 +73,79 @@ def create_run(
     runs[run_id] = run
     _run_order.append(run_id)
     _trim_runs()
+    run_log.write(run)
     return run
 
 
-def add_step(run_id: str, step: dict[str, Any]) -> dict[str, Any]:
-    run = runs.get(run_id)
+def _run_for_update(run_id: str) -> dict[str, Any]:
+    """The hot run, or a copy loaded from ``run_log``; callers write cold runs back."""
+    run = runs.get(run_id) or run_log.get(run_id)
     if not run:
         raise KeyError("run not found")
+    return run
+
+
+def add_step(run_id: str, step: dict[str, Any]) -> dict[str, Any]:
+    run = _run_for_update(run_id)
     run.setdefault("steps", []).append(step)
     run["updatedAt"] = _epoch_ms()
+    if run_id not in runs:
+        run_log.write(run)
     return step
 
 
-def complete_run(run_id: str, output: dict[str, Any]) -> dict[str, Any]:
+def record_node_latency(run_id: str, node_id: str, elapsed_ms: float) -> None:
     run = runs.get(run_id)
     if not run:
-        raise KeyError("run not found")
+        return
+    run.setdefault("nodeLatencyMs", {})[node_id] = round(elapsed_ms, 3)
+
+
+def complete_run(run_id: str, output: dict[str, Any]) -> dict[str, Any]:
+    run = _run_for_update(run_id)
     now_ms = _epoch_ms()
     run["status"] = "COMPLETED"
     run["endedAt"] = now_ms
     run["updatedAt"] = now_ms
     run["output"] = output
     run["error"] = None
+    run_log.write(run)
+    _trim_runs()
+    return run
+
+
+def set_reply(run_id: str, reply: dict[str, Any]) -> dict[str, Any]:
+    run = _run_for_update(run_id)
+    run["reply"] = reply
+    run["updatedAt"] = _epoch_ms()
+    run_log.write(run)
     return run
 
 
 def fail_run(run_id: str, error: str) -> dict[str, Any]:
-    run = runs.get(run_id)
-    if not run:
-        raise KeyError("run not found")
+    run = _run_for_update(run_id)
     now_ms = _epoch_ms()
     run["status"] = "FAILED"
     run["endedAt"] = now_ms
     run["updatedAt"] = now_ms
     run["error"] = error
+    run_log.write(run)
+    _trim_runs()
     return run
 
 
-def list_runs() -> list[dict[str, Any]]:
-    items = sorted(runs.values(), key=lambda run: run.get("startedAt") or 0, reverse=True)
+def list_runs(
+    *,
+    limit: int = DEFAULT_PAGE_SIZE,
+    before: str | None = None,
+    status: str | None = None,
+    ticket_id: str | None = None,
+) -> list[dict[str, Any]]:
+    """Newest-first page of run summaries; pass the last item's ``cursor`` as ``before``."""
     summaries = []
-    for run in items:
+    for logged in run_log.query(limit=limit, before=before, status=status, ticket_id=ticket_id):
+        # Runs still in the hot cache may have progressed since their last write.
+        run = runs.get(logged["runId"]) or logged
         summaries.append(
             {
                 "runId": run.get("runId"),
@@ -106,16 +156,40 @@ def list_runs() -> list[dict[str, Any]]:
                 "input": run.get("input"),
                 "output": run.get("output"),
                 "stepCount": len(run.get("steps") or []),
+                "ticketId": (run.get("metadata") or {}).get("ticketId"),
+                "cursor": encode_cursor(run.get("startedAt") or 0, run["runId"]),
             }
         )
     return summaries
 
 
 def get_run(run_id: str) -> dict[str, Any] | None:
-    return runs.get(run_id)
+    run = runs.get(run_id)
+    if run is not None:
+        return run
+    return run_log.get(run_id)
+
+
+def find_run_by_inbound_message(inbound_message_id: str) -> dict[str, Any] | None:
+    run_id = inbound_message_index.get(str(inbound_message_id))
+    if run_id and run_id in runs:
+        return runs[run_id]
+    return run_log.find_by_inbound_message(str(inbound_message_id))
+
+
+def run_log_stats() -> dict[str, Any]:
+    return {"hot_runs": len(runs), "hot_capacity": MAX_RUNS, **run_log.stats()}
 
 
 def reset_store() -> None:
+    """Drop the hot cache only; the durable run log keeps its history."""
     runs.clear()
     inbound_message_index.clear()
     _run_order.clear()
+
+
+def clear_run_log() -> int:
+    """Delete every logged run (explicit admin action); returns how many were removed."""
+    removed = run_log.count()
+    run_log.reset()
+    return removed
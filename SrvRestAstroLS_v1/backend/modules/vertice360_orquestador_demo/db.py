@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+import re
 from contextlib import contextmanager
 from threading import Lock
 from typing import Any, Callable, Iterator, TypeVar
@@ -22,10 +23,29 @@ logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
+_SCHEMA_RE = re.compile(r"^[a-z_][a-z0-9_]*$")
+
 _pool: Any | None = None
 _pool_lock = Lock()
 
 
+def normalize_search_path(search_path: str | None) -> str | None:
+    """Validate a comma-separated schema list and drop whitespace.
+
+    libpq splits ``options`` on whitespace, so ``"a, b"`` would turn ``b`` into
+    a stray server argument and every connection would fail.
+    """
+    schemas = [part.strip().lower() for part in str(search_path or "").split(",") if part.strip()]
+    for schema in schemas:
+        if not _SCHEMA_RE.match(schema):
+            raise ValueError(f"invalid schema in search_path: {schema!r}")
+    return ",".join(schemas) or None
+
+
+# V360_DB_SEARCH_PATH lets a whole app process run against a scratch schema (load tests).
+_search_path: str | None = normalize_search_path(globalVar.get_env_str("V360_DB_SEARCH_PATH", ""))
+
+
 def psycopg_available() -> bool:
     return psycopg is not None
 
@@ -41,6 +61,27 @@ def _get_conninfo() -> str:
     return _normalize_conninfo(globalVar.get_v360_db_url())
 
 
+def _connection_kwargs() -> dict[str, Any]:
+    kwargs: dict[str, Any] = {"autocommit": False}
+    if _search_path:
+        kwargs["options"] = f"-c search_path={_search_path}"
+    return kwargs
+
+
+def set_search_path(search_path: str | None) -> None:
+    """Route new connections to another schema (e.g. a replay scratch schema).
+
+    Closes the current pool so every connection picks up the new search_path.
+    """
+    global _pool, _search_path
+    normalized = normalize_search_path(search_path)
+    with _pool_lock:
+        _search_path = normalized
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
 def _get_pool() -> Any | None:
     if ConnectionPool is None:
         return None
@@ -59,7 +100,7 @@ def _get_pool() -> Any | None:
             conninfo=conninfo,
             min_size=min_size,
             max_size=max_size,
-            kwargs={"autocommit": False},
+            kwargs=_connection_kwargs(),
         )
         logger.info("V360_DB_POOL initialized min_size=%s max_size=%s", min_size, max_size)
     return _pool
@@ -80,7 +121,7 @@ def get_connection() -> Iterator[Any]:
         return
 
     conninfo = _get_conninfo()
-    with psycopg.connect(conninfo, autocommit=False) as conn:
+    with psycopg.connect(conninfo, **_connection_kwargs()) as conn:
         yield conn
 
 
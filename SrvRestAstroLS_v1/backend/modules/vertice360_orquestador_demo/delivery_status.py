@@ -0,0 +1,256 @@
+"""Batched ingestion of WhatsApp delivery-status callbacks into ``messages``.
+
+Status webhooks (Gupshup ``message-event``, Meta ``statuses``) are buffered for
+a short window, collapsed per ``provider_message_id`` to the most advanced
+status (keeping the earliest ``delivered`` time, so a ``read`` in the same
+window does not hide it), and applied in a single ``UPDATE ... FROM (VALUES ...)``. Statuses only
+move forward (queued → sent → delivered → read), so retried or out-of-order
+callbacks cannot regress a message. Applied rows feed a per-line latency
+histogram for sent→delivered, delivered→read and sent→read.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from backend import globalVar
+from backend.modules.vertice360_orquestador_demo import db, repo
+from backend.telemetry import metrics
+
+logger = logging.getLogger(__name__)
+
+STATUS_RANK = {
+    "pending": 0,
+    "error": 0,
+    "skipped": 0,
+    "queued": 1,
+    "sent": 2,
+    "failed": 3,
+    "delivered": 3,
+    "read": 4,
+}
+DEFAULT_WINDOW_MS = 250
+DEFAULT_MAX_BATCH = 500
+LATENCY_BUCKETS_MS = (500, 1000, 2000, 5000, 10000, 30000, 60000, 300000, 900000, 3600000)
+
+# (provider_message_id, status, status_ts_ms, delivered_ts_ms)
+StatusRow = tuple[str, str, int, int | None]
+
+
+@dataclass(slots=True)
+class StatusUpdate:
+    provider: str
+    provider_message_id: str
+    status: str
+    timestamp_ms: int
+    line_key: str
+    delivered_ms: int | None = None
+
+
+class LatencyHistogram:
+    def __init__(self, bounds_ms: tuple[int, ...] = LATENCY_BUCKETS_MS) -> None:
+        self.bounds_ms = bounds_ms
+        self.counts = [0] * (len(bounds_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds_ms, value_ms)] += 1
+        self.count += 1
+        self.total_ms += value_ms
+
+    def snapshot(self) -> dict[str, Any]:
+        buckets = {f"le_{bound}": count for bound, count in zip(self.bounds_ms, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "buckets": buckets,
+        }
+
+
+# The ALTER TABLE / CREATE INDEX checks take locks on ``messages``; run them once per process.
+_delivery_columns_ready = False
+
+
+def _apply_to_db(updates: list[StatusRow]) -> list[dict[str, Any]]:
+    global _delivery_columns_ready
+    ensure_columns = not _delivery_columns_ready
+
+    def _tx(conn: Any) -> list[dict[str, Any]]:
+        if ensure_columns:
+            repo.ensure_messages_delivery_columns(conn)
+        return repo.bulk_apply_message_statuses(conn, updates, STATUS_RANK)
+
+    applied = db.run_in_transaction(_tx)
+    _delivery_columns_ready = True
+    return applied
+
+
+class DeliveryStatusIngestor:
+    def __init__(
+        self,
+        *,
+        window_ms: int = DEFAULT_WINDOW_MS,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        apply: Callable[[list[StatusRow]], list[dict[str, Any]]] = _apply_to_db,
+        enabled: bool = True,
+    ) -> None:
+        self.window_seconds = max(0, int(window_ms)) / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        self.apply = apply
+        self.enabled = bool(enabled)
+        self._pending: dict[str, StatusUpdate] = {}
+        self._task: asyncio.Task[None] | None = None
+        self._inflight: set[asyncio.Task[int]] = set()
+        self._histograms: dict[tuple[str, str], LatencyHistogram] = {}
+        self._counters = {
+            "received": 0,
+            "ignored": 0,
+            "collapsed": 0,
+            "flushes": 0,
+            "applied": 0,
+            "stale": 0,
+            "errors": 0,
+        }
+
+    def submit(self, update: StatusUpdate) -> bool:
+        """Buffer ``update``; returns False when it cannot be applied (unknown status or id)."""
+        if not self.enabled or not update.provider_message_id or update.status not in STATUS_RANK:
+            self._counters["ignored"] += 1
+            return False
+        self._counters["received"] += 1
+        if update.status == "delivered" and update.delivered_ms is None:
+            update.delivered_ms = update.timestamp_ms
+        current = self._pending.get(update.provider_message_id)
+        if current is not None:
+            self._counters["collapsed"] += 1
+            delivered = [ts for ts in (current.delivered_ms, update.delivered_ms) if ts is not None]
+            if STATUS_RANK[update.status] <= STATUS_RANK[current.status]:
+                current.delivered_ms = min(delivered, default=None)
+                if update.status == current.status:
+                    current.timestamp_ms = min(current.timestamp_ms, update.timestamp_ms)
+                return True
+            update.delivered_ms = min(delivered, default=None)
+        self._pending[update.provider_message_id] = update
+        self._schedule(immediate=len(self._pending) >= self.max_batch)
+        return True
+
+    def _schedule(self, *, immediate: bool) -> None:
+        loop = asyncio.get_running_loop()
+        if immediate:
+            task = loop.create_task(self.flush())
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+            return
+        # A timer left on a previous (closed) loop never fires; start a new one.
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._flush_after(self.window_seconds))
+
+    async def _flush_after(self, delay: float) -> None:
+        # Updates submitted while a batch is being applied see this timer still
+        # running and schedule nothing, so keep going until the buffer is empty.
+        while True:
+            await asyncio.sleep(delay)
+            await self.flush()
+            if not self._pending:
+                return
+
+    async def flush(self) -> int:
+        """Apply everything buffered so far; returns how many messages changed."""
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        rows = [
+            (item.provider_message_id, item.status, item.timestamp_ms, item.delivered_ms) for item in batch.values()
+        ]
+        self._counters["flushes"] += 1
+        try:
+            applied = await asyncio.to_thread(self.apply, rows)
+        except Exception as exc:  # noqa: BLE001 - status bookkeeping must not break webhooks
+            self._counters["errors"] += 1
+            logger.warning("DELIVERY_STATUS_FLUSH_FAILED rows=%s error=%s", len(rows), exc)
+            return 0
+        self._counters["applied"] += len(applied)
+        self._counters["stale"] += len(rows) - len(applied)
+        metrics.observe("messaging.status.batch_size", len(rows))
+        for row in applied:
+            update = batch.get(str(row.get("provider_message_id") or ""))
+            if update is not None:
+                self._record_latency(update, row)
+        return len(applied)
+
+    def _record_latency(self, update: StatusUpdate, row: dict[str, Any]) -> None:
+        line_key = update.line_key
+        sent_at = row.get("sent_at_ms")
+        delivered_at = row.get("delivered_at_ms")
+        read_at = row.get("read_at_ms")
+        status = row.get("provider_status")
+        samples: list[tuple[str, float]] = []
+        # A read that carried its delivery time set delivered_at in this batch too.
+        delivered_now = status == "delivered" or (
+            status == "read" and update.delivered_ms is not None and delivered_at == update.delivered_ms
+        )
+        if delivered_now and sent_at and delivered_at:
+            samples.append(("sent_to_delivered", delivered_at - sent_at))
+        if status == "read" and read_at:
+            if delivered_at and delivered_at < read_at:
+                samples.append(("delivered_to_read", read_at - delivered_at))
+            if sent_at:
+                samples.append(("sent_to_read", read_at - sent_at))
+        for stage, value_ms in samples:
+            value_ms = max(0.0, float(value_ms))
+            histogram = self._histograms.get((line_key, stage))
+            if histogram is None:
+                histogram = LatencyHistogram()
+                self._histograms[(line_key, stage)] = histogram
+            histogram.observe(value_ms)
+            metrics.observe("messaging.delivery_ms", value_ms, {"line": line_key, "stage": stage})
+
+    async def aclose(self) -> None:
+        """Flush the buffer and wait for in-flight batches (app shutdown)."""
+        loop = asyncio.get_running_loop()
+        pending = [task for task in (self._task, *self._inflight) if task is not None and task.get_loop() is loop]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._task = None
+        await self.flush()
+
+    def reset(self) -> None:
+        for task in (self._task, *self._inflight):
+            if task is not None and not task.done():
+                task.cancel()
+        self._task = None
+        self._inflight.clear()
+        self._pending.clear()
+        self._histograms.clear()
+        for key in self._counters:
+            self._counters[key] = 0
+
+    def stats(self) -> dict[str, Any]:
+        lines: dict[str, dict[str, Any]] = {}
+        for (line_key, stage), histogram in sorted(self._histograms.items()):
+            lines.setdefault(line_key, {})[stage] = histogram.snapshot()
+        return {
+            "enabled": self.enabled,
+            "window_ms": int(self.window_seconds * 1000),
+            "max_batch": self.max_batch,
+            "buffered": len(self._pending),
+            **self._counters,
+            "latency_by_line": lines,
+        }
+
+
+delivery_status_ingestor = DeliveryStatusIngestor(
+    window_ms=globalVar.get_env_int("V360_STATUS_BATCH_WINDOW_MS", DEFAULT_WINDOW_MS, minimum=0),
+    max_batch=globalVar.get_env_int("V360_STATUS_BATCH_MAX", DEFAULT_MAX_BATCH, minimum=1),
+    enabled=globalVar.get_env_bool("V360_STATUS_INGEST_ENABLED", True),
+)
+
+
+async def close_delivery_status_ingestor() -> None:
+    await delivery_status_ingestor.aclose()
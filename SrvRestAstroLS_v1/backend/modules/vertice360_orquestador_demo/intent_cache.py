@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable
+
+from backend import globalVar
+from backend.telemetry import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 4096
+# 0 disables parity checks; N double-computes every N-th cache hit.
+DEFAULT_PARITY_EVERY = 0
+
+
+def state_fingerprint(parts: dict[str, Any]) -> str:
+    """Compact stable hash of the conversation state a resolution depends on."""
+    encoded = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str, separators=(",", ":"))
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=12).hexdigest()
+
+
+class IntentResolutionCache:
+    """Bounded LRU for semantic intent resolutions with hit/miss counters.
+
+    Entries are keyed by ``(normalized_text, state_fingerprint)``. Cached values
+    are deep-copied on the way in and out so callers may mutate the returned dict.
+    """
+
+    def __init__(self, *, max_entries: int = DEFAULT_MAX_ENTRIES, parity_every: int = DEFAULT_PARITY_EVERY) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self.parity_every = max(0, int(parity_every))
+        self._entries: OrderedDict[tuple[str, str], dict[str, Any]] = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._parity_checks = 0
+        self._parity_mismatches = 0
+
+    def resolve(
+        self,
+        text_key: str,
+        fingerprint: str,
+        compute: Callable[[], dict[str, Any]],
+    ) -> dict[str, Any]:
+        if self.max_entries <= 0:
+            return compute()
+
+        key = (text_key, fingerprint)
+        run_parity = False
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                if self.parity_every and self._hits % self.parity_every == 0:
+                    self._parity_checks += 1
+                    run_parity = True
+            else:
+                self._misses += 1
+
+        if cached is None:
+            metrics.inc("orquestador.intent_cache.miss")
+            result = compute()
+            self._store(key, result)
+            return result
+
+        metrics.inc("orquestador.intent_cache.hit")
+        if not run_parity:
+            return copy.deepcopy(cached)
+
+        fresh = compute()
+        if fresh != cached:
+            with self._lock:
+                self._parity_mismatches += 1
+            metrics.inc("orquestador.intent_cache.parity_mismatch")
+            logger.warning(
+                "ORQ_INTENT_CACHE_PARITY_MISMATCH text=%r fingerprint=%s cached_intent=%s fresh_intent=%s",
+                text_key,
+                fingerprint,
+                cached.get("intent"),
+                fresh.get("intent"),
+            )
+            self._store(key, fresh)
+        return fresh
+
+    def _store(self, key: tuple[str, str], value: dict[str, Any]) -> None:
+        snapshot = copy.deepcopy(value)
+        evicted = 0
+        with self._lock:
+            self._entries[key] = snapshot
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            self._evictions += evicted
+        if evicted:
+            metrics.inc("orquestador.intent_cache.eviction")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+            self._parity_checks = 0
+            self._parity_mismatches = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "parity_every": self.parity_every,
+                "parity_checks": self._parity_checks,
+                "parity_mismatches": self._parity_mismatches,
+            }
+
+
+intent_cache = IntentResolutionCache(
+    max_entries=globalVar.get_env_int("V360_INTENT_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES, minimum=0),
+    parity_every=globalVar.get_env_int("V360_INTENT_CACHE_PARITY_EVERY", DEFAULT_PARITY_EVERY, minimum=0),
+)
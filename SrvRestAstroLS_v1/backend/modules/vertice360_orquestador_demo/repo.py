@@ -636,6 +636,86 @@ def update_message_provider_result(
     return row
 
 
+def ensure_messages_delivery_columns(conn: Any) -> None:
+    ensure_messages_provider_columns(conn)
+    conn.execute("alter table messages add column if not exists delivered_at timestamptz")
+    conn.execute("alter table messages add column if not exists read_at timestamptz")
+    conn.execute(
+        "create index if not exists ix_messages_provider_message_id on messages (provider_message_id)"
+    )
+
+
+def bulk_apply_message_statuses(
+    conn: Any,
+    updates: list[tuple[str, str, int, int | None]],
+    status_rank: dict[str, int],
+) -> list[dict[str, Any]]:
+    """Apply ``(provider_message_id, status, status_ts_ms, delivered_ts_ms)`` rows in one statement.
+
+    A row only moves a message forward (by ``status_rank``); stale or duplicate
+    callbacks are no-ops. ``delivered_ts_ms`` carries the delivery time when a
+    ``read`` arrived together with its ``delivered``; without it ``delivered_at``
+    falls back to the status time. Returns the updated rows with epoch-ms timestamps.
+    """
+    if not updates:
+        return []
+    rank_cases = " ".join(f"when '{status}' then {rank}" for status, rank in status_rank.items())
+    values_sql = ", ".join(["(%s, %s, %s::bigint, %s::bigint, %s::int)"] * len(updates))
+    params: list[Any] = []
+    for provider_message_id, status, status_ts_ms, delivered_ts_ms in updates:
+        params.extend((provider_message_id, status, status_ts_ms, delivered_ts_ms, status_rank.get(status, 0)))
+    return fetch_all(
+        conn,
+        f"""
+        update messages as m
+        set provider_status = v.status,
+            delivered_at = case
+                when v.status in ('delivered', 'read')
+                    then coalesce(
+                        m.delivered_at, to_timestamp(coalesce(v.delivered_ts_ms, v.status_ts_ms) / 1000.0)
+                    )
+                else m.delivered_at
+            end,
+            read_at = case
+                when v.status = 'read' then coalesce(m.read_at, to_timestamp(v.status_ts_ms / 1000.0))
+                else m.read_at
+            end
+        from (values {values_sql}) as v(provider_message_id, status, status_ts_ms, delivered_ts_ms, status_rank)
+        where m.provider_message_id = v.provider_message_id
+          and (case m.provider_status {rank_cases} else 0 end) < v.status_rank
+        returning
+            m.id,
+            m.provider_message_id,
+            m.provider_status,
+            (extract(epoch from m.sent_at) * 1000)::bigint as sent_at_ms,
+            (extract(epoch from m.delivered_at) * 1000)::bigint as delivered_at_ms,
+            (extract(epoch from m.read_at) * 1000)::bigint as read_at_ms
+        """,
+        tuple(params),
+    )
+
+
+def mark_message_provider_pending(
+    conn: Any,
+    *,
+    message_id: str,
+    provider_name: str,
+    reason: str,
+) -> None:
+    """Record that an outbound send is queued or retrying; never overwrites a final status."""
+    conn.execute(
+        """
+        update messages
+        set provider_name = %s,
+            provider_status = 'pending',
+            provider_error = %s
+        where id = %s
+          and (provider_status is null or provider_status = 'pending')
+        """,
+        (provider_name, reason, message_id),
+    )
+
+
 def insert_event(
     conn: Any,
     *,
@@ -11,11 +11,18 @@ from decimal import Decimal
 from typing import Any
 
 from backend import globalVar
+from backend.modules.messaging.providers.dispatcher import (
+    CircuitOpenError,
+    OutboundSendError,
+    outbound_dispatcher,
+)
 from backend.modules.messaging.providers.gupshup.whatsapp.service import (
     GupshupWhatsAppSendError,
     send_text_message as gupshup_send_text,
 )
-from backend.modules.vertice360_orquestador_demo import db, repo
+from backend.modules.vertice360_orquestador_demo import db, intent_cache, repo
+from backend.modules.vertice360_orquestador_demo.delivery_status import delivery_status_ingestor
+from backend.services.inbound_dedupe import inbound_dedupe
 from backend.telemetry.context import set_correlation_id
 
 logger = logging.getLogger(__name__)
@@ -2165,12 +2172,90 @@ def _project_exclusions_for_list(
     return _dedupe_texts(exclusions, limit=4)
 
 
+INTENT_STATE_SUMMARY_KEYS = (
+    "pending_offer_type",
+    "pending_question_type",
+    "active_filter",
+    "last_result_units",
+    "last_result_slots",
+    "last_rooms_query",
+    "last_intent",
+    "last_search_scope",
+    "last_subject_type",
+    "last_subject_unit_code",
+    "last_subject_unit_id",
+    "last_subject_project_code",
+    "last_subject_project_name",
+    "last_subject_summary",
+)
+
+
+def _intent_state_fingerprint(
+    *,
+    detail: dict[str, Any] | None,
+    recent_messages: list[dict[str, Any]] | None,
+    summary: dict[str, Any] | None,
+) -> str:
+    summary_obj = summary if isinstance(summary, dict) else {}
+    return intent_cache.state_fingerprint(
+        {
+            "selected_project": _ticket_selected_project(detail).get("code"),
+            "clarification_active": _clarification_context_active(summary_obj, recent_messages),
+            "summary": {key: summary_obj.get(key) for key in INTENT_STATE_SUMMARY_KEYS if summary_obj.get(key) is not None},
+        }
+    )
+
+
+def intent_cache_stats() -> dict[str, Any]:
+    return intent_cache.intent_cache.stats()
+
+
+def reset_intent_cache() -> None:
+    intent_cache.intent_cache.clear()
+
+
+def inbound_dedupe_stats() -> dict[str, Any]:
+    return inbound_dedupe.stats()
+
+
+def outbound_dispatch_stats() -> dict[str, Any]:
+    return outbound_dispatcher.stats()
+
+
+def delivery_status_stats() -> dict[str, Any]:
+    return delivery_status_ingestor.stats()
+
+
 def _semantic_intent_resolver(
     text: str,
     *,
     detail: dict[str, Any] | None = None,
     recent_messages: list[dict[str, Any]] | None = None,
     summary: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    fingerprint = _intent_state_fingerprint(
+        detail=detail,
+        recent_messages=recent_messages,
+        summary=summary,
+    )
+    return intent_cache.intent_cache.resolve(
+        _normalize_text(text),
+        fingerprint,
+        lambda: _semantic_intent_resolver_uncached(
+            text,
+            detail=detail,
+            recent_messages=recent_messages,
+            summary=summary,
+        ),
+    )
+
+
+def _semantic_intent_resolver_uncached(
+    text: str,
+    *,
+    detail: dict[str, Any] | None = None,
+    recent_messages: list[dict[str, Any]] | None = None,
+    summary: dict[str, Any] | None = None,
 ) -> dict[str, Any]:
     clean = _normalize_text(text)
     summary_obj = summary if isinstance(summary, dict) else {}
@@ -7135,7 +7220,11 @@ async def _send_vera_whatsapp_reply(phone_e164: str, text: str) -> dict[str, Any
         }
 
     try:
-        ack = await gupshup_send_text(phone_e164, text)
+        ack = await outbound_dispatcher.dispatch(
+            "gupshup",
+            _default_gupshup_line_key(),
+            lambda: gupshup_send_text(phone_e164, text),
+        )
         return {
             "provider": "gupshup_whatsapp",
             "vera_send_ok": True,
@@ -7205,7 +7294,21 @@ def _provider_response_json(value: Any) -> dict[str, Any]:
     return {"raw": _jsonable(value)}
 
 
-async def _send_supervisor_whatsapp_via_gupshup(phone_e164: str, text: str) -> dict[str, Any]:
+def _mark_message_send_pending(message_id: str, reason: str) -> None:
+    def _tx(conn: Any) -> None:
+        repo.ensure_messages_provider_columns(conn)
+        repo.mark_message_provider_pending(conn, message_id=message_id, provider_name="gupshup", reason=reason)
+
+    db.run_in_transaction(_tx)
+
+
+async def _send_supervisor_whatsapp_via_gupshup(
+    phone_e164: str,
+    text: str,
+    *,
+    message_id: str | None = None,
+    line_key: str | None = None,
+) -> dict[str, Any]:
     missing = _missing_gupshup_config_keys()
     if missing:
         return {
@@ -7217,8 +7320,23 @@ async def _send_supervisor_whatsapp_via_gupshup(phone_e164: str, text: str) -> d
             "error": "missing_gupshup_config",
         }
 
+    def _on_pending(status: str, attempt: int) -> None:
+        # Persist that the reply is still on its way, so a crash mid-backoff
+        # leaves the row "pending" rather than looking never attempted.
+        if message_id:
+            _mark_message_send_pending(message_id, f"{status}:attempt={attempt}")
+
+    # Rate limits apply to the sending number: the ticket's inbound line when
+    # it is a Gupshup line, else the configured sender.
+    if not (line_key and line_key.startswith("gupshup:")):
+        line_key = _default_gupshup_line_key()
     try:
-        ack = await gupshup_send_text(phone_e164, text)
+        ack = await outbound_dispatcher.dispatch(
+            "gupshup",
+            line_key,
+            lambda: gupshup_send_text(phone_e164, text),
+            on_pending=_on_pending,
+        )
         provider_message_id = str(ack.provider_message_id or "").strip() or None
         return {
             "send_ok": True,
@@ -7252,6 +7370,15 @@ async def _send_supervisor_whatsapp_via_gupshup(phone_e164: str, text: str) -> d
             ),
             "error": error_code,
         }
+    except OutboundSendError as exc:
+        return {
+            "send_ok": False,
+            "provider": "gupshup",
+            "provider_status": "error",
+            "provider_message_id": None,
+            "provider_response": _provider_response_json(str(exc)),
+            "error": "gupshup_circuit_open" if isinstance(exc, CircuitOpenError) else "gupshup_queue_timeout",
+        }
     except Exception as exc:  # noqa: BLE001
         return {
             "send_ok": False,
@@ -7722,7 +7849,47 @@ async def ingest_from_provider(
 
     provider_name = str(provider or "gupshup_whatsapp").strip().lower() or "gupshup_whatsapp"
     safe_provider_message_id = str(provider_message_id or "").strip() or None
+    dedupe_key = (
+        f"orquestador:provider:{provider_name}:id:{safe_provider_message_id}" if safe_provider_message_id else None
+    )
+    if dedupe_key and not inbound_dedupe.mark(dedupe_key):
+        logger.info(
+            "DUPLICATE_INBOUND ignored provider=%s phone=%s provider_message_id=%s",
+            provider_name,
+            normalized_phone,
+            safe_provider_message_id,
+        )
+        # Nothing was sent by this call, so no vera_send_ok.
+        return {
+            "ok": True,
+            "routed": "orquestador",
+            "duplicate": True,
+            "provider_message_id": safe_provider_message_id,
+        }
+
+    try:
+        return await _ingest_provider_turn(
+            normalized_phone=normalized_phone,
+            clean_text=clean_text,
+            provider_name=provider_name,
+            safe_provider_message_id=safe_provider_message_id,
+            provider_meta=provider_meta,
+        )
+    except BaseException:
+        # A turn that failed half-way must not swallow the provider's retry for the whole TTL.
+        if dedupe_key:
+            inbound_dedupe.forget(dedupe_key)
+        raise
+
 
+async def _ingest_provider_turn(
+    *,
+    normalized_phone: str,
+    clean_text: str,
+    provider_name: str,
+    safe_provider_message_id: str | None,
+    provider_meta: dict[str, Any] | None,
+) -> dict[str, Any]:
     inbound_meta = dict(provider_meta or {})
     inbound_meta.setdefault("provider", provider_name)
     inbound_meta.setdefault("channel", "whatsapp")
@@ -8172,6 +8339,7 @@ async def propose_visit(
             "option3": proposal.get("option3"),
             "visit_scheduled_at": ticket.get("visit_scheduled_at"),
             "target_phone_e164": _normalize_target_phone(context.get("phone_e164")),
+            "inbound_line_key": str(context.get("inbound_line_key") or "").strip() or None,
         }
 
     prepared = db.run_in_transaction(_tx_prepare)
@@ -8209,6 +8377,8 @@ async def propose_visit(
         provider_result = await _send_supervisor_whatsapp_via_gupshup(
             target_phone_e164,
             clean_message_out,
+            message_id=str(prepared.get("message_id") or "") or None,
+            line_key=prepared.get("inbound_line_key"),
         )
 
     provider_status = str(provider_result.get("provider_status") or "error")
@@ -8592,6 +8762,7 @@ async def supervisor_send(
             "ticket_id": str(resolved_ticket_id),
             "target": clean_target,
             "target_phone_e164": target_phone,
+            "inbound_line_key": str(context.get("inbound_line_key") or "").strip() or None,
             "message_id": str(message.get("id")),
             "stage": ticket.get("stage"),
             "last_activity_at": ticket.get("last_activity_at"),
@@ -8610,7 +8781,12 @@ async def supervisor_send(
             "error": "missing_target_phone",
         }
     else:
-        provider_result = await _send_supervisor_whatsapp_via_gupshup(target_phone_e164, clean_text)
+        provider_result = await _send_supervisor_whatsapp_via_gupshup(
+            target_phone_e164,
+            clean_text,
+            message_id=str(prepared.get("message_id") or "") or None,
+            line_key=prepared.get("inbound_line_key"),
+        )
 
     provider_status = str(provider_result.get("provider_status") or "error")
     provider_message_id = (
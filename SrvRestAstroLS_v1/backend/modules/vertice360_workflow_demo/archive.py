@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS ticket_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ticket_id TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        archived_at INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_ticket_history_ticket ON ticket_history (ticket_id, kind, id)",
+    """
+    CREATE TABLE IF NOT EXISTS ticket_snapshots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ticket_id TEXT NOT NULL,
+        status TEXT NOT NULL,
+        phone_key TEXT,
+        conversation_key TEXT,
+        payload TEXT NOT NULL,
+        archived_at INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_ticket_snapshots_ticket ON ticket_snapshots (ticket_id, id)",
+    "CREATE INDEX IF NOT EXISTS ix_ticket_snapshots_phone ON ticket_snapshots (phone_key, id)",
+    "CREATE INDEX IF NOT EXISTS ix_ticket_snapshots_conversation ON ticket_snapshots (conversation_key, id)",
+)
+
+_LOOKUP_COLUMNS = {"phone_key", "conversation_key"}
+
+
+def _epoch_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str, separators=(",", ":"))
+
+
+class TicketArchive:
+    """Append-only SQLite archive for spilled ticket history and evicted tickets.
+
+    Rows are never updated: a ticket evicted twice gets two snapshots and the
+    latest one wins on load.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._lock = Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+        self._history_rows = 0
+        self._snapshots = 0
+        self._loads = 0
+
+    def append_history(self, ticket_id: str, kind: str, entries: list[dict[str, Any]]) -> None:
+        if not entries:
+            return
+        now_ms = _epoch_ms()
+        rows = [(ticket_id, kind, _dumps(entry), now_ms) for entry in entries]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO ticket_history (ticket_id, kind, payload, archived_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._history_rows += len(rows)
+
+    def load_history(self, ticket_id: str, kind: str, limit: int | None = None) -> list[dict[str, Any]]:
+        """Spilled entries for a ticket, oldest first (the newest ``limit`` if given)."""
+        sql = "SELECT payload FROM ticket_history WHERE ticket_id = ? AND kind = ? ORDER BY id DESC"
+        params: list[Any] = [ticket_id, kind]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def archive_ticket(
+        self,
+        ticket: dict[str, Any],
+        *,
+        status: str,
+        phone_key: str | None,
+        conversation_key: str | None,
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO ticket_snapshots
+                    (ticket_id, status, phone_key, conversation_key, payload, archived_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    str(ticket.get("ticketId")),
+                    status,
+                    phone_key or None,
+                    conversation_key or None,
+                    _dumps(ticket),
+                    _epoch_ms(),
+                ),
+            )
+            self._snapshots += 1
+
+    def load_ticket(self, ticket_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM ticket_snapshots WHERE ticket_id = ? ORDER BY id DESC LIMIT 1",
+                (ticket_id,),
+            ).fetchone()
+            if row is not None:
+                self._loads += 1
+        return json.loads(row[0]) if row is not None else None
+
+    def has_ticket(self, ticket_id: str) -> bool:
+        """Whether the id was ever used: snapshotted or with spilled history."""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT 1 FROM ticket_snapshots WHERE ticket_id = ?
+                UNION ALL
+                SELECT 1 FROM ticket_history WHERE ticket_id = ?
+                LIMIT 1
+                """,
+                (ticket_id, ticket_id),
+            ).fetchone()
+        return row is not None
+
+    def max_ticket_number(self, prefix: str) -> int:
+        """Highest numeric suffix among archived ids starting with ``prefix``."""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT MAX(CAST(SUBSTR(ticket_id, ?) AS INTEGER)) FROM (
+                    SELECT ticket_id FROM ticket_snapshots WHERE ticket_id LIKE ? || '%'
+                    UNION
+                    SELECT ticket_id FROM ticket_history WHERE ticket_id LIKE ? || '%'
+                )
+                """,
+                (len(prefix) + 1, prefix, prefix),
+            ).fetchone()
+        return int(row[0] or 0)
+
+    def find_active_ticket_id(self, column: str, key: str) -> str | None:
+        """Latest archived ticket still active (not CLOSED) for a phone/conversation key."""
+        if column not in _LOOKUP_COLUMNS:
+            raise ValueError(f"unsupported lookup column: {column}")
+        if not key:
+            return None
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT s.ticket_id FROM ticket_snapshots s
+                WHERE s.{column} = ? AND s.status != 'CLOSED'
+                  AND s.id = (SELECT MAX(id) FROM ticket_snapshots WHERE ticket_id = s.ticket_id)
+                ORDER BY s.id DESC LIMIT 1
+                """,
+                (key,),
+            ).fetchall()
+        return rows[0][0] if rows else None
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            history_total = self._conn.execute("SELECT COUNT(*) FROM ticket_history").fetchone()[0]
+            snapshot_total = self._conn.execute("SELECT COUNT(*) FROM ticket_snapshots").fetchone()[0]
+            return {
+                "path": self.path,
+                "historyRows": int(history_total),
+                "snapshotRows": int(snapshot_total),
+                "historyRowsWritten": self._history_rows,
+                "snapshotsWritten": self._snapshots,
+                "ticketLoads": self._loads,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
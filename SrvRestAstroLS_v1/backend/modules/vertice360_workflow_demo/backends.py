@@ -0,0 +1,573 @@
+"""Pluggable persistence for the workflow ticket store.
+
+``store.tickets`` stays the in-process working set. A backend decides whether
+that dict is the whole truth (``MemoryTicketBackend``, the default) or a cache in
+front of storage shared by every worker (``SqliteTicketBackend`` for a single
+host, ``PostgresTicketBackend`` across hosts). Shared backends provide atomic
+ticket-number allocation and a per-conversation lock held for the whole inbound
+turn, so ``VERTICE360_UVICORN_WORKERS>1`` no longer splits conversations.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from threading import Lock
+from typing import Any, AsyncIterator, Iterable, Protocol
+
+from backend.services.keyed_mutex import KeyedAsyncMutex
+from backend.telemetry import metrics
+
+try:
+    import psycopg  # type: ignore
+    from psycopg.types.json import Jsonb  # type: ignore
+except ImportError:  # pragma: no cover - depends on runtime env
+    psycopg = None
+    Jsonb = None
+
+try:
+    from psycopg_pool import ConnectionPool  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    ConnectionPool = None
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_COLUMNS = ("phone_key", "conversation_key")
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str, separators=(",", ":"))
+
+
+def _check_column(column: str) -> str:
+    if column not in LOOKUP_COLUMNS:
+        raise ValueError(f"unsupported lookup column: {column}")
+    return column
+
+
+class TicketBackend(Protocol):
+    shared: bool
+
+    def next_ticket_number(self) -> int: ...
+
+    def advance_ticket_number(self, floor: int) -> None: ...
+
+    def load_ticket(self, ticket_id: str) -> dict[str, Any] | None: ...
+
+    def load_all(self) -> list[dict[str, Any]]: ...
+
+    def save_ticket(self, ticket: dict[str, Any], *, status: str, phone_key: str, conversation_key: str) -> None: ...
+
+    def save_tickets(self, rows: Iterable[tuple[dict[str, Any], str, str, str]]) -> int: ...
+
+    def find_active_ticket_id(self, column: str, key: str) -> str | None: ...
+
+    def conversation_lock(self, key: str) -> Any: ...
+
+    def lock_stats(self) -> dict[str, Any]: ...
+
+    def reset(self) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class MemoryTicketBackend:
+    """Single-process backend: ``store.tickets`` is the source of truth."""
+
+    shared = False
+
+    def __init__(self) -> None:
+        self._last_number = 0
+        self._sequence_lock = Lock()
+        self._locks = KeyedAsyncMutex("workflow.conversation_lock")
+
+    def next_ticket_number(self) -> int:
+        with self._sequence_lock:
+            self._last_number += 1
+            return self._last_number
+
+    def advance_ticket_number(self, floor: int) -> None:
+        with self._sequence_lock:
+            self._last_number = max(self._last_number, int(floor))
+
+    def load_ticket(self, ticket_id: str) -> dict[str, Any] | None:
+        return None
+
+    def load_all(self) -> list[dict[str, Any]]:
+        return []
+
+    def save_ticket(self, ticket: dict[str, Any], *, status: str, phone_key: str, conversation_key: str) -> None:
+        return None
+
+    def save_tickets(self, rows: Iterable[tuple[dict[str, Any], str, str, str]]) -> int:
+        return sum(1 for _ in rows)
+
+    def find_active_ticket_id(self, column: str, key: str) -> str | None:
+        return None
+
+    @asynccontextmanager
+    async def conversation_lock(self, key: str) -> AsyncIterator[None]:
+        async with self._locks.hold(key):
+            yield
+
+    def lock_stats(self) -> dict[str, Any]:
+        return self._locks.stats()
+
+    def reset(self) -> None:
+        with self._sequence_lock:
+            self._last_number = 0
+
+    def close(self) -> None:
+        return None
+
+
+_SQLITE_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS workflow_tickets (
+        ticket_id TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        phone_key TEXT,
+        conversation_key TEXT,
+        created_at INTEGER NOT NULL,
+        payload TEXT NOT NULL,
+        updated_at INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_workflow_tickets_phone ON workflow_tickets (phone_key, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_workflow_tickets_conversation ON workflow_tickets (conversation_key, created_at)",
+    "CREATE TABLE IF NOT EXISTS workflow_sequences (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO workflow_sequences (name, value) VALUES ('ticket', 0)",
+    """
+    CREATE TABLE IF NOT EXISTS workflow_conversation_locks (
+        conversation_key TEXT PRIMARY KEY,
+        owner TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    )
+    """,
+)
+
+
+class SqliteTicketBackend:
+    """Local SQLite (WAL) backend shared by every worker on one host.
+
+    Conversation locks are leased rows in ``workflow_conversation_locks``; a
+    lease outlives a crashed worker by at most ``lock_ttl_seconds``. While a
+    turn runs, a heartbeat renews the lease every third of the TTL, so slow
+    (LLM-backed) turns keep it.
+    """
+
+    shared = True
+
+    def __init__(self, path: str, *, lock_ttl_seconds: float = 30.0, busy_timeout_ms: int = 5000) -> None:
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.lock_ttl_seconds = float(lock_ttl_seconds)
+        self._conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            isolation_level=None,
+            timeout=busy_timeout_ms / 1000.0,
+        )
+        self._lock = Lock()
+        self._locks = KeyedAsyncMutex("workflow.conversation_lock")
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SQLITE_SCHEMA:
+                self._conn.execute(statement)
+
+    def _write(self, statements: list[tuple[str, Any]]) -> list[list[Any]]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursors = [
+                    self._conn.executemany(sql, params) if isinstance(params, list) else self._conn.execute(sql, params)
+                    for sql, params in statements
+                ]
+                results = [cursor.fetchall() for cursor in cursors]
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return results
+
+    def next_ticket_number(self) -> int:
+        (rows,) = self._write(
+            [("UPDATE workflow_sequences SET value = value + 1 WHERE name = 'ticket' RETURNING value", ())]
+        )
+        return int(rows[0][0])
+
+    def advance_ticket_number(self, floor: int) -> None:
+        self._write([("UPDATE workflow_sequences SET value = MAX(value, ?) WHERE name = 'ticket'", (int(floor),))])
+
+    def load_ticket(self, ticket_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM workflow_tickets WHERE ticket_id = ?", (ticket_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def load_all(self) -> list[dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM workflow_tickets ORDER BY created_at, ticket_id"
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    @staticmethod
+    def _row(ticket: dict[str, Any], status: str, phone_key: str, conversation_key: str) -> tuple[Any, ...]:
+        return (
+            str(ticket.get("ticketId")),
+            status,
+            phone_key or None,
+            conversation_key or None,
+            int(ticket.get("createdAt") or 0),
+            _dumps(ticket),
+            int(time.time() * 1000),
+        )
+
+    _UPSERT = """
+        INSERT INTO workflow_tickets
+            (ticket_id, status, phone_key, conversation_key, created_at, payload, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (ticket_id) DO UPDATE SET
+            status = excluded.status,
+            phone_key = excluded.phone_key,
+            conversation_key = excluded.conversation_key,
+            payload = excluded.payload,
+            updated_at = excluded.updated_at
+    """
+
+    def save_ticket(self, ticket: dict[str, Any], *, status: str, phone_key: str, conversation_key: str) -> None:
+        self._write([(self._UPSERT, self._row(ticket, status, phone_key, conversation_key))])
+
+    def save_tickets(self, rows: Iterable[tuple[dict[str, Any], str, str, str]]) -> int:
+        params = [self._row(*row) for row in rows]
+        if params:
+            self._write([(self._UPSERT, params)])
+        return len(params)
+
+    def find_active_ticket_id(self, column: str, key: str) -> str | None:
+        if not key:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                f"""
+                SELECT ticket_id FROM workflow_tickets
+                WHERE {_check_column(column)} = ? AND status != 'CLOSED'
+                ORDER BY created_at DESC, ticket_id DESC LIMIT 1
+                """,
+                (key,),
+            ).fetchone()
+        return row[0] if row else None
+
+    def _try_acquire(self, key: str, owner: str) -> bool:
+        now = time.time()
+        _, inserted = self._write(
+            [
+                ("DELETE FROM workflow_conversation_locks WHERE conversation_key = ? AND expires_at < ?", (key, now)),
+                (
+                    "INSERT OR IGNORE INTO workflow_conversation_locks (conversation_key, owner, expires_at) "
+                    "VALUES (?, ?, ?) RETURNING owner",
+                    (key, owner, now + self.lock_ttl_seconds),
+                ),
+            ]
+        )
+        return bool(inserted)
+
+    def _renew(self, key: str, owner: str) -> bool:
+        (renewed,) = self._write(
+            [
+                (
+                    "UPDATE workflow_conversation_locks SET expires_at = ? "
+                    "WHERE conversation_key = ? AND owner = ? RETURNING owner",
+                    (time.time() + self.lock_ttl_seconds, key, owner),
+                )
+            ]
+        )
+        return bool(renewed)
+
+    def _release(self, key: str, owner: str) -> bool:
+        (released,) = self._write(
+            [
+                (
+                    "DELETE FROM workflow_conversation_locks WHERE conversation_key = ? AND owner = ? RETURNING owner",
+                    (key, owner),
+                )
+            ]
+        )
+        return bool(released)
+
+    async def _heartbeat(self, key: str, owner: str) -> None:
+        interval = self.lock_ttl_seconds / 3.0
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                renewed = await asyncio.to_thread(self._renew, key, owner)
+            except Exception as exc:  # noqa: BLE001 - retry on the next beat while the lease lasts
+                logger.warning("WORKFLOW_LOCK_RENEW_FAILED key=%s error=%s", key, exc)
+                continue
+            if not renewed:
+                metrics.inc("workflow.conversation_lock.lost")
+                logger.warning("WORKFLOW_LOCK_LOST key=%s owner=%s", key, owner)
+                return
+
+    @asynccontextmanager
+    async def conversation_lock(self, key: str) -> AsyncIterator[None]:
+        # The local lock keeps same-process waiters off the polling loop.
+        async with self._locks.hold(key):
+            owner = uuid.uuid4().hex
+            delay = 0.005
+            while not await asyncio.to_thread(self._try_acquire, key, owner):
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.2)
+            heartbeat = asyncio.get_running_loop().create_task(self._heartbeat(key, owner))
+            try:
+                yield
+            finally:
+                heartbeat.cancel()
+                await asyncio.gather(heartbeat, return_exceptions=True)
+                if not await asyncio.to_thread(self._release, key, owner):
+                    # Another worker took the expired lease mid-turn; leave its row alone.
+                    metrics.inc("workflow.conversation_lock.lost")
+                    logger.warning("WORKFLOW_LOCK_RELEASE_NOT_OWNER key=%s owner=%s", key, owner)
+
+    def lock_stats(self) -> dict[str, Any]:
+        return self._locks.stats()
+
+    def reset(self) -> None:
+        self._write(
+            [
+                ("DELETE FROM workflow_tickets", ()),
+                ("DELETE FROM workflow_conversation_locks", ()),
+                ("UPDATE workflow_sequences SET value = 0 WHERE name = 'ticket'", ()),
+            ]
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_PG_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS workflow_tickets (
+        ticket_id text PRIMARY KEY,
+        status text NOT NULL,
+        phone_key text,
+        conversation_key text,
+        created_at bigint NOT NULL,
+        payload jsonb NOT NULL,
+        updated_at timestamptz NOT NULL DEFAULT now()
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_workflow_tickets_phone_active
+        ON workflow_tickets (phone_key, created_at DESC) WHERE status <> 'CLOSED'
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_workflow_tickets_conversation_active
+        ON workflow_tickets (conversation_key, created_at DESC) WHERE status <> 'CLOSED'
+    """,
+    "CREATE SEQUENCE IF NOT EXISTS workflow_ticket_seq",
+    "CREATE TABLE IF NOT EXISTS workflow_conversation_locks (conversation_key text PRIMARY KEY)",
+)
+
+
+class PostgresTicketBackend:
+    """Postgres backend for workers spread across hosts.
+
+    Ticket numbers come from a sequence; the conversation lock is a
+    ``SELECT ... FOR UPDATE`` on the conversation's row, held until the turn
+    finishes on a connection from a separate lock pool. Turns holding locks
+    therefore never starve the reads and writes the turn itself needs.
+    """
+
+    shared = True
+
+    def __init__(
+        self,
+        conninfo: str,
+        *,
+        min_size: int = 1,
+        max_size: int = 8,
+        lock_max_size: int = 16,
+        lock_timeout_seconds: float = 30.0,
+    ) -> None:
+        if psycopg is None or ConnectionPool is None:
+            raise RuntimeError(
+                "psycopg and psycopg_pool are required for the postgres workflow store. "
+                "Install with: uv add psycopg[binary] psycopg_pool"
+            )
+        self._pool = ConnectionPool(
+            conninfo=conninfo,
+            min_size=min_size,
+            max_size=max_size,
+            kwargs={"autocommit": True},
+        )
+        lock_max_size = max(1, int(lock_max_size))
+        self._lock_pool = ConnectionPool(
+            conninfo=conninfo,
+            min_size=1,
+            max_size=lock_max_size,
+            kwargs={"autocommit": True},
+        )
+        # Turns beyond the lock pool wait here, not on a thread blocked in getconn().
+        self._lock_slots = asyncio.Semaphore(lock_max_size)
+        # A holder that never commits must not hang every later turn of the conversation.
+        self._lock_timeout = f"{max(1, int(float(lock_timeout_seconds) * 1000))}ms"
+        self._locks = KeyedAsyncMutex("workflow.conversation_lock")
+        with self._pool.connection() as conn:
+            for statement in _PG_SCHEMA:
+                conn.execute(statement)
+
+    def next_ticket_number(self) -> int:
+        with self._pool.connection() as conn:
+            return int(conn.execute("SELECT nextval('workflow_ticket_seq')").fetchone()[0])
+
+    def advance_ticket_number(self, floor: int) -> None:
+        if floor < 1:
+            return
+        with self._pool.connection() as conn:
+            conn.execute(
+                """
+                SELECT setval('workflow_ticket_seq', %s)
+                FROM workflow_ticket_seq
+                WHERE NOT is_called OR last_value < %s
+                """,
+                (int(floor), int(floor)),
+            )
+
+    def load_ticket(self, ticket_id: str) -> dict[str, Any] | None:
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                "SELECT payload FROM workflow_tickets WHERE ticket_id = %s", (ticket_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def load_all(self) -> list[dict[str, Any]]:
+        with self._pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT payload FROM workflow_tickets ORDER BY created_at, ticket_id"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    _UPSERT = """
+        INSERT INTO workflow_tickets
+            (ticket_id, status, phone_key, conversation_key, created_at, payload, updated_at)
+        VALUES (%s, %s, %s, %s, %s, %s, now())
+        ON CONFLICT (ticket_id) DO UPDATE SET
+            status = EXCLUDED.status,
+            phone_key = EXCLUDED.phone_key,
+            conversation_key = EXCLUDED.conversation_key,
+            payload = EXCLUDED.payload,
+            updated_at = now()
+    """
+
+    @staticmethod
+    def _row(ticket: dict[str, Any], status: str, phone_key: str, conversation_key: str) -> tuple[Any, ...]:
+        return (
+            str(ticket.get("ticketId")),
+            status,
+            phone_key or None,
+            conversation_key or None,
+            int(ticket.get("createdAt") or 0),
+            Jsonb(json.loads(_dumps(ticket))),
+        )
+
+    def save_ticket(self, ticket: dict[str, Any], *, status: str, phone_key: str, conversation_key: str) -> None:
+        with self._pool.connection() as conn:
+            conn.execute(self._UPSERT, self._row(ticket, status, phone_key, conversation_key))
+
+    def save_tickets(self, rows: Iterable[tuple[dict[str, Any], str, str, str]]) -> int:
+        params = [self._row(*row) for row in rows]
+        if not params:
+            return 0
+        with self._pool.connection() as conn:
+            with conn.transaction():
+                with conn.cursor() as cur:
+                    cur.executemany(self._UPSERT, params)
+        return len(params)
+
+    def find_active_ticket_id(self, column: str, key: str) -> str | None:
+        if not key:
+            return None
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                f"""
+                SELECT ticket_id FROM workflow_tickets
+                WHERE {_check_column(column)} = %s AND status <> 'CLOSED'
+                ORDER BY created_at DESC, ticket_id DESC LIMIT 1
+                """,
+                (key,),
+            ).fetchone()
+        return row[0] if row else None
+
+    def _acquire_row_lock(self, key: str) -> Any:
+        conn = self._lock_pool.getconn()
+        try:
+            conn.execute(
+                "INSERT INTO workflow_conversation_locks (conversation_key) VALUES (%s) ON CONFLICT DO NOTHING",
+                (key,),
+            )
+            conn.execute("BEGIN")
+            conn.execute("SELECT set_config('lock_timeout', %s, true)", (self._lock_timeout,))
+            conn.execute(
+                "SELECT 1 FROM workflow_conversation_locks WHERE conversation_key = %s FOR UPDATE",
+                (key,),
+            )
+        except Exception:
+            try:
+                conn.execute("ROLLBACK")
+            except Exception:  # noqa: BLE001 - the pool discards broken connections
+                pass
+            self._lock_pool.putconn(conn)
+            raise
+        return conn
+
+    def _release_row_lock(self, conn: Any) -> None:
+        try:
+            conn.execute("COMMIT")
+        finally:
+            self._lock_pool.putconn(conn)
+
+    @asynccontextmanager
+    async def conversation_lock(self, key: str) -> AsyncIterator[None]:
+        async with self._locks.hold(key), self._lock_slots:
+            acquire = asyncio.ensure_future(asyncio.to_thread(self._acquire_row_lock, key))
+            try:
+                conn = await asyncio.shield(acquire)
+            except asyncio.CancelledError:
+                # The thread still takes the row lock; give it back as soon as it does.
+                acquire.add_done_callback(self._release_abandoned_lock)
+                raise
+            try:
+                yield
+            finally:
+                await asyncio.to_thread(self._release_row_lock, conn)
+
+    def _release_abandoned_lock(self, acquire: asyncio.Future[Any]) -> None:
+        if acquire.cancelled() or acquire.exception() is not None:
+            return
+        metrics.inc("workflow.conversation_lock.abandoned")
+        asyncio.get_running_loop().run_in_executor(None, self._release_row_lock, acquire.result())
+
+    def lock_stats(self) -> dict[str, Any]:
+        return self._locks.stats()
+
+    def reset(self) -> None:
+        with self._pool.connection() as conn:
+            with conn.transaction():
+                conn.execute("TRUNCATE workflow_tickets, workflow_conversation_locks")
+                conn.execute("ALTER SEQUENCE workflow_ticket_seq RESTART WITH 1")
+
+    def close(self) -> None:
+        self._lock_pool.close()
+        self._pool.close()
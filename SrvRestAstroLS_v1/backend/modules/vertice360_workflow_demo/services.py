@@ -1,18 +1,17 @@
 from __future__ import annotations
 
 import datetime as dt
-import asyncio
 import hashlib
 import json
 import logging
 import re
 import time
 import unicodedata
-from collections import deque, OrderedDict
-from threading import Lock
+from collections import deque
 from typing import Any
 
 from backend import globalVar
+from backend.modules.messaging.providers.dispatcher import outbound_dispatcher
 from backend.modules.messaging.providers.gupshup.whatsapp.service import (
     GupshupWhatsAppSendError,
     send_text_message as gupshup_send_text,
@@ -23,23 +22,10 @@ from backend.modules.messaging.providers.meta.whatsapp.service import (
 )
 from backend.modules.vertice360_ai_workflow_demo import services as ai_workflow_services
 from backend.modules.vertice360_workflow_demo import commercial_memory, events, store
-
-# Shared lock to protect the user_locks dictionary itself
-_user_locks_registry_lock = Lock()
-_user_locks: dict[str, asyncio.Lock] = {}
-
-
-def _get_user_lock(user_id: str) -> asyncio.Lock:
-    with _user_locks_registry_lock:
-        if user_id not in _user_locks:
-            _user_locks[user_id] = asyncio.Lock()
-        return _user_locks[user_id]
-
+from backend.services.inbound_dedupe import inbound_dedupe
 
 ASSIGNMENT_SLA_MS = 30 * 60 * 1000
 DOC_VALIDATION_SLA_MS = 24 * 60 * 60 * 1000
-INBOUND_DEDUPE_TTL_SECONDS = 600
-INBOUND_DEDUPE_MAX_KEYS = 5000
 WORKFLOW_INTRO_PREFIX = "Soy el asistente de Vértice360 👋. "
 VISIT_SLOT_PROMPT = "Para coordinar visita, decime día y franja horaria."
 SHORT_ACK_TOKENS = {
@@ -81,8 +67,6 @@ ZONA_CANDIDATE_STOPWORDS = {
 }
 
 logger = logging.getLogger(__name__)
-_inbound_seen_cache: OrderedDict[str, float] = OrderedDict()
-_inbound_seen_lock = Lock()
 
 
 def _is_slot_value_present(value: Any) -> bool:
@@ -127,29 +111,11 @@ def _build_inbound_key(inbound: dict[str, Any], normalized: dict[str, Any]) -> s
 
 
 def _mark_inbound_processed(inbound_key: str) -> bool:
-    now = time.monotonic()
-    cutoff = now - INBOUND_DEDUPE_TTL_SECONDS
-    with _inbound_seen_lock:
-        stale_keys = [
-            key for key, seen_at in _inbound_seen_cache.items() if seen_at < cutoff
-        ]
-        for key in stale_keys:
-            _inbound_seen_cache.pop(key, None)
-        while len(_inbound_seen_cache) > INBOUND_DEDUPE_MAX_KEYS:
-            _inbound_seen_cache.popitem(last=False)
-
-        if inbound_key in _inbound_seen_cache:
-            _inbound_seen_cache.move_to_end(inbound_key)
-            return False
-
-        _inbound_seen_cache[inbound_key] = now
-        _inbound_seen_cache.move_to_end(inbound_key)
-        return True
+    return inbound_dedupe.mark(f"workflow:{inbound_key}")
 
 
 def reset_inbound_dedupe_cache() -> None:
-    with _inbound_seen_lock:
-        _inbound_seen_cache.clear()
+    inbound_dedupe.reset()
 
 
 async def send_text_message(to: str, text: str) -> dict[str, Any]:
@@ -1049,6 +1015,14 @@ async def _send_whatsapp_text(provider: str, to: str, text: str) -> dict[str, An
     return await send_text_message(to, text)
 
 
+def _outbound_line_key(provider: str) -> str:
+    if provider == "gupshup_whatsapp":
+        digits = re.sub(r"\D", "", globalVar.get_gupshup_wa_sender_e164() or "")
+        return f"gupshup:{digits or 'unknown'}"
+    digits = re.sub(r"\D", "", str(globalVar.META_VERTICE360_PHONE_NUMBER_ID or ""))
+    return f"meta:{digits or 'unknown'}"
+
+
 async def _send_whatsapp_text_with_context(
     provider: str,
     to: str,
@@ -1086,7 +1060,11 @@ async def _send_whatsapp_text_with_context(
             correlation_id or "-",
         )
     try:
-        result = await _send_whatsapp_text(provider, to, text)
+        result = await outbound_dispatcher.dispatch(
+            "gupshup" if is_gupshup else "meta",
+            _outbound_line_key(provider),
+            lambda: _send_whatsapp_text(provider, to, text),
+        )
     except Exception as exc:
         if is_gupshup:
             logger.warning(
@@ -1255,9 +1233,9 @@ def _build_commercial_summary(slots: dict[str, Any]) -> str:
 async def process_inbound_message(inbound: dict[str, Any]) -> dict[str, Any]:
     normalized = _normalize_inbound(inbound)
     user_id = normalized.get("from") or "unknown"
-    lock = _get_user_lock(user_id)
 
-    async with lock:
+    # Held across workers when the store runs on a shared backend.
+    async with store.conversation_lock(user_id):
         started_at = time.perf_counter()
         timings_ms: dict[str, int] = {}
         correlation_id = _build_correlation_id(normalized)
@@ -1278,6 +1256,8 @@ async def process_inbound_message(inbound: dict[str, Any]) -> dict[str, Any]:
                         payload["vera_send_ok"] = True
                     elif vera_send_ok is not None:
                         payload["vera_send_ok"] = vera_send_ok
+            if ticket is not None:
+                store.persist_ticket(ticket)
             timings_ms["total_ms"] = _duration_ms(started_at)
             logger.info(
                 "INBOUND_RESULT correlation_id=%s received_at_ms=%s message_id=%s user_phone=%s ticket_id=%s outcome=%s decision=%s answered=%s missing=%s handoff_required=%s handoff_stage=%s actions=%s timings_ms=%s",
@@ -1,17 +1,59 @@
 from __future__ import annotations
 
+import asyncio
+import copy
 import datetime as dt
 import itertools
 import logging
+import sys
 import unicodedata
-from typing import Any
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
 
+from backend import globalVar
 from backend.modules.vertice360_workflow_demo import events
+from backend.modules.vertice360_workflow_demo.archive import TicketArchive
+from backend.modules.vertice360_workflow_demo.backends import (
+    MemoryTicketBackend,
+    PostgresTicketBackend,
+    SqliteTicketBackend,
+    TicketBackend,
+)
+from backend.telemetry import metrics
 
 
-_ticket_sequence = itertools.count(1)
 tickets: dict[str, dict[str, Any]] = {}
+# Secondary indexes over ``tickets``. Phone and conversation-key indexes only hold
+# active (non-CLOSED) tickets; the latest one wins by insertion rank.
+_active_by_phone: dict[str, set[str]] = {}
+_active_by_conversation: dict[str, set[str]] = {}
+_ids_by_status: dict[str, set[str]] = {}
+_indexed_keys: dict[str, tuple[str, str, str]] = {}
+_ticket_rank: dict[str, int] = {}
+_rank_sequence = itertools.count(1)
+_archive: TicketArchive | None = None
+TICKET_ID_PREFIX = "VTX-"
+_backend: TicketBackend = MemoryTicketBackend()
+# Shared-backend write-behind: ticket id -> (generation, ticket) not yet saved.
+_dirty: dict[str, tuple[int, dict[str, Any]]] = {}
+_write_generation = itertools.count(1)
+_writer: asyncio.Task[None] | None = None
+STORE_BACKEND = globalVar.get_env_str("V360_WORKFLOW_STORE_BACKEND", "memory").strip().lower() or "memory"
+_last_sweep_ms = 0
 TIMELINE_DEDUPE_WINDOW_MS = 2000
+# Per-ticket ring buffer caps; older entries spill to the archive when one is configured.
+TICKET_MAX_MESSAGES = globalVar.get_env_int("V360_WORKFLOW_TICKET_MAX_MESSAGES", 200, minimum=1)
+TICKET_MAX_TIMELINE = globalVar.get_env_int("V360_WORKFLOW_TICKET_MAX_TIMELINE", 200, minimum=1)
+# Eviction to the archive (only when V360_WORKFLOW_ARCHIVE_PATH is set).
+CLOSED_TICKET_EVICT_SECONDS = globalVar.get_env_int(
+    "V360_WORKFLOW_CLOSED_TICKET_EVICT_SECONDS", 300, minimum=0
+)
+IDLE_TICKET_EVICT_SECONDS = globalVar.get_env_int(
+    "V360_WORKFLOW_IDLE_TICKET_EVICT_SECONDS", 86400, minimum=0
+)
+ARCHIVE_SWEEP_INTERVAL_SECONDS = globalVar.get_env_int(
+    "V360_WORKFLOW_ARCHIVE_SWEEP_INTERVAL_SECONDS", 60, minimum=0
+)
 _RESET_COMMANDS = {
     "reiniciar",
     "empezar de nuevo",
@@ -286,18 +328,355 @@ def _append_timeline_event(
         return last_event, False
     timeline_event = _build_timeline_event(name, value, now_ms)
     timeline.append(timeline_event)
+    _cap_history(ticket, "timeline", TICKET_MAX_TIMELINE)
     return timeline_event, True
 
 
+def configure_archive(path: str | None) -> TicketArchive | None:
+    """Open (or with ``None`` detach) the archive used for spill-over and eviction."""
+    global _archive
+    if _archive is not None:
+        _archive.close()
+    _archive = TicketArchive(path) if path else None
+    _seed_ticket_sequence()
+    return _archive
+
+
+def _seed_ticket_sequence() -> None:
+    """Start numbering after the newest archived ticket so ids are never reused."""
+    if _archive is not None:
+        _backend.advance_ticket_number(_archive.max_ticket_number(TICKET_ID_PREFIX))
+
+
+def _cap_history(ticket: dict[str, Any], key: str, cap: int) -> None:
+    entries = ticket.get(key)
+    if not isinstance(entries, list) or len(entries) <= cap:
+        return
+    overflow = len(entries) - cap
+    spilled = entries[:overflow]
+    del entries[:overflow]
+    counter = f"{key}Archived"
+    ticket[counter] = int(ticket.get(counter) or 0) + overflow
+    if _archive is not None and ticket.get("ticketId"):
+        _archive.append_history(str(ticket["ticketId"]), key, spilled)
+    metrics.inc("workflow.ticket.history_spilled", {"kind": key})
+
+
+def enforce_history_caps(ticket: dict[str, Any]) -> None:
+    """Trim ``messages``/``timeline`` to their caps after an in-place append."""
+    _cap_history(ticket, "messages", TICKET_MAX_MESSAGES)
+    _cap_history(ticket, "timeline", TICKET_MAX_TIMELINE)
+
+
+def archived_history(ticket_id: str, kind: str, limit: int | None = None) -> list[dict[str, Any]]:
+    if _archive is None or kind not in ("messages", "timeline"):
+        return []
+    return _archive.load_history(ticket_id, kind, limit)
+
+
+def _restore_ticket(ticket_id: str) -> dict[str, Any] | None:
+    if _archive is None or not ticket_id:
+        return None
+    ticket = _archive.load_ticket(ticket_id)
+    if ticket is None:
+        return None
+    tickets[ticket_id] = ticket
+    _index_ticket(ticket_id)
+    metrics.inc("workflow.ticket.restored")
+    logger.info("TICKET_RESTORED ticket_id=%s status=%s", ticket_id, ticket.get("status"))
+    return ticket
+
+
+def get_ticket(ticket_id: str, *, refresh: bool = False) -> dict[str, Any] | None:
+    """Ticket from memory, lazily reloaded from the shared backend or the archive.
+
+    ``refresh=True`` re-reads a shared backend even when the ticket is cached, to
+    pick up writes made by other workers. Async callers use ``aget_ticket``.
+    """
+    ticket = tickets.get(ticket_id)
+    if not _needs_backend_read(ticket_id, ticket, refresh):
+        return ticket if ticket is not None else _restore_ticket(ticket_id)
+    return _resolve_loaded(ticket_id, ticket, _backend.load_ticket(ticket_id))
+
+
+async def aget_ticket(ticket_id: str, *, refresh: bool = False) -> dict[str, Any] | None:
+    """``get_ticket`` with the shared-backend read off the event loop."""
+    ticket = tickets.get(ticket_id)
+    if not _needs_backend_read(ticket_id, ticket, refresh):
+        return ticket if ticket is not None else _restore_ticket(ticket_id)
+    stored = await asyncio.to_thread(_backend.load_ticket, ticket_id)
+    return _resolve_loaded(ticket_id, tickets.get(ticket_id), stored)
+
+
+def _needs_backend_read(ticket_id: str, ticket: dict[str, Any] | None, refresh: bool) -> bool:
+    if not _backend.shared or not ticket_id:
+        return False
+    if ticket is None:
+        return True
+    # A ticket with unsaved writes is newer locally than in the backend.
+    return refresh and ticket_id not in _dirty
+
+
+def _resolve_loaded(
+    ticket_id: str, ticket: dict[str, Any] | None, stored: dict[str, Any] | None
+) -> dict[str, Any] | None:
+    if stored is not None and ticket_id not in _dirty:
+        return _merge_loaded_ticket(stored)
+    if ticket is not None:
+        return ticket
+    return _restore_ticket(ticket_id)
+
+
+def all_tickets() -> list[dict[str, Any]]:
+    if _backend.shared:
+        load_from_backend()
+    return list(tickets.values())
+
+
+def evict_inactive_tickets(now_ms: int | None = None) -> int:
+    """Move closed and idle tickets to the archive; returns how many were evicted."""
+    if _archive is None:
+        return 0
+    now = _epoch_ms() if now_ms is None else now_ms
+    closed_cutoff = now - CLOSED_TICKET_EVICT_SECONDS * 1000
+    idle_cutoff = now - IDLE_TICKET_EVICT_SECONDS * 1000
+    evicted = 0
+    for ticket_id, ticket in list(tickets.items()):
+        updated_at = int(ticket.get("updatedAt") or 0)
+        phone_key, conversation_key, status = _ticket_index_keys(ticket)
+        if status == "CLOSED":
+            if updated_at > closed_cutoff:
+                continue
+        elif updated_at > idle_cutoff:
+            continue
+        _archive.archive_ticket(
+            ticket,
+            status=status,
+            phone_key=phone_key,
+            conversation_key=conversation_key,
+        )
+        del tickets[ticket_id]
+        _index_ticket(ticket_id)
+        evicted += 1
+    if evicted:
+        metrics.inc("workflow.ticket.evicted")
+        logger.info("TICKETS_EVICTED count=%s remaining=%s", evicted, len(tickets))
+    return evicted
+
+
+def _maybe_evict_inactive_tickets() -> None:
+    global _last_sweep_ms
+    if _archive is None:
+        return
+    now_ms = _epoch_ms()
+    if now_ms - _last_sweep_ms < ARCHIVE_SWEEP_INTERVAL_SECONDS * 1000:
+        return
+    _last_sweep_ms = now_ms
+    evict_inactive_tickets(now_ms)
+
+
+def _approx_size(value: Any, seen: set[int] | None = None) -> int:
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_approx_size(k, seen) + _approx_size(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_approx_size(item, seen) for item in value)
+    return size
+
+
+async def aticket_memory_report() -> dict[str, Any]:
+    """``ticket_memory_report`` with the archive's SQLite stats read off the event loop."""
+    report = ticket_memory_report(include_archive=False)
+    report["archive"] = await asyncio.to_thread(_archive.stats) if _archive is not None else None
+    return report
+
+
+def ticket_memory_report(*, include_archive: bool = True) -> dict[str, Any]:
+    rows = []
+    for ticket_id, ticket in tickets.items():
+        rows.append(
+            {
+                "ticketId": ticket_id,
+                "status": ticket.get("status"),
+                "messages": len(ticket.get("messages") or []),
+                "timeline": len(ticket.get("timeline") or []),
+                "messagesArchived": int(ticket.get("messagesArchived") or 0),
+                "timelineArchived": int(ticket.get("timelineArchived") or 0),
+                "approxBytes": _approx_size(ticket),
+            }
+        )
+    rows.sort(key=lambda row: row["approxBytes"], reverse=True)
+    return {
+        "ticketCount": len(rows),
+        "totalApproxBytes": sum(row["approxBytes"] for row in rows),
+        "caps": {"messages": TICKET_MAX_MESSAGES, "timeline": TICKET_MAX_TIMELINE},
+        "archive": _archive.stats() if include_archive and _archive is not None else None,
+        "tickets": rows,
+    }
+
+
+def _open_backend(kind: str, *, path: str | None = None, conninfo: str | None = None) -> TicketBackend:
+    kind = str(kind or "memory").strip().lower()
+    if kind == "memory":
+        return MemoryTicketBackend()
+    if kind == "sqlite":
+        return SqliteTicketBackend(
+            path or globalVar.get_env_str("V360_WORKFLOW_STORE_SQLITE_PATH", "").strip()
+            or "data/workflow_store.sqlite3",
+            lock_ttl_seconds=globalVar.get_env_int("V360_WORKFLOW_STORE_LOCK_TTL_SECONDS", 30, minimum=1),
+        )
+    if kind == "postgres":
+        return PostgresTicketBackend(
+            conninfo
+            or globalVar.get_env_str("V360_WORKFLOW_STORE_PG_URL", "").strip()
+            or globalVar.get_v360_db_url(),
+            max_size=globalVar.get_env_int("V360_WORKFLOW_STORE_PG_POOL_MAX_SIZE", 8, minimum=2),
+            lock_max_size=globalVar.get_env_int("V360_WORKFLOW_STORE_PG_LOCK_POOL_MAX_SIZE", 16, minimum=1),
+            lock_timeout_seconds=globalVar.get_env_int("V360_WORKFLOW_STORE_PG_LOCK_TIMEOUT_SECONDS", 30, minimum=1),
+        )
+    raise ValueError(f"unknown workflow store backend: {kind}")
+
+
+def configure_backend(
+    kind: str, *, path: str | None = None, conninfo: str | None = None
+) -> TicketBackend:
+    """Swap the ticket backend ("memory", "sqlite" or "postgres").
+
+    The local working set is dropped; shared backends reload tickets lazily.
+    """
+    global _backend
+    backend = _open_backend(kind, path=path, conninfo=conninfo)
+    _backend.close()
+    _backend = backend
+    _dirty.clear()
+    tickets.clear()
+    _seed_ticket_sequence()
+    rebuild_indexes()
+    return backend
+
+
+@asynccontextmanager
+async def conversation_lock(key: str) -> AsyncIterator[None]:
+    """Serialize one conversation's turn across workers.
+
+    The turn's ticket writes are flushed before the lock is released, so the
+    next worker to take it reads them.
+    """
+    async with _backend.conversation_lock(str(key or "unknown")):
+        try:
+            yield
+        finally:
+            await flush_ticket_writes()
+
+
+def conversation_lock_stats() -> dict[str, Any]:
+    return _backend.lock_stats()
+
+
+def persist_ticket(ticket: dict[str, Any]) -> None:
+    """Save a ticket to a shared backend.
+
+    Inside an event loop the write is queued and done by a single writer task
+    in a thread, latest state wins; without a loop it is written inline.
+    """
+    if not _backend.shared or not ticket.get("ticketId"):
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        phone_key, conversation_key, status = _ticket_index_keys(ticket)
+        _backend.save_ticket(ticket, status=status, phone_key=phone_key, conversation_key=conversation_key)
+        return
+    global _writer
+    _dirty[str(ticket["ticketId"])] = (next(_write_generation), ticket)
+    if _writer is None or _writer.done() or _writer.get_loop() is not loop:
+        _writer = loop.create_task(_write_dirty_tickets())
+
+
+async def _write_dirty_tickets() -> None:
+    while _dirty:
+        batch = dict(_dirty)
+        # Detached copies: the loop keeps mutating tickets while the thread serializes.
+        rows = []
+        for ticket in (item[1] for item in batch.values()):
+            phone_key, conversation_key, status = _ticket_index_keys(ticket)
+            rows.append((copy.deepcopy(ticket), status, phone_key, conversation_key))
+        try:
+            await asyncio.to_thread(_backend.save_tickets, rows)
+        except Exception as exc:  # noqa: BLE001 - keep them dirty for the next flush
+            logger.warning("WORKFLOW_TICKET_WRITE_FAILED tickets=%s error=%s", len(rows), exc)
+            return
+        for ticket_id, (generation, _) in batch.items():
+            if ticket_id in _dirty and _dirty[ticket_id][0] == generation:
+                del _dirty[ticket_id]
+
+
+async def flush_ticket_writes() -> None:
+    """Wait until every queued ticket write reached the shared backend."""
+    global _writer
+    writer = _writer
+    if writer is not None and not writer.done() and writer.get_loop() is asyncio.get_running_loop():
+        await asyncio.shield(writer)
+    if _dirty:
+        _writer = asyncio.get_running_loop().create_task(_write_dirty_tickets())
+        await asyncio.shield(_writer)
+
+
+def bulk_load_tickets(items: list[dict[str, Any]]) -> int:
+    """Insert many tickets at once (migrations, replays) with a single backend write."""
+    rows = []
+    for ticket in items:
+        ticket_id = str(ticket.get("ticketId") or "").strip()
+        if not ticket_id:
+            continue
+        tickets[ticket_id] = ticket
+        _index_ticket(ticket_id)
+        rows.append((ticket, *_ticket_index_keys(ticket)))
+    return _backend.save_tickets(
+        (ticket, status, phone_key, conversation_key) for ticket, phone_key, conversation_key, status in rows
+    )
+
+
+def load_from_backend() -> int:
+    """Refresh the local working set with every ticket held by a shared backend."""
+    loaded = 0
+    for ticket in _backend.load_all():
+        _merge_loaded_ticket(ticket)
+        loaded += 1
+    return loaded
+
+
+def _merge_loaded_ticket(ticket: dict[str, Any]) -> dict[str, Any]:
+    ticket_id = str(ticket["ticketId"])
+    local = tickets.get(ticket_id)
+    if local is None:
+        tickets[ticket_id] = ticket
+        local = ticket
+    elif local is not ticket:
+        # Update in place so references held by the caller stay valid.
+        local.clear()
+        local.update(ticket)
+    _index_ticket(ticket_id)
+    return local
+
+
 def generate_ticket_id() -> str:
-    return f"VTX-{next(_ticket_sequence):04d}"
+    return f"{TICKET_ID_PREFIX}{_backend.next_ticket_number():04d}"
 
 
-def _reserve_ticket_id() -> str:
-    ticket_id = generate_ticket_id()
-    while ticket_id in tickets:
-        ticket_id = generate_ticket_id()
-    return ticket_id
+async def _reserve_ticket_id() -> str:
+    while True:
+        if _backend.shared:
+            number = await asyncio.to_thread(_backend.next_ticket_number)
+        else:
+            number = _backend.next_ticket_number()
+        ticket_id = f"{TICKET_ID_PREFIX}{number:04d}"
+        if ticket_id not in tickets and (_archive is None or not _archive.has_ticket(ticket_id)):
+            return ticket_id
 
 
 def _apply_inbound_updates(
@@ -330,22 +709,162 @@ def _apply_inbound_updates(
     return patch
 
 
+def _ticket_index_keys(ticket: dict[str, Any]) -> tuple[str, str, str]:
+    phone_key = _normalize_phone_key((ticket.get("customer") or {}).get("from"))
+    conversation_key = str(ticket.get("conversationKey") or "").strip().lower()
+    if not conversation_key:
+        conversation_key = str(_conversation_key_from_ticket(ticket) or "").strip().lower()
+    status = str(ticket.get("status") or "").upper()
+    return phone_key, conversation_key, status
+
+
+def _index_discard(index: dict[str, set[str]], key: str, ticket_id: str) -> None:
+    ids = index.get(key)
+    if ids is None:
+        return
+    ids.discard(ticket_id)
+    if not ids:
+        del index[key]
+
+
+def _unindex_ticket(ticket_id: str) -> None:
+    previous = _indexed_keys.pop(ticket_id, None)
+    if previous is None:
+        return
+    phone_key, conversation_key, status = previous
+    _index_discard(_active_by_phone, phone_key, ticket_id)
+    _index_discard(_active_by_conversation, conversation_key, ticket_id)
+    _index_discard(_ids_by_status, status, ticket_id)
+
+
+def _index_ticket(ticket_id: str) -> None:
+    ticket = tickets.get(ticket_id)
+    if ticket is None:
+        _unindex_ticket(ticket_id)
+        _ticket_rank.pop(ticket_id, None)
+        return
+    keys = _ticket_index_keys(ticket)
+    if _indexed_keys.get(ticket_id) == keys:
+        return
+    _unindex_ticket(ticket_id)
+    if ticket_id not in _ticket_rank:
+        _ticket_rank[ticket_id] = next(_rank_sequence)
+    phone_key, conversation_key, status = keys
+    _ids_by_status.setdefault(status, set()).add(ticket_id)
+    if status != "CLOSED":
+        if phone_key:
+            _active_by_phone.setdefault(phone_key, set()).add(ticket_id)
+        if conversation_key:
+            _active_by_conversation.setdefault(conversation_key, set()).add(ticket_id)
+    _indexed_keys[ticket_id] = keys
+
+
+def rebuild_indexes() -> None:
+    global _rank_sequence
+    _active_by_phone.clear()
+    _active_by_conversation.clear()
+    _ids_by_status.clear()
+    _indexed_keys.clear()
+    _ticket_rank.clear()
+    _rank_sequence = itertools.count(1)
+    for ticket_id in tickets:
+        _index_ticket(ticket_id)
+
+
+def _ensure_indexes() -> None:
+    # Tickets inserted straight into ``tickets`` (fixtures, diagnostics) bypass the
+    # store helpers; catch up once instead of scanning on every lookup.
+    if len(_indexed_keys) != len(tickets):
+        rebuild_indexes()
+
+
+def reindex_ticket(ticket_id: str) -> None:
+    """Refresh indexes after a caller mutated status/customer/conversationKey in place."""
+    _index_ticket(ticket_id)
+
+
+def ticket_ids_by_status(status: str) -> list[str]:
+    _ensure_indexes()
+    ids = _ids_by_status.get(str(status or "").upper()) or set()
+    return sorted(ids, key=_ticket_rank.__getitem__)
+
+
+def _latest_active_ticket(
+    index: dict[str, set[str]], key: str, archive_column: str
+) -> dict[str, Any] | None:
+    if _backend.shared:
+        shared_id = _backend.find_active_ticket_id(archive_column, key)
+        if shared_id:
+            return get_ticket(shared_id, refresh=True)
+    return _latest_local_active_ticket(index, key, archive_column)
+
+
+async def _alatest_active_ticket(
+    index: dict[str, set[str]], key: str, archive_column: str
+) -> dict[str, Any] | None:
+    if _backend.shared:
+        shared_id = await asyncio.to_thread(_backend.find_active_ticket_id, archive_column, key)
+        if shared_id:
+            return await aget_ticket(shared_id, refresh=True)
+    return _latest_local_active_ticket(index, key, archive_column)
+
+
+def _latest_local_active_ticket(
+    index: dict[str, set[str]], key: str, archive_column: str
+) -> dict[str, Any] | None:
+    _ensure_indexes()
+    ids = index.get(key)
+    if ids:
+        return tickets.get(max(ids, key=_ticket_rank.__getitem__))
+    if _archive is None:
+        return None
+    archived_id = _archive.find_active_ticket_id(archive_column, key)
+    if not archived_id or archived_id in tickets:
+        return None
+    return _restore_ticket(archived_id)
+
+
+def check_index_consistency() -> list[str]:
+    """Compare the maintained indexes with a fresh scan; returns the mismatches found."""
+    expected_phone: dict[str, set[str]] = {}
+    expected_conversation: dict[str, set[str]] = {}
+    expected_status: dict[str, set[str]] = {}
+    for ticket_id, ticket in tickets.items():
+        phone_key, conversation_key, status = _ticket_index_keys(ticket)
+        expected_status.setdefault(status, set()).add(ticket_id)
+        if status == "CLOSED":
+            continue
+        if phone_key:
+            expected_phone.setdefault(phone_key, set()).add(ticket_id)
+        if conversation_key:
+            expected_conversation.setdefault(conversation_key, set()).add(ticket_id)
+
+    problems: list[str] = []
+    for name, expected, actual in (
+        ("phone", expected_phone, _active_by_phone),
+        ("conversation", expected_conversation, _active_by_conversation),
+        ("status", expected_status, _ids_by_status),
+    ):
+        for key in sorted(set(expected) | set(actual)):
+            want = expected.get(key, set())
+            have = actual.get(key, set())
+            if want != have:
+                problems.append(
+                    f"{name}[{key}]: missing={sorted(want - have)} stale={sorted(have - want)}"
+                )
+    unranked = sorted(set(tickets) - set(_ticket_rank))
+    if unranked:
+        problems.append(f"rank: missing={unranked}")
+    return problems
+
+
 def _find_active_ticket_by_phone(phone: str) -> dict[str, Any] | None:
     if not phone:
         return None
     phone_key = _normalize_phone_key(phone)
     if not phone_key:
         return None
-    # Reverse search to find latest
-    for ticket in reversed(tickets.values()):
-        # Check matching phone
-        t_phone = _normalize_phone_key((ticket.get("customer") or {}).get("from"))
-        if t_phone == phone_key:
-            # Check if active (not closed)
-            status = str(ticket.get("status") or "").upper()
-            if status != "CLOSED":
-                return ticket
-    return None
+    return _latest_active_ticket(_active_by_phone, phone_key, "phone_key")
 
 
 def _find_active_ticket_by_conversation_key(
@@ -353,18 +872,20 @@ def _find_active_ticket_by_conversation_key(
 ) -> dict[str, Any] | None:
     if not conversation_key:
         return None
-    for ticket in reversed(tickets.values()):
-        status = str(ticket.get("status") or "").upper()
-        if status == "CLOSED":
-            continue
-        ticket_key = str(ticket.get("conversationKey") or "").strip().lower()
-        if not ticket_key:
-            ticket_key = (
-                str(_conversation_key_from_ticket(ticket) or "").strip().lower()
-            )
-        if ticket_key and ticket_key == conversation_key:
+    return _latest_active_ticket(_active_by_conversation, conversation_key, "conversation_key")
+
+
+async def _afind_active_ticket(
+    conversation_key: str | None, phone: str | None
+) -> dict[str, Any] | None:
+    if conversation_key:
+        ticket = await _alatest_active_ticket(_active_by_conversation, conversation_key, "conversation_key")
+        if ticket:
             return ticket
-    return None
+    phone_key = _normalize_phone_key(phone) if phone else ""
+    if not phone_key:
+        return None
+    return await _alatest_active_ticket(_active_by_phone, phone_key, "phone_key")
 
 
 async def create_or_get_ticket_from_inbound(inbound: dict[str, Any]) -> dict[str, Any]:
@@ -372,10 +893,12 @@ async def create_or_get_ticket_from_inbound(inbound: dict[str, Any]) -> dict[str
     ticket_id = str(raw_ticket_id).strip() if raw_ticket_id is not None else ""
 
     # If explicit ticketId provided, lookup directly
-    if ticket_id and ticket_id in tickets:
+    if ticket_id and await aget_ticket(ticket_id, refresh=True) is not None:
         ticket = tickets[ticket_id]
         prev_status = ticket.get("status")
         patch = _apply_inbound_updates(ticket, inbound)
+        if patch:
+            reindex_ticket(ticket_id)
         next_status = ticket.get("status")
         _ensure_commercial(ticket)
         _ensure_ai_context(ticket)
@@ -396,14 +919,13 @@ async def create_or_get_ticket_from_inbound(inbound: dict[str, Any]) -> dict[str
                     patch,
                     actor="inbound",
                 )
+        persist_ticket(ticket)
         return ticket
 
     # If no ticketId, accept an active ticket for this user conversation key.
     phone = inbound.get("from") or (inbound.get("customer") or {}).get("from")
     conversation_key = _conversation_key_from_inbound(inbound)
-    existing_ticket = _find_active_ticket_by_conversation_key(
-        conversation_key
-    ) or _find_active_ticket_by_phone(phone)
+    existing_ticket = await _afind_active_ticket(conversation_key, phone)
     if existing_ticket:
         _ensure_commercial(existing_ticket)
         _ensure_slot_memory(existing_ticket)
@@ -438,6 +960,8 @@ async def create_or_get_ticket_from_inbound(inbound: dict[str, Any]) -> dict[str
             ticket_id = ticket["ticketId"]
             prev_status = ticket.get("status")
             patch = _apply_inbound_updates(ticket, inbound)
+            if patch:
+                reindex_ticket(ticket_id)
             next_status = ticket.get("status")
             _ensure_commercial(ticket)
             _ensure_ai_context(ticket)
@@ -460,11 +984,13 @@ async def create_or_get_ticket_from_inbound(inbound: dict[str, Any]) -> dict[str
                         patch,
                         actor="inbound",
                     )
+            persist_ticket(ticket)
             return ticket
 
     # Create new if none found
+    _maybe_evict_inactive_tickets()
     if not ticket_id:
-        ticket_id = _reserve_ticket_id()
+        ticket_id = await _reserve_ticket_id()
     now_ms = _epoch_ms()
     ticket = {
         "ticketId": ticket_id,
@@ -550,12 +1076,14 @@ async def create_or_get_ticket_from_inbound(inbound: dict[str, Any]) -> dict[str
     )
     _append_timeline_event(ticket, events.TICKET_CREATED, inbound)
     tickets[ticket_id] = ticket
+    reindex_ticket(ticket_id)
+    persist_ticket(ticket)
     await events.emit_ticket_created(ticket)
     return ticket
 
 
 async def assign_ticket(ticket_id: str, assignee: Any) -> dict[str, Any]:
-    ticket = tickets.get(ticket_id)
+    ticket = await aget_ticket(ticket_id)
     if not ticket:
         raise KeyError("ticket not found")
     if ticket.get("assignee") == assignee:
@@ -572,6 +1100,7 @@ async def assign_ticket(ticket_id: str, assignee: Any) -> dict[str, Any]:
         events.TICKET_ASSIGNED,
         {"assignee": assignee, "dueAt": assignment_due_at},
     )
+    persist_ticket(ticket)
     if appended:
         await events.emit_ticket_assigned(ticket_id, assignee, assignment_due_at)
     return ticket
@@ -583,7 +1112,7 @@ async def set_status(
     actor: str | None = "system",
     patch: dict[str, Any] | None = None,
 ) -> dict[str, Any]:
-    ticket = tickets.get(ticket_id)
+    ticket = await aget_ticket(ticket_id)
     if not ticket:
         raise KeyError("ticket not found")
     prev_status = ticket.get("status")
@@ -619,12 +1148,14 @@ async def set_status(
     if not changed:
         return ticket
 
+    reindex_ticket(ticket_id)
     _touch(ticket)
     _, appended = _append_timeline_event(
         ticket,
         events.TICKET_UPDATED,
         {"patch": patch_payload},
     )
+    persist_ticket(ticket)
     if appended:
         await events.emit_ticket_updated(
             ticket_id,
@@ -639,41 +1170,46 @@ async def set_status(
 async def add_timeline_event(
     ticket_id: str, name: str, value: dict[str, Any] | None = None
 ) -> dict[str, Any]:
-    ticket = tickets.get(ticket_id)
+    ticket = await aget_ticket(ticket_id)
     if not ticket:
         raise KeyError("ticket not found")
     timeline_event, appended = _append_timeline_event(ticket, name, value)
     if appended:
         _touch(ticket)
+        persist_ticket(ticket)
         await events.emit_event(name, ticket_id, {"timeline": timeline_event})
     return timeline_event
 
 
 async def close_ticket(ticket_id: str, reason: str | None = None) -> dict[str, Any]:
-    ticket = tickets.get(ticket_id)
+    ticket = await aget_ticket(ticket_id)
     if not ticket:
         raise KeyError("ticket not found")
     ticket["status"] = "CLOSED"
+    reindex_ticket(ticket_id)
     _touch(ticket)
     timeline_value = {"reason": reason} if reason else {}
     _, appended = _append_timeline_event(ticket, events.TICKET_CLOSED, timeline_value)
+    persist_ticket(ticket)
     if appended:
         await events.emit_ticket_closed(ticket_id, reason)
     return ticket
 
 
 def add_message(ticket_id: str, message: dict[str, Any]) -> None:
-    ticket = tickets.get(ticket_id)
+    ticket = get_ticket(ticket_id)
     if not ticket:
         raise KeyError("ticket not found")
     ticket.setdefault("messages", []).append(message)
+    _cap_history(ticket, "messages", TICKET_MAX_MESSAGES)
     ticket["lastMessageText"] = message.get("text")
     ticket["lastMessageAt"] = message.get("at")
     _touch(ticket)
+    persist_ticket(ticket)
 
 
 def update_ticket_commercial(ticket_id: str, patch: dict[str, Any]) -> dict[str, Any]:
-    ticket = tickets.get(ticket_id)
+    ticket = get_ticket(ticket_id)
     if not ticket:
         raise KeyError("ticket not found")
     commercial = _ensure_commercial(ticket)
@@ -691,22 +1227,24 @@ def update_ticket_commercial(ticket_id: str, patch: dict[str, Any]) -> dict[str,
             slots[key] = commercial.get(key)
     if changed:
         _touch(ticket)
+        persist_ticket(ticket)
     return commercial
 
 
 def set_pending_action(ticket_id: str, action: str | None) -> None:
-    ticket = tickets.get(ticket_id)
+    ticket = get_ticket(ticket_id)
     if not ticket:
         raise KeyError("ticket not found")
     if ticket.get("pendingAction") != action:
         ticket["pendingAction"] = action
         _touch(ticket)
+        persist_ticket(ticket)
 
 
 def set_handoff_required(
     ticket_id: str, required: bool, action: str | None = "schedule_visit"
 ) -> None:
-    ticket = tickets.get(ticket_id)
+    ticket = get_ticket(ticket_id)
     if not ticket:
         raise KeyError("ticket not found")
     required_bool = bool(required)
@@ -724,12 +1262,13 @@ def set_handoff_required(
         changed = True
     if changed:
         _touch(ticket)
+        persist_ticket(ticket)
 
 
 def set_handoff_stage(
     ticket_id: str, stage: str | None, operator_name: str | None = None
 ) -> None:
-    ticket = tickets.get(ticket_id)
+    ticket = get_ticket(ticket_id)
     if not ticket:
         raise KeyError("ticket not found")
     normalized_stage = str(stage).strip().lower() if stage is not None else None
@@ -764,16 +1303,30 @@ def set_handoff_stage(
 
     if changed:
         _touch(ticket)
+        persist_ticket(ticket)
 
 
 def touch_ticket(ticket_id: str) -> None:
-    ticket = tickets.get(ticket_id)
+    ticket = get_ticket(ticket_id)
     if not ticket:
         raise KeyError("ticket not found")
     _touch(ticket)
+    persist_ticket(ticket)
 
 
 def reset_store() -> None:
-    global _ticket_sequence
+    global _last_sweep_ms
     tickets.clear()
-    _ticket_sequence = itertools.count(1)
+    _last_sweep_ms = 0
+    _dirty.clear()
+    _backend.reset()
+    _seed_ticket_sequence()
+    rebuild_indexes()
+
+
+if STORE_BACKEND != "memory":
+    _backend = _open_backend(STORE_BACKEND)
+
+_ARCHIVE_PATH = globalVar.get_env_str("V360_WORKFLOW_ARCHIVE_PATH", "").strip()
+if _ARCHIVE_PATH:
+    configure_archive(_ARCHIVE_PATH)
@@ -6,9 +6,11 @@ from typing import Any
 
 from litestar import Router, Request, post
 from litestar.exceptions import HTTPException
+from litestar.response import Stream
 from pydantic import BaseModel, Field
 
-from services.demo_codex_chat import run_demo_chat
+from backend.modules.agui_stream import build_sse_headers, stream_text_message
+from services.demo_codex_chat import run_demo_chat, stream_demo_chat
 
 
 class ChatMessage(BaseModel):
@@ -37,10 +39,23 @@ async def chat_with_lain_graph(request: Request) -> ChatResponse:
     try:
         body = await request.json()
         payload = ChatRequest.model_validate(body)
-        result = run_demo_chat(prompt=payload.prompt, history=[m.dict() for m in payload.history])
+        result = await run_demo_chat(prompt=payload.prompt, history=[m.dict() for m in payload.history])
     except Exception as exc:  # pragma: no cover - queremos devolver el detalle al front
         raise HTTPException(status_code=500, detail=str(exc)) from exc
     return ChatResponse(**result)
 
 
-router = Router(path="/api/demo/codex", route_handlers=[chat_with_lain_graph])
+@post("/chat/stream", tags=["demo", "codex", "chat"], status_code=200)
+async def stream_chat_with_lain_graph(request: Request) -> Stream:
+    """Igual que /chat pero emite los tokens como eventos AG-UI TEXT_MESSAGE_* por SSE."""
+    try:
+        body = await request.json()
+        payload = ChatRequest.model_validate(body)
+        llm_stream = stream_demo_chat(prompt=payload.prompt, history=[m.dict() for m in payload.history])
+    except Exception as exc:  # pragma: no cover - queremos devolver el detalle al front
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    headers = build_sse_headers(request.headers.get("origin"))
+    return Stream(content=stream_text_message(llm_stream), media_type="text/event-stream", headers=headers)
+
+
+router = Router(path="/api/demo/codex", route_handlers=[chat_with_lain_graph, stream_chat_with_lain_graph])
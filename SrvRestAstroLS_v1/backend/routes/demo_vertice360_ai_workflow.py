@@ -2,12 +2,21 @@ from __future__ import annotations
 
 from typing import Any
 
-from litestar import Router, get, post
+from litestar import Request, Router, get, post
 from litestar.exceptions import HTTPException
+from litestar.response import Stream
 
+from backend.modules.agui_stream import build_sse_headers
 from backend.modules.vertice360_ai_workflow_demo import services
-from backend.modules.vertice360_ai_workflow_demo.schemas import ResetRequest, RunRequest, SendReplyRequest
+from backend.modules.vertice360_ai_workflow_demo.schemas import (
+    BatchRunRequest,
+    ReplyStreamRequest,
+    ResetRequest,
+    RunRequest,
+    SendReplyRequest,
+)
 from backend.modules.vertice360_workflow_demo import services as workflow_services
+from backend.routes.demo_vertice360_orquestador import _validate_admin_reset_access
 
 
 @get("/workflows")
@@ -43,9 +52,48 @@ async def create_run(data: RunRequest) -> dict[str, Any]:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
+@post("/runs/batch", status_code=200)
+async def create_batch_run(data: BatchRunRequest) -> dict[str, Any]:
+    mode = (data.mode or services.DEFAULT_MODE).strip().lower()
+    if mode not in services.ALLOWED_MODES:
+        raise HTTPException(status_code=400, detail="Invalid mode. Use heuristic or llm.")
+    inputs = [item if isinstance(item, str) else item.model_dump() for item in data.inputs]
+    try:
+        return await services.run_workflow_batch(
+            data.workflowId,
+            inputs,
+            mode,
+            concurrency=data.concurrency,
+            record=data.record,
+            include_results=data.includeResults,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
 @get("/runs")
-async def list_runs() -> list[dict[str, Any]]:
-    return services.list_runs()
+async def list_runs(
+    limit: int = 50,
+    before: str | None = None,
+    status: str | None = None,
+    ticketId: str | None = None,  # noqa: N803 - query parameter name
+) -> list[dict[str, Any]]:
+    try:
+        return services.list_runs(limit=limit, before=before, status=status, ticket_id=ticketId)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@get("/debug/run-log")
+async def run_log_stats() -> dict[str, Any]:
+    return services.run_log_stats()
+
+
+@post("/admin/run-log/clear", status_code=200)
+async def clear_run_log(request: Request) -> dict[str, Any]:
+    """Erase the durable run history; ``/reset`` only clears the hot cache."""
+    _validate_admin_reset_access(request)
+    return services.clear_run_log()
 
 
 @get("/runs/{run_id:str}")
@@ -56,6 +104,18 @@ async def get_run(run_id: str) -> dict[str, Any]:
     return run
 
 
+@post("/runs/{run_id:str}/reply/stream", status_code=200)
+async def stream_run_reply(run_id: str, data: ReplyStreamRequest, request: Request) -> Stream:
+    try:
+        events = services.stream_run_reply(run_id, data.maxChars)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail="Run not found") from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    headers = build_sse_headers(request.headers.get("origin"))
+    return Stream(content=events, media_type="text/event-stream", headers=headers)
+
+
 @post("/reset")
 async def reset_demo(data: ResetRequest) -> dict[str, Any]:
     return await services.reset_demo(data.reason)
@@ -80,8 +140,12 @@ router = Router(
         list_workflows,
         get_workflow,
         create_run,
+        create_batch_run,
         list_runs,
+        run_log_stats,
+        clear_run_log,
         get_run,
+        stream_run_reply,
         reset_demo,
         send_reply,
     ],
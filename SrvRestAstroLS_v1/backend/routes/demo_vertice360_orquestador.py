@@ -81,6 +81,50 @@ async def knowledge_debug_project(request: Request, code: str) -> dict[str, Any]
         raise _map_service_error(exc) from exc
 
 
+@get("/knowledge/debug/intent-cache")
+async def knowledge_debug_intent_cache(request: Request) -> dict[str, Any]:
+    try:
+        _validate_admin_reset_access(request)
+        return services.intent_cache_stats()
+    except HTTPException:
+        raise
+    except Exception as exc:  # noqa: BLE001
+        raise _map_service_error(exc) from exc
+
+
+@get("/debug/inbound-dedupe")
+async def debug_inbound_dedupe(request: Request) -> dict[str, Any]:
+    try:
+        _validate_admin_reset_access(request)
+        return services.inbound_dedupe_stats()
+    except HTTPException:
+        raise
+    except Exception as exc:  # noqa: BLE001
+        raise _map_service_error(exc) from exc
+
+
+@get("/debug/outbound")
+async def debug_outbound(request: Request) -> dict[str, Any]:
+    try:
+        _validate_admin_reset_access(request)
+        return services.outbound_dispatch_stats()
+    except HTTPException:
+        raise
+    except Exception as exc:  # noqa: BLE001
+        raise _map_service_error(exc) from exc
+
+
+@get("/debug/delivery-status")
+async def debug_delivery_status(request: Request) -> dict[str, Any]:
+    try:
+        _validate_admin_reset_access(request)
+        return services.delivery_status_stats()
+    except HTTPException:
+        raise
+    except Exception as exc:  # noqa: BLE001
+        raise _map_service_error(exc) from exc
+
+
 @get("/ticket/{ticket_id:str}")
 async def ticket_detail(ticket_id: str) -> dict[str, Any]:
     try:
@@ -176,6 +220,10 @@ router = Router(
         dashboard,
         knowledge_capabilities,
         knowledge_debug_project,
+        knowledge_debug_intent_cache,
+        debug_inbound_dedupe,
+        debug_outbound,
+        debug_delivery_status,
         ticket_detail,
         ingest_message,
         admin_reset_phone,
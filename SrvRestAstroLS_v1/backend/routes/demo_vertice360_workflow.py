@@ -3,11 +3,12 @@ from __future__ import annotations
 import time
 from typing import Any
 
-from litestar import Controller, Router, get, post
+from litestar import Controller, Request, Router, get, post
 from litestar.exceptions import HTTPException
 
 from backend.modules.agui_stream import broadcaster
 from backend.modules.vertice360_workflow_demo import events, store
+from backend.routes.demo_vertice360_orquestador import _validate_admin_reset_access
 
 
 ALLOWED_STATUSES = {"OPEN", "IN_PROGRESS", "WAITING_DOCS", "ESCALATED", "CLOSED"}
@@ -25,8 +26,8 @@ def _ensure_payload_keys(payload: dict[str, Any], required: list[str]) -> None:
         raise HTTPException(status_code=400, detail=f"Missing fields: {', '.join(missing)}")
 
 
-def _get_ticket_or_404(ticket_id: str) -> dict[str, Any]:
-    ticket = store.tickets.get(ticket_id)
+async def _get_ticket_or_404(ticket_id: str) -> dict[str, Any]:
+    ticket = await store.aget_ticket(ticket_id, refresh=True)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
     return ticket
@@ -102,6 +103,7 @@ def _append_timeline_event(ticket: dict[str, Any], name: str, value: dict[str, A
             "value": value,
         }
     )
+    store.enforce_history_caps(ticket)
 
 
 class WorkflowTicketsController(Controller):
@@ -110,21 +112,26 @@ class WorkflowTicketsController(Controller):
     @get("")
     async def list_tickets(self) -> list[dict[str, Any]]:
         items = sorted(
-            store.tickets.values(),
+            store.all_tickets(),
             key=lambda ticket: ticket.get("updatedAt") or 0,
             reverse=True,
         )
         return [_ticket_summary(ticket) for ticket in items]
 
+    @get("/memory")
+    async def tickets_memory(self, request: Request) -> dict[str, Any]:
+        _validate_admin_reset_access(request)
+        return await store.aticket_memory_report()
+
     @get("/{ticket_id:str}")
     async def ticket_detail(self, ticket_id: str) -> dict[str, Any]:
-        ticket = _get_ticket_or_404(ticket_id)
+        ticket = await _get_ticket_or_404(ticket_id)
         return _ticket_detail(ticket)
 
     @post("/{ticket_id:str}/assign")
     async def assign_ticket(self, ticket_id: str, data: dict[str, Any]) -> dict[str, Any]:
         _ensure_payload_keys(data, ["team", "name"])
-        ticket = _get_ticket_or_404(ticket_id)
+        ticket = await _get_ticket_or_404(ticket_id)
         await store.assign_ticket(ticket_id, {"team": data["team"], "name": data["name"]})
         if (ticket.get("status") or "").upper() == "OPEN":
             await store.set_status(ticket_id, "IN_PROGRESS", actor="agent")
@@ -136,7 +143,7 @@ class WorkflowTicketsController(Controller):
         status = str(data["status"]).upper()
         if status not in ALLOWED_STATUSES:
             raise HTTPException(status_code=400, detail="Invalid status")
-        ticket = _get_ticket_or_404(ticket_id)
+        ticket = await _get_ticket_or_404(ticket_id)
         await store.set_status(ticket_id, status, actor="agent")
         return _ticket_detail(ticket)
 
@@ -147,7 +154,7 @@ class WorkflowTicketsController(Controller):
         if action not in ALLOWED_DOC_ACTIONS:
             raise HTTPException(status_code=400, detail="Invalid docs action")
 
-        ticket = _get_ticket_or_404(ticket_id)
+        ticket = await _get_ticket_or_404(ticket_id)
         patch: dict[str, Any] = {}
         target_status = ticket.get("status") or "OPEN"
 
@@ -175,14 +182,14 @@ class WorkflowTicketsController(Controller):
     @post("/{ticket_id:str}/close")
     async def close_ticket(self, ticket_id: str, data: dict[str, Any]) -> dict[str, Any]:
         _ensure_payload_keys(data, ["resolutionCode"])
-        ticket = _get_ticket_or_404(ticket_id)
+        ticket = await _get_ticket_or_404(ticket_id)
         await store.close_ticket(ticket_id, data["resolutionCode"])
         return _ticket_detail(ticket)
 
     @post("/{ticket_id:str}/escalate")
     async def escalate_ticket(self, ticket_id: str, data: dict[str, Any]) -> dict[str, Any]:
         _ensure_payload_keys(data, ["reason", "toTeam"])
-        ticket = _get_ticket_or_404(ticket_id)
+        ticket = await _get_ticket_or_404(ticket_id)
         prev_status = ticket.get("status")
         escalation = ticket.get("escalation") or {}
         if prev_status == "ESCALATED" and escalation.get("toTeam") == data["toTeam"]:
@@ -207,7 +214,7 @@ class WorkflowTicketsController(Controller):
         if sla_type not in ALLOWED_SLA_TYPES:
             raise HTTPException(status_code=400, detail="Invalid slaType")
 
-        ticket = _get_ticket_or_404(ticket_id)
+        ticket = await _get_ticket_or_404(ticket_id)
         prev_status = ticket.get("status")
 
         sla = ticket.get("sla")
@@ -237,6 +244,7 @@ class WorkflowTicketsController(Controller):
         if ticket.get("status") != "ESCALATED":
             ticket["status"] = "ESCALATED"
             patch["status"] = ticket["status"]
+            store.reindex_ticket(ticket_id)
 
         escalation = ticket.get("escalation") or {}
         should_emit_escalated = (
@@ -255,6 +263,13 @@ class WorkflowTicketsController(Controller):
         return _ticket_detail(ticket)
 
 
+@get("/debug/conversation-locks")
+async def conversation_locks(request: Request) -> dict[str, Any]:
+    # Lock keys are customer phone numbers: same admin guard as the other debug routes.
+    _validate_admin_reset_access(request)
+    return store.conversation_lock_stats()
+
+
 @post("/reset")
 async def reset_demo() -> dict[str, bool]:
     from backend.modules.vertice360_workflow_demo.services import process_inbound_message
@@ -303,5 +318,5 @@ async def reset_demo() -> dict[str, bool]:
 
 router = Router(
     path="/api/demo/vertice360-workflow",
-    route_handlers=[WorkflowTicketsController, reset_demo],
+    route_handlers=[WorkflowTicketsController, conversation_locks, reset_demo],
 )
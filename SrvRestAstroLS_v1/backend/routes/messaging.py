@@ -1,4 +1,5 @@
-from typing import Dict, Any
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+import asyncio
 import hashlib
 import hmac
 import json
@@ -14,10 +15,6 @@ from litestar.enums import MediaType
 
 import globalVar
 from backend.modules.messaging.providers.meta.whatsapp import MetaWhatsAppSendError, send_text_message
-from backend.modules.messaging.providers.meta.whatsapp.mapper import (
-    extract_inbound_messages,
-    extract_status_updates,
-)
 from backend.modules.messaging.providers.gupshup.whatsapp.client import (
     GupshupConfig,
     GupshupHTTPError,
@@ -27,20 +24,30 @@ from backend.modules.messaging.providers.gupshup.whatsapp.service import (
     GupshupWhatsAppSendError,
     GupshupWhatsAppService,
 )
-from backend.modules.messaging.providers.gupshup.whatsapp.mapper import (
-    parse_inbound as gupshup_parse_inbound,
-    parse_status as gupshup_parse_status,
-)
 from backend.modules.messaging.providers.registry import normalize_provider
+from backend.modules.messaging.providers.webhook_decode import (
+    WebhookDecodeError,
+    decode_gupshup_webhook,
+    decode_meta_webhook,
+)
 from backend.modules.agui_stream import broadcaster
 from backend.modules.vertice360_ai_workflow_demo.bridge import maybe_start_ai_workflow_from_inbound
 from backend.modules.vertice360_orquestador_demo import services as orquestador_demo_services
+from backend.modules.vertice360_orquestador_demo.delivery_status import StatusUpdate, delivery_status_ingestor
 from backend.modules.vertice360_workflow_demo.services import process_inbound_message
 from backend.modules.vertice360_workflow_demo import events as workflow_events
 from backend.modules.vertice360_workflow_demo import store as workflow_store
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Full webhook bodies/headers carry phone numbers and message text; dump them only on request.
+WEBHOOK_DEBUG = globalVar.get_env_bool("V360_WEBHOOK_DEBUG", False)
+# Distinct senders of one webhook batch processed at the same time.
+WEBHOOK_SENDER_CONCURRENCY = globalVar.get_env_int("V360_WEBHOOK_SENDER_CONCURRENCY", 8, minimum=1)
+
 
 class MessagingController(Controller):
     path = "/api/v1/messaging"
@@ -72,20 +79,6 @@ def _with_operator_intro(text: str, operator_name: str) -> str:
     return f"{_operator_intro(operator_name)}{clean_text}"
 
 
-def _extract_gupshup_inbound_text(payload: dict[str, Any]) -> str:
-    body = payload.get("payload") if isinstance(payload.get("payload"), dict) else {}
-    body_type = str(body.get("type") or "").strip().lower()
-    if body_type != "text":
-        return ""
-
-    nested = body.get("payload")
-    if isinstance(nested, dict):
-        text = nested.get("text") or nested.get("body")
-    else:
-        text = body.get("text") or body.get("body")
-    return str(text or "").strip()
-
-
 async def _send_whatsapp_unified_payload(provider: str, to: str, text: str) -> tuple[int, Dict[str, Any]]:
     resolved_provider = normalize_provider(provider)
 
@@ -276,7 +269,7 @@ class OperatorWorkflowController(Controller):
         result["message_id"] = message_id
 
         if ticket_id:
-            ticket = workflow_store.tickets.get(ticket_id)
+            ticket = await workflow_store.aget_ticket(ticket_id)
             if ticket:
                 channel = ticket.get("channel") or "whatsapp"
                 workflow_provider = ticket.get("provider") or _workflow_provider(str(resolved_provider))
@@ -457,6 +450,247 @@ def _build_meta_error_payload(exc: Exception) -> Dict[str, Any]:
     }
 
 
+def _submit_delivery_status(
+    provider: str,
+    message_id: str | None,
+    status: str | None,
+    timestamp: str | int | None,
+    line_key: str,
+) -> None:
+    if not message_id or not status:
+        return
+    delivery_status_ingestor.submit(
+        StatusUpdate(
+            provider=provider,
+            provider_message_id=str(message_id),
+            status=str(status).strip().lower(),
+            timestamp_ms=_to_epoch_ms(timestamp),
+            line_key=line_key,
+        )
+    )
+
+
+def _gupshup_status_message_id(status: Any) -> str | None:
+    # Delivery events carry the send ack's messageId as "id"; "gsId" is Gupshup-internal.
+    raw = status.raw if isinstance(status.raw, dict) else {}
+    inner = raw.get("payload") if isinstance(raw.get("payload"), dict) else {}
+    candidate = raw.get("id") or inner.get("id") or status.message_id
+    return str(candidate) if candidate else None
+
+
+async def _handle_gupshup_statuses(status_updates: tuple[Any, ...]) -> None:
+    line_digits = "".join(filter(str.isdigit, str(globalVar.GUPSHUP_SRC_NUMBER or "")))
+    line_key = f"gupshup:{line_digits}" if line_digits else "gupshup:unknown"
+    for status in status_updates:
+        _submit_delivery_status("gupshup", _gupshup_status_message_id(status), status.status, status.timestamp, line_key)
+        value = _compact_value(
+            {
+                "provider": status.provider,
+                "service": status.service,
+                "message_id": status.message_id,
+                "status": status.status,
+                "timestamp": status.timestamp,
+                "raw": status.raw,
+            }
+        )
+        await broadcaster.publish(
+            "messaging.status",
+            _custom_event("messaging.status", value, status.message_id),
+        )
+
+
+async def _process_by_sender(
+    items: list[T],
+    sender_of: Callable[[T], str],
+    handle: Callable[[T], Awaitable[R]],
+    *,
+    limit: int | None = None,
+) -> list[R]:
+    """Run ``handle`` over ``items``: one sender's items strictly in order, different senders concurrently.
+
+    At most ``limit`` senders run at once; results are returned in input order.
+    """
+    groups: dict[str, list[int]] = {}
+    for index, item in enumerate(items):
+        groups.setdefault(sender_of(item), []).append(index)
+    results: list[Any] = [None] * len(items)
+    if len(groups) <= 1:
+        for index, item in enumerate(items):
+            results[index] = await handle(item)
+        return results
+
+    semaphore = asyncio.Semaphore(limit or WEBHOOK_SENDER_CONCURRENCY)
+
+    async def _run_sender(indexes: list[int]) -> None:
+        async with semaphore:
+            for index in indexes:
+                results[index] = await handle(items[index])
+
+    await asyncio.gather(*(_run_sender(indexes) for indexes in groups.values()))
+    return results
+
+
+async def _process_meta_inbound(message: Dict[str, Any], tenant_ctx: Dict[str, Any] | None) -> None:
+    value = _compact_value(
+        {
+            "provider": "meta",
+            "service": "whatsapp",
+            "wa_id": message.get("wa_id"),
+            "from": message.get("from"),
+            "to": message.get("to"),
+            "text": message.get("text"),
+            "timestamp": message.get("timestamp"),
+            "message_id": message.get("message_id"),
+            "media_count": message.get("media_count"),
+            "raw": message.get("raw"),
+        }
+    )
+    wf_inbound = {
+        "provider": "meta_whatsapp",
+        "channel": "whatsapp",
+        "from": message.get("from") or message.get("wa_id") or "",
+        "to": message.get("to") or "",
+        "messageId": message.get("message_id") or "",
+        "text": message.get("text") or "",
+        "timestamp": _to_epoch_ms(message.get("timestamp")),
+        "mediaCount": message.get("media_count") or 0,
+    }
+    ticket_id = None
+    try:
+        ai_result = await maybe_start_ai_workflow_from_inbound(message, broadcaster, tenant_ctx)
+        if ai_result and ai_result.get("responseText"):
+            wf_inbound["aiResponseText"] = ai_result["responseText"]
+        if ai_result and ai_result.get("decision"):
+            wf_inbound["aiDecision"] = ai_result["decision"]
+        if ai_result and ai_result.get("handoffRequired") is not None:
+            wf_inbound["aiHandoffRequired"] = bool(ai_result.get("handoffRequired"))
+        if ai_result and isinstance(ai_result.get("humanActionRequired"), dict):
+            wf_inbound["humanActionRequired"] = ai_result["humanActionRequired"]
+        wf_result = await process_inbound_message(wf_inbound)
+        ticket_id = wf_result.get("ticketId")
+    except Exception as exc:  # noqa: BLE001 - best-effort webhook
+        ticket_id = wf_inbound.get("ticketId")
+        logger.warning(
+            "META_INBOUND_FAILED message_id=%s from=%s error=%s",
+            message.get("message_id"),
+            message.get("from"),
+            exc,
+        )
+        error_value = _compact_value(
+            {
+                "ticketId": ticket_id,
+                "messageId": message.get("message_id"),
+                "from": message.get("from"),
+                "error": str(exc),
+            }
+        )
+        correlation_id = ticket_id or "workflow"
+        await broadcaster.publish(
+            "workflow.error",
+            _custom_event("workflow.error", error_value, correlation_id),
+        )
+
+    await broadcaster.publish(
+        "messaging.inbound.raw",
+        _custom_event("messaging.inbound.raw", value, message.get("message_id")),
+    )
+
+
+async def _process_gupshup_inbound(message: Any, gupshup_app: str | None) -> tuple[bool, bool]:
+    """Route one inbound message to the orquestador; returns ``(routed, vera_send_ok)``."""
+    routed = False
+    vera_send_ok = False
+    message_id = message.message_id or f"gupshup-noid-{uuid.uuid4().hex[:8]}"
+    correlation_id = f"gupshup_whatsapp:{message_id}"
+    value = _compact_value(
+        {
+            "provider": message.provider,
+            "service": message.service,
+            "wa_id": message.wa_id,
+            "from": message.from_,
+            "to": message.to,
+            "text": message.text,
+            "timestamp": message.timestamp,
+            "message_id": message_id,
+            "raw": message.raw,
+        }
+    )
+
+    ticket_id = None
+    sanitized_from = "".join(filter(str.isdigit, message.from_ or message.wa_id or ""))
+    sanitized_to = "".join(filter(str.isdigit, message.to or ""))
+    fallback_line_digits = "".join(filter(str.isdigit, str(globalVar.GUPSHUP_SRC_NUMBER or "")))
+    inbound_line_digits = sanitized_to or fallback_line_digits
+    inbound_line_phone = f"+{inbound_line_digits}" if inbound_line_digits else None
+    inbound_line_key = f"gupshup:{inbound_line_digits}" if inbound_line_digits else "gupshup:unknown"
+    sanitized_phone = f"+{sanitized_from}" if sanitized_from else ""
+    message_text = str(message.text or "").strip()
+
+    try:
+        logger.info(
+            "GUPSHUP_ROUTE_DECISION route=orquestador event_type=message phone=%s message_id=%s",
+            sanitized_phone or "-",
+            message_id,
+        )
+        orq_started_at = time.perf_counter()
+        orq_result = await orquestador_demo_services.ingest_from_provider(
+            user_phone=sanitized_phone,
+            text=message_text,
+            provider="gupshup_whatsapp",
+            provider_message_id=message_id,
+            provider_meta={
+                "app": gupshup_app,
+                "channel": "whatsapp",
+                "from": sanitized_phone,
+                "to": f"+{sanitized_to}" if sanitized_to else None,
+                "inbound_line_phone": inbound_line_phone,
+                "inbound_line_key": inbound_line_key,
+            },
+        )
+        orq_ms = int((time.perf_counter() - orq_started_at) * 1000)
+        ticket_id = str(orq_result.get("ticket_id") or "")
+        vera_send_ok = bool(orq_result.get("vera_send_ok"))
+        routed = True
+        logger.info(
+            "GUPSHUP_INBOUND_PROCESSED correlation_id=%s route=orquestador ticket_id=%s orq_ms=%s vera_send_ok=%s",
+            correlation_id,
+            ticket_id or "-",
+            orq_ms,
+            vera_send_ok,
+        )
+    except Exception as exc:  # noqa: BLE001
+        vera_send_ok = False
+        logger.exception(
+            "GUPSHUP_INBOUND_FAILED correlation_id=%s message_id=%s user_phone=%s error=%s",
+            correlation_id,
+            message_id,
+            sanitized_phone or sanitized_from,
+            exc,
+        )
+        error_value = _compact_value(
+            {
+                "ticketId": ticket_id or None,
+                "messageId": message_id,
+                "from": sanitized_phone or message.from_,
+                "error": str(exc),
+            }
+        )
+        await broadcaster.publish(
+            "workflow.error",
+            _custom_event("workflow.error", error_value, ticket_id or "workflow"),
+        )
+
+    await broadcaster.publish(
+        "messaging.inbound",
+        _custom_event("messaging.inbound", value, message_id),
+    )
+    await broadcaster.publish(
+        "messaging.inbound.raw",
+        _custom_event("messaging.inbound.raw", value, message_id),
+    )
+    return routed, vera_send_ok
+
+
 class MetaWhatsAppWebhookController(Controller):
     path = "/webhooks/messaging/meta/whatsapp"
     tags = ["Messaging Webhooks"]
@@ -475,40 +709,36 @@ class MetaWhatsAppWebhookController(Controller):
 
     @post()
     async def receive_webhook(self, request: Request) -> Dict[str, Any]:
-        print("\n" + "="*40)
-        print(f"DEBUG: Webhook POST received at {time.strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"DEBUG: Remote IP: {request.client.host if request.client else 'Unknown'}")
-        
         raw_body = await request.body()
-        body_str = raw_body.decode('utf-8')
-        print(f"DEBUG: Raw Body: {body_str}")
-        print(f"DEBUG: Headers: {dict(request.headers)}")
+        if WEBHOOK_DEBUG:
+            logger.info(
+                "META_WEBHOOK_DEBUG remote_ip=%s headers=%s body=%s",
+                request.client.host if request.client else "-",
+                dict(request.headers),
+                raw_body.decode("utf-8", errors="replace"),
+            )
 
         try:
-            payload = json.loads(body_str)
-        except (json.JSONDecodeError, UnicodeDecodeError) as exc:
-            print(f"DEBUG: JSON Parse Error: {exc}")
+            webhook = decode_meta_webhook(raw_body)
+        except WebhookDecodeError as exc:
+            logger.info("META_WEBHOOK invalid body error=%s", exc)
             raise HTTPException(status_code=400, detail="Invalid JSON") from exc
 
         app_secret = globalVar.META_APP_SECRET_IMOTORSOFT
         signature = request.headers.get("X-Hub-Signature-256")
-        
-        print(f"DEBUG: App Secret exists: {bool(app_secret)}")
-        print(f"DEBUG: signature header: {signature}")
 
         if app_secret and signature:
             expected = "sha256=" + hmac.new(
                 app_secret.encode("utf-8"), raw_body, hashlib.sha256
             ).hexdigest()
             if not hmac.compare_digest(expected, signature):
-                print(f"DEBUG: SIG FAIL! Expected: {expected} | Received: {signature}")
+                logger.warning("META_WEBHOOK signature mismatch")
                 raise HTTPException(status_code=403, detail="Invalid signature")
-            print("DEBUG: SIG OK")
         elif not signature:
-            print("DEBUG: WARNING - No signature header found in request.")
+            logger.debug("META_WEBHOOK no signature header")
 
-        inbound_messages = extract_inbound_messages(payload)
-        status_updates = extract_status_updates(payload)
+        inbound_messages = webhook.inbound
+        status_updates = webhook.statuses
 
         tenant_ctx = {
             "tenant_id": request.scope.get("tenant_id"),
@@ -516,93 +746,40 @@ class MetaWhatsAppWebhookController(Controller):
         }
         if not tenant_ctx["tenant_id"] and not tenant_ctx["tenant_host"]:
             tenant_ctx = None
-        
-        print(f"DEBUG: Inbound messages found: {len(inbound_messages)}")
-        print(f"DEBUG: Status updates found: {len(status_updates)}")
 
-        for message in inbound_messages:
-            value = _compact_value(
-                {
-                    "provider": "meta",
-                    "service": "whatsapp",
-                    "wa_id": message.get("wa_id"),
-                    "from": message.get("from"),
-                    "to": message.get("to"),
-                    "text": message.get("text"),
-                    "timestamp": message.get("timestamp"),
-                    "message_id": message.get("message_id"),
-                    "media_count": message.get("media_count"),
-                    "raw": message.get("raw"),
-                }
-            )
-            print(f"DEBUG: Broadcasting inbound message from {value.get('from')}")
-            wf_inbound = {
-                "provider": "meta_whatsapp",
-                "channel": "whatsapp",
-                "from": message.get("from") or message.get("wa_id") or "",
-                "to": message.get("to") or "",
-                "messageId": message.get("message_id") or "",
-                "text": message.get("text") or "",
-                "timestamp": _to_epoch_ms(message.get("timestamp")),
-                "mediaCount": message.get("media_count") or 0,
-            }
-            ticket_id = None
-            try:
-                ai_result = await maybe_start_ai_workflow_from_inbound(message, broadcaster, tenant_ctx)
-                if ai_result and ai_result.get("responseText"):
-                    wf_inbound["aiResponseText"] = ai_result["responseText"]
-                if ai_result and ai_result.get("decision"):
-                    wf_inbound["aiDecision"] = ai_result["decision"]
-                if ai_result and ai_result.get("handoffRequired") is not None:
-                    wf_inbound["aiHandoffRequired"] = bool(ai_result.get("handoffRequired"))
-                if ai_result and isinstance(ai_result.get("humanActionRequired"), dict):
-                    wf_inbound["humanActionRequired"] = ai_result["humanActionRequired"]
-                wf_result = await process_inbound_message(wf_inbound)
-                ticket_id = wf_result.get("ticketId")
-            except Exception as exc:  # noqa: BLE001 - best-effort webhook
-                ticket_id = wf_inbound.get("ticketId")
-                print(
-                    "ERROR: workflow demo inbound failed",
-                    {
-                        "message_id": message.get("message_id"),
-                        "from": message.get("from"),
-                        "error": str(exc),
-                    },
-                )
-                error_value = _compact_value(
-                    {
-                        "ticketId": ticket_id,
-                        "messageId": message.get("message_id"),
-                        "from": message.get("from"),
-                        "error": str(exc),
-                    }
-                )
-                correlation_id = ticket_id or "workflow"
-                await broadcaster.publish(
-                    "workflow.error",
-                    _custom_event("workflow.error", error_value, correlation_id),
-                )
+        logger.debug(
+            "META_WEBHOOK_RECEIVED inbound=%s statuses=%s", len(inbound_messages), len(status_updates)
+        )
 
-            await broadcaster.publish(
-                "messaging.inbound.raw",
-                _custom_event("messaging.inbound.raw", value, message.get("message_id")),
-            )
+        await _process_by_sender(
+            list(inbound_messages),
+            lambda message: str(message.get("from") or message.get("wa_id") or message.get("message_id") or ""),
+            lambda message: _process_meta_inbound(message, tenant_ctx),
+        )
 
         for status in status_updates:
+            phone_number_id = "".join(filter(str.isdigit, str(status.phone_number_id or "")))
+            _submit_delivery_status(
+                "meta",
+                status.message_id,
+                status.status,
+                status.timestamp,
+                f"meta:{phone_number_id}" if phone_number_id else "meta:unknown",
+            )
             value = _compact_value(
                 {
                     "provider": "meta",
                     "service": "whatsapp",
-                    "wa_id": status.get("wa_id"),
-                    "message_id": status.get("message_id"),
-                    "status": status.get("status"),
-                    "timestamp": status.get("timestamp"),
-                    "raw": status.get("raw"),
+                    "wa_id": status.wa_id,
+                    "message_id": status.message_id,
+                    "status": status.status,
+                    "timestamp": status.timestamp,
+                    "raw": status.raw,
                 }
             )
             await broadcaster.publish(
                 "messaging.status",
-                _custom_event("messaging.status", value, status.get("message_id")),
+                _custom_event("messaging.status", value, status.message_id),
             )
 
         return {"ok": True}
@@ -617,12 +794,12 @@ class GupshupWhatsAppWebhookController(Controller):
         received_at_ms = _to_epoch_ms(None)
         raw_body = await request.body()
         try:
-            payload = json.loads(raw_body.decode("utf-8"))
-        except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+            webhook = decode_gupshup_webhook(raw_body)
+        except WebhookDecodeError as exc:
             raise HTTPException(status_code=400, detail="Invalid JSON") from exc
 
-        event_type = str(payload.get("type") or "").strip().lower()
-        gupshup_app = str(payload.get("app") or "").strip() or None
+        event_type = webhook.event_type
+        gupshup_app = webhook.app
         logger.info(
             "GUPSHUP_WEBHOOK_RECEIVED received_at_ms=%s remote_ip=%s event_type=%s app=%s",
             received_at_ms,
@@ -630,134 +807,36 @@ class GupshupWhatsAppWebhookController(Controller):
             event_type or "-",
             gupshup_app or "-",
         )
+        if WEBHOOK_DEBUG:
+            logger.info("GUPSHUP_WEBHOOK_DEBUG body=%s", raw_body.decode("utf-8", errors="replace"))
+        if event_type == "message-event":
+            # Delivery receipts: persist and broadcast, never routed as inbound.
+            await _handle_gupshup_statuses(webhook.statuses)
+            return {"ok": True}
         if event_type != "message":
             logger.info("GUPSHUP_WEBHOOK ignored event_type=%s reason=non_inbound", event_type or "-")
             return {"ok": True}
 
-        inbound_text = _extract_gupshup_inbound_text(payload)
-        if not inbound_text:
-            payload_type = ""
-            if isinstance(payload.get("payload"), dict):
-                payload_type = str(payload["payload"].get("type") or "").strip().lower()
+        if not webhook.inbound_text:
             logger.info(
                 "GUPSHUP_WEBHOOK ignored event_type=%s payload_type=%s reason=non_text_or_empty",
                 event_type,
-                payload_type or "-",
+                webhook.payload_type or "-",
             )
             return {"ok": True}
 
-        inbound_messages = gupshup_parse_inbound(payload)
-        status_updates = gupshup_parse_status(payload)
+        inbound_messages = webhook.inbound
+        status_updates = webhook.statuses
 
-        vera_send_ok_all = True
-        routed_message_count = 0
-
-        for message in inbound_messages:
-            message_id = message.message_id or f"gupshup-noid-{uuid.uuid4().hex[:8]}"
-            correlation_id = f"gupshup_whatsapp:{message_id}"
-            value = _compact_value(
-                {
-                    "provider": message.provider,
-                    "service": message.service,
-                    "wa_id": message.wa_id,
-                    "from": message.from_,
-                    "to": message.to,
-                    "text": message.text,
-                    "timestamp": message.timestamp,
-                    "message_id": message_id,
-                    "raw": message.raw,
-                }
-            )
-
-            ticket_id = None
-            sanitized_from = "".join(filter(str.isdigit, message.from_ or message.wa_id or ""))
-            sanitized_to = "".join(filter(str.isdigit, message.to or ""))
-            fallback_line_digits = "".join(filter(str.isdigit, str(globalVar.GUPSHUP_SRC_NUMBER or "")))
-            inbound_line_digits = sanitized_to or fallback_line_digits
-            inbound_line_phone = f"+{inbound_line_digits}" if inbound_line_digits else None
-            inbound_line_key = f"gupshup:{inbound_line_digits}" if inbound_line_digits else "gupshup:unknown"
-            sanitized_phone = f"+{sanitized_from}" if sanitized_from else ""
-            message_text = str(message.text or "").strip()
-
-            try:
-                logger.info(
-                    "GUPSHUP_ROUTE_DECISION route=orquestador event_type=message phone=%s message_id=%s",
-                    sanitized_phone or "-",
-                    message_id,
-                )
-                orq_started_at = time.perf_counter()
-                orq_result = await orquestador_demo_services.ingest_from_provider(
-                    user_phone=sanitized_phone,
-                    text=message_text,
-                    provider="gupshup_whatsapp",
-                    provider_message_id=message_id,
-                    provider_meta={
-                        "app": gupshup_app,
-                        "channel": "whatsapp",
-                        "from": sanitized_phone,
-                        "to": f"+{sanitized_to}" if sanitized_to else None,
-                        "inbound_line_phone": inbound_line_phone,
-                        "inbound_line_key": inbound_line_key,
-                    },
-                )
-                orq_ms = int((time.perf_counter() - orq_started_at) * 1000)
-                ticket_id = str(orq_result.get("ticket_id") or "")
-                vera_send_ok = bool(orq_result.get("vera_send_ok"))
-                vera_send_ok_all = vera_send_ok_all and vera_send_ok
-                routed_message_count += 1
-                logger.info(
-                    "GUPSHUP_INBOUND_PROCESSED correlation_id=%s route=orquestador ticket_id=%s orq_ms=%s vera_send_ok=%s",
-                    correlation_id,
-                    ticket_id or "-",
-                    orq_ms,
-                    vera_send_ok,
-                )
-            except Exception as exc:  # noqa: BLE001
-                vera_send_ok_all = False
-                logger.exception(
-                    "GUPSHUP_INBOUND_FAILED correlation_id=%s message_id=%s user_phone=%s error=%s",
-                    correlation_id,
-                    message_id,
-                    sanitized_phone or sanitized_from,
-                    exc,
-                )
-                error_value = _compact_value(
-                    {
-                        "ticketId": ticket_id or None,
-                        "messageId": message_id,
-                        "from": sanitized_phone or message.from_,
-                        "error": str(exc),
-                    }
-                )
-                await broadcaster.publish(
-                    "workflow.error",
-                    _custom_event("workflow.error", error_value, ticket_id or "workflow"),
-                )
-
-            await broadcaster.publish(
-                "messaging.inbound",
-                _custom_event("messaging.inbound", value, message_id),
-            )
-            await broadcaster.publish(
-                "messaging.inbound.raw",
-                _custom_event("messaging.inbound.raw", value, message_id),
-            )
+        outcomes = await _process_by_sender(
+            list(inbound_messages),
+            lambda message: "".join(filter(str.isdigit, message.from_ or message.wa_id or "")),
+            lambda message: _process_gupshup_inbound(message, gupshup_app),
+        )
+        routed_message_count = sum(1 for routed, _ in outcomes if routed)
+        vera_send_ok_all = all(vera_send_ok for _, vera_send_ok in outcomes)
 
-        for status in status_updates:
-            value = _compact_value(
-                {
-                    "provider": status.provider,
-                    "service": status.service,
-                    "message_id": status.message_id,
-                    "status": status.status,
-                    "timestamp": status.timestamp,
-                    "raw": status.raw,
-                }
-            )
-            await broadcaster.publish(
-                "messaging.status",
-                _custom_event("messaging.status", value, status.message_id),
-            )
+        await _handle_gupshup_statuses(status_updates)
 
         if routed_message_count == 0:
             return {"ok": True}
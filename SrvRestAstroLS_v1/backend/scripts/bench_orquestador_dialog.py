@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+ROOT_DIR = BACKEND_DIR.parent
+for path in (ROOT_DIR, BACKEND_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from backend.modules.vertice360_orquestador_demo import services  # noqa: E402
+
+DEFAULT_SUITES = (
+    "tests/test_orquestador_project_dialog_units_and_features.py",
+    "tests/test_vertice360_orquestador_demo_ingest_copy.py",
+)
+DEFAULT_BASELINE = Path(__file__).resolve().with_name("bench_orquestador_dialog_baseline.json")
+STAGES = {
+    "semantic_intent": "_semantic_intent_resolver",
+    "knowledge_reply": "_resolve_project_knowledge_reply",
+}
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+COUNT_KEYS = ("repo_calls_per_turn", "rows_per_turn", "max_repo_calls")
+
+
+def _rows_in(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (list, tuple)):
+        return len(value)
+    if isinstance(value, dict):
+        return 1
+    return 0
+
+
+class _Recorder:
+    """Collects per-turn timings and repo usage while the dialog suites replay."""
+
+    def __init__(self) -> None:
+        self.turns: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        self.failures: list[str] = []
+        self._frames: list[dict[str, Any]] = []
+
+    def wrap_stage(self, stage: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        def _timed(*args: Any, **kwargs: Any) -> Any:
+            frame = {"repo_calls": 0, "rows": 0}
+            self._frames.append(frame)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000.0
+                self._frames.pop()
+                self.turns[stage].append({"elapsed_ms": elapsed_ms, **frame})
+
+        _timed.__wrapped__ = fn  # type: ignore[attr-defined]
+        return _timed
+
+    def record_repo_call(self, result: Any) -> None:
+        rows = _rows_in(result)
+        for frame in self._frames:
+            frame["repo_calls"] += 1
+            frame["rows"] += rows
+
+    def pytest_runtest_logreport(self, report: Any) -> None:
+        if report.failed:
+            self.failures.append(report.nodeid)
+
+
+class _CountingRepo:
+    """Stands in for ``services.repo`` and counts calls routed through it.
+
+    Test stubs are installed with ``monkeypatch.setattr(services.repo, ...)``, so
+    writes are forwarded to the real module (unwrapped) and reads come back wrapped.
+    """
+
+    def __init__(self, module: Any, recorder: _Recorder) -> None:
+        object.__setattr__(self, "_module", module)
+        object.__setattr__(self, "_recorder", recorder)
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self._module, name)
+        if not callable(value) or isinstance(value, type):
+            return value
+        recorder = self._recorder
+
+        def _counted(*args: Any, **kwargs: Any) -> Any:
+            result = value(*args, **kwargs)
+            recorder.record_repo_call(result)
+            return result
+
+        _counted.__wrapped__ = value  # type: ignore[attr-defined]
+        return _counted
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._module, name, getattr(value, "__wrapped__", value))
+
+    def __delattr__(self, name: str) -> None:
+        delattr(self._module, name)
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(turns: dict[str, list[dict[str, Any]]]) -> dict[str, dict[str, Any]]:
+    summary: dict[str, dict[str, Any]] = {}
+    for stage in STAGES:
+        rows = turns.get(stage) or []
+        latencies = [row["elapsed_ms"] for row in rows]
+        count = len(rows)
+        summary[stage] = {
+            "turns": count,
+            "p50_ms": round(_percentile(latencies, 50), 4),
+            "p95_ms": round(_percentile(latencies, 95), 4),
+            "p99_ms": round(_percentile(latencies, 99), 4),
+            "repo_calls_per_turn": round(sum(row["repo_calls"] for row in rows) / count, 4) if count else 0.0,
+            "rows_per_turn": round(sum(row["rows"] for row in rows) / count, 4) if count else 0.0,
+            "max_repo_calls": max((row["repo_calls"] for row in rows), default=0),
+        }
+    return summary
+
+
+def compare_to_baseline(
+    current: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    *,
+    latency_tolerance: float,
+    count_tolerance: float,
+) -> list[str]:
+    regressions: list[str] = []
+    for stage, base in baseline.items():
+        now = current.get(stage) or {}
+        for key in (*LATENCY_KEYS, *COUNT_KEYS):
+            if key not in base or key not in now:
+                continue
+            tolerance = latency_tolerance if key in LATENCY_KEYS else count_tolerance
+            limit = float(base[key]) * (1.0 + tolerance)
+            if float(now[key]) > limit + 1e-9:
+                regressions.append(
+                    f"{stage}.{key}: {now[key]} > baseline {base[key]} (+{tolerance:.0%})"
+                )
+    return regressions
+
+
+def run_suites(suites: list[str], *, repeat: int) -> tuple[dict[str, list[dict[str, Any]]], list[str]]:
+    recorder = _Recorder()
+    original_repo = services.repo
+    originals = {stage: getattr(services, attr) for stage, attr in STAGES.items()}
+    services.repo = _CountingRepo(original_repo, recorder)
+    for stage, attr in STAGES.items():
+        setattr(services, attr, recorder.wrap_stage(stage, originals[stage]))
+    try:
+        for _ in range(max(1, repeat)):
+            pytest.main(
+                ["-q", "-p", "no:cacheprovider", "--rootdir", str(BACKEND_DIR), *suites],
+                plugins=[recorder],
+            )
+    finally:
+        services.repo = original_repo
+        for stage, attr in STAGES.items():
+            setattr(services, attr, originals[stage])
+    return recorder.turns, recorder.failures
+
+
+def _print_summary(summary: dict[str, dict[str, Any]]) -> None:
+    print("")
+    print(f"{'stage':<18}{'turns':>7}{'p50_ms':>10}{'p95_ms':>10}{'p99_ms':>10}{'repo/turn':>11}{'rows/turn':>11}{'max_repo':>10}")
+    for stage, row in summary.items():
+        print(
+            f"{stage:<18}{row['turns']:>7}{row['p50_ms']:>10.3f}{row['p95_ms']:>10.3f}{row['p99_ms']:>10.3f}"
+            f"{row['repo_calls_per_turn']:>11.2f}{row['rows_per_turn']:>11.2f}{row['max_repo_calls']:>10}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Replay the orquestador dialog test conversations and benchmark the dialog engine."
+    )
+    parser.add_argument("suites", nargs="*", default=list(DEFAULT_SUITES), help="Test files to replay (relative to backend/).")
+    parser.add_argument("--repeat", type=int, default=3, help="Replay the suites N times to stabilize percentiles.")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Write the current results as the new baseline.")
+    parser.add_argument("--latency-tolerance", type=float, default=0.5, help="Allowed relative latency growth (0.5 = +50%%).")
+    parser.add_argument("--count-tolerance", type=float, default=0.0, help="Allowed relative growth of repo calls/rows.")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON.")
+    args = parser.parse_args()
+
+    suites = [str((BACKEND_DIR / suite) if not Path(suite).is_absolute() else suite) for suite in args.suites]
+    turns, failures = run_suites(suites, repeat=args.repeat)
+    summary = summarize(turns)
+
+    if args.json:
+        print(json.dumps(summary, indent=2, sort_keys=True))
+    else:
+        _print_summary(summary)
+
+    if failures:
+        print(f"WARN: {len(failures)} replayed test(s) failed; their turns are still measured.")
+        for nodeid in sorted(set(failures)):
+            print(f"  - {nodeid}")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(summary, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    regressions = compare_to_baseline(
+        summary,
+        baseline,
+        latency_tolerance=args.latency_tolerance,
+        count_tolerance=args.count_tolerance,
+    )
+    if regressions:
+        print("FAIL: regressions against baseline:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print("OK: no regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
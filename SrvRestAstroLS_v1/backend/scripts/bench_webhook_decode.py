@@ -0,0 +1,93 @@
+"""Benchmark webhook body decoding: legacy multi-walk path vs single-pass decoder.
+
+Replays every JSON body under ``providers/gupshup/fixtures`` (plus any extra
+``--fixtures`` directory) and reports per-body p50/p95 in microseconds for both
+paths, so regressions in ``webhook_decode`` show up without a running server.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+ROOT_DIR = BACKEND_DIR.parent
+for path in (ROOT_DIR, BACKEND_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from backend.modules.messaging.providers.gupshup.whatsapp.mapper import (  # noqa: E402
+    parse_inbound,
+    parse_status,
+)
+from backend.modules.messaging.providers.webhook_decode import decode_gupshup_webhook  # noqa: E402
+
+DEFAULT_FIXTURES = BACKEND_DIR / "modules" / "messaging" / "providers" / "gupshup" / "fixtures"
+
+
+def _legacy_decode(raw: bytes) -> Any:
+    """What the webhook handler did before: str decode, loads, then one walk per parser."""
+    payload = json.loads(raw.decode("utf-8"))
+    event_type = str(payload.get("type") or "").strip().lower()
+    if event_type == "message-event":
+        return parse_status(payload)
+    body = payload.get("payload") if isinstance(payload.get("payload"), dict) else {}
+    if event_type != "message" or str(body.get("type") or "").strip().lower() != "text":
+        return None
+    return parse_inbound(payload), parse_status(payload)
+
+
+def _time_per_call(fn: Callable[[bytes], Any], bodies: list[bytes], iterations: int) -> list[float]:
+    samples: list[float] = []
+    for _ in range(iterations):
+        for body in bodies:
+            started = time.perf_counter()
+            fn(body)
+            samples.append((time.perf_counter() - started) * 1_000_000.0)
+    return samples
+
+
+def _summary(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "p50_us": round(statistics.median(ordered), 2),
+        "p95_us": round(ordered[int(len(ordered) * 0.95) - 1], 2),
+        "mean_us": round(statistics.fmean(ordered), 2),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", type=Path, action="append", default=[])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    bodies: list[bytes] = []
+    for directory in (DEFAULT_FIXTURES, *args.fixtures):
+        bodies.extend(path.read_bytes() for path in sorted(directory.glob("*.json")))
+    if not bodies:
+        print("no fixtures found", file=sys.stderr)
+        return 1
+
+    # Warm both paths once so imports and caches do not skew the first samples.
+    for body in bodies:
+        _legacy_decode(body)
+        decode_gupshup_webhook(body)
+
+    report = {
+        "bodies": len(bodies),
+        "iterations": args.iterations,
+        "legacy": _summary(_time_per_call(_legacy_decode, bodies, args.iterations)),
+        "single_pass": _summary(_time_per_call(decode_gupshup_webhook, bodies, args.iterations)),
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
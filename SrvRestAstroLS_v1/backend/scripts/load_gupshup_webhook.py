@@ -0,0 +1,487 @@
+"""Synthetic end-to-end load for the Gupshup WhatsApp webhook pipeline.
+
+Drives N concurrent synthetic conversations (scripted Spanish turns) through
+``POST /webhooks/messaging/gupshup/whatsapp`` of a local app and measures, per
+turn, the webhook ack, the time until the reply reaches a stand-in Gupshup HTTP
+server started by this script, and (optionally) the ack of the delivered/read
+receipts posted back for that reply. Nothing leaves the machine: the app is
+pointed at the stand-in via ``GUPSHUP_BASE_URL_DEV`` and, with
+``--scratch-schema``, writes into a scratch Postgres schema cloned by
+``replay_orquestador_conversations.prepare_scratch_schema``. ``--spawn-app``
+requires ``--scratch-schema`` unless ``--allow-live-db`` is passed.
+
+Typical run (spawns the app with the right environment)::
+
+    python backend/scripts/load_gupshup_webhook.py --spawn-app \\
+        --prepare-scratch --scratch-schema load_scratch \\
+        --conversations 50 --concurrency 20 --receipts
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import copy
+import json
+import os
+import random
+import secrets
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+ROOT_DIR = BACKEND_DIR.parent
+for path in (ROOT_DIR, BACKEND_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+FIXTURES_DIR = BACKEND_DIR / "modules" / "messaging" / "providers" / "gupshup" / "fixtures"
+WEBHOOK_PATH = "/webhooks/messaging/gupshup/whatsapp"
+SEND_PATH = "/wa/api/v1/msg"
+LINE_PHONE = "5491100000000"
+STAGES = ("webhook_ack_ms", "reply_ms", "receipt_ack_ms")
+
+# Realistic lead conversations; each synthetic conversation picks one script.
+TURN_SCRIPTS: tuple[tuple[str, ...], ...] = (
+    (
+        "Hola, vi el proyecto en Instagram y quería más información",
+        "¿Qué unidades de 2 ambientes tienen disponibles?",
+        "¿Cuál es el precio y aceptan financiación en cuotas?",
+        "¿Puedo ir a verlo el sábado a la mañana?",
+    ),
+    (
+        "Buenas tardes, busco un monoambiente para inversión",
+        "¿En qué barrio está y cuándo es la entrega?",
+        "¿Cuánto sale con cochera?",
+        "Gracias, lo pienso y te escribo",
+    ),
+    (
+        "Hola! Me interesa un 3 ambientes con balcón",
+        "¿Tienen en piso alto?",
+        "¿Qué amenities tiene el edificio?",
+        "Quiero coordinar una visita, ¿qué días tienen?",
+        "El jueves a las 18 me queda bien",
+    ),
+    (
+        "Hola, ¿siguen vendiendo en pozo?",
+        "¿Se puede pagar en dólares y el resto en pesos?",
+        "Pasame por favor la ubicación exacta",
+    ),
+)
+
+
+@dataclass(slots=True)
+class SendRecord:
+    received_at: float
+    message_id: str
+    text: str
+
+
+@dataclass(slots=True)
+class TurnSample:
+    conversation: int
+    turn: int
+    webhook_ack_ms: float | None = None
+    reply_ms: float | None = None
+    receipt_ack_ms: float | None = None
+    error: str | None = None
+
+
+class FakeGupshupServer:
+    """Stand-in for the Gupshup send API: records every send per destination."""
+
+    def __init__(self, *, host: str, port: int, latency_ms: float, error_rate: float, seed: int) -> None:
+        self.host = host
+        self.port = port
+        self.latency_s = max(0.0, latency_ms) / 1000.0
+        self.error_rate = max(0.0, min(1.0, error_rate))
+        self._rng = random.Random(seed)
+        self._sends: dict[str, list[SendRecord]] = {}
+        self._cond = threading.Condition()
+        self.stats = {"sends": 0, "injected_errors": 0, "bad_requests": 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self._server.server_address[1]}"
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+                return
+
+            def do_POST(self) -> None:  # noqa: N802
+                length = int(self.headers.get("Content-Length") or 0)
+                status, body = server.handle_send(self.path, self.rfile.read(length))
+                encoded = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(encoded)))
+                self.end_headers()
+                self.wfile.write(encoded)
+
+        return _Handler
+
+    def handle_send(self, path: str, raw: bytes) -> tuple[int, dict[str, Any]]:
+        if path.split("?")[0] != SEND_PATH:
+            self.stats["bad_requests"] += 1
+            return 404, {"status": "error", "message": "unknown path"}
+        form = {key: values[0] for key, values in parse_qs(raw.decode("utf-8")).items()}
+        destination = "".join(filter(str.isdigit, form.get("destination", "")))
+        try:
+            text = str(json.loads(form.get("message") or "{}").get("text") or "")
+        except ValueError:
+            text = ""
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        with self._cond:
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.stats["injected_errors"] += 1
+                return 503, {"status": "error", "message": "injected failure"}
+            record = SendRecord(time.monotonic(), f"load-{uuid.uuid4().hex}", text)
+            self._sends.setdefault(destination, []).append(record)
+            self.stats["sends"] += 1
+            self._cond.notify_all()
+        return 200, {"status": "submitted", "messageId": record.message_id}
+
+    def wait_for_send(self, phone: str, *, after: float, timeout: float) -> SendRecord | None:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                for record in self._sends.get(phone, ()):
+                    if record.received_at >= after:
+                        return record
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _load_fixture(name: str) -> dict[str, Any]:
+    return json.loads((FIXTURES_DIR / name).read_text(encoding="utf-8"))
+
+
+def build_inbound(template: dict[str, Any], *, phone: str, text: str, message_id: str) -> dict[str, Any]:
+    payload = copy.deepcopy(template)
+    payload["timestamp"] = int(time.time() * 1000)
+    body = payload["payload"]
+    body["id"] = message_id
+    body["source"] = phone
+    body["payload"] = {"text": text}
+    body["sender"] = {**body.get("sender", {}), "phone": phone, "dial_code": phone[2:]}
+    return payload
+
+
+def build_receipt(template: dict[str, Any], *, phone: str, message_id: str, status: str) -> dict[str, Any]:
+    payload = copy.deepcopy(template)
+    payload["timestamp"] = int(time.time() * 1000)
+    body = payload["payload"]
+    body["id"] = message_id
+    body["gsId"] = f"gs-{message_id}"
+    body["type"] = status
+    body["destination"] = phone
+    body["payload"] = {"ts": int(time.time())}
+    return payload
+
+
+async def run_conversation(
+    client: httpx.AsyncClient,
+    server: FakeGupshupServer,
+    *,
+    index: int,
+    run_id: str,
+    turns: tuple[str, ...],
+    inbound_template: dict[str, Any],
+    receipt_template: dict[str, Any],
+    receipts: bool,
+    think_ms: float,
+    reply_timeout: float,
+) -> list[TurnSample]:
+    phone = f"54911{55000000 + index:08d}"
+    samples: list[TurnSample] = []
+    for turn_index, text in enumerate(turns):
+        if turn_index and think_ms > 0:
+            await asyncio.sleep(think_ms / 1000.0)
+        sample = TurnSample(conversation=index, turn=turn_index)
+        samples.append(sample)
+        payload = build_inbound(
+            inbound_template, phone=phone, text=text, message_id=f"load-{run_id}-{index}-{turn_index}"
+        )
+        started = time.monotonic()
+        try:
+            response = await client.post(WEBHOOK_PATH, json=payload)
+        except httpx.HTTPError as exc:
+            sample.error = f"transport:{exc.__class__.__name__}"
+            continue
+        sample.webhook_ack_ms = (time.monotonic() - started) * 1000.0
+        if response.status_code >= 400:
+            sample.error = f"http_{response.status_code}"
+            continue
+        result = response.json()
+        if result.get("routed") is None:
+            # Acked but never reached the orquestador (e.g. its DB is down): no reply will come.
+            sample.error = "not_routed"
+            continue
+        if result.get("vera_send_ok") is False:
+            sample.error = "vera_send_failed"
+
+        record = await asyncio.to_thread(server.wait_for_send, phone, after=started, timeout=reply_timeout)
+        if record is None:
+            sample.error = sample.error or "reply_timeout"
+            continue
+        sample.reply_ms = (record.received_at - started) * 1000.0
+
+        if receipts:
+            receipt_started = time.monotonic()
+            try:
+                for status in ("delivered", "read"):
+                    ack = await client.post(
+                        WEBHOOK_PATH,
+                        json=build_receipt(receipt_template, phone=phone, message_id=record.message_id, status=status),
+                    )
+                    if ack.status_code >= 400:
+                        sample.error = sample.error or f"receipt_http_{ack.status_code}"
+            except httpx.HTTPError as exc:
+                sample.error = sample.error or f"receipt_transport:{exc.__class__.__name__}"
+            sample.receipt_ack_ms = (time.monotonic() - receipt_started) * 1000.0
+    return samples
+
+
+async def run_load(args: argparse.Namespace, server: FakeGupshupServer) -> tuple[list[TurnSample], float]:
+    inbound_template = _load_fixture("inbound_text_v2.json")
+    receipt_template = _load_fixture("message_event_v2.json")
+    rng = random.Random(args.seed)
+    run_id = uuid.uuid4().hex[:8]
+    semaphore = asyncio.Semaphore(max(1, args.concurrency))
+    limits = httpx.Limits(max_connections=max(1, args.concurrency), max_keepalive_connections=max(1, args.concurrency))
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.request_timeout, limits=limits) as client:
+
+        async def _one(index: int) -> list[TurnSample]:
+            async with semaphore:
+                return await run_conversation(
+                    client,
+                    server,
+                    index=index,
+                    run_id=run_id,
+                    turns=rng.choice(TURN_SCRIPTS),
+                    inbound_template=inbound_template,
+                    receipt_template=receipt_template,
+                    receipts=args.receipts,
+                    think_ms=args.think_ms,
+                    reply_timeout=args.reply_timeout,
+                )
+
+        started = time.monotonic()
+        batches = await asyncio.gather(*(_one(index) for index in range(args.conversations)))
+        elapsed = time.monotonic() - started
+    return [sample for batch in batches for sample in batch], elapsed
+
+
+def summarize(samples: list[TurnSample], *, elapsed_seconds: float, conversations: int) -> dict[str, Any]:
+    from scripts.replay_orquestador_conversations import _percentile, latency_histogram
+
+    errors: dict[str, int] = {}
+    for sample in samples:
+        if sample.error:
+            kind = sample.error.split(":")[0]
+            errors[kind] = errors.get(kind, 0) + 1
+    stages: dict[str, Any] = {}
+    for stage in STAGES:
+        values = [getattr(sample, stage) for sample in samples if getattr(sample, stage) is not None]
+        if not values:
+            continue
+        stages[stage] = {
+            "count": len(values),
+            "p50": round(_percentile(values, 50), 3),
+            "p95": round(_percentile(values, 95), 3),
+            "p99": round(_percentile(values, 99), 3),
+            "max": round(max(values), 3),
+            "histogram": latency_histogram(values),
+        }
+    turns = len(samples)
+    failed = sum(1 for sample in samples if sample.error)
+    return {
+        "conversations": conversations,
+        "turns": turns,
+        "elapsed_seconds": round(elapsed_seconds, 3),
+        "throughput_turns_per_second": round(turns / elapsed_seconds, 3) if elapsed_seconds > 0 else 0.0,
+        "error_rate": round(failed / turns, 4) if turns else 0.0,
+        "errors": errors,
+        "stages_ms": stages,
+    }
+
+
+def _wait_for_health(base_url: str, timeout: float, process: subprocess.Popen[bytes] | None) -> bool:
+    deadline = time.monotonic() + timeout
+    with httpx.Client(base_url=base_url, timeout=2.0) as client:
+        while time.monotonic() < deadline:
+            if process is not None and process.poll() is not None:
+                return False
+            try:
+                if client.get("/health").status_code < 400:
+                    return True
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.25)
+    return False
+
+
+def _app_env(args: argparse.Namespace, server: FakeGupshupServer, admin_token: str) -> dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        {
+            "VERTICE360_ENV": "dev",
+            "VERTICE360_HOST": "127.0.0.1",
+            "VERTICE360_PORT": str(args.app_port),
+            "GUPSHUP_BASE_URL_DEV": server.base_url,
+            "GUPSHUP_API_KEY_DEV": "load-test",
+            "GUPSHUP_APP_NAME_DEV": "vertice360load",
+            "GUPSHUP_WA_SENDER": f"+{LINE_PHONE}",
+            "V360_ADMIN_TOKEN": admin_token,
+        }
+    )
+    if args.scratch_schema:
+        # Scratch only: a table missing there must fail instead of writing to the source schema.
+        env["V360_DB_SEARCH_PATH"] = args.scratch_schema
+    for item in args.app_env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return env
+
+
+def _fetch_debug_stats(base_url: str, admin_token: str) -> dict[str, Any]:
+    stats: dict[str, Any] = {}
+    headers = {"x-v360-admin-token": admin_token}
+    with httpx.Client(base_url=base_url, timeout=5.0, headers=headers) as client:
+        for name in ("outbound", "delivery-status"):
+            try:
+                response = client.get(f"/api/demo/vertice360-orquestador/debug/{name}")
+            except httpx.HTTPError:
+                continue
+            if response.status_code == 200:
+                stats[name] = response.json()
+    return stats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Synthetic load for the Gupshup WhatsApp webhook pipeline.")
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=10, help="Conversations in flight at once.")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pause between turns of a conversation.")
+    parser.add_argument("--receipts", action="store_true", help="Post delivered/read receipts for every reply.")
+    parser.add_argument("--base-url", help="Running app to target (default: the spawned app).")
+    parser.add_argument("--spawn-app", action="store_true", help="Start the demo app wired to the stand-in server.")
+    parser.add_argument("--app-port", type=int, default=7162)
+    parser.add_argument("--app-env", action="append", default=[], help="Extra KEY=VALUE for the spawned app.")
+    parser.add_argument("--admin-token", default=None, help="Admin token of --base-url, for debug stats.")
+    parser.add_argument("--gupshup-port", type=int, default=7199, help="Stand-in Gupshup server port.")
+    parser.add_argument("--send-latency-ms", type=float, default=80.0, help="Stand-in send latency.")
+    parser.add_argument("--send-error-rate", type=float, default=0.0, help="Share of sends answered with 503.")
+    parser.add_argument("--source-schema", default="public")
+    parser.add_argument("--scratch-schema", default=None, help="Schema the spawned app writes into.")
+    parser.add_argument("--prepare-scratch", action="store_true", help="(Re)create --scratch-schema first.")
+    parser.add_argument(
+        "--allow-live-db",
+        action="store_true",
+        help="Let --spawn-app run without --scratch-schema, writing synthetic leads into the configured DB.",
+    )
+    parser.add_argument("--reply-timeout", type=float, default=30.0)
+    parser.add_argument("--request-timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json-out", type=Path)
+    args = parser.parse_args()
+
+    if not args.spawn_app and not args.base_url:
+        parser.error("pass --base-url of a running app or --spawn-app")
+    if args.prepare_scratch and not args.scratch_schema:
+        parser.error("--prepare-scratch needs --scratch-schema")
+    if args.spawn_app and not args.scratch_schema and not args.allow_live_db:
+        parser.error("--spawn-app writes synthetic conversations; pass --scratch-schema (or --allow-live-db)")
+    if args.scratch_schema:
+        from scripts.replay_orquestador_conversations import (
+            _identifier,
+            prepare_scratch_schema,
+            verify_scratch_schema,
+        )
+
+        try:
+            args.scratch_schema = _identifier(args.scratch_schema)
+        except ValueError as exc:
+            parser.error(str(exc))
+        if args.prepare_scratch:
+            tables = prepare_scratch_schema(source_schema=args.source_schema, scratch_schema=args.scratch_schema)
+            print(f"Scratch schema {args.scratch_schema} prepared from {args.source_schema} ({len(tables)} tables).")
+        else:
+            verify_scratch_schema(source_schema=args.source_schema, scratch_schema=args.scratch_schema)
+
+    server = FakeGupshupServer(
+        host="127.0.0.1",
+        port=args.gupshup_port,
+        latency_ms=args.send_latency_ms,
+        error_rate=args.send_error_rate,
+        seed=args.seed,
+    )
+    server.start()
+    admin_token = args.admin_token or secrets.token_hex(8)
+    process: subprocess.Popen[bytes] | None = None
+    try:
+        if args.spawn_app:
+            args.base_url = args.base_url or f"http://127.0.0.1:{args.app_port}"
+            process = subprocess.Popen(
+                [sys.executable, str(BACKEND_DIR / "ls_iMotorSoft_Srv01_demo.py")],
+                cwd=str(BACKEND_DIR),
+                env=_app_env(args, server, admin_token),
+            )
+        else:
+            print(
+                "Target app must send through the stand-in: "
+                f"GUPSHUP_BASE_URL_DEV={server.base_url} GUPSHUP_API_KEY_DEV=load-test "
+                f"GUPSHUP_APP_NAME_DEV=vertice360load GUPSHUP_WA_SENDER=+{LINE_PHONE}"
+            )
+        if not _wait_for_health(args.base_url, 60.0, process):
+            print(f"FAIL: app at {args.base_url} is not healthy.")
+            return 1
+
+        samples, elapsed = asyncio.run(run_load(args, server))
+        summary = summarize(samples, elapsed_seconds=elapsed, conversations=args.conversations)
+        summary["stand_in_gupshup"] = dict(server.stats)
+        summary["server"] = _fetch_debug_stats(args.base_url, admin_token)
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        server.stop()
+
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if args.json_out:
+        args.json_out.write_text(json.dumps(summary, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return 0 if summary["error_rate"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,509 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+ROOT_DIR = BACKEND_DIR.parent
+for path in (ROOT_DIR, BACKEND_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from backend.modules.vertice360_orquestador_demo import db, repo, services  # noqa: E402
+
+# Tables that hold conversation state: cloned empty into the scratch schema.
+# Every other table (projects, units, profiles, users...) is cloned with data.
+CONVERSATION_TABLES = (
+    "events",
+    "visit_confirmations",
+    "visit_proposals",
+    "messages",
+    "tickets",
+    "conversations",
+    "leads",
+)
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+_IDENTIFIER_RE = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+@dataclass
+class ReplayTurn:
+    text: str
+    created_at: datetime | None = None
+    expected_reply: str | None = None
+
+
+@dataclass
+class ReplayConversation:
+    conversation_id: str
+    phone: str
+    turns: list[ReplayTurn] = field(default_factory=list)
+
+
+@dataclass
+class TurnResult:
+    conversation_id: str
+    turn_index: int
+    text: str
+    latency_ms: float
+    expected_reply: str | None
+    reply: str | None
+    error: str | None = None
+
+
+def _identifier(name: str) -> str:
+    clean = str(name or "").strip().lower()
+    if not _IDENTIFIER_RE.match(clean):
+        raise ValueError(f"invalid SQL identifier: {name!r}")
+    return clean
+
+
+def _normalize_reply(text: str | None) -> str:
+    return " ".join(str(text or "").split())
+
+
+def _parse_timestamp(value: Any) -> datetime | None:
+    if isinstance(value, datetime):
+        return value
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def group_message_rows(rows: list[dict[str, Any]]) -> list[ReplayConversation]:
+    """Group ordered message rows into conversations of inbound turns.
+
+    The first outbound ``system`` message after an inbound message is the reply
+    Vera originally sent; it becomes the turn's expected reply.
+    """
+    conversations: dict[str, ReplayConversation] = {}
+    for row in rows:
+        conversation_id = str(row.get("conversation_id") or "")
+        if not conversation_id:
+            continue
+        conversation = conversations.get(conversation_id)
+        if conversation is None:
+            conversation = ReplayConversation(
+                conversation_id=conversation_id,
+                phone=str(row.get("phone_e164") or row.get("phone") or ""),
+            )
+            conversations[conversation_id] = conversation
+        direction = str(row.get("direction") or "").strip().lower()
+        actor = str(row.get("actor") or "").strip().lower()
+        text = str(row.get("text") or "").strip()
+        if direction == "in" and text:
+            conversation.turns.append(
+                ReplayTurn(text=text, created_at=_parse_timestamp(row.get("created_at")))
+            )
+        elif direction == "out" and actor == "system" and conversation.turns:
+            last_turn = conversation.turns[-1]
+            if last_turn.expected_reply is None:
+                last_turn.expected_reply = text
+    return [conv for conv in conversations.values() if conv.phone and conv.turns]
+
+
+def load_message_rows_from_db(
+    *,
+    schema: str,
+    since: str | None,
+    limit_conversations: int | None,
+) -> list[dict[str, Any]]:
+    safe_schema = _identifier(schema)
+    conversation_filter = ""
+    params: list[Any] = []
+    if since:
+        conversation_filter = "where c.created_at >= %s"
+        params.append(since)
+    limit_sql = ""
+    if limit_conversations:
+        limit_sql = "limit %s"
+        params.append(int(limit_conversations))
+
+    def _tx(conn: Any) -> list[dict[str, Any]]:
+        return repo.fetch_all(
+            conn,
+            f"""
+            with picked as (
+                select c.id
+                from {safe_schema}.conversations c
+                {conversation_filter}
+                order by c.created_at asc
+                {limit_sql}
+            )
+            select
+                m.conversation_id,
+                l.phone_e164,
+                m.direction,
+                m.actor,
+                m.text,
+                m.created_at
+            from {safe_schema}.messages m
+            join picked p on p.id = m.conversation_id
+            join {safe_schema}.leads l on l.id = m.lead_id
+            order by m.conversation_id asc, m.created_at asc
+            """,
+            tuple(params),
+        )
+
+    return db.run_in_transaction(_tx)
+
+
+def load_message_rows_from_jsonl(path: Path) -> list[dict[str, Any]]:
+    rows: list[dict[str, Any]] = []
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if line:
+                rows.append(json.loads(line))
+    rows.sort(key=lambda row: (str(row.get("conversation_id") or ""), str(row.get("created_at") or "")))
+    return rows
+
+
+def export_message_rows(rows: list[dict[str, Any]], path: Path) -> None:
+    with path.open("w", encoding="utf-8") as handle:
+        for row in rows:
+            handle.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+
+
+def _give_own_sequences(conn: Any, scratch: str, table: str) -> None:
+    """Point serial columns at scratch-owned sequences.
+
+    ``like ... including all`` copies ``nextval('<source>.<seq>')`` defaults, so
+    scratch inserts would otherwise advance the production sequences.
+    """
+    columns = repo.fetch_all(
+        conn,
+        """
+        select column_name
+        from information_schema.columns
+        where table_schema = %s and table_name = %s and column_default like 'nextval(%%'
+        """,
+        (scratch, table),
+    )
+    for row in columns:
+        column = _identifier(str(row["column_name"]))
+        sequence = f"{scratch}.{table}_{column}_seq"
+        conn.execute(f"drop sequence if exists {sequence}")
+        conn.execute(f"create sequence {sequence} owned by {scratch}.{table}.{column}")
+        conn.execute(f"alter table {scratch}.{table} alter column {column} set default nextval('{sequence}')")
+        conn.execute(
+            f"select setval('{sequence}', coalesce((select max({column}) from {scratch}.{table}), 0) + 1, false)"
+        )
+
+
+def _base_tables(conn: Any, schema: str) -> list[str]:
+    return [
+        str(row["table_name"])
+        for row in repo.fetch_all(
+            conn,
+            """
+            select table_name
+            from information_schema.tables
+            where table_schema = %s and table_type = 'BASE TABLE'
+            order by table_name asc
+            """,
+            (schema,),
+        )
+    ]
+
+
+def verify_scratch_schema(*, source_schema: str, scratch_schema: str) -> None:
+    """Fail unless every source table exists in scratch.
+
+    Only the scratch schema is on the replay search_path, so a missing table
+    must stop the run instead of resolving anywhere else.
+    """
+    source = _identifier(source_schema)
+    scratch = _identifier(scratch_schema)
+
+    def _tx(conn: Any) -> list[str]:
+        return sorted(set(_base_tables(conn, source)) - set(_base_tables(conn, scratch)))
+
+    missing = db.run_in_transaction(_tx)
+    if missing:
+        raise RuntimeError(
+            f"scratch schema {scratch} is missing tables {missing}; run with --prepare-scratch"
+        )
+
+
+def prepare_scratch_schema(*, source_schema: str, scratch_schema: str) -> list[str]:
+    source = _identifier(source_schema)
+    scratch = _identifier(scratch_schema)
+    if source == scratch:
+        raise ValueError("scratch schema must differ from the source schema")
+
+    def _tx(conn: Any) -> list[str]:
+        tables = _base_tables(conn, source)
+        conn.execute(f"create schema if not exists {scratch}")
+        for table in tables:
+            safe_table = _identifier(table)
+            conn.execute(f"drop table if exists {scratch}.{safe_table} cascade")
+            conn.execute(
+                f"create table {scratch}.{safe_table} (like {source}.{safe_table} including all)"
+            )
+            if safe_table not in CONVERSATION_TABLES:
+                conn.execute(f"insert into {scratch}.{safe_table} select * from {source}.{safe_table}")
+            _give_own_sequences(conn, scratch, safe_table)
+        return tables
+
+    tables = db.run_in_transaction(_tx)
+    verify_scratch_schema(source_schema=source, scratch_schema=scratch)
+    return tables
+
+
+def _install_stub_sender(send_latency_ms: float) -> None:
+    async def _stub_send(phone_e164: str, text: str) -> dict[str, Any]:  # noqa: ARG001
+        if send_latency_ms > 0:
+            await asyncio.sleep(send_latency_ms / 1000.0)
+        return {
+            "provider": "gupshup_whatsapp",
+            "vera_send_ok": True,
+            "provider_message_id": f"replay-{uuid.uuid4().hex}",
+            "raw": {"status": "submitted", "replay": True},
+        }
+
+    services._send_vera_whatsapp_reply = _stub_send
+
+
+async def _replay_conversation(
+    conversation: ReplayConversation,
+    *,
+    run_id: str,
+    time_compression: float,
+) -> list[TurnResult]:
+    results: list[TurnResult] = []
+    previous_at: datetime | None = None
+    for index, turn in enumerate(conversation.turns):
+        if time_compression > 0 and previous_at and turn.created_at:
+            gap_seconds = (turn.created_at - previous_at).total_seconds()
+            if gap_seconds > 0:
+                await asyncio.sleep(gap_seconds / time_compression)
+        previous_at = turn.created_at or previous_at
+
+        started = time.perf_counter()
+        reply: str | None = None
+        error: str | None = None
+        try:
+            payload = await services.ingest_from_provider(
+                user_phone=conversation.phone,
+                text=turn.text,
+                provider="gupshup_whatsapp",
+                provider_message_id=f"replay-{run_id}-{conversation.conversation_id}-{index}",
+                provider_meta={"replay_run_id": run_id},
+            )
+            reply = str(payload.get("vera_reply_text") or "")
+        except Exception as exc:  # noqa: BLE001
+            error = f"{exc.__class__.__name__}: {exc}"
+        results.append(
+            TurnResult(
+                conversation_id=conversation.conversation_id,
+                turn_index=index,
+                text=turn.text,
+                latency_ms=(time.perf_counter() - started) * 1000.0,
+                expected_reply=turn.expected_reply,
+                reply=reply,
+                error=error,
+            )
+        )
+    return results
+
+
+def run_replay(
+    conversations: list[ReplayConversation],
+    *,
+    concurrency: int,
+    time_compression: float,
+) -> tuple[list[TurnResult], float]:
+    """Replay conversations, one worker thread (and event loop) per conversation slot.
+
+    Turns inside a conversation stay strictly ordered; different conversations
+    run in parallel up to ``concurrency``.
+    """
+    run_id = uuid.uuid4().hex[:8]
+    results: list[TurnResult] = []
+    results_lock = Lock()
+
+    def _worker(conversation: ReplayConversation) -> None:
+        turn_results = asyncio.run(
+            _replay_conversation(conversation, run_id=run_id, time_compression=time_compression)
+        )
+        with results_lock:
+            results.extend(turn_results)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        list(executor.map(_worker, conversations))
+    return results, time.perf_counter() - started
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def latency_histogram(latencies: list[float]) -> dict[str, int]:
+    histogram = {f"<={bound}ms": 0 for bound in LATENCY_BUCKETS_MS}
+    histogram[f">{LATENCY_BUCKETS_MS[-1]}ms"] = 0
+    for value in latencies:
+        for bound in LATENCY_BUCKETS_MS:
+            if value <= bound:
+                histogram[f"<={bound}ms"] += 1
+                break
+        else:
+            histogram[f">{LATENCY_BUCKETS_MS[-1]}ms"] += 1
+    return histogram
+
+
+def summarize(results: list[TurnResult], *, elapsed_seconds: float, conversations: int) -> dict[str, Any]:
+    latencies = [row.latency_ms for row in results if row.error is None]
+    compared = [row for row in results if row.error is None and row.expected_reply is not None]
+    changed = [
+        row for row in compared if _normalize_reply(row.reply) != _normalize_reply(row.expected_reply)
+    ]
+    return {
+        "conversations": conversations,
+        "turns": len(results),
+        "errors": sum(1 for row in results if row.error is not None),
+        "elapsed_seconds": round(elapsed_seconds, 3),
+        "throughput_turns_per_second": round(len(results) / elapsed_seconds, 3) if elapsed_seconds > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50), 3),
+            "p95": round(_percentile(latencies, 95), 3),
+            "p99": round(_percentile(latencies, 99), 3),
+            "max": round(max(latencies, default=0.0), 3),
+        },
+        "latency_histogram": latency_histogram(latencies),
+        "answers": {
+            "compared": len(compared),
+            "unchanged": len(compared) - len(changed),
+            "changed": len(changed),
+            "without_expected": sum(1 for row in results if row.error is None and row.expected_reply is None),
+        },
+    }
+
+
+def answer_diffs(results: list[TurnResult]) -> list[dict[str, Any]]:
+    diffs: list[dict[str, Any]] = []
+    for row in sorted(results, key=lambda item: (item.conversation_id, item.turn_index)):
+        if row.error is not None:
+            diffs.append(
+                {
+                    "conversation_id": row.conversation_id,
+                    "turn": row.turn_index,
+                    "text": row.text,
+                    "error": row.error,
+                }
+            )
+            continue
+        if row.expected_reply is None:
+            continue
+        if _normalize_reply(row.reply) == _normalize_reply(row.expected_reply):
+            continue
+        diffs.append(
+            {
+                "conversation_id": row.conversation_id,
+                "turn": row.turn_index,
+                "text": row.text,
+                "expected": row.expected_reply,
+                "actual": row.reply,
+            }
+        )
+    return diffs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Replay recorded orquestador conversations through ingest_from_provider against a scratch schema."
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--from-jsonl", type=Path, help="Read message rows from an exported JSONL file.")
+    source.add_argument("--source-schema", default="public", help="Schema holding the recorded messages (default: public).")
+    parser.add_argument("--since", help="Only conversations created at/after this timestamp (DB source).")
+    parser.add_argument("--limit-conversations", type=int, default=None)
+    parser.add_argument("--export-jsonl", type=Path, help="Export the loaded message rows to JSONL and exit.")
+    parser.add_argument("--scratch-schema", default="replay_scratch", help="Schema the replay writes into.")
+    parser.add_argument("--prepare-scratch", action="store_true", help="(Re)create the scratch schema from the source schema.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Conversations replayed in parallel.")
+    parser.add_argument(
+        "--time-compression",
+        type=float,
+        default=0.0,
+        help="Divide recorded inter-message gaps by this factor (0 = no waiting).",
+    )
+    parser.add_argument("--send-latency-ms", type=float, default=0.0, help="Simulated Gupshup send latency.")
+    parser.add_argument("--diff-out", type=Path, help="Write per-turn answer diffs to this JSONL file.")
+    parser.add_argument("--json-out", type=Path, help="Write the summary as JSON to this file.")
+    args = parser.parse_args()
+
+    source_schema = _identifier(args.source_schema)
+    scratch_schema = _identifier(args.scratch_schema)
+
+    if args.from_jsonl:
+        rows = load_message_rows_from_jsonl(args.from_jsonl)
+    else:
+        rows = load_message_rows_from_db(
+            schema=source_schema,
+            since=args.since,
+            limit_conversations=args.limit_conversations,
+        )
+    if args.export_jsonl:
+        export_message_rows(rows, args.export_jsonl)
+        print(f"Exported {len(rows)} message rows to {args.export_jsonl}")
+        return 0
+
+    conversations = group_message_rows(rows)
+    if args.limit_conversations:
+        conversations = conversations[: args.limit_conversations]
+    if not conversations:
+        print("No conversations with inbound turns to replay.")
+        return 1
+
+    if args.prepare_scratch:
+        tables = prepare_scratch_schema(source_schema=source_schema, scratch_schema=scratch_schema)
+        print(f"Scratch schema {scratch_schema} prepared from {source_schema} ({len(tables)} tables).")
+    else:
+        verify_scratch_schema(source_schema=source_schema, scratch_schema=scratch_schema)
+    db.set_search_path(scratch_schema)
+    _install_stub_sender(args.send_latency_ms)
+
+    results, elapsed = run_replay(
+        conversations,
+        concurrency=args.concurrency,
+        time_compression=args.time_compression,
+    )
+    summary = summarize(results, elapsed_seconds=elapsed, conversations=len(conversations))
+    diffs = answer_diffs(results)
+
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if args.json_out:
+        args.json_out.write_text(json.dumps(summary, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    if args.diff_out:
+        export_message_rows(diffs, args.diff_out)
+        print(f"Wrote {len(diffs)} answer diffs to {args.diff_out}")
+    else:
+        for diff in diffs[:10]:
+            print(json.dumps(diff, ensure_ascii=False))
+    return 0 if summary["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,10 +4,11 @@ from __future__ import annotations
 
 from typing import Any
 
-from openai import OpenAI
-
 import globalVar
+from backend.services.llm_client import LLMStream, llm_client
+from backend.telemetry import metrics
 from db import demo_vertice360_data
+from services.demo_codex_context import DEFAULT_MAX_CHARS, ContextSlice, DemoContextCache, estimate_tokens
 
 # Prompt base para contextualizar al modelo con el mock de Vertice360.
 SYSTEM_PROMPT = (
@@ -17,51 +18,37 @@ SYSTEM_PROMPT = (
 )
 
 
+demo_context = DemoContextCache(
+    demo_vertice360_data,
+    max_chars=globalVar.get_env_int("V360_CODEX_CONTEXT_MAX_CHARS", DEFAULT_MAX_CHARS, minimum=200),
+)
+CONTEXT_SLICES = globalVar.get_env_bool("V360_CODEX_CONTEXT_SLICES", False)
+
+
 def _format_demo_context() -> str:
-    """Compacta los datos mock para dárselos al LLM."""
-    projects = "\n".join(
-        f"- {p['id_proyecto']}: {p['nombre']} ({p['ciudad']}, {p['estado']}), "
-        f"precio USD {p['precio_desde']}–{p['precio_hasta']}"
-        for p in demo_vertice360_data.proyectos_en_pozo
-    )
-    units = "\n".join(
-        f"- {u['id_unidad']} ({u['id_proyecto']}): {u['ambiente']}, piso {u['piso']}, "
-        f"{u['estado_unidad']}, USD {u['precio_lista']}"
-        for u in demo_vertice360_data.unidades
-    )
-    investors = "\n".join(
-        f"- {i['id_inversor']}: {i['nombre']} ({i['tipo_inversor']}, {i['pais']})"
-        for i in demo_vertice360_data.inversores
-    )
-    operations = "\n".join(
-        f"- {op['id_operacion']}: {op['tipo_operacion']} de {op['id_unidad']} "
-        f"por {op['id_inversor']} el {op['fecha']} (USD {op['monto']})"
-        for op in demo_vertice360_data.reservas_y_ventas
-    )
-    return (
-        "Contexto demo Vertice360:\n"
-        f"Proyectos:\n{projects}\n\n"
-        f"Unidades:\n{units}\n\n"
-        f"Inversores:\n{investors}\n\n"
-        f"Operaciones:\n{operations}\n"
-        "Siempre responde citando los IDs relevantes."
-    )
+    """Contexto mock compilado una vez (se recompila sólo si cambian los datos)."""
+    return demo_context.get().text
 
 
-def run_demo_chat(prompt: str, history: list[dict[str, str]] | None = None) -> dict[str, Any]:
-    """Ejecuta la llamada al LLM usando el modelo configurado (gpt-4o-mini)."""
+def warm_demo_context() -> None:
+    """Compila el contexto al arrancar para que el primer chat no pague el costo."""
+    demo_context.get()
+
+
+def _build_messages(
+    prompt: str,
+    history: list[dict[str, str]] | None,
+) -> tuple[list[dict[str, str]], ContextSlice]:
     if not prompt or not prompt.strip():
         raise ValueError("El prompt no puede estar vacío.")
 
-    api_key = globalVar.OpenAI_Key
-    if not api_key:
+    if not llm_client.available:
         raise RuntimeError("Falta OpenAI API key (VERTICE360_OPENAI_KEY u OPENAI_API_KEY).")
 
-    client = OpenAI(api_key=api_key)
-
+    context = demo_context.select(prompt, sliced=CONTEXT_SLICES)
     messages: list[dict[str, str]] = [
         {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "system", "content": _format_demo_context()},
+        {"role": "system", "content": context.text},
     ]
 
     for msg in history or []:
@@ -71,29 +58,57 @@ def run_demo_chat(prompt: str, history: list[dict[str, str]] | None = None) -> d
             messages.append({"role": role, "content": content})
 
     messages.append({"role": "user", "content": prompt})
+    return messages, context
 
-    completion = client.chat.completions.create(
+
+def _prompt_report(messages: list[dict[str, str]], context: ContextSlice) -> dict[str, Any]:
+    prompt_tokens = sum(estimate_tokens(msg["content"]) for msg in messages)
+    metrics.observe("codex_chat.prompt_tokens", prompt_tokens, {"sliced": str(context.sliced).lower()})
+    return {
+        "contextVersion": context.version,
+        "contextSliced": context.sliced,
+        "contextEntities": list(context.entity_ids),
+        "contextTokens": context.tokens,
+        "promptTokensEstimate": prompt_tokens,
+    }
+
+
+async def run_demo_chat(prompt: str, history: list[dict[str, str]] | None = None) -> dict[str, Any]:
+    """Ejecuta la llamada al LLM usando el modelo configurado (gpt-4o-mini)."""
+    messages, context = _build_messages(prompt, history)
+    prompt_report = _prompt_report(messages, context)
+
+    completion = await llm_client.chat(
+        messages,
         model=globalVar.OpenAI_Model or "gpt-4o-mini",
-        messages=messages,
         temperature=0.2,
+        purpose="codex_chat",
     )
 
-    choice = completion.choices[0].message
-    usage_data: dict[str, Any] | None = None
-    if completion.usage:
-        usage_data = completion.usage.model_dump() if hasattr(completion.usage, "model_dump") else dict(completion.usage)
-
     return {
-        "reply": choice.content or "",
+        "reply": completion.content,
         "model": completion.model,
         "created": completion.created,
-        "usage": usage_data,
+        "usage": completion.usage,
         "meta": {
             "prompt": prompt,
             "history_length": len(history or []),
             "source": "demo_codex_lain_graph",
+            **prompt_report,
         },
     }
 
 
-__all__ = ["run_demo_chat"]
+def stream_demo_chat(prompt: str, history: list[dict[str, str]] | None = None) -> LLMStream:
+    """Igual que ``run_demo_chat`` pero devuelve los tokens a medida que llegan."""
+    messages, context = _build_messages(prompt, history)
+    _prompt_report(messages, context)
+    return llm_client.stream(
+        messages,
+        model=globalVar.OpenAI_Model or "gpt-4o-mini",
+        temperature=0.2,
+        purpose="codex_chat",
+    )
+
+
+__all__ = ["run_demo_chat", "stream_demo_chat", "warm_demo_context"]
@@ -0,0 +1,249 @@
+"""Contexto demo Vertice360 precompilado para el chat Codex.
+
+El bloque de contexto se compila una sola vez (y otra vez sólo si cambian los
+datos mock) en líneas por sección, con versión y presupuesto de caracteres.
+Cada request reutiliza el bloque completo o, si se piden, sólo las líneas
+relevantes para la pregunta más las entidades enlazadas (unidad ↔ proyecto,
+operación ↔ unidad e inversor).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any
+
+from db import demo_vertice360_data
+
+try:
+    import tiktoken  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+DEFAULT_MAX_CHARS = 6000
+SECTION_TITLES = (
+    ("proyectos", "Proyectos"),
+    ("unidades", "Unidades"),
+    ("inversores", "Inversores"),
+    ("operaciones", "Operaciones"),
+)
+HEADER = "Contexto demo Vertice360:\n"
+FOOTER = "Siempre responde citando los IDs relevantes."
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9-]+")
+_STOPWORDS = {"de", "del", "la", "el", "los", "las", "en", "por", "para", "con", "que", "usd", "y", "un", "una"}
+
+_encoding: Any = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count with tiktoken when installed, else the ~4 chars/token rule."""
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            try:
+                _encoding = tiktoken.get_encoding("o200k_base")
+            except Exception:  # noqa: BLE001 - encoding files may be unavailable offline
+                _encoding = False
+        if _encoding:
+            return len(_encoding.encode(text))
+    return max(1, len(text) // 4) if text else 0
+
+
+def _terms(text: str) -> frozenset[str]:
+    normalized = unicodedata.normalize("NFKD", text.lower())
+    normalized = "".join(char for char in normalized if not unicodedata.combining(char))
+    return frozenset(word for word in _WORD_RE.findall(normalized) if word not in _STOPWORDS)
+
+
+@dataclass(frozen=True, slots=True)
+class ContextLine:
+    section: str
+    entity_id: str
+    text: str
+    terms: frozenset[str]
+    links: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class DemoContext:
+    version: str
+    text: str
+    tokens: int
+    lines: tuple[ContextLine, ...]
+    omitted: int
+    max_chars: int
+    build_ms: float
+    by_id: dict[str, ContextLine] = field(default_factory=dict)
+
+
+@dataclass(frozen=True, slots=True)
+class ContextSlice:
+    text: str
+    tokens: int
+    version: str
+    sliced: bool
+    entity_ids: tuple[str, ...]
+
+
+def _build_lines(data: Any) -> list[ContextLine]:
+    lines: list[ContextLine] = []
+    for p in data.proyectos_en_pozo:
+        text = (
+            f"- {p['id_proyecto']}: {p['nombre']} ({p['ciudad']}, {p['estado']}), "
+            f"precio USD {p['precio_desde']}–{p['precio_hasta']}"
+        )
+        lines.append(ContextLine("proyectos", p["id_proyecto"], text, _terms(f"{text} {p.get('barrio', '')}")))
+    for u in data.unidades:
+        text = (
+            f"- {u['id_unidad']} ({u['id_proyecto']}): {u['ambiente']}, piso {u['piso']}, "
+            f"{u['estado_unidad']}, USD {u['precio_lista']}"
+        )
+        lines.append(ContextLine("unidades", u["id_unidad"], text, _terms(text), (u["id_proyecto"],)))
+    for i in data.inversores:
+        text = f"- {i['id_inversor']}: {i['nombre']} ({i['tipo_inversor']}, {i['pais']})"
+        lines.append(ContextLine("inversores", i["id_inversor"], text, _terms(text)))
+    for op in data.reservas_y_ventas:
+        text = (
+            f"- {op['id_operacion']}: {op['tipo_operacion']} de {op['id_unidad']} "
+            f"por {op['id_inversor']} el {op['fecha']} (USD {op['monto']})"
+        )
+        lines.append(
+            ContextLine("operaciones", op["id_operacion"], text, _terms(text), (op["id_unidad"], op["id_inversor"]))
+        )
+    return lines
+
+
+def _render(lines: list[ContextLine] | tuple[ContextLine, ...], max_chars: int) -> tuple[str, int]:
+    """Render sections in order, dropping trailing lines per section to fit ``max_chars``."""
+    grouped: dict[str, list[ContextLine]] = {key: [] for key, _ in SECTION_TITLES}
+    for line in lines:
+        grouped[line.section].append(line)
+    # Fill sections round-robin so a large section cannot starve the others.
+    # Reserve room for each section title and its "(+N más)" marker.
+    budget = max_chars - len(HEADER) - len(FOOTER) - sum(len(title) + 16 for _, title in SECTION_TITLES)
+    kept: dict[str, list[str]] = {key: [] for key, _ in SECTION_TITLES}
+    cursors = {key: 0 for key, _ in SECTION_TITLES}
+    progressed = True
+    while progressed:
+        progressed = False
+        for key, _ in SECTION_TITLES:
+            items = grouped[key]
+            index = cursors[key]
+            if index >= len(items) or len(items[index].text) + 1 > budget:
+                continue
+            kept[key].append(items[index].text)
+            budget -= len(items[index].text) + 1
+            cursors[key] = index + 1
+            progressed = True
+    omitted = sum(len(grouped[key]) - cursors[key] for key, _ in SECTION_TITLES)
+    blocks = []
+    for key, title in SECTION_TITLES:
+        if not grouped[key]:
+            continue
+        body = "\n".join(kept[key])
+        hidden = len(grouped[key]) - cursors[key]
+        if hidden:
+            body = f"{body}\n(+{hidden} más)" if body else f"(+{hidden} más)"
+        blocks.append(f"{title}:\n{body}")
+    return HEADER + "\n\n".join(blocks) + "\n" + FOOTER, omitted
+
+
+def compile_demo_context(data: Any = demo_vertice360_data, *, max_chars: int = DEFAULT_MAX_CHARS) -> DemoContext:
+    started = time.perf_counter()
+    lines = _build_lines(data)
+    text, omitted = _render(lines, max_chars)
+    version = hashlib.sha256(
+        json.dumps([line.text for line in lines], ensure_ascii=False).encode("utf-8")
+    ).hexdigest()[:12]
+    return DemoContext(
+        version=version,
+        text=text,
+        tokens=estimate_tokens(text),
+        lines=tuple(lines),
+        omitted=omitted,
+        max_chars=max_chars,
+        build_ms=(time.perf_counter() - started) * 1000.0,
+        by_id={line.entity_id: line for line in lines},
+    )
+
+
+class DemoContextCache:
+    """Holds the compiled context; recompiles when the mock collections change."""
+
+    def __init__(self, data: Any = demo_vertice360_data, *, max_chars: int = DEFAULT_MAX_CHARS) -> None:
+        self.data = data
+        self.max_chars = max(200, int(max_chars))
+        self._context: DemoContext | None = None
+        self._signature: tuple[Any, ...] | None = None
+        self._lock = Lock()
+        self.compiles = 0
+
+    def _current_signature(self) -> tuple[Any, ...]:
+        # Identity + length is O(1) per request; in-place edits of a record
+        # must call invalidate().
+        collections = (
+            self.data.proyectos_en_pozo,
+            self.data.unidades,
+            self.data.inversores,
+            self.data.reservas_y_ventas,
+        )
+        return tuple((id(items), len(items)) for items in collections)
+
+    def get(self) -> DemoContext:
+        signature = self._current_signature()
+        context = self._context
+        if context is not None and signature == self._signature:
+            return context
+        with self._lock:
+            if self._context is None or signature != self._signature:
+                self._context = compile_demo_context(self.data, max_chars=self.max_chars)
+                self._signature = signature
+                self.compiles += 1
+            return self._context
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._context = None
+            self._signature = None
+
+    def select(self, question: str, *, sliced: bool = True) -> ContextSlice:
+        """Full block, or only lines matching ``question`` (plus linked entities)."""
+        context = self.get()
+        if not sliced:
+            return ContextSlice(context.text, context.tokens, context.version, False, ())
+        wanted = _terms(question)
+        matched = [line for line in context.lines if line.entity_id.lower() in wanted or line.terms & wanted]
+        if not matched:
+            return ContextSlice(context.text, context.tokens, context.version, False, ())
+        selected: dict[str, ContextLine] = {}
+        for line in matched:
+            selected[line.entity_id] = line
+            for linked_id in line.links:
+                linked = context.by_id.get(linked_id)
+                if linked is not None:
+                    selected.setdefault(linked_id, linked)
+        matched_ids = {line.entity_id for line in matched}
+        for line in context.lines:
+            if matched_ids.intersection(line.links):
+                selected.setdefault(line.entity_id, line)
+        ordered = [line for line in context.lines if line.entity_id in selected]
+        text, _ = _render(ordered, self.max_chars)
+        return ContextSlice(text, estimate_tokens(text), context.version, True, tuple(selected))
+
+    def stats(self) -> dict[str, Any]:
+        context = self.get()
+        return {
+            "version": context.version,
+            "chars": len(context.text),
+            "tokens": context.tokens,
+            "lines": len(context.lines),
+            "omitted": context.omitted,
+            "max_chars": context.max_chars,
+            "build_ms": round(context.build_ms, 3),
+            "compiles": self.compiles,
+        }
@@ -0,0 +1,310 @@
+"""Inbound webhook de-duplication shared by the workflow and orquestador flows.
+
+Providers retry webhooks, so every inbound message id is claimed once within a
+TTL. Claims are kept in a time-ordered local table (expiry only pops from the
+head) and, when ``V360_INBOUND_DEDUPE_BACKEND`` is ``sqlite`` or ``postgres``,
+also in a shared table so every worker agrees on the first claim.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Protocol
+
+from backend import globalVar
+from backend.telemetry import metrics
+
+try:
+    from psycopg_pool import ConnectionPool  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    ConnectionPool = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 600
+DEFAULT_MAX_KEYS = 5000
+# Shared tables are purged of expired claims once every N claims.
+PURGE_EVERY = 256
+
+
+class SharedDedupeBackend(Protocol):
+    def claim(self, key: str, ttl_seconds: float) -> bool: ...
+
+    def release(self, key: str) -> None: ...
+
+    def purge_expired(self) -> int: ...
+
+    def reset(self) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class SqliteDedupeBackend:
+    """Claims stored in a local SQLite (WAL) file shared by workers on one host."""
+
+    def __init__(self, path: str) -> None:
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._lock = Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS inbound_dedupe (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_inbound_dedupe_expires ON inbound_dedupe (expires_at)")
+
+    def claim(self, key: str, ttl_seconds: float) -> bool:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                """
+                INSERT INTO inbound_dedupe (key, expires_at) VALUES (?, ?)
+                ON CONFLICT (key) DO UPDATE SET expires_at = excluded.expires_at
+                WHERE inbound_dedupe.expires_at < ?
+                RETURNING key
+                """,
+                (key, now + ttl_seconds, now),
+            ).fetchone()
+        return row is not None
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM inbound_dedupe WHERE key = ?", (key,))
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM inbound_dedupe WHERE expires_at < ?", (time.time(),))
+        return int(cursor.rowcount or 0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM inbound_dedupe")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class PostgresDedupeBackend:
+    """Claims stored in Postgres for workers spread across hosts."""
+
+    def __init__(self, conninfo: str, *, max_size: int = 4) -> None:
+        if ConnectionPool is None:
+            raise RuntimeError(
+                "psycopg_pool is required for the postgres inbound dedupe backend. "
+                "Install with: uv add psycopg[binary] psycopg_pool"
+            )
+        self._pool = ConnectionPool(conninfo=conninfo, min_size=1, max_size=max_size, kwargs={"autocommit": True})
+        with self._pool.connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS inbound_dedupe (key text PRIMARY KEY, expires_at timestamptz NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_inbound_dedupe_expires ON inbound_dedupe (expires_at)")
+
+    def claim(self, key: str, ttl_seconds: float) -> bool:
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                """
+                INSERT INTO inbound_dedupe (key, expires_at)
+                VALUES (%s, now() + make_interval(secs => %s))
+                ON CONFLICT (key) DO UPDATE SET expires_at = EXCLUDED.expires_at
+                WHERE inbound_dedupe.expires_at < now()
+                RETURNING key
+                """,
+                (key, float(ttl_seconds)),
+            ).fetchone()
+        return row is not None
+
+    def release(self, key: str) -> None:
+        with self._pool.connection() as conn:
+            conn.execute("DELETE FROM inbound_dedupe WHERE key = %s", (key,))
+
+    def purge_expired(self) -> int:
+        with self._pool.connection() as conn:
+            cursor = conn.execute("DELETE FROM inbound_dedupe WHERE expires_at < now()")
+        return int(cursor.rowcount or 0)
+
+    def reset(self) -> None:
+        with self._pool.connection() as conn:
+            conn.execute("TRUNCATE inbound_dedupe")
+
+    def close(self) -> None:
+        self._pool.close()
+
+
+class InboundDedupe:
+    """TTL + size bounded set of claimed inbound keys.
+
+    Keys are stored in claim order with their claim time, so expiry and size
+    eviction only ever pop from the head: amortized O(1) per claim.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_keys: int = DEFAULT_MAX_KEYS,
+        shared: SharedDedupeBackend | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_keys = max(1, int(max_keys))
+        self.shared = shared
+        self._clock = clock
+        self._seen: OrderedDict[str, float] = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evicted = 0
+        self._shared_hits = 0
+        self._shared_purged = 0
+        self._shared_errors = 0
+
+    def _expire_head(self, now: float) -> int:
+        cutoff = now - self.ttl_seconds
+        seen = self._seen
+        expired = 0
+        while seen:
+            key, seen_at = next(iter(seen.items()))
+            if seen_at >= cutoff:
+                break
+            seen.popitem(last=False)
+            expired += 1
+        self._expired += expired
+        return expired
+
+    def _trim_to_size(self) -> int:
+        evicted = 0
+        while len(self._seen) > self.max_keys:
+            self._seen.popitem(last=False)
+            evicted += 1
+        self._evicted += evicted
+        return evicted
+
+    def mark(self, key: str) -> bool:
+        """Claim ``key``; returns False when it was already claimed within the TTL."""
+        now = self._clock()
+        with self._lock:
+            expired = self._expire_head(now)
+            duplicate = key in self._seen
+            if duplicate:
+                self._hits += 1
+                evicted = 0
+            else:
+                # Reserve locally before asking the shared tier so concurrent
+                # retries in this process cannot both pass.
+                self._seen[key] = now
+                evicted = self._trim_to_size()
+
+        if expired:
+            metrics.inc("inbound.dedupe.eviction", {"reason": "ttl"})
+        if evicted:
+            metrics.inc("inbound.dedupe.eviction", {"reason": "size"})
+        if duplicate:
+            metrics.inc("inbound.dedupe.hit", {"tier": "local"})
+            return False
+
+        if self.shared is not None and not self._claim_shared(key):
+            with self._lock:
+                self._hits += 1
+                self._shared_hits += 1
+            metrics.inc("inbound.dedupe.hit", {"tier": "shared"})
+            return False
+
+        with self._lock:
+            self._misses += 1
+        metrics.inc("inbound.dedupe.miss")
+        return True
+
+    def _claim_shared(self, key: str) -> bool:
+        shared = self.shared
+        assert shared is not None
+        try:
+            claimed = shared.claim(key, self.ttl_seconds)
+        except Exception as exc:  # noqa: BLE001 - fall back to the local claim
+            with self._lock:
+                self._shared_errors += 1
+            logger.warning("INBOUND_DEDUPE_SHARED_FAILED key=%s error=%s", key, exc)
+            return True
+        if claimed and (self._misses + 1) % PURGE_EVERY == 0:
+            try:
+                purged = shared.purge_expired()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("INBOUND_DEDUPE_PURGE_FAILED error=%s", exc)
+            else:
+                with self._lock:
+                    self._shared_purged += purged
+        return claimed
+
+    def forget(self, key: str) -> None:
+        """Drop the claim on ``key`` so a retry of a failed turn is processed."""
+        with self._lock:
+            self._seen.pop(key, None)
+        if self.shared is None:
+            return
+        try:
+            self.shared.release(key)
+        except Exception as exc:  # noqa: BLE001 - the claim then expires with its TTL
+            with self._lock:
+                self._shared_errors += 1
+            logger.warning("INBOUND_DEDUPE_RELEASE_FAILED key=%s error=%s", key, exc)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._seen.clear()
+            self._hits = 0
+            self._misses = 0
+            self._expired = 0
+            self._evicted = 0
+            self._shared_hits = 0
+            self._shared_purged = 0
+            self._shared_errors = 0
+        if self.shared is not None:
+            self.shared.reset()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._seen),
+                "max_keys": self.max_keys,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "expired": self._expired,
+                "evicted": self._evicted,
+                "shared": type(self.shared).__name__ if self.shared is not None else None,
+                "shared_hits": self._shared_hits,
+                "shared_purged": self._shared_purged,
+                "shared_errors": self._shared_errors,
+            }
+
+
+def _open_shared_backend(kind: str) -> SharedDedupeBackend | None:
+    kind = str(kind or "memory").strip().lower()
+    if kind in ("", "memory"):
+        return None
+    if kind == "sqlite":
+        return SqliteDedupeBackend(
+            globalVar.get_env_str("V360_INBOUND_DEDUPE_SQLITE_PATH", "").strip() or "data/inbound_dedupe.sqlite3"
+        )
+    if kind == "postgres":
+        return PostgresDedupeBackend(
+            globalVar.get_env_str("V360_INBOUND_DEDUPE_PG_URL", "").strip() or globalVar.get_v360_db_url()
+        )
+    raise ValueError(f"unknown inbound dedupe backend: {kind}")
+
+
+inbound_dedupe = InboundDedupe(
+    ttl_seconds=globalVar.get_env_int("V360_INBOUND_DEDUPE_TTL_SECONDS", DEFAULT_TTL_SECONDS, minimum=1),
+    max_keys=globalVar.get_env_int("V360_INBOUND_DEDUPE_MAX_KEYS", DEFAULT_MAX_KEYS, minimum=1),
+    shared=_open_shared_backend(globalVar.get_env_str("V360_INBOUND_DEDUPE_BACKEND", "memory")),
+)
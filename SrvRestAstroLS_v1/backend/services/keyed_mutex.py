@@ -0,0 +1,184 @@
+"""Per-key asyncio mutex that forgets keys nobody holds or waits for.
+
+The registry is only touched from the owning event loop between awaits, so it
+needs no thread lock: entry lookup, reference counting and removal are plain
+dict operations. Wait and hold times feed global histograms plus a bounded
+per-key table so hot conversations can be spotted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator
+
+from backend.telemetry import metrics
+
+logger = logging.getLogger(__name__)
+
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+DEFAULT_TRACKED_KEYS = 1024
+DEFAULT_HOT_WAIT_MS = 250.0
+
+
+def _bucket_index(value_ms: float) -> int:
+    return bisect_left(BUCKETS_MS, value_ms)
+
+
+def _mask_key(key: str) -> str:
+    return f"...{key[-4:]}" if len(key) > 4 else key
+
+
+def _histogram(counts: list[int]) -> dict[str, int]:
+    labels = [f"le_{bound}" for bound in BUCKETS_MS] + ["gt_" + str(BUCKETS_MS[-1])]
+    return {label: count for label, count in zip(labels, counts) if count}
+
+
+@dataclass(slots=True)
+class _Entry:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    refs: int = 0
+
+
+@dataclass(slots=True)
+class _KeyStats:
+    acquisitions: int = 0
+    contended: int = 0
+    wait_total_ms: float = 0.0
+    wait_max_ms: float = 0.0
+    hold_total_ms: float = 0.0
+    hold_max_ms: float = 0.0
+    wait_buckets: list[int] = field(default_factory=lambda: [0] * (len(BUCKETS_MS) + 1))
+    hold_buckets: list[int] = field(default_factory=lambda: [0] * (len(BUCKETS_MS) + 1))
+
+
+class KeyedAsyncMutex:
+    def __init__(
+        self,
+        name: str,
+        *,
+        tracked_keys: int = DEFAULT_TRACKED_KEYS,
+        hot_wait_ms: float = DEFAULT_HOT_WAIT_MS,
+    ) -> None:
+        self.name = name
+        self.tracked_keys = max(1, int(tracked_keys))
+        self.hot_wait_ms = float(hot_wait_ms)
+        self._entries: dict[str, _Entry] = {}
+        self._stats: OrderedDict[str, _KeyStats] = OrderedDict()
+        self._wait_buckets = [0] * (len(BUCKETS_MS) + 1)
+        self._hold_buckets = [0] * (len(BUCKETS_MS) + 1)
+        self._acquisitions = 0
+        self._contended = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def locked(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return bool(entry and entry.lock.locked())
+
+    @asynccontextmanager
+    async def hold(self, key: str) -> AsyncIterator[None]:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = _Entry()
+            self._entries[key] = entry
+        entry.refs += 1
+        contended = entry.lock.locked()
+        wait_started = time.perf_counter()
+        try:
+            await entry.lock.acquire()
+        except BaseException:
+            self._release_ref(key, entry)
+            raise
+        held_started = time.perf_counter()
+        wait_ms = (held_started - wait_started) * 1000.0
+        try:
+            yield
+        finally:
+            entry.lock.release()
+            hold_ms = (time.perf_counter() - held_started) * 1000.0
+            self._release_ref(key, entry)
+            self._record(key, wait_ms, hold_ms, contended)
+
+    def _release_ref(self, key: str, entry: _Entry) -> None:
+        entry.refs -= 1
+        if entry.refs <= 0 and self._entries.get(key) is entry:
+            del self._entries[key]
+
+    def _record(self, key: str, wait_ms: float, hold_ms: float, contended: bool) -> None:
+        wait_bucket = _bucket_index(wait_ms)
+        hold_bucket = _bucket_index(hold_ms)
+        self._acquisitions += 1
+        self._wait_buckets[wait_bucket] += 1
+        self._hold_buckets[hold_bucket] += 1
+        if contended:
+            self._contended += 1
+
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = _KeyStats()
+            self._stats[key] = stats
+            while len(self._stats) > self.tracked_keys:
+                self._stats.popitem(last=False)
+        else:
+            self._stats.move_to_end(key)
+        stats.acquisitions += 1
+        stats.contended += int(contended)
+        stats.wait_total_ms += wait_ms
+        stats.wait_max_ms = max(stats.wait_max_ms, wait_ms)
+        stats.hold_total_ms += hold_ms
+        stats.hold_max_ms = max(stats.hold_max_ms, hold_ms)
+        stats.wait_buckets[wait_bucket] += 1
+        stats.hold_buckets[hold_bucket] += 1
+
+        tags = {"lock": self.name}
+        metrics.observe(f"{self.name}.wait_ms", wait_ms, tags)
+        metrics.observe(f"{self.name}.hold_ms", hold_ms, tags)
+        if wait_ms >= self.hot_wait_ms:
+            metrics.inc(f"{self.name}.hot_key", tags)
+            logger.info(
+                "KEYED_MUTEX_HOT lock=%s key=%s wait_ms=%.1f hold_ms=%.1f waiters=%s",
+                self.name,
+                _mask_key(key),
+                wait_ms,
+                hold_ms,
+                self._entries[key].refs if key in self._entries else 0,
+            )
+
+    def stats(self, *, top: int = 10) -> dict[str, Any]:
+        hottest = sorted(self._stats.items(), key=lambda item: item[1].wait_total_ms, reverse=True)[: max(0, top)]
+        return {
+            "name": self.name,
+            "active_keys": len(self._entries),
+            "acquisitions": self._acquisitions,
+            "contended": self._contended,
+            "wait_ms_histogram": _histogram(self._wait_buckets),
+            "hold_ms_histogram": _histogram(self._hold_buckets),
+            "hot_keys": [
+                {
+                    "key": _mask_key(key),
+                    "acquisitions": row.acquisitions,
+                    "contended": row.contended,
+                    "wait_total_ms": round(row.wait_total_ms, 3),
+                    "wait_max_ms": round(row.wait_max_ms, 3),
+                    "hold_total_ms": round(row.hold_total_ms, 3),
+                    "hold_max_ms": round(row.hold_max_ms, 3),
+                    "wait_ms_histogram": _histogram(row.wait_buckets),
+                    "hold_ms_histogram": _histogram(row.hold_buckets),
+                }
+                for key, row in hottest
+            ],
+        }
+
+    def reset_stats(self) -> None:
+        self._stats.clear()
+        self._wait_buckets = [0] * (len(BUCKETS_MS) + 1)
+        self._hold_buckets = [0] * (len(BUCKETS_MS) + 1)
+        self._acquisitions = 0
+        self._contended = 0
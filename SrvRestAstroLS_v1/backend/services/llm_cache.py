@@ -0,0 +1,258 @@
+"""Completion cache for deterministic (temperature 0) LLM prompts.
+
+Entries are keyed by a hash of model, messages and sampling params. Lookups hit
+an in-process LRU first and then, when ``V360_LLM_CACHE_SQLITE_PATH`` is set, a
+local SQLite file shared by workers on the host. Both tiers honour a TTL; the
+SQLite tier is trimmed to ``max_rows`` by least-recent access.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable
+
+from backend import globalVar
+from backend.telemetry import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL_SECONDS = 86400
+DEFAULT_SQLITE_MAX_ROWS = 10000
+# The SQLite tier is trimmed to max_rows once every N writes.
+TRIM_EVERY = 128
+
+
+def cache_key(model: str, messages: list[dict[str, str]], params: dict[str, Any]) -> str:
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SqliteCacheTier:
+    def __init__(self, path: str, *, max_rows: int = DEFAULT_SQLITE_MAX_ROWS) -> None:
+        self.path = str(path)
+        self.max_rows = max(1, int(max_rows))
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._lock = Lock()
+        self._writes = 0
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    purpose TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed ON llm_cache (accessed_at)")
+
+    def get(self, key: str, now: float) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ? AND expires_at >= ? RETURNING payload",
+                (now, key, now),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, purpose: str, value: dict[str, Any], expires_at: float, now: float) -> int:
+        """Store ``value``; returns how many rows were evicted to stay under ``max_rows``."""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO llm_cache (key, purpose, payload, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    payload = excluded.payload, expires_at = excluded.expires_at, accessed_at = excluded.accessed_at
+                """,
+                (key, purpose, json.dumps(value, ensure_ascii=False), expires_at, now),
+            )
+            self._writes += 1
+            if self._writes % TRIM_EVERY:
+                return 0
+            return self._trim(now)
+
+    def _trim(self, now: float) -> int:
+        evicted = self._conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,)).rowcount or 0
+        evicted += (
+            self._conn.execute(
+                """
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_rows,),
+            ).rowcount
+            or 0
+        )
+        return int(evicted)
+
+    def trim(self, now: float | None = None) -> int:
+        with self._lock:
+            return self._trim(time.time() if now is None else now)
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0])
+
+    def reset(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LLMCache:
+    """Two-tier (LRU + optional SQLite) completion cache with per-purpose counters."""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        disk: SqliteCacheTier | None = None,
+        bypass: bool = False,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.disk = disk
+        self.bypass = bool(bypass)
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = Lock()
+        self._purposes: dict[str, dict[str, int]] = {}
+        self._evicted = 0
+        self._disk_errors = 0
+
+    def _count(self, purpose: str, field: str) -> None:
+        row = self._purposes.get(purpose)
+        if row is None:
+            row = {"hits_memory": 0, "hits_disk": 0, "misses": 0, "stores": 0}
+            self._purposes[purpose] = row
+        row[field] += 1
+
+    def get(self, key: str, *, purpose: str = "default") -> dict[str, Any] | None:
+        if self.bypass:
+            return None
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._count(purpose, "hits_memory")
+        if entry is not None:
+            metrics.inc("llm.cache.hit", {"purpose": purpose, "tier": "memory"})
+            return entry[1]
+
+        value = None
+        if self.disk is not None:
+            try:
+                value = self.disk.get(key, now)
+            except Exception as exc:  # noqa: BLE001 - the cache must never fail a call
+                self._disk_errors += 1
+                logger.warning("LLM_CACHE_DISK_GET_FAILED error=%s", exc)
+        if value is not None:
+            with self._lock:
+                self._remember(key, value, now + self.ttl_seconds)
+                self._count(purpose, "hits_disk")
+            metrics.inc("llm.cache.hit", {"purpose": purpose, "tier": "disk"})
+            return value
+
+        with self._lock:
+            self._count(purpose, "misses")
+        metrics.inc("llm.cache.miss", {"purpose": purpose})
+        return None
+
+    def put(self, key: str, value: dict[str, Any], *, purpose: str = "default") -> None:
+        if self.bypass:
+            return
+        now = self._clock()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self._count(purpose, "stores")
+        if self.disk is not None:
+            try:
+                evicted = self.disk.put(key, purpose, value, expires_at, now)
+            except Exception as exc:  # noqa: BLE001
+                self._disk_errors += 1
+                logger.warning("LLM_CACHE_DISK_PUT_FAILED error=%s", exc)
+            else:
+                if evicted:
+                    metrics.inc("llm.cache.eviction", {"tier": "disk"})
+
+    def _remember(self, key: str, value: dict[str, Any], expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evicted += 1
+            metrics.inc("llm.cache.eviction", {"tier": "memory"})
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._purposes.clear()
+            self._evicted = 0
+            self._disk_errors = 0
+        if self.disk is not None:
+            self.disk.reset()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            purposes = {}
+            for purpose, row in self._purposes.items():
+                lookups = row["hits_memory"] + row["hits_disk"] + row["misses"]
+                hits = row["hits_memory"] + row["hits_disk"]
+                purposes[purpose] = {**row, "hit_rate": round(hits / lookups, 4) if lookups else 0.0}
+            return {
+                "bypass": self.bypass,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "evicted": self._evicted,
+                "disk": self.disk.path if self.disk is not None else None,
+                "disk_errors": self._disk_errors,
+                "purposes": purposes,
+            }
+
+
+def _open_disk_tier() -> SqliteCacheTier | None:
+    path = globalVar.get_env_str("V360_LLM_CACHE_SQLITE_PATH", "").strip()
+    if not path:
+        return None
+    return SqliteCacheTier(
+        path,
+        max_rows=globalVar.get_env_int("V360_LLM_CACHE_SQLITE_MAX_ROWS", DEFAULT_SQLITE_MAX_ROWS, minimum=1),
+    )
+
+
+llm_cache = LLMCache(
+    max_entries=globalVar.get_env_int("V360_LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES, minimum=1),
+    ttl_seconds=globalVar.get_env_int("V360_LLM_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS, minimum=1),
+    disk=_open_disk_tier(),
+    bypass=globalVar.get_env_bool("V360_LLM_CACHE_BYPASS", False),
+)
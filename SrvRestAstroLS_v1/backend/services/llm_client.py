@@ -0,0 +1,462 @@
+"""Process-wide async LLM client shared by every chat-completion call site.
+
+One ``AsyncOpenAI`` client (and its httpx connection pool) is reused for the
+life of the event loop, so TLS sessions are kept alive between calls. Calls are
+bounded by a semaphore and a per-call timeout; cancelling the awaiting task
+cancels the in-flight HTTP request. ``V360_LLM_BACKEND=stub`` swaps in a local
+backend that never touches the network (tests, offline demos). Callers with
+deterministic prompts pass ``cache=True`` to go through ``services.llm_cache``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Protocol
+
+from backend import globalVar
+from backend.services.llm_cache import LLMCache, cache_key, llm_cache
+from backend.services.stale_clients import close_stale_client
+from backend.telemetry import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_TIMEOUT_SECONDS = 20
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_CONNECTIONS = 10
+
+
+class LLMError(RuntimeError):
+    """Raised when a completion could not be produced (backend or transport)."""
+
+
+class LLMTimeout(LLMError):
+    """Raised when a completion exceeds its per-call timeout."""
+
+
+@dataclass(slots=True)
+class LLMResult:
+    content: str
+    model: str | None = None
+    created: int | None = None
+    usage: dict[str, Any] | None = None
+    latency_ms: float = 0.0
+    cached: bool = False
+
+
+@dataclass(slots=True)
+class LLMRequest:
+    messages: list[dict[str, str]]
+    model: str
+    temperature: float | None = None
+    max_tokens: int | None = None
+    purpose: str = "default"
+    extra: dict[str, Any] = field(default_factory=dict)
+
+
+class LLMBackend(Protocol):
+    name: str
+
+    async def complete(self, request: LLMRequest) -> LLMResult: ...
+
+    def stream(self, request: LLMRequest) -> AsyncIterator[str]: ...
+
+    async def aclose(self) -> None: ...
+
+
+class OpenAIBackend:
+    """``AsyncOpenAI`` over a pooled httpx client, rebuilt per event loop."""
+
+    name = "openai"
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        keepalive_connections: int = DEFAULT_KEEPALIVE_CONNECTIONS,
+    ) -> None:
+        self.max_connections = max(1, int(max_connections))
+        self.keepalive_connections = max(0, int(keepalive_connections))
+        self._client: Any = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_client(self) -> Any:
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is loop:
+            return self._client
+        try:
+            import httpx
+            from openai import AsyncOpenAI
+        except Exception as exc:  # pragma: no cover - depends on installed lib
+            raise LLMError("openai_not_available") from exc
+        if not globalVar.OpenAI_Key:
+            raise LLMError("missing_openai_key")
+        # A client created on another loop cannot be used here; close it (it
+        # still owns sockets) and pool afresh on this one.
+        if self._client is not None:
+            close_stale_client(self._client.close, self._loop, kind="openai")
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.keepalive_connections,
+            ),
+        )
+        self._client = AsyncOpenAI(api_key=globalVar.OpenAI_Key, http_client=http_client, max_retries=0)
+        self._loop = loop
+        return self._client
+
+    async def complete(self, request: LLMRequest) -> LLMResult:
+        client = self._get_client()
+        kwargs: dict[str, Any] = {"model": request.model, "messages": request.messages, **request.extra}
+        if request.temperature is not None:
+            kwargs["temperature"] = request.temperature
+        if request.max_tokens is not None:
+            kwargs["max_tokens"] = request.max_tokens
+        completion = await client.chat.completions.create(**kwargs)
+        content = ""
+        if completion.choices:
+            content = completion.choices[0].message.content or ""
+        usage = None
+        if getattr(completion, "usage", None):
+            usage = completion.usage.model_dump() if hasattr(completion.usage, "model_dump") else dict(completion.usage)
+        return LLMResult(
+            content=content,
+            model=getattr(completion, "model", None) or request.model,
+            created=getattr(completion, "created", None),
+            usage=usage,
+        )
+
+    async def stream(self, request: LLMRequest) -> AsyncIterator[str]:
+        client = self._get_client()
+        kwargs: dict[str, Any] = {"model": request.model, "messages": request.messages, "stream": True, **request.extra}
+        if request.temperature is not None:
+            kwargs["temperature"] = request.temperature
+        if request.max_tokens is not None:
+            kwargs["max_tokens"] = request.max_tokens
+        response = await client.chat.completions.create(**kwargs)
+        try:
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Closing the response aborts the HTTP body read when the caller
+            # stops early (client disconnect, timeout).
+            await response.close()
+
+    async def aclose(self) -> None:
+        client, self._client, self._loop = self._client, None, None
+        if client is not None:
+            try:
+                await client.close()
+            except Exception as exc:  # noqa: BLE001 - closing on a dead loop
+                logger.debug("LLM_CLIENT_CLOSE_FAILED error=%s", exc)
+
+
+StubResponder = Callable[[LLMRequest], Any]
+
+
+class StubBackend:
+    """Local backend: answers from ``responder`` (default: echo the last user message)."""
+
+    name = "stub"
+
+    def __init__(
+        self,
+        responder: StubResponder | None = None,
+        *,
+        delay_seconds: float = 0.0,
+        chunk_delay_seconds: float = 0.0,
+    ) -> None:
+        self.responder = responder
+        self.delay_seconds = float(delay_seconds)
+        self.chunk_delay_seconds = float(chunk_delay_seconds)
+        self.requests: list[LLMRequest] = []
+
+    async def complete(self, request: LLMRequest) -> LLMResult:
+        self.requests.append(request)
+        if self.delay_seconds:
+            await asyncio.sleep(self.delay_seconds)
+        if self.responder is None:
+            user_messages = [m.get("content") or "" for m in request.messages if m.get("role") == "user"]
+            reply: Any = user_messages[-1] if user_messages else ""
+        else:
+            reply = self.responder(request)
+            if asyncio.iscoroutine(reply):
+                reply = await reply
+        if isinstance(reply, LLMResult):
+            return reply
+        return LLMResult(content=str(reply or ""), model=f"stub:{request.model}", created=int(time.time()))
+
+    async def stream(self, request: LLMRequest) -> AsyncIterator[str]:
+        result = await self.complete(request)
+        for index, word in enumerate(result.content.split(" ")):
+            if index and self.chunk_delay_seconds:
+                await asyncio.sleep(self.chunk_delay_seconds)
+            yield word if index == 0 else f" {word}"
+
+    async def aclose(self) -> None:
+        return None
+
+
+class LLMStream:
+    """Async iterator of content deltas for one streamed completion.
+
+    The assembled text, time to first token and total latency are available
+    once iteration ends. ``aclose()`` (or breaking out of ``async for``) stops
+    the upstream request and releases the concurrency slot.
+    """
+
+    def __init__(self, client: LLMClient, request: LLMRequest, timeout_seconds: float) -> None:
+        self.request = request
+        self.model = request.model
+        self.timeout_seconds = timeout_seconds
+        self.content = ""
+        self.first_token_ms: float | None = None
+        self.latency_ms: float | None = None
+        self.status = "pending"
+        self._client = client
+        self._iterator: AsyncIterator[str] | None = None
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        if self._iterator is None:
+            self._iterator = self._run()
+        return self._iterator
+
+    async def aclose(self) -> None:
+        if self._iterator is not None:
+            await self._iterator.aclose()  # type: ignore[attr-defined]
+
+    async def _run(self) -> AsyncIterator[str]:
+        client = self._client
+        tags = {"backend": client.backend.name, "purpose": self.request.purpose}
+        started = time.perf_counter()
+        parts: list[str] = []
+        self.status = "ok"
+        upstream = client.backend.stream(self.request)
+        try:
+            # Each timeout only wraps the wait for the next chunk, never the
+            # consumer's work between chunks, so it bounds idle gaps.
+            async with asyncio.timeout(self.timeout_seconds):
+                await client._get_semaphore().acquire()
+            client._in_flight += 1
+            try:
+                while True:
+                    async with asyncio.timeout(self.timeout_seconds):
+                        try:
+                            delta = await anext(upstream)
+                        except StopAsyncIteration:
+                            break
+                    if self.first_token_ms is None:
+                        self.first_token_ms = (time.perf_counter() - started) * 1000.0
+                        metrics.observe("llm.first_token_ms", self.first_token_ms, tags)
+                    parts.append(delta)
+                    yield delta
+            finally:
+                client._in_flight -= 1
+                client._get_semaphore().release()
+        except TimeoutError as exc:
+            self.status = "timeout"
+            client._timeouts += 1
+            raise LLMTimeout(f"llm_timeout purpose={self.request.purpose} after={self.timeout_seconds}s") from exc
+        except (asyncio.CancelledError, GeneratorExit):
+            self.status = "cancelled"
+            client._cancelled += 1
+            raise
+        except LLMError:
+            self.status = "error"
+            client._errors += 1
+            raise
+        except Exception as exc:
+            self.status = "error"
+            client._errors += 1
+            raise LLMError(f"{type(exc).__name__}: {exc}") from exc
+        finally:
+            await upstream.aclose()  # type: ignore[attr-defined]
+            self.content = "".join(parts)
+            self.latency_ms = (time.perf_counter() - started) * 1000.0
+            client._calls += 1
+            metrics.observe("llm.call_ms", self.latency_ms, {**tags, "status": self.status, "mode": "stream"})
+            metrics.inc("llm.calls", {**tags, "status": self.status, "mode": "stream"})
+
+
+class LLMClient:
+    def __init__(
+        self,
+        backend: LLMBackend,
+        *,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS,
+        cache: LLMCache | None = None,
+    ) -> None:
+        self.backend = backend
+        self.cache = cache
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.timeout_seconds = float(timeout_seconds)
+        self._semaphore: asyncio.Semaphore | None = None
+        self._semaphore_loop: asyncio.AbstractEventLoop | None = None
+        self._in_flight = 0
+        self._calls = 0
+        self._errors = 0
+        self._timeouts = 0
+        self._cancelled = 0
+
+    @property
+    def available(self) -> bool:
+        """True when a call has a chance of succeeding (stub, or a key is set)."""
+        return self.backend.name != "openai" or bool(globalVar.OpenAI_Key)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def chat(
+        self,
+        messages: list[dict[str, str]],
+        *,
+        model: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        timeout: float | None = None,
+        purpose: str = "default",
+        cache: bool = False,
+    ) -> LLMResult:
+        request = LLMRequest(
+            messages=messages,
+            model=model or globalVar.OpenAI_Model or DEFAULT_MODEL,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            purpose=purpose,
+        )
+        key = None
+        if cache and self.cache is not None:
+            key = cache_key(
+                f"{self.backend.name}:{request.model}",
+                messages,
+                {"temperature": temperature, "max_tokens": max_tokens},
+            )
+            hit = self.cache.get(key, purpose=purpose)
+            if hit is not None:
+                return LLMResult(
+                    content=hit.get("content") or "",
+                    model=hit.get("model"),
+                    created=hit.get("created"),
+                    usage=hit.get("usage"),
+                    cached=True,
+                )
+        limit = self.timeout_seconds if timeout is None else float(timeout)
+        tags = {"backend": self.backend.name, "purpose": purpose}
+        started = time.perf_counter()
+        status = "ok"
+        # The timeout covers the queue wait too: a caller that gave up should
+        # not keep a slot once it finally gets one.
+        try:
+            async with asyncio.timeout(limit):
+                async with self._get_semaphore():
+                    self._in_flight += 1
+                    try:
+                        result = await self.backend.complete(request)
+                    finally:
+                        self._in_flight -= 1
+        except TimeoutError as exc:
+            status = "timeout"
+            self._timeouts += 1
+            raise LLMTimeout(f"llm_timeout purpose={purpose} after={limit}s") from exc
+        except asyncio.CancelledError:
+            status = "cancelled"
+            self._cancelled += 1
+            raise
+        except LLMError:
+            status = "error"
+            self._errors += 1
+            raise
+        except Exception as exc:
+            status = "error"
+            self._errors += 1
+            raise LLMError(f"{type(exc).__name__}: {exc}") from exc
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            self._calls += 1
+            metrics.observe("llm.call_ms", elapsed_ms, {**tags, "status": status})
+            metrics.inc("llm.calls", {**tags, "status": status})
+        result.latency_ms = elapsed_ms
+        if key is not None and result.content:
+            self.cache.put(
+                key,
+                {"content": result.content, "model": result.model, "created": result.created, "usage": result.usage},
+                purpose=purpose,
+            )
+        return result
+
+    def stream(
+        self,
+        messages: list[dict[str, str]],
+        *,
+        model: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        timeout: float | None = None,
+        purpose: str = "default",
+    ) -> LLMStream:
+        request = LLMRequest(
+            messages=messages,
+            model=model or globalVar.OpenAI_Model or DEFAULT_MODEL,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            purpose=purpose,
+        )
+        return LLMStream(self, request, self.timeout_seconds if timeout is None else float(timeout))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "backend": self.backend.name,
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout_seconds,
+            "in_flight": self._in_flight,
+            "calls": self._calls,
+            "errors": self._errors,
+            "timeouts": self._timeouts,
+            "cancelled": self._cancelled,
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+    async def aclose(self) -> None:
+        await self.backend.aclose()
+
+
+def _open_backend(kind: str) -> LLMBackend:
+    kind = str(kind or "openai").strip().lower()
+    if kind == "stub":
+        return StubBackend()
+    if kind == "openai":
+        return OpenAIBackend(
+            max_connections=globalVar.get_env_int("V360_LLM_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS, minimum=1),
+            keepalive_connections=globalVar.get_env_int(
+                "V360_LLM_KEEPALIVE_CONNECTIONS", DEFAULT_KEEPALIVE_CONNECTIONS, minimum=0
+            ),
+        )
+    raise ValueError(f"unknown llm backend: {kind}")
+
+
+llm_client = LLMClient(
+    _open_backend(globalVar.get_env_str("V360_LLM_BACKEND", "openai")),
+    max_concurrency=globalVar.get_env_int("V360_LLM_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY, minimum=1),
+    timeout_seconds=globalVar.get_env_int("V360_LLM_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS, minimum=1),
+    cache=llm_cache,
+)
+
+
+def configure_llm_backend(backend: LLMBackend | str) -> LLMBackend:
+    """Swap the shared client's backend (e.g. ``StubBackend`` in tests)."""
+    llm_client.backend = _open_backend(backend) if isinstance(backend, str) else backend
+    return llm_client.backend
+
+
+async def close_llm_client() -> None:
+    await llm_client.aclose()
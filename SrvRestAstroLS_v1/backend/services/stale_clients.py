@@ -0,0 +1,43 @@
+"""Closing pooled async clients left behind on another event loop.
+
+``llm_client`` and the provider HTTP pools rebuild their client when first used
+on a new loop. The old client still owns sockets, so it is closed on its own
+loop while that loop is running, otherwise on the current one (best effort: a
+closed loop may refuse to tear its transports down cleanly).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+from backend.telemetry import metrics
+
+logger = logging.getLogger(__name__)
+
+_closing: set[asyncio.Task[None]] = set()
+
+
+async def _close(close: Callable[[], Awaitable[Any]], kind: str) -> None:
+    try:
+        await close()
+    except Exception as exc:  # noqa: BLE001 - the owning loop may already be gone
+        logger.debug("STALE_CLIENT_CLOSE_FAILED kind=%s error=%s", kind, exc)
+
+
+def close_stale_client(
+    close: Callable[[], Awaitable[Any]],
+    owner_loop: asyncio.AbstractEventLoop | None,
+    *,
+    kind: str,
+) -> None:
+    """Schedule ``close()`` of a client created on ``owner_loop``; never waits."""
+    metrics.inc("client.stale_closed", {"kind": kind})
+    current = asyncio.get_running_loop()
+    if owner_loop is not None and owner_loop is not current and owner_loop.is_running():
+        asyncio.run_coroutine_threadsafe(_close(close, kind), owner_loop)
+        return
+    task = current.create_task(_close(close, kind))
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import os
 import sys
 from pathlib import Path
 import asyncio
 
+# Keep the suite off the on-disk AI run log (data/ai_workflow_runs.sqlite3).
+os.environ.setdefault("V360_AI_RUN_LOG_PATH", ":memory:")
+
 ROOT_DIR = Path(__file__).resolve().parents[2]
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
@@ -12,7 +16,10 @@ import pytest
 import httpx
 
 from backend.modules.agui_stream.broadcaster import broadcaster
+from backend.modules.messaging.providers.dispatcher import outbound_dispatcher
+from backend.modules.vertice360_orquestador_demo.delivery_status import delivery_status_ingestor
 from backend.modules.vertice360_workflow_demo import services, store
+from backend.modules.vertice360_orquestador_demo import services as orquestador_services
 from backend.ls_iMotorSoft_Srv01_demo import create_app
 
 _ORIGINAL_SEND_WHATSAPP_TEXT = services._send_whatsapp_text
@@ -23,9 +30,15 @@ _ORIGINAL_RUN_AI_WORKFLOW_REPLY = services._run_ai_workflow_reply
 def reset_workflow_store():
     store.reset_store()
     services.reset_inbound_dedupe_cache()
+    orquestador_services.reset_intent_cache()
+    outbound_dispatcher.reset()
+    delivery_status_ingestor.reset()
     yield
     store.reset_store()
     services.reset_inbound_dedupe_cache()
+    orquestador_services.reset_intent_cache()
+    outbound_dispatcher.reset()
+    delivery_status_ingestor.reset()
 
 
 @pytest.fixture(autouse=True)
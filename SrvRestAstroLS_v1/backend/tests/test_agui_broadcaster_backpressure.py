@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+from backend.modules.agui_stream.broadcaster import AGUIBroadcaster
+
+
+def _event(correlation_id: str, seq: int) -> dict:
+    return {"type": "CUSTOM", "name": "ticket.updated", "value": {"seq": seq}, "correlationId": correlation_id}
+
+
+def _drain(queue) -> list[int | None]:  # noqa: ANN001
+    values: list[int | None] = []
+    while not queue.empty():
+        message = queue.get_nowait()
+        values.append(None if message is None else json.loads(message.split("data: ", 1)[1])["value"]["seq"])
+    return values
+
+
+def test_drop_oldest_keeps_latest_messages_without_blocking_publish() -> None:
+    hub = AGUIBroadcaster(queue_size=3, policy="drop_oldest")
+
+    async def scenario():  # noqa: ANN202
+        stalled = await hub.subscribe()
+        for seq in range(5):
+            await asyncio.wait_for(hub.publish("ticket.updated", _event(f"T-{seq}", seq)), timeout=0.1)
+        return stalled
+
+    stalled = asyncio.run(scenario())
+
+    assert _drain(stalled) == [2, 3, 4]
+    stats = hub.stats()
+    assert stats["dropped"] == 2
+    assert stats["per_subscriber"][0]["max_lag"] == 3
+
+
+def test_coalesce_replaces_queued_event_of_same_correlation_id() -> None:
+    hub = AGUIBroadcaster(queue_size=2, policy="coalesce")
+
+    async def scenario():  # noqa: ANN202
+        queue = await hub.subscribe()
+        await hub.publish("ticket.updated", _event("T-1", 1))
+        await hub.publish("ticket.updated", _event("T-2", 2))
+        await hub.publish("ticket.updated", _event("T-1", 3))  # supersedes seq 1
+        await hub.publish("ticket.updated", _event("T-9", 4))  # no match: oldest (seq 2) goes
+        return queue
+
+    queue = asyncio.run(scenario())
+
+    assert _drain(queue) == [3, 4]
+    assert hub.stats()["per_subscriber"][0] == {
+        "id": 1,
+        "policy": "coalesce",
+        "filters": None,
+        "lag": 0,
+        "max_lag": 2,
+        "delivered": 2,
+        "dropped": 1,
+        "coalesced": 1,
+        "closed": False,
+    }
+
+
+def test_disconnect_policy_drops_only_the_slow_subscriber() -> None:
+    hub = AGUIBroadcaster(queue_size=2, policy="disconnect")
+
+    async def scenario():  # noqa: ANN202
+        slow = await hub.subscribe()
+        fast = await hub.subscribe()
+        received: list[int | None] = []
+        for seq in range(4):
+            await hub.publish("ticket.updated", _event("T-1", seq))
+            received.extend(_drain(fast))
+        return slow, received
+
+    slow, received = asyncio.run(scenario())
+
+    assert received == [0, 1, 2, 3]
+    assert _drain(slow) == [None]
+    assert hub.subscriber_count() == 1
+    assert hub.stats()["disconnected"] == 1
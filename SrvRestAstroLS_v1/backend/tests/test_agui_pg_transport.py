@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Any
+
+from backend.modules.agui_stream.broadcaster import AGUIBroadcaster, SubscriptionFilter
+from backend.modules.agui_stream.transport import PostgresNotifyTransport
+
+
+class FakeCursor:
+    def __init__(self, row: tuple | None) -> None:
+        self.row = row
+
+    async def fetchone(self) -> tuple | None:
+        return self.row
+
+
+class FakeNotifyConn:
+    """Stands in for the worker's psycopg AsyncConnection: records NOTIFYs, keeps a spill table."""
+
+    def __init__(self, spill: dict[int, str]) -> None:
+        self.spill = spill
+        self.notifications: list[str] = []
+
+    @asynccontextmanager
+    async def transaction(self):  # noqa: ANN201
+        yield
+
+    async def execute(self, query: str, params: tuple = ()) -> FakeCursor:
+        if "pg_notify" in query:
+            self.notifications.append(params[1])
+        elif query.startswith("INSERT INTO agui_event_spill"):
+            spill_id = len(self.spill) + 1
+            self.spill[spill_id] = params[0]
+            return FakeCursor((spill_id,))
+        elif query.startswith("SELECT body FROM agui_event_spill"):
+            body = self.spill.get(params[0])
+            return FakeCursor((body,) if body is not None else None)
+        return FakeCursor(None)
+
+
+class SlowNotifyConn(FakeNotifyConn):
+    """Holds each transaction open briefly and records how deeply they nest."""
+
+    def __init__(self, spill: dict[int, str]) -> None:
+        super().__init__(spill)
+        self.depth = 0
+        self.max_depth = 0
+
+    @asynccontextmanager
+    async def transaction(self):  # noqa: ANN201
+        self.depth += 1
+        self.max_depth = max(self.max_depth, self.depth)
+        try:
+            await asyncio.sleep(0.02)
+            yield
+        finally:
+            self.depth -= 1
+
+
+def _worker(origin: str, spill: dict[int, str], **kwargs: Any) -> tuple[PostgresNotifyTransport, list]:
+    transport = PostgresNotifyTransport("postgresql+psycopg://u:p@db/v360", origin=origin, **kwargs)
+    transport._notify_conn = FakeNotifyConn(spill)
+    received: list[tuple[str, dict]] = []
+
+    async def deliver(event_type: str, payload: dict) -> None:
+        received.append((event_type, payload))
+
+    transport._deliver = deliver
+    return transport, received
+
+
+def test_batches_spills_large_events_and_dedupes_on_the_receiving_worker() -> None:
+    spill: dict[int, str] = {}
+    sender, _ = _worker("w1", spill, payload_limit=1024)
+    receiver, received = _worker("w2", spill)
+
+    async def scenario() -> list[str]:
+        for seq in range(20):
+            sender.send("ticket.updated", {"name": "ticket.updated", "correlationId": f"T-{seq}"})
+        sender.send("messaging.inbound.raw", {"name": "messaging.inbound.raw", "value": {"raw": "x" * 4000}})
+        await sender.flush()
+        bodies = list(sender._notify_conn.notifications)
+        for body in bodies + bodies:  # a re-sent batch must not be delivered twice
+            await receiver.handle_notification(body)
+        await sender.handle_notification(bodies[0])  # own notifications are ignored
+        return bodies
+
+    bodies = asyncio.run(scenario())
+
+    assert 1 < len(bodies) < 21
+    assert all(len(body.encode()) <= 1024 for body in bodies)
+    assert len(spill) == 1
+    assert [payload.get("correlationId") for _, payload in received[:20]] == [f"T-{seq}" for seq in range(20)]
+    assert received[20][0] == "messaging.inbound.raw"
+    assert len(received[20][1]["value"]["raw"]) == 4000
+    assert len(received) == 21
+    assert receiver.stats()["duplicates"] == 21
+    assert sender.conninfo == "postgresql://u:p@db/v360"
+
+
+def test_broadcaster_delivers_locally_and_forwards_remote_events_through_filters() -> None:
+    spill: dict[int, str] = {}
+    worker_a, worker_b = AGUIBroadcaster(), AGUIBroadcaster()
+    transport_a, _ = _worker("a", spill)
+    transport_b, _ = _worker("b", spill)
+    transport_b._deliver = worker_b.publish_local
+    worker_a.transport = transport_a
+
+    async def scenario():  # noqa: ANN202
+        local = await worker_a.subscribe()
+        remote = await worker_b.subscribe(SubscriptionFilter.build(correlation_ids=["T-1"]))
+        await worker_a.publish("ticket.updated", {"name": "ticket.updated", "correlationId": "T-1"})
+        await worker_a.publish("ticket.updated", {"name": "ticket.updated", "correlationId": "T-2"})
+        await transport_a.flush()
+        for body in transport_a._notify_conn.notifications:
+            await transport_b.handle_notification(body)
+        return local, remote
+
+    local, remote = asyncio.run(scenario())
+
+    assert local.qsize() == 2
+    assert remote.qsize() == 1
+    assert json.loads(remote.get_nowait().split("data: ", 1)[1])["correlationId"] == "T-1"
+    assert worker_a.stats()["transport"]["sent_events"] == 2
+
+
+def test_flushes_are_serialized_and_events_sent_mid_flush_are_not_stranded() -> None:
+    transport, _ = _worker("w1", {}, batch_window_ms=5, max_batch=3)
+    conn = SlowNotifyConn({})
+    transport._notify_conn = conn
+
+    def sent() -> list[int]:
+        return sorted(event["p"]["seq"] for body in conn.notifications for event in json.loads(body)["e"])
+
+    async def scenario() -> None:
+        transport.send("ticket.updated", {"seq": 1})
+        await asyncio.sleep(0.01)  # the timer flush is now inside its transaction
+        transport.send("ticket.updated", {"seq": 2})
+        await asyncio.sleep(0.1)
+        assert sent() == [1, 2]
+        transport.send("ticket.updated", {"seq": 3})
+        await asyncio.sleep(0.01)
+        for seq in (4, 5, 6):  # max_batch: an immediate flush while the timer flush runs
+            transport.send("ticket.updated", {"seq": seq})
+        await asyncio.sleep(0.15)
+
+    asyncio.run(scenario())
+
+    assert sent() == [1, 2, 3, 4, 5, 6]
+    assert conn.max_depth == 1
+    assert transport.stats()["buffered"] == 0
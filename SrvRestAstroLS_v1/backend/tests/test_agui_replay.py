@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+from backend.modules.agui_stream.broadcaster import (
+    RESYNC_EVENT,
+    AGUIBroadcaster,
+    ReplayBuffer,
+    SubscriptionFilter,
+)
+
+
+def _event(correlation_id: str, seq: int) -> dict:
+    return {"type": "CUSTOM", "name": "ticket.updated", "value": {"seq": seq}, "correlationId": correlation_id}
+
+
+def _frames(queue) -> list[tuple[str, str, dict]]:  # noqa: ANN001
+    frames = []
+    while not queue.empty():
+        fields = dict(line.split(": ", 1) for line in queue.get_nowait().strip().splitlines())
+        frames.append((fields.get("id"), fields["event"], json.loads(fields["data"])))
+    return frames
+
+
+def test_reconnect_with_last_event_id_replays_only_missed_matching_frames() -> None:
+    hub = AGUIBroadcaster()
+
+    async def scenario():  # noqa: ANN202
+        first = await hub.subscribe(SubscriptionFilter.build(correlation_ids=["T-1"]))
+        await hub.publish("ticket.updated", _event("T-1", 1))
+        await hub.publish("ticket.updated", _event("T-1", 2))
+        seen = _frames(first)
+        await hub.unsubscribe(first)
+        # Published while the client was reconnecting.
+        await hub.publish("ticket.updated", _event("T-1", 3))
+        await hub.publish("ticket.updated", _event("T-2", 4))
+        await hub.publish("ticket.updated", _event("T-1", 5))
+        resumed = await hub.subscribe(SubscriptionFilter.build(correlation_ids=["T-1"]), last_event_id=seen[-1][0])
+        return seen, _frames(resumed)
+
+    seen, replayed = asyncio.run(scenario())
+
+    assert [frame[2]["value"]["seq"] for frame in seen] == [1, 2]
+    assert [frame[2]["value"]["seq"] for frame in replayed] == [3, 5]
+    ids = [int(frame[0].rsplit("-", 1)[1]) for frame in seen + replayed]
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+    assert hub.stats()["replay"]["replayed_events"] == 3
+
+
+def test_expired_or_foreign_last_event_id_sends_a_single_resync() -> None:
+    now = [0.0]
+    hub = AGUIBroadcaster(replay=ReplayBuffer(max_events=3, max_age_seconds=60, clock=lambda: now[0]))
+
+    async def scenario():  # noqa: ANN202
+        for seq in range(5):
+            await hub.publish("ticket.updated", _event("T-1", seq))
+        evicted = await hub.subscribe(last_event_id=f"{hub.replay.epoch}-1")
+        in_window = await hub.subscribe(last_event_id=f"{hub.replay.epoch}-3")
+        foreign = await hub.subscribe(last_event_id="deadbeef-4")
+        now[0] = 120.0
+        expired = await hub.subscribe(last_event_id=f"{hub.replay.epoch}-3")
+        return evicted, in_window, foreign, expired
+
+    evicted, in_window, foreign, expired = asyncio.run(scenario())
+
+    assert [frame[2]["value"]["seq"] for frame in _frames(in_window)] == [3, 4]
+    for queue in (evicted, foreign, expired):
+        frames = _frames(queue)
+        assert [frame[1] for frame in frames] == [RESYNC_EVENT]
+        assert frames[0][0] == f"{hub.replay.epoch}-5"
+    assert hub.stats()["replay"]["resyncs"] == 3
+
+
+def test_replay_sends_the_payload_as_it_was_published() -> None:
+    hub = AGUIBroadcaster()
+    ticket = {"ticketId": "T-1", "status": "OPEN"}
+
+    async def scenario():  # noqa: ANN202
+        live = await hub.subscribe()
+        await hub.publish("ticket.created", {"type": "CUSTOM", "name": "ticket.created", "value": ticket})
+        frames = _frames(live)
+        # The store keeps mutating the same ticket dict after the event went out.
+        ticket["status"] = "CLOSED"
+        resumed = await hub.subscribe(last_event_id=f"{hub.replay.epoch}-0")
+        return frames, _frames(resumed)
+
+    live, replayed = asyncio.run(scenario())
+
+    assert live[0][2]["value"]["status"] == "OPEN"
+    assert replayed[0][2]["value"]["status"] == "OPEN"
+    assert replayed[0][0] == live[0][0]
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import json
+
+from litestar.datastructures import MultiDict
+
+from backend.modules.agui_stream.broadcaster import AGUIBroadcaster, ReplayBuffer, SubscriptionFilter
+from backend.modules.agui_stream.routes import parse_stream_filters
+
+# The package re-exports the ``broadcaster`` singleton under the submodule's name.
+broadcaster_module = importlib.import_module("backend.modules.agui_stream.broadcaster")
+
+
+def _event(name: str, correlation_id: str, **value) -> dict:  # noqa: ANN003
+    return {"type": "CUSTOM", "name": name, "value": value, "correlationId": correlation_id}
+
+
+def _names(queue) -> list[str]:  # noqa: ANN001
+    names: list[str] = []
+    while not queue.empty():
+        names.append(json.loads(queue.get_nowait().split("data: ", 1)[1])["name"])
+    return names
+
+
+def test_filtered_subscribers_only_receive_matching_events() -> None:
+    hub = AGUIBroadcaster()
+
+    async def scenario():  # noqa: ANN202
+        everything = await hub.subscribe()
+        ticket = await hub.subscribe(SubscriptionFilter.build(correlation_ids=["T-1"]))
+        ai_runs = await hub.subscribe(SubscriptionFilter.build(domains=["AI_Workflow"]))
+        inbound = await hub.subscribe(SubscriptionFilter.build(prefixes=["messaging.inbound"]))
+        ticket_messages = await hub.subscribe(
+            SubscriptionFilter.build(prefixes=["messaging."], correlation_ids=["T-1"])
+        )
+        await hub.publish("ticket.updated", _event("ticket.updated", "T-1"))
+        await hub.publish("ticket.updated", _event("ticket.updated", "T-2"))
+        await hub.publish("messaging.inbound", _event("messaging.inbound", "wamid-1", ticketId="T-1"))
+        await hub.publish("messaging.status", _event("messaging.status", "wamid-2"))
+        await hub.publish("ai_workflow.run.started", _event("ai_workflow.run.started", "run-1"))
+        return everything, ticket, ai_runs, inbound, ticket_messages
+
+    everything, ticket, ai_runs, inbound, ticket_messages = asyncio.run(scenario())
+
+    assert len(_names(everything)) == 5
+    assert _names(ticket) == ["ticket.updated", "messaging.inbound"]
+    assert _names(ai_runs) == ["ai_workflow.run.started"]
+    assert _names(inbound) == ["messaging.inbound"]
+    assert _names(ticket_messages) == ["messaging.inbound"]
+
+
+def test_unmatched_events_are_not_serialized_and_index_is_cleaned(monkeypatch) -> None:
+    # With replay on, every event is rendered once for the buffer; without it only matches are.
+    hub = AGUIBroadcaster(replay=ReplayBuffer(max_events=0))
+    rendered: list[str] = []
+    original = broadcaster_module.format_sse_message
+
+    def counting_format(event_type, payload, event_id=None):  # noqa: ANN001, ANN202
+        rendered.append(event_type)
+        return original(event_type, payload, event_id)
+
+    monkeypatch.setattr(broadcaster_module, "format_sse_message", counting_format)
+
+    async def scenario():  # noqa: ANN202
+        queue = await hub.subscribe(SubscriptionFilter.build(correlation_ids=["T-1"]))
+        await hub.publish("ticket.updated", _event("ticket.updated", "T-9"))
+        await hub.publish("ticket.updated", _event("ticket.updated", "T-1"))
+        await hub.unsubscribe(queue)
+        await hub.publish("ticket.updated", _event("ticket.updated", "T-1"))
+
+    asyncio.run(scenario())
+
+    assert rendered == ["ticket.updated"]
+    stats = hub.stats()
+    assert stats["published"] == 1
+    assert stats["skipped_unmatched"] == 2
+    assert hub._by_correlation == {}
+
+
+def test_stream_query_params_build_subscription_filter() -> None:
+    class FakeRequest:
+        def __init__(self, query: list[tuple[str, str]]) -> None:
+            self.query_params = MultiDict(query)
+
+    filters = parse_stream_filters(
+        FakeRequest([("events", "ticket.,messaging.inbound"), ("ticketId", "T-1"), ("domain", "ticket")])
+    )
+
+    assert filters == SubscriptionFilter(
+        prefixes=("messaging.inbound", "ticket."),
+        correlation_ids=frozenset({"T-1"}),
+        domains=frozenset({"ticket"}),
+    )
+    assert parse_stream_filters(FakeRequest([])) is None
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from backend import globalVar
+from backend.modules.vertice360_ai_workflow_demo import services, store
+
+INPUTS = [
+    "Hola",
+    "Busco 2 ambientes en Palermo",
+    {"id": "m-3", "input": "Tengo USD 120000 para un 3 ambientes en Caballito"},
+    "Quiero agendar una visita el sabado",
+]
+
+
+@pytest.fixture(autouse=True)
+def reset_ai_store():
+    store.reset_store()
+    yield
+    store.reset_store()
+
+
+def test_detached_batch_skips_store_and_events(event_recorder, monkeypatch) -> None:
+    monkeypatch.setattr(globalVar, "OpenAI_Key", "")
+
+    result = asyncio.run(services.run_workflow_batch(services.WORKFLOW_ID, INPUTS, concurrency=3))
+
+    assert store.runs == {}
+    assert event_recorder == []
+    stats = result["stats"]
+    assert stats["total"] == 4
+    assert stats["completed"] == 4
+    assert sum(stats["intents"].values()) == 4
+    assert stats["slotsFilled"]["zona"] >= 2
+    assert stats["usedFallback"] == 4
+    assert stats["fallbackReasons"] == {"openai_key_missing": 4}
+    assert stats["throughputPerSec"] > 0
+    assert [item["index"] for item in result["results"]] == [0, 1, 2, 3]
+    assert result["results"][2]["id"] == "m-3"
+    assert result["results"][1]["nodeLatencyMs"].keys() >= {"intent_classify", "extract_entities"}
+
+
+def test_batch_matches_single_run_output(monkeypatch) -> None:
+    monkeypatch.setattr(globalVar, "OpenAI_Key", "")
+    single = asyncio.run(services.run_workflow(services.WORKFLOW_ID, "Busco 2 ambientes en Palermo"))
+
+    batch = asyncio.run(services.run_workflow_batch(services.WORKFLOW_ID, ["Busco 2 ambientes en Palermo"]))
+
+    assert batch["results"][0]["output"] == single["output"]
+
+
+def test_batch_endpoint_can_record_runs(client) -> None:
+    response = client.post(
+        "/api/demo/vertice360-ai-workflow/runs/batch",
+        json={"workflowId": services.WORKFLOW_ID, "inputs": INPUTS[:2], "record": True, "includeResults": False},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert "results" not in body
+    assert body["stats"]["completed"] == 2
+    assert len(store.runs) == 2
+
+
+def test_recorded_batch_above_hot_cache_size_keeps_in_flight_runs(monkeypatch) -> None:
+    monkeypatch.setattr(globalVar, "OpenAI_Key", "")
+    monkeypatch.setattr(store, "MAX_RUNS", 3)
+    inputs = [f"Busco 2 ambientes en Palermo {index}" for index in range(20)]
+
+    result = asyncio.run(services.run_workflow_batch(services.WORKFLOW_ID, inputs, concurrency=8, record=True))
+
+    assert result["concurrency"] == 8
+    assert result["stats"]["completed"] == 20
+    assert len(store.runs) == 3
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import asyncio
+
+from backend.modules.vertice360_ai_workflow_demo import langgraph_flow, services, store
+
+
+def test_intent_and_entities_run_in_the_same_superstep(monkeypatch) -> None:
+    original_intent = langgraph_flow.intent_classify
+    original_entities = langgraph_flow.extract_entities
+
+    async def scenario() -> dict:
+        arrived = {"intent": asyncio.Event(), "entities": asyncio.Event()}
+
+        async def rendezvous(own: str, other: str) -> None:
+            arrived[own].set()
+            # Deadlocks (and times out) if the graph ran the nodes one by one.
+            await asyncio.wait_for(arrived[other].wait(), timeout=1.0)
+
+        async def intent(state):  # noqa: ANN001
+            await rendezvous("intent", "entities")
+            return await original_intent(state)
+
+        async def entities(state):  # noqa: ANN001
+            await rendezvous("entities", "intent")
+            return await original_entities(state)
+
+        monkeypatch.setattr(langgraph_flow, "intent_classify", intent)
+        monkeypatch.setattr(langgraph_flow, "extract_entities", entities)
+        graph = langgraph_flow.build_graph()
+        run = store.create_run(langgraph_flow.WORKFLOW_ID, "Busco 2 ambientes en Palermo")
+        return await graph.ainvoke({"run_id": run["runId"], "input": "Busco 2 ambientes en Palermo"})
+
+    final_state = asyncio.run(scenario())
+
+    assert final_state["primary_intent"]
+    assert final_state["entities"]["zona"]
+    assert final_state["response_text"]
+
+
+def test_run_records_node_latency_and_flushes_steps_before_completion(event_recorder) -> None:
+    run = asyncio.run(services.run_workflow(langgraph_flow.WORKFLOW_ID, "Hola, busco depto en Caballito"))
+
+    assert set(run["nodeLatencyMs"]) == set(langgraph_flow.WORKFLOW_NODES)
+    assert all(value >= 0 for value in run["nodeLatencyMs"].values())
+    names = [event["name"] for event in event_recorder]
+    assert names.count("ai_workflow.run.step") == len(langgraph_flow.WORKFLOW_NODES)
+    assert names[-1] == "ai_workflow.run.completed"
+    assert {event["value"]["nodeId"] for event in event_recorder if event["name"] == "ai_workflow.run.step"} == set(
+        langgraph_flow.WORKFLOW_NODES
+    )
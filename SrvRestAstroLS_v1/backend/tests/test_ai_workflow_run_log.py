@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.modules.vertice360_ai_workflow_demo import store
+from backend.modules.vertice360_ai_workflow_demo.run_log import RunLog
+
+
+@pytest.fixture(autouse=True)
+def reset_ai_store(monkeypatch):
+    ticks = iter(range(1_700_000_000_000, 1_700_000_100_000))
+    monkeypatch.setattr(store, "_epoch_ms", lambda: next(ticks))
+    store.reset_store()
+    store.clear_run_log()
+    yield
+    store.reset_store()
+    store.clear_run_log()
+
+
+def _create(index: int, *, ticket_id: str = "T-1") -> dict:
+    run = store.create_run(
+        "vertice360-ai-workflow",
+        f"mensaje {index}",
+        "heuristic",
+        metadata={"inboundMessageId": f"wamid-{index}", "ticketId": ticket_id},
+    )
+    return store.complete_run(run["runId"], {"responseText": f"ok {index}"})
+
+
+def test_evicted_runs_are_served_from_the_log(monkeypatch) -> None:
+    monkeypatch.setattr(store, "MAX_RUNS", 3)
+    created = [_create(index) for index in range(5)]
+
+    assert len(store.runs) == 3
+    assert set(store.inbound_message_index) == {"wamid-2", "wamid-3", "wamid-4"}
+    oldest = store.get_run(created[0]["runId"])
+    assert oldest is not None
+    assert oldest["status"] == "COMPLETED"
+    assert oldest["output"] == {"responseText": "ok 0"}
+    assert store.find_run_by_inbound_message("wamid-1")["runId"] == created[1]["runId"]
+
+
+def test_reply_on_an_evicted_run_is_written_to_the_log(monkeypatch) -> None:
+    monkeypatch.setattr(store, "MAX_RUNS", 1)
+    cold = _create(0)
+    _create(1)
+    assert cold["runId"] not in store.runs
+
+    store.set_reply(cold["runId"], {"responseText": "te contacto hoy"})
+
+    assert cold["runId"] not in store.runs
+    assert store.get_run(cold["runId"])["reply"] == {"responseText": "te contacto hoy"}
+
+
+def test_list_runs_pages_with_cursor_and_filters() -> None:
+    created = [_create(index, ticket_id="T-even" if index % 2 == 0 else "T-odd") for index in range(5)]
+
+    first = store.list_runs(limit=2)
+    second = store.list_runs(limit=2, before=first[-1]["cursor"])
+    third = store.list_runs(limit=2, before=second[-1]["cursor"])
+
+    paged = [item["runId"] for item in first + second + third]
+    assert paged == [run["runId"] for run in reversed(created)]
+    assert [item["ticketId"] for item in store.list_runs(ticket_id="T-odd")] == ["T-odd", "T-odd"]
+    assert store.list_runs(status="failed") == []
+    with pytest.raises(ValueError):
+        store.list_runs(before="not-a-cursor")
+
+
+def test_log_survives_reopen_and_applies_retention(tmp_path) -> None:
+    path = tmp_path / "runs.sqlite3"
+    now = 1_700_000_000.0
+    log = RunLog(str(path), retention_seconds=3600, clock=lambda: now)
+    log.write({"runId": "run-old", "workflowId": "wf", "status": "COMPLETED", "startedAt": int((now - 7200) * 1000)})
+    log.write({"runId": "run-new", "workflowId": "wf", "status": "COMPLETED", "startedAt": int(now * 1000)})
+    log.close()
+
+    reopened = RunLog(str(path), retention_seconds=3600, clock=lambda: now)
+    assert reopened.count() == 2
+    assert reopened.purge() == 1
+    assert [run["runId"] for run in reopened.query()] == ["run-new"]
+    reopened.close()
+
+
+def test_log_is_capped_at_max_rows() -> None:
+    log = RunLog(":memory:", max_rows=2)
+    for index in range(3):
+        log.write({"runId": f"run-{index}", "workflowId": "wf", "status": "COMPLETED", "startedAt": 1_000 + index})
+
+    assert log.purge(now=0) == 1
+    assert [run["runId"] for run in log.query()] == ["run-2", "run-1"]
+    log.close()
+
+
+def test_reset_keeps_the_log_and_clearing_requires_admin(client, monkeypatch) -> None:
+    from backend import globalVar
+
+    monkeypatch.setattr(globalVar, "RUN_ENV", "dev", raising=False)
+    monkeypatch.setattr(globalVar, "V360_ADMIN_TOKEN", "test", raising=False)
+    created = _create(1)
+
+    assert client.post("/api/demo/vertice360-ai-workflow/reset", json={}).status_code in (200, 201)
+    assert created["runId"] not in store.runs
+    assert store.get_run(created["runId"])["status"] == "COMPLETED"
+
+    url = "/api/demo/vertice360-ai-workflow/admin/run-log/clear"
+    assert client.post(url).status_code == 401
+    response = client.post(url, headers={"x-v360-admin-token": "test"})
+    assert response.status_code == 200
+    assert response.json() == {"ok": True, "removed": 1}
+    assert store.get_run(created["runId"]) is None
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+from backend.modules.vertice360_orquestador_demo import delivery_status
+from backend.modules.vertice360_orquestador_demo.delivery_status import (
+    DeliveryStatusIngestor,
+    StatusUpdate,
+    delivery_status_ingestor,
+)
+
+
+def _update(message_id: str, status: str, ts: int, line_key: str = "gupshup:5491100000000") -> StatusUpdate:
+    return StatusUpdate("gupshup", message_id, status, ts, line_key)
+
+
+def test_ingestor_collapses_to_highest_status_in_one_flush() -> None:
+    batches: list[list[tuple]] = []
+
+    def fake_apply(rows):  # noqa: ANN001
+        batches.append(sorted(rows))
+        return [
+            {
+                "provider_message_id": pmid,
+                "provider_status": status,
+                "sent_at_ms": 1_000,
+                "delivered_at_ms": (delivered_ts or ts) if status in {"delivered", "read"} else None,
+                "read_at_ms": ts if status == "read" else None,
+            }
+            for pmid, status, ts, delivered_ts in rows
+        ]
+
+    ingestor = DeliveryStatusIngestor(window_ms=10, apply=fake_apply)
+
+    async def scenario() -> None:
+        ingestor.submit(_update("wamid-1", "read", 9_000))
+        # Late "delivered" callback must not regress the buffered "read".
+        ingestor.submit(_update("wamid-1", "delivered", 3_000))
+        ingestor.submit(_update("wamid-2", "sent", 1_500))
+        ingestor.submit(_update("wamid-2", "delivered", 3_000))
+        assert ingestor.submit(_update("wamid-3", "bogus", 1)) is False
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+
+    # The late "delivered" still contributes its timestamp to wamid-1.
+    assert batches == [[("wamid-1", "read", 9_000, 3_000), ("wamid-2", "delivered", 3_000, 3_000)]]
+    stats = ingestor.stats()
+    assert stats["flushes"] == 1
+    assert stats["applied"] == 2
+    assert stats["collapsed"] == 2
+    assert stats["ignored"] == 1
+    line = stats["latency_by_line"]["gupshup:5491100000000"]
+    assert line["sent_to_delivered"]["count"] == 2
+    assert line["delivered_to_read"]["avg_ms"] == 6000.0
+    assert line["sent_to_read"]["buckets"]["le_10000"] == 1
+
+
+def test_ingestor_flush_errors_do_not_raise() -> None:
+    def failing_apply(rows):  # noqa: ANN001, ARG001
+        raise RuntimeError("db down")
+
+    ingestor = DeliveryStatusIngestor(window_ms=0, max_batch=1, apply=failing_apply)
+
+    async def scenario() -> None:
+        ingestor.submit(_update("wamid-9", "delivered", 2_000))
+        await ingestor.aclose()
+
+    asyncio.run(scenario())
+    assert ingestor.stats()["errors"] == 1
+
+
+def test_ingestor_flushes_updates_submitted_during_a_flush() -> None:
+    batches: list[list[str]] = []
+
+    def slow_apply(rows):  # noqa: ANN001
+        batches.append(sorted(pmid for pmid, *_ in rows))
+        if len(batches) == 1:
+            time.sleep(0.05)
+        return []
+
+    ingestor = DeliveryStatusIngestor(window_ms=10, apply=slow_apply)
+
+    async def scenario() -> None:
+        ingestor.submit(_update("wamid-1", "sent", 1_000))
+        await asyncio.sleep(0.03)
+        # The first batch is still being applied in its thread.
+        ingestor.submit(_update("wamid-2", "sent", 1_100))
+        await asyncio.sleep(0.1)
+
+    asyncio.run(scenario())
+
+    assert batches == [["wamid-1"], ["wamid-2"]]
+    assert ingestor.stats()["buffered"] == 0
+
+
+def test_delivered_and_read_in_one_window_keep_the_delivery_time() -> None:
+    batches: list[list[tuple]] = []
+
+    def fake_apply(rows):  # noqa: ANN001
+        batches.append(rows)
+        return [
+            {
+                "provider_message_id": pmid,
+                "provider_status": status,
+                "sent_at_ms": 1_000,
+                "delivered_at_ms": delivered_ts,
+                "read_at_ms": ts,
+            }
+            for pmid, status, ts, delivered_ts in rows
+        ]
+
+    ingestor = DeliveryStatusIngestor(window_ms=10, apply=fake_apply)
+
+    async def scenario() -> None:
+        ingestor.submit(_update("wamid-7", "delivered", 2_500))
+        ingestor.submit(_update("wamid-7", "read", 8_000))
+        await ingestor.aclose()
+
+    asyncio.run(scenario())
+
+    assert batches == [[("wamid-7", "read", 8_000, 2_500)]]
+    line = ingestor.stats()["latency_by_line"]["gupshup:5491100000000"]
+    assert line["sent_to_delivered"]["avg_ms"] == 1500.0
+    assert line["delivered_to_read"]["avg_ms"] == 5500.0
+
+
+def test_delivery_columns_are_ensured_once_per_process(monkeypatch) -> None:
+    ensured: list[object] = []
+    monkeypatch.setattr(delivery_status, "_delivery_columns_ready", False)
+    monkeypatch.setattr(delivery_status.db, "run_in_transaction", lambda callback: callback(object()))
+    monkeypatch.setattr(delivery_status.repo, "ensure_messages_delivery_columns", ensured.append)
+    monkeypatch.setattr(delivery_status.repo, "bulk_apply_message_statuses", lambda conn, updates, rank: [])
+
+    delivery_status._apply_to_db([("wamid-1", "sent", 1_000)])
+    delivery_status._apply_to_db([("wamid-2", "sent", 1_000)])
+
+    assert len(ensured) == 1
+
+
+def test_gupshup_message_event_submits_delivery_status(client, monkeypatch, event_recorder) -> None:  # noqa: ARG001
+    submitted: list[StatusUpdate] = []
+    monkeypatch.setattr(delivery_status_ingestor, "submit", lambda update: submitted.append(update) or True)
+    monkeypatch.setattr("globalVar.GUPSHUP_SRC_NUMBER", "+54 9 11 0000-0000", raising=False)
+
+    payload = {
+        "type": "message-event",
+        "payload": {
+            "id": "gs-ack-1",
+            "gsId": "gs-internal-1",
+            "type": "delivered",
+            "timestamp": 1_700_000_000,
+        },
+    }
+    response = client.post(
+        "/webhooks/messaging/gupshup/whatsapp",
+        content=json.dumps(payload),
+        headers={"Content-Type": "application/json"},
+    )
+
+    assert response.status_code == 201
+    assert response.json() == {"ok": True}
+    assert [(u.provider_message_id, u.status, u.timestamp_ms, u.line_key) for u in submitted] == [
+        ("gs-ack-1", "delivered", 1_700_000_000_000, "gupshup:5491100000000")
+    ]
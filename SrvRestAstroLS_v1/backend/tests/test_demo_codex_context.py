@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from backend.db import demo_vertice360_data
+from backend.services.demo_codex_context import DemoContextCache, compile_demo_context
+
+
+def _data(**overrides):
+    base = {
+        "proyectos_en_pozo": list(demo_vertice360_data.proyectos_en_pozo),
+        "unidades": list(demo_vertice360_data.unidades),
+        "inversores": list(demo_vertice360_data.inversores),
+        "reservas_y_ventas": list(demo_vertice360_data.reservas_y_ventas),
+    }
+    base.update(overrides)
+    return SimpleNamespace(**base)
+
+
+def test_context_is_compiled_once_and_recompiled_on_data_change() -> None:
+    data = _data()
+    cache = DemoContextCache(data)
+
+    first = cache.get()
+    assert cache.get() is first
+    assert cache.compiles == 1
+
+    data.inversores.append(
+        {"id_inversor": "INV-999", "nombre": "Nuevo", "tipo_inversor": "minorista", "email": "", "pais": "Peru"}
+    )
+    second = cache.get()
+    assert cache.compiles == 2
+    assert second.version != first.version
+    assert "INV-999" in second.text
+
+
+def test_context_respects_char_budget_across_sections() -> None:
+    context = compile_demo_context(_data(), max_chars=700)
+
+    assert len(context.text) <= 700
+    assert context.omitted > 0
+    for title in ("Proyectos:", "Unidades:", "Inversores:", "Operaciones:"):
+        assert title in context.text
+    assert "más)" in context.text
+
+
+def test_relevance_slice_keeps_linked_entities() -> None:
+    cache = DemoContextCache(_data())
+
+    selection = cache.select("Quien reservo la ALV-12C?")
+
+    assert selection.sliced is True
+    assert {"ALV-12C", "PZ-ALV-101", "OP-5001", "INV-901"} <= set(selection.entity_ids)
+    assert "PZ-RIO-204" not in selection.text
+    assert selection.tokens < cache.get().tokens
+
+    unrelated = cache.select("hola")
+    assert unrelated.sliced is False
+    assert unrelated.text == cache.get().text
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from backend.modules.vertice360_orquestador_demo import services as orquestador_services
+from backend.services.inbound_dedupe import InboundDedupe, SqliteDedupeBackend, inbound_dedupe
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_duplicate_within_ttl_is_rejected_and_expires_from_head() -> None:
+    clock = _Clock()
+    dedupe = InboundDedupe(ttl_seconds=10, max_keys=100, clock=clock)
+
+    assert dedupe.mark("a") is True
+    clock.now += 5
+    assert dedupe.mark("b") is True
+    assert dedupe.mark("a") is False
+
+    clock.now += 6
+    assert dedupe.mark("c") is True
+    stats = dedupe.stats()
+    assert stats["expired"] == 1
+    assert stats["size"] == 2
+    assert dedupe.mark("a") is True
+
+
+def test_size_bound_evicts_oldest_claims() -> None:
+    dedupe = InboundDedupe(ttl_seconds=600, max_keys=2, clock=_Clock())
+    for key in ("a", "b", "c"):
+        assert dedupe.mark(key) is True
+
+    stats = dedupe.stats()
+    assert stats["evicted"] == 1
+    assert stats["misses"] == 3
+    assert dedupe.mark("b") is False
+    assert dedupe.stats()["hits"] == 1
+
+
+def test_shared_sqlite_backend_dedupes_across_workers(tmp_path) -> None:
+    path = str(tmp_path / "dedupe.sqlite3")
+    worker_a = InboundDedupe(ttl_seconds=600, shared=SqliteDedupeBackend(path))
+    worker_b = InboundDedupe(ttl_seconds=600, shared=SqliteDedupeBackend(path))
+    try:
+        assert worker_a.mark("provider:gupshup:id:1") is True
+        assert worker_b.mark("provider:gupshup:id:1") is False
+        assert worker_b.stats()["shared_hits"] == 1
+        assert worker_b.mark("provider:gupshup:id:2") is True
+    finally:
+        worker_a.shared.close()
+        worker_b.shared.close()
+
+
+def test_orquestador_ingest_ignores_provider_retry(monkeypatch) -> None:
+    def fail_ingest(**kwargs):  # noqa: ANN003
+        raise AssertionError("duplicate webhook must not be ingested")
+
+    monkeypatch.setattr(orquestador_services, "ingest_message", fail_ingest)
+    assert inbound_dedupe.mark("orquestador:provider:gupshup_whatsapp:id:gs-retry-1") is True
+
+    result = asyncio.run(
+        orquestador_services.ingest_from_provider(
+            user_phone="+5491130004001",
+            text="hola",
+            provider="gupshup_whatsapp",
+            provider_message_id="gs-retry-1",
+        )
+    )
+
+    assert result["duplicate"] is True
+    assert "vera_send_ok" not in result
+
+
+
+class _SharedClaims:
+    def __init__(self) -> None:
+        self.keys: set[str] = set()
+
+    def claim(self, key: str, ttl_seconds: float) -> bool:  # noqa: ARG002
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        return True
+
+    def release(self, key: str) -> None:
+        self.keys.discard(key)
+
+    def purge_expired(self) -> int:
+        return 0
+
+    def reset(self) -> None:
+        self.keys.clear()
+
+
+def test_failed_turn_releases_its_claim_for_the_provider_retry(monkeypatch) -> None:
+    shared = _SharedClaims()
+    monkeypatch.setattr(inbound_dedupe, "shared", shared)
+
+    def broken_ingest(**kwargs):  # noqa: ANN003
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(orquestador_services, "ingest_message", broken_ingest)
+    with pytest.raises(RuntimeError):
+        asyncio.run(
+            orquestador_services.ingest_from_provider(
+                user_phone="+5491130004002",
+                text="hola",
+                provider="gupshup_whatsapp",
+                provider_message_id="gs-retry-2",
+            )
+        )
+
+    assert shared.keys == set()
+    assert inbound_dedupe.mark("orquestador:provider:gupshup_whatsapp:id:gs-retry-2") is True
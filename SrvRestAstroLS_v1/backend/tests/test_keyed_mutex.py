@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from backend.modules.vertice360_workflow_demo import services, store
+from backend.services.keyed_mutex import KeyedAsyncMutex
+
+
+def test_entries_are_dropped_once_released() -> None:
+    mutex = KeyedAsyncMutex("test.lock")
+
+    async def scenario() -> None:
+        async with mutex.hold("+5491100000001"):
+            assert len(mutex) == 1
+        async with mutex.hold("+5491100000002"):
+            pass
+
+    asyncio.run(scenario())
+
+    assert len(mutex) == 0
+    assert mutex.stats()["acquisitions"] == 2
+
+
+def test_same_key_is_serialized_and_contention_is_recorded() -> None:
+    mutex = KeyedAsyncMutex("test.lock", hot_wait_ms=0.0)
+    order: list[str] = []
+
+    async def worker(name: str, delay: float) -> None:
+        async with mutex.hold("hot"):
+            order.append(f"{name}:in")
+            await asyncio.sleep(delay)
+            order.append(f"{name}:out")
+
+    async def scenario() -> None:
+        await asyncio.gather(worker("a", 0.02), worker("b", 0.0), worker("c", 0.0))
+
+    asyncio.run(scenario())
+
+    assert order == ["a:in", "a:out", "b:in", "b:out", "c:in", "c:out"]
+    stats = mutex.stats()
+    assert len(mutex) == 0
+    assert stats["contended"] == 2
+    assert stats["hot_keys"][0]["key"] == "hot"
+    assert stats["hot_keys"][0]["acquisitions"] == 3
+    assert stats["hot_keys"][0]["wait_max_ms"] > 0
+
+
+def test_cancelled_waiter_releases_its_reference() -> None:
+    mutex = KeyedAsyncMutex("test.lock")
+
+    async def scenario() -> None:
+        async with mutex.hold("k"):
+            waiter = asyncio.create_task(mutex.hold("k").__aenter__())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+        assert len(mutex) == 0
+
+    asyncio.run(scenario())
+
+
+def test_per_key_stats_are_bounded() -> None:
+    mutex = KeyedAsyncMutex("test.lock", tracked_keys=2)
+
+    async def scenario() -> None:
+        for key in ("a", "b", "c"):
+            async with mutex.hold(key):
+                pass
+
+    asyncio.run(scenario())
+
+    assert {row["key"] for row in mutex.stats()["hot_keys"]} == {"b", "c"}
+
+
+def test_process_inbound_message_does_not_leak_conversation_locks() -> None:
+    for index in range(3):
+        asyncio.run(
+            services.process_inbound_message(
+                {
+                    "provider": "meta_whatsapp",
+                    "channel": "whatsapp",
+                    "from": f"+54911300050{index:02d}",
+                    "to": "+5491100000000",
+                    "messageId": f"msg-lock-{index}",
+                    "text": "Hola",
+                    "timestamp": 1710000000000,
+                }
+            )
+        )
+
+    stats = store.conversation_lock_stats()
+    assert stats["active_keys"] == 0
+    assert stats["acquisitions"] >= 3
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+
+from backend.services.llm_cache import LLMCache, SqliteCacheTier, cache_key
+from backend.services.llm_client import LLMClient, StubBackend
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _ask(client: LLMClient, text: str, *, cache: bool = True):
+    return asyncio.run(
+        client.chat(
+            [{"role": "user", "content": text}],
+            temperature=0,
+            max_tokens=60,
+            purpose="ai_workflow.next_best_question",
+            cache=cache,
+        )
+    )
+
+
+def test_repeated_prompt_is_served_from_memory() -> None:
+    backend = StubBackend(lambda request: "Que zona buscas?")
+    client = LLMClient(backend, cache=LLMCache())
+
+    first = _ask(client, "zona, tipologia")
+    second = _ask(client, "zona, tipologia")
+    _ask(client, "presupuesto")
+
+    assert first.cached is False
+    assert second.cached is True
+    assert second.content == "Que zona buscas?"
+    assert len(backend.requests) == 2
+    purpose = client.cache.stats()["purposes"]["ai_workflow.next_best_question"]
+    assert purpose["hits_memory"] == 1
+    assert purpose["misses"] == 2
+    assert purpose["hit_rate"] == round(1 / 3, 4)
+
+
+def test_uncached_calls_and_bypass_skip_the_cache() -> None:
+    backend = StubBackend(lambda request: "ok")
+    client = LLMClient(backend, cache=LLMCache(bypass=True))
+
+    _ask(client, "zona")
+    _ask(client, "zona")
+    client.cache.bypass = False
+    _ask(client, "zona", cache=False)
+    _ask(client, "zona", cache=False)
+
+    assert len(backend.requests) == 4
+    assert client.cache.stats()["size"] == 0
+
+
+def test_disk_tier_survives_a_cold_process_and_honours_ttl(tmp_path) -> None:
+    path = str(tmp_path / "llm_cache.sqlite3")
+    clock = _Clock()
+    warm = LLMCache(ttl_seconds=60, disk=SqliteCacheTier(path), clock=clock)
+    key = cache_key("stub:gpt", [{"role": "user", "content": "zona"}], {"temperature": 0})
+    warm.put(key, {"content": "Que zona?"}, purpose="p")
+
+    cold = LLMCache(ttl_seconds=60, disk=SqliteCacheTier(path), clock=clock)
+    assert cold.get(key, purpose="p") == {"content": "Que zona?"}
+    assert cold.stats()["purposes"]["p"]["hits_disk"] == 1
+
+    clock.now += 120
+    other = LLMCache(ttl_seconds=60, disk=SqliteCacheTier(path), clock=clock)
+    assert other.get(key, purpose="p") is None
+
+
+def test_size_bounds_evict_least_recently_used(tmp_path) -> None:
+    cache = LLMCache(max_entries=2)
+    for key in ("a", "b"):
+        cache.put(key, {"content": key})
+    assert cache.get("a") is not None
+    cache.put("c", {"content": "c"})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evicted"] == 1
+
+    disk = SqliteCacheTier(str(tmp_path / "trim.sqlite3"), max_rows=3)
+    for index in range(10):
+        disk.put(f"k{index}", "p", {"content": index}, expires_at=10_000.0, now=float(index))
+    assert disk.trim(now=5.0) == 7
+    assert disk.count() == 3
+    assert disk.get("k9", 5.0) == {"content": 9}
+    assert disk.get("k0", 5.0) is None
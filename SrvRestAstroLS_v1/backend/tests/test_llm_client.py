@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from backend import globalVar
+from backend.modules.vertice360_ai_workflow_demo import llm_service, llm_state_reducer
+from backend.services import llm_client as llm_client_module
+from backend.services.llm_client import LLMClient, LLMTimeout, StubBackend
+
+
+@pytest.fixture()
+def stub_backend():
+    previous = llm_client_module.llm_client.backend
+    backend = llm_client_module.configure_llm_backend(StubBackend())
+    llm_client_module.llm_cache.reset()
+    yield backend
+    llm_client_module.llm_client.backend = previous
+    llm_client_module.llm_cache.reset()
+
+
+def test_concurrency_is_bounded_by_semaphore() -> None:
+    active = 0
+    peak = 0
+
+    async def responder(request):  # noqa: ANN001
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return "ok"
+
+    client = LLMClient(StubBackend(responder), max_concurrency=2)
+
+    async def scenario() -> list[str]:
+        results = await asyncio.gather(*(client.chat([{"role": "user", "content": "hola"}]) for _ in range(6)))
+        return [result.content for result in results]
+
+    assert asyncio.run(scenario()) == ["ok"] * 6
+    assert peak == 2
+    assert client.stats()["calls"] == 6
+
+
+def test_timeout_raises_and_frees_the_slot() -> None:
+    client = LLMClient(StubBackend(delay_seconds=1.0), max_concurrency=1, timeout_seconds=0.02)
+
+    async def scenario() -> None:
+        with pytest.raises(LLMTimeout):
+            await client.chat([{"role": "user", "content": "hola"}])
+        client.backend = StubBackend()
+        result = await client.chat([{"role": "user", "content": "segunda"}])
+        assert result.content == "segunda"
+
+    asyncio.run(scenario())
+    assert client.stats()["timeouts"] == 1
+    assert client.stats()["in_flight"] == 0
+
+
+def test_cancelling_the_caller_cancels_the_request() -> None:
+    client = LLMClient(StubBackend(delay_seconds=1.0))
+
+    async def scenario() -> None:
+        task = asyncio.create_task(client.chat([{"role": "user", "content": "hola"}]))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert client.stats()["cancelled"] == 1
+    assert client.stats()["in_flight"] == 0
+
+
+def test_call_sites_use_the_shared_client(monkeypatch, stub_backend) -> None:
+    monkeypatch.setattr(globalVar, "OpenAI_Key", "test-key")
+    monkeypatch.setattr(globalVar, "FEATURE_AI", True)
+    stub_backend.responder = lambda request: (
+        '{"slotUpdates": {}, "confirmed": {}, "ambiguities": {}, '
+        '"next_action": "ask", "next_question": "Que zona buscas"}'
+        if request.purpose == "ai_workflow.state_reducer"
+        else "Tenemos opciones en Caballito."
+    )
+
+    reply = asyncio.run(
+        llm_service.generate_human_reply(
+            user_text="Busco en Caballito",
+            nlu={"intent": "search"},
+            options=None,
+            missing_slots={},
+            max_chars=200,
+        )
+    )
+    reduced = asyncio.run(llm_state_reducer.reduce_state({}, "Busco en Caballito"))
+
+    assert reply["usedFallback"] is False
+    assert reply["responseText"] == "Tenemos opciones en Caballito."
+    assert reduced["next_question"] == "¿Que zona buscas?"
+    assert [request.purpose for request in stub_backend.requests] == [
+        "ai_workflow.human_reply",
+        "ai_workflow.state_reducer",
+    ]
+
+
+def test_openai_client_left_on_a_previous_loop_is_closed(monkeypatch) -> None:
+    monkeypatch.setattr(globalVar, "OpenAI_Key", "sk-test", raising=False)
+    backend = llm_client_module.OpenAIBackend()
+
+    async def first():  # noqa: ANN202
+        return backend._get_client()
+
+    async def second():  # noqa: ANN202
+        client = backend._get_client()
+        await asyncio.sleep(0)
+        return client
+
+    stale = asyncio.run(first())
+    fresh = asyncio.run(second())
+
+    assert stale is not fresh
+    assert stale.is_closed()
+    assert not fresh.is_closed()
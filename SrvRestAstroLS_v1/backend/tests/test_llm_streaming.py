@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from backend import globalVar
+from backend.modules.agui_stream import stream_text_message
+from backend.modules.vertice360_ai_workflow_demo import services, store
+from backend.services import llm_client as llm_client_module
+from backend.services.llm_client import LLMClient, StubBackend
+
+
+def _events(body: str) -> list[dict]:
+    return [
+        json.loads(line[len("data: ") :])
+        for line in body.splitlines()
+        if line.startswith("data: ")
+    ]
+
+
+@pytest.fixture()
+def stub_backend():
+    previous = llm_client_module.llm_client.backend
+    backend = llm_client_module.configure_llm_backend(StubBackend(lambda request: "Tenemos dos opciones en Caballito."))
+    yield backend
+    llm_client_module.llm_client.backend = previous
+
+
+def test_stream_reports_first_token_and_persists_once() -> None:
+    client = LLMClient(StubBackend(lambda request: "uno dos tres"))
+    completions: list[str] = []
+
+    async def on_complete(text, stream):  # noqa: ANN001
+        completions.append(text)
+        return {"content": text.upper()}
+
+    async def scenario() -> list[dict]:
+        llm_stream = client.stream([{"role": "user", "content": "hola"}], purpose="test")
+        chunks = [chunk async for chunk in stream_text_message(llm_stream, on_complete=on_complete)]
+        return _events("".join(chunks))
+
+    events = asyncio.run(scenario())
+
+    assert [event["type"] for event in events] == [
+        "TEXT_MESSAGE_START",
+        "TEXT_MESSAGE_CONTENT",
+        "TEXT_MESSAGE_CONTENT",
+        "TEXT_MESSAGE_CONTENT",
+        "TEXT_MESSAGE_END",
+    ]
+    assert "".join(event["delta"] for event in events[1:4]) == "uno dos tres"
+    assert events[-1]["content"] == "UNO DOS TRES"
+    assert events[-1]["firstTokenMs"] >= 0
+    assert completions == ["uno dos tres"]
+    assert len({event["messageId"] for event in events}) == 1
+
+
+def test_client_disconnect_cancels_upstream_without_persisting() -> None:
+    client = LLMClient(StubBackend(lambda request: "uno dos tres cuatro", chunk_delay_seconds=0.05))
+    completions: list[str] = []
+
+    async def on_complete(text, stream):  # noqa: ANN001
+        completions.append(text)
+        return {"content": text}
+
+    async def scenario():
+        llm_stream = client.stream([{"role": "user", "content": "hola"}])
+        events = stream_text_message(llm_stream, on_complete=on_complete)
+        await anext(events)
+        await anext(events)
+        await events.aclose()
+        return llm_stream
+
+    llm_stream = asyncio.run(scenario())
+
+    assert completions == []
+    assert llm_stream.status == "cancelled"
+    assert client.stats()["cancelled"] == 1
+    assert client.stats()["in_flight"] == 0
+
+
+def test_run_reply_stream_route_persists_final_reply(client, monkeypatch, stub_backend) -> None:
+    monkeypatch.setattr(globalVar, "OpenAI_Key", "")
+    run = asyncio.run(services.run_workflow("vertice360-ai-workflow", "Busco en Caballito"))
+    monkeypatch.setattr(globalVar, "OpenAI_Key", "test-key")
+
+    response = client.post(
+        f"/api/demo/vertice360-ai-workflow/runs/{run['runId']}/reply/stream",
+        json={"maxChars": 200},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response.text)
+    assert events[0]["type"] == "TEXT_MESSAGE_START"
+    assert events[-1]["type"] == "TEXT_MESSAGE_END"
+    assert events[-1]["correlationId"] == run["runId"]
+    reply = store.get_run(run["runId"])["reply"]
+    assert reply["responseText"] == "Tenemos dos opciones en Caballito."
+    assert reply["usedFallback"] is False
+    assert reply["firstTokenMs"] is not None
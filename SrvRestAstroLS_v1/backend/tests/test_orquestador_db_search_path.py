@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import importlib
+
+import pytest
+
+from backend.modules.vertice360_orquestador_demo import db
+
+
+def test_search_path_is_validated_and_stripped_of_whitespace(monkeypatch) -> None:
+    monkeypatch.setattr(db, "_pool", None)
+    monkeypatch.setattr(db, "_search_path", None)
+
+    db.set_search_path(" Replay_Scratch , public ")
+
+    assert db._connection_kwargs()["options"] == "-c search_path=replay_scratch,public"
+    with pytest.raises(ValueError):
+        db.set_search_path("scratch; drop table messages")
+    assert db.normalize_search_path("  ") is None
+
+
+def test_search_path_env_is_validated_at_import(monkeypatch) -> None:
+    try:
+        monkeypatch.setenv("V360_DB_SEARCH_PATH", "load_scratch, public")
+        assert importlib.reload(db)._search_path == "load_scratch,public"
+        monkeypatch.setenv("V360_DB_SEARCH_PATH", "load_scratch public")
+        with pytest.raises(ValueError):
+            importlib.reload(db)
+    finally:
+        monkeypatch.delenv("V360_DB_SEARCH_PATH", raising=False)
+        importlib.reload(db)
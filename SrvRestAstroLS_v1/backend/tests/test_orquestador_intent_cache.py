@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from typing import Any
+
+from backend.modules.vertice360_orquestador_demo import intent_cache, services
+
+
+def _detail(project_code: str = "MANZANARES_3277") -> dict[str, Any]:
+    return {
+        "project_code": project_code,
+        "summary_jsonb": {"selected_project": {"code": project_code, "name": project_code}},
+    }
+
+
+def test_identical_message_and_state_hits_cache() -> None:
+    first = services._semantic_intent_resolver("Hola", detail=_detail(), recent_messages=[], summary={})
+    second = services._semantic_intent_resolver("  hola ", detail=_detail(), recent_messages=[], summary={})
+
+    assert first == second
+    stats = services.intent_cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_cached_result_is_isolated_from_caller_mutation() -> None:
+    first = services._semantic_intent_resolver("ok", detail=_detail(), recent_messages=[], summary={})
+    first["intent"] = "MUTATED"
+
+    second = services._semantic_intent_resolver("ok", detail=_detail(), recent_messages=[], summary={})
+
+    assert second["intent"] != "MUTATED"
+
+
+def test_state_fingerprint_separates_pending_offer() -> None:
+    plain = services._semantic_intent_resolver("dale", detail=_detail(), recent_messages=[], summary={})
+    with_offer = services._semantic_intent_resolver(
+        "dale",
+        detail=_detail(),
+        recent_messages=[],
+        summary={"pending_offer_type": "VISIT"},
+    )
+
+    assert plain["intent"] == "ACKNOWLEDGEMENT"
+    assert with_offer["intent"] == "AFFIRM"
+    assert services.intent_cache_stats()["hits"] == 0
+
+
+def test_fingerprint_ignores_summary_fields_not_read_by_resolver() -> None:
+    services._semantic_intent_resolver(
+        "hola",
+        detail=_detail(),
+        recent_messages=[],
+        summary={"last_answer_brief": "uno"},
+    )
+    services._semantic_intent_resolver(
+        "hola",
+        detail=_detail(),
+        recent_messages=[],
+        summary={"last_answer_brief": "otro"},
+    )
+
+    assert services.intent_cache_stats()["hits"] == 1
+
+
+def test_lru_is_bounded() -> None:
+    cache = intent_cache.IntentResolutionCache(max_entries=2)
+    for text in ("a", "b", "c"):
+        cache.resolve(text, "fp", lambda text=text: {"intent": text})
+
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
+    cache.resolve("a", "fp", lambda: {"intent": "a"})
+    assert cache.stats()["misses"] == 4
+
+
+def test_parity_mode_flags_and_repairs_mismatch() -> None:
+    cache = intent_cache.IntentResolutionCache(max_entries=8, parity_every=1)
+    cache.resolve("hola", "fp", lambda: {"intent": "GREETING"})
+
+    result = cache.resolve("hola", "fp", lambda: {"intent": "ACKNOWLEDGEMENT"})
+
+    assert result == {"intent": "ACKNOWLEDGEMENT"}
+    stats = cache.stats()
+    assert stats["parity_checks"] == 1
+    assert stats["parity_mismatches"] == 1
+    assert cache.resolve("hola", "fp", lambda: {"intent": "ACKNOWLEDGEMENT"}) == {"intent": "ACKNOWLEDGEMENT"}
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import random
+
+import pytest
+
+from backend.modules.messaging.providers.dispatcher import CircuitOpenError, OutboundDispatcher, SendQueueTimeout
+from backend.modules.messaging.providers.gupshup.whatsapp.service import GupshupWhatsAppSendError, SendAck
+from backend.modules.vertice360_orquestador_demo import services as orquestador_services
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _dispatcher(clock: FakeClock, **kwargs) -> OutboundDispatcher:
+    return OutboundDispatcher(clock=clock, sleep=clock.sleep, rng=random.Random(7), **kwargs)
+
+
+def _upstream(status: int) -> GupshupWhatsAppSendError:
+    return GupshupWhatsAppSendError("Gupshup send failed", upstream_status=status)
+
+
+def test_bursts_beyond_the_bucket_are_queued_per_line() -> None:
+    clock = FakeClock()
+    dispatcher = _dispatcher(clock, rate_per_second={"gupshup": 10}, burst=2)
+    pending: list[tuple[str, int]] = []
+
+    async def send() -> str:
+        return "ok"
+
+    async def scenario() -> None:
+        for _ in range(3):
+            await dispatcher.dispatch("gupshup", "gupshup:111", send, on_pending=lambda s, a: pending.append((s, a)))
+        await dispatcher.dispatch("gupshup", "gupshup:222", send)
+
+    asyncio.run(scenario())
+
+    assert clock.sleeps == [pytest.approx(0.1)]
+    assert pending == [("queued", 1)]
+    assert dispatcher.stats()["providers"]["gupshup"]["sent"] == 4
+
+
+def test_retries_429_and_5xx_but_not_client_errors() -> None:
+    clock = FakeClock()
+    dispatcher = _dispatcher(clock, max_attempts=3, backoff_base_ms=100)
+    outcomes = [_upstream(429), _upstream(503), SendAck("gs-1", {})]
+    calls = {"bad_request": 0}
+
+    async def flaky() -> SendAck:
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    async def bad_request() -> None:
+        calls["bad_request"] += 1
+        raise _upstream(400)
+
+    async def scenario() -> None:
+        ack = await dispatcher.dispatch("gupshup", "gupshup:111", flaky)
+        assert ack.provider_message_id == "gs-1"
+        with pytest.raises(GupshupWhatsAppSendError):
+            await dispatcher.dispatch("gupshup", "gupshup:111", bad_request)
+
+    asyncio.run(scenario())
+
+    assert calls["bad_request"] == 1
+    assert len(clock.sleeps) == 2
+    assert 0 <= clock.sleeps[0] <= 0.1 and 0 <= clock.sleeps[1] <= 0.2
+    stats = dispatcher.stats()["providers"]["gupshup"]
+    assert stats["retried"] == 2
+    assert stats["circuit"] == "closed"
+
+
+def test_breaker_fails_fast_then_probes_after_cooldown() -> None:
+    clock = FakeClock()
+    dispatcher = _dispatcher(clock, max_attempts=1, breaker_threshold=2, breaker_cooldown_seconds=30)
+    calls = {"n": 0}
+
+    async def down() -> None:
+        calls["n"] += 1
+        raise _upstream(502)
+
+    async def up() -> str:
+        calls["n"] += 1
+        return "ok"
+
+    async def scenario() -> None:
+        for _ in range(2):
+            with pytest.raises(GupshupWhatsAppSendError):
+                await dispatcher.dispatch("gupshup", "gupshup:111", down)
+        with pytest.raises(CircuitOpenError):
+            await dispatcher.dispatch("gupshup", "gupshup:111", up)
+        assert calls["n"] == 2
+        clock.now += 31
+        assert await dispatcher.dispatch("gupshup", "gupshup:111", up) == "ok"
+
+    asyncio.run(scenario())
+
+    stats = dispatcher.stats()["providers"]["gupshup"]
+    assert stats["circuit"] == "closed"
+    assert stats["rejected_open"] == 1
+    assert stats["opens"] == 1
+
+
+def test_supervisor_send_marks_message_pending_while_retrying(monkeypatch) -> None:
+    clock = FakeClock()
+    dispatcher = _dispatcher(clock)
+    marked: list[tuple[str, str]] = []
+    outcomes = [_upstream(503), SendAck("gs-9", {"status": "submitted"})]
+
+    async def fake_send(phone: str, text: str) -> SendAck:  # noqa: ARG001
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(orquestador_services, "outbound_dispatcher", dispatcher)
+    monkeypatch.setattr(orquestador_services, "gupshup_send_text", fake_send)
+    monkeypatch.setattr(orquestador_services, "_missing_gupshup_config_keys", lambda: [])
+    monkeypatch.setattr(
+        orquestador_services, "_mark_message_send_pending", lambda message_id, reason: marked.append((message_id, reason))
+    )
+
+    result = asyncio.run(
+        orquestador_services._send_supervisor_whatsapp_via_gupshup("+5491130946950", "Hola", message_id="msg-1")
+    )
+
+    assert result["send_ok"] is True
+    assert result["provider_message_id"] == "gs-9"
+    assert marked == [("msg-1", "retrying:attempt=1")]
+
+
+
+def test_queued_or_cancelled_probe_does_not_wedge_the_breaker() -> None:
+    clock = FakeClock()
+    dispatcher = _dispatcher(
+        clock,
+        max_attempts=1,
+        breaker_threshold=1,
+        breaker_cooldown_seconds=30,
+        rate_per_second={"gupshup": 1},
+        max_queue_wait_seconds=0.5,
+    )
+
+    async def down() -> None:
+        raise _upstream(502)
+
+    async def hang() -> None:
+        await asyncio.Event().wait()
+
+    async def up() -> str:
+        return "ok"
+
+    async def scenario() -> None:
+        with pytest.raises(GupshupWhatsAppSendError):
+            await dispatcher.dispatch("gupshup", "gupshup:111", down)
+        clock.now += 31
+        # The would-be probe is refused by its line's queue before reaching the provider.
+        dispatcher._buckets["gupshup:111"].tokens = -5.0
+        dispatcher._buckets["gupshup:111"].updated_at = clock.now
+        with pytest.raises(SendQueueTimeout):
+            await dispatcher.dispatch("gupshup", "gupshup:111", up)
+        # A probe cancelled mid-send hands the probe to the next caller.
+        probe = asyncio.create_task(dispatcher.dispatch("gupshup", "gupshup:222", hang))
+        await asyncio.sleep(0)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        assert await dispatcher.dispatch("gupshup", "gupshup:333", up) == "ok"
+
+    asyncio.run(scenario())
+
+    assert dispatcher.stats()["providers"]["gupshup"]["circuit"] == "closed"
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+
+from backend import globalVar
+from backend.modules.messaging.providers import http_pool
+from backend.modules.messaging.providers.gupshup.whatsapp.client import GupshupConfig, GupshupWhatsAppClient
+from backend.modules.messaging.providers.meta.whatsapp import client as meta_client
+
+
+def _config() -> GupshupConfig:
+    return GupshupConfig(
+        base_url="https://gupshup.test",
+        api_key="key",
+        app_name="app",
+        sender_e164="+5491100000000",
+        source_number="5491100000000",
+    )
+
+
+def test_gupshup_sends_reuse_the_pooled_client(monkeypatch) -> None:
+    seen: list[str] = []
+    observed: list[tuple[str, float, dict]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        return httpx.Response(200, json={"messageId": f"gs-{len(seen)}"})
+
+    pool = http_pool.ProviderHTTPPool("gupshup", timeout_seconds=5, transport=httpx.MockTransport(handler))
+    monkeypatch.setitem(http_pool.provider_pools, "gupshup", pool)
+    monkeypatch.setattr(http_pool.metrics, "observe", lambda name, value, tags=None: observed.append((name, value, tags)))
+
+    async def scenario() -> list[dict]:
+        await http_pool.open_provider_clients()
+        client = GupshupWhatsAppClient(_config())
+        results = [await client.send_text("+5491100000001", "hola"), await client.send_text("+5491100000001", "chau")]
+        assert not pool.client().is_closed
+        await http_pool.close_provider_clients()
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert [item["messageId"] for item in results] == ["gs-1", "gs-2"]
+    assert seen == ["/wa/api/v1/msg", "/wa/api/v1/msg"]
+    assert pool.created == 1
+    assert http_pool.provider_http_stats()["gupshup"]["open"] is False
+    assert [(name, tags) for name, _, tags in observed] == [
+        ("messaging.send_ms", {"provider": "gupshup", "status": "200"}),
+        ("messaging.send_ms", {"provider": "gupshup", "status": "200"}),
+    ]
+
+
+def test_meta_post_message_uses_the_meta_pool(monkeypatch) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["Authorization"] == "Bearer token"
+        return httpx.Response(200, json={"messages": [{"id": "wamid.1"}]})
+
+    pool = http_pool.ProviderHTTPPool("meta", timeout_seconds=5, transport=httpx.MockTransport(handler))
+    monkeypatch.setitem(http_pool.provider_pools, "meta", pool)
+    monkeypatch.setenv("DEMO_DISABLE_META_SEND", "0")
+    monkeypatch.setattr(meta_client.globalVar, "meta_whatsapp_enabled", lambda: True)
+    monkeypatch.setattr(meta_client.globalVar, "META_VERTICE360_WABA_TOKEN", "token")
+
+    result = asyncio.run(meta_client.post_message({"to": "5491100000001", "type": "text"}))
+
+    assert result["messages"][0]["id"] == "wamid.1"
+    assert pool.created == 1
+
+
+def test_client_left_on_a_previous_loop_is_closed() -> None:
+    pool = http_pool.ProviderHTTPPool(
+        "gupshup", timeout_seconds=5, transport=httpx.MockTransport(lambda request: httpx.Response(200))
+    )
+
+    async def first() -> httpx.AsyncClient:
+        return pool.client()
+
+    async def second() -> httpx.AsyncClient:
+        client = pool.client()
+        await asyncio.sleep(0)
+        return client
+
+    stale = asyncio.run(first())
+    fresh = asyncio.run(second())
+
+    assert stale is not fresh
+    assert stale.is_closed
+    assert not fresh.is_closed
+    assert pool.created == 2
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from backend.modules.messaging.providers.gupshup.whatsapp.mapper import (
+    parse_events,
+    parse_inbound,
+    parse_status,
+)
+from backend.modules.messaging.providers.meta.whatsapp.mapper import (
+    extract_inbound_messages,
+    extract_status_updates,
+)
+from backend.modules.messaging.providers.webhook_decode import (
+    WebhookDecodeError,
+    decode_gupshup_webhook,
+    decode_meta_webhook,
+)
+
+FIXTURES_DIR = Path(__file__).resolve().parents[1] / "modules" / "messaging" / "providers" / "gupshup" / "fixtures"
+
+GUPSHUP_INBOUND_V2 = {
+    "app": "vertice360dev",
+    "type": "message",
+    "payload": {
+        "id": "inbound-msg-001",
+        "source": "541130946950",
+        "type": "text",
+        "payload": {"text": " OK DobleVia "},
+        "sender": {"phone": "541130946950"},
+        "destination": "5491100000000",
+    },
+}
+GUPSHUP_MESSAGE_EVENT = {
+    "type": "message-event",
+    "payload": {"id": "ack-1", "gsId": "gs-1", "type": "read", "payload": {"ts": 1700000005}},
+}
+META_PAYLOAD = {
+    "entry": [
+        {
+            "changes": [
+                {
+                    "value": {
+                        "metadata": {"phone_number_id": "1234567890"},
+                        "contacts": [{"wa_id": "5491100000000"}],
+                        "messages": [
+                            {"from": "5491100000000", "id": "wamid.IN", "timestamp": "1700000000",
+                             "type": "text", "text": {"body": "hola"}},
+                        ],
+                        "statuses": [
+                            {"id": "wamid.OUT", "status": "delivered", "timestamp": "1700000001",
+                             "recipient_id": "5491100000000", "pricing": {"billable": True}},
+                        ],
+                    }
+                }
+            ]
+        }
+    ]
+}
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        *(json.loads(path.read_text(encoding="utf-8")) for path in sorted(FIXTURES_DIR.glob("*.json"))),
+        GUPSHUP_INBOUND_V2,
+        GUPSHUP_MESSAGE_EVENT,
+        {"data": [{"statuses": [{"messageId": "m-1", "status": "sent"}]}, {"message": {"from": "1", "text": "x"}}]},
+    ],
+)
+def test_parse_events_matches_separate_parsers(payload) -> None:  # noqa: ANN001
+    inbound, statuses = parse_events(payload)
+
+    assert inbound == parse_inbound(payload)
+    assert statuses == parse_status(payload)
+
+
+def test_decode_gupshup_webhook_maps_only_what_the_event_needs() -> None:
+    inbound = decode_gupshup_webhook(json.dumps(GUPSHUP_INBOUND_V2).encode("utf-8"))
+    assert (inbound.event_type, inbound.app, inbound.payload_type) == ("message", "vertice360dev", "text")
+    assert inbound.inbound_text == "OK DobleVia"
+    assert [(item.message_id, item.from_, item.to) for item in inbound.inbound] == [
+        ("inbound-msg-001", "541130946950", "5491100000000")
+    ]
+
+    event = decode_gupshup_webhook(json.dumps(GUPSHUP_MESSAGE_EVENT).encode("utf-8"))
+    assert event.inbound == ()
+    assert [(item.status, item.raw["id"]) for item in event.statuses] == [("read", "ack-1")]
+
+    billing = decode_gupshup_webhook(b'{"type": "billing-event", "payload": {"type": "charged"}}')
+    assert (billing.inbound, billing.statuses) == ((), ())
+
+    with pytest.raises(WebhookDecodeError):
+        decode_gupshup_webhook(b"[1, 2]")
+    with pytest.raises(WebhookDecodeError):
+        decode_gupshup_webhook(b"\xff{not json")
+
+
+def test_decode_meta_webhook_single_pass_matches_extractors() -> None:
+    webhook = decode_meta_webhook(json.dumps(META_PAYLOAD).encode("utf-8"))
+
+    assert list(webhook.inbound) == extract_inbound_messages(META_PAYLOAD)
+    assert [status.as_dict() for status in webhook.statuses] == extract_status_updates(META_PAYLOAD)
+    assert webhook.statuses[0].phone_number_id == "1234567890"
+    assert webhook.statuses[0].raw == {"pricing": {"billable": True}}
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+from backend.routes import messaging as messaging_routes
+
+
+def _meta_batch(messages: list[tuple[str, str]]) -> dict:
+    return {
+        "entry": [
+            {
+                "changes": [
+                    {
+                        "value": {
+                            "metadata": {"phone_number_id": "123"},
+                            "messages": [
+                                {"from": sender, "id": message_id, "timestamp": "1710000300",
+                                 "type": "text", "text": {"body": message_id}}
+                                for sender, message_id in messages
+                            ],
+                        }
+                    }
+                ]
+            }
+        ]
+    }
+
+
+def test_meta_batch_keeps_per_sender_order_while_senders_overlap(client, monkeypatch) -> None:
+    batch = [
+        ("5491100000001", "a-1"),
+        ("5491100000002", "b-1"),
+        ("5491100000001", "a-2"),
+        ("5491100000003", "c-1"),
+        ("5491100000002", "b-2"),
+        ("5491100000001", "a-3"),
+    ]
+    # Earlier messages of a sender are slower, so any reordering within a sender would show.
+    delays = {"a-1": 0.03, "a-2": 0.01, "a-3": 0.0, "b-1": 0.02, "b-2": 0.0, "c-1": 0.01}
+    processed: list[tuple[str, str]] = []
+    state = {"active": 0, "peak": 0}
+
+    async def fake_ai(*args, **kwargs):  # noqa: ANN002, ANN003
+        return None
+
+    async def fake_workflow(inbound):  # noqa: ANN001
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(delays[inbound["messageId"]])
+        state["active"] -= 1
+        processed.append((inbound["from"], inbound["messageId"]))
+        return {"ticketId": f"T-{inbound['from'][-1]}"}
+
+    monkeypatch.setattr(messaging_routes, "maybe_start_ai_workflow_from_inbound", fake_ai)
+    monkeypatch.setattr(messaging_routes, "process_inbound_message", fake_workflow)
+    monkeypatch.setattr(messaging_routes.globalVar, "META_APP_SECRET_IMOTORSOFT", "", raising=False)
+
+    response = client.post(
+        "/webhooks/messaging/meta/whatsapp",
+        content=json.dumps(_meta_batch(batch)),
+        headers={"Content-Type": "application/json"},
+    )
+
+    assert response.status_code == 201
+    assert response.json() == {"ok": True}
+    assert len(processed) == len(batch)
+    for sender in {sender for sender, _ in batch}:
+        expected = [message_id for s, message_id in batch if s == sender]
+        assert [message_id for s, message_id in processed if s == sender] == expected
+    assert state["peak"] > 1
+
+
+def test_process_by_sender_bounds_concurrency_and_keeps_input_order() -> None:
+    state = {"active": 0, "peak": 0}
+
+    async def handle(item: tuple[str, int]) -> int:
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.005)
+        state["active"] -= 1
+        return item[1]
+
+    items = [(f"sender-{index % 5}", index) for index in range(15)]
+    results = asyncio.run(messaging_routes._process_by_sender(items, lambda item: item[0], handle, limit=2))
+
+    assert results == list(range(15))
+    assert state["peak"] == 2
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.modules.vertice360_workflow_demo import services, store
+from backend.modules.vertice360_workflow_demo.backends import PostgresTicketBackend, SqliteTicketBackend
+from backend.services.keyed_mutex import KeyedAsyncMutex
+
+
+@pytest.fixture()
+def sqlite_store(tmp_path):
+    path = str(tmp_path / "workflow.sqlite3")
+    store.configure_backend("sqlite", path=path)
+    yield path
+    store.configure_backend("memory")
+
+
+def _inbound(message_id: str, text: str) -> dict:
+    return {
+        "provider": "meta_whatsapp",
+        "channel": "whatsapp",
+        "from": "+5491130002001",
+        "to": "+5491100000000",
+        "messageId": message_id,
+        "text": text,
+        "timestamp": 1710000000000,
+        "mediaCount": 0,
+    }
+
+
+def test_ticket_ids_are_allocated_atomically_across_workers(tmp_path) -> None:
+    path = str(tmp_path / "shared.sqlite3")
+    worker_a = SqliteTicketBackend(path)
+    worker_b = SqliteTicketBackend(path)
+    try:
+        numbers = [worker_a.next_ticket_number() if i % 2 else worker_b.next_ticket_number() for i in range(10)]
+    finally:
+        worker_a.close()
+        worker_b.close()
+
+    assert sorted(numbers) == list(range(1, 11))
+
+
+def test_conversation_lock_excludes_other_workers(tmp_path) -> None:
+    path = str(tmp_path / "shared.sqlite3")
+    worker_a = SqliteTicketBackend(path)
+    worker_b = SqliteTicketBackend(path)
+
+    async def scenario() -> list[str]:
+        order: list[str] = []
+
+        async def hold() -> None:
+            async with worker_a.conversation_lock("5491130002001"):
+                order.append("a:start")
+                await asyncio.sleep(0.05)
+                order.append("a:end")
+
+        async def wait() -> None:
+            await asyncio.sleep(0.01)
+            async with worker_b.conversation_lock("5491130002001"):
+                order.append("b")
+
+        await asyncio.gather(hold(), wait())
+        return order
+
+    try:
+        assert asyncio.run(scenario()) == ["a:start", "a:end", "b"]
+    finally:
+        worker_a.close()
+        worker_b.close()
+
+
+def test_conversation_continues_when_another_worker_handles_next_message(sqlite_store) -> None:
+    first = asyncio.run(services.process_inbound_message(_inbound("msg-backend-1", "Hola")))
+
+    # Simulate the next webhook landing on a worker with a cold cache.
+    store.tickets.clear()
+    store.rebuild_indexes()
+    second = asyncio.run(services.process_inbound_message(_inbound("msg-backend-2", "Palermo 3 ambientes")))
+
+    assert second["ticketId"] == first["ticketId"]
+    stored = store.get_ticket(first["ticketId"], refresh=True)
+    texts = [message.get("text") for message in stored["messages"]]
+    assert "Hola" in texts
+    assert "Palermo 3 ambientes" in texts
+
+
+def test_bulk_load_writes_every_ticket_once(sqlite_store) -> None:
+    items = [
+        {
+            "ticketId": f"VTX-{index:04d}",
+            "status": "OPEN",
+            "customer": {"from": f"54911300030{index:02d}"},
+            "createdAt": index,
+        }
+        for index in range(1, 6)
+    ]
+
+    assert store.bulk_load_tickets(items) == 5
+
+    store.tickets.clear()
+    store.rebuild_indexes()
+    assert store.load_from_backend() == 5
+    assert store._find_active_ticket_by_phone("5491130003003")["ticketId"] == "VTX-0003"
+
+
+def test_shared_backend_writes_leave_the_loop_and_land_before_lock_release(sqlite_store, monkeypatch) -> None:
+    import threading
+
+    backend = store._backend
+    writer_threads: list[bool] = []
+    original_save_tickets = backend.save_tickets
+
+    def recording_save_tickets(rows):  # noqa: ANN001, ANN202
+        writer_threads.append(threading.current_thread() is threading.main_thread())
+        return original_save_tickets(rows)
+
+    monkeypatch.setattr(backend, "save_tickets", recording_save_tickets)
+    monkeypatch.setattr(backend, "save_ticket", lambda *a, **k: pytest.fail("inline write on the event loop"))
+
+    async def scenario() -> tuple[dict, dict | None]:
+        async with store.conversation_lock("5491130002001"):
+            ticket = await store.create_or_get_ticket_from_inbound(_inbound("msg-wb-1", "Hola"))
+            store.add_message(ticket["ticketId"], {"text": "pendiente", "at": 1})
+            # Unsaved local changes must win over the stale backend row.
+            refreshed = await store.aget_ticket(ticket["ticketId"], refresh=True)
+            assert refreshed is ticket
+        return ticket, await asyncio.to_thread(backend.load_ticket, ticket["ticketId"])
+
+    ticket, stored = asyncio.run(scenario())
+
+    assert writer_threads and not any(writer_threads)
+    assert stored is not None
+    assert [message["text"] for message in stored["messages"]][-1] == "pendiente"
+    assert store._dirty == {}
+
+
+def test_sqlite_lease_is_renewed_while_a_long_turn_holds_it(tmp_path) -> None:
+    path = str(tmp_path / "shared.sqlite3")
+    worker_a = SqliteTicketBackend(path, lock_ttl_seconds=0.09)
+    worker_b = SqliteTicketBackend(path, lock_ttl_seconds=0.09)
+
+    async def scenario() -> list[str]:
+        order: list[str] = []
+
+        async def long_turn() -> None:
+            async with worker_a.conversation_lock("5491130002009"):
+                order.append("a:start")
+                await asyncio.sleep(0.3)  # several TTLs
+                order.append("a:end")
+
+        async def contender() -> None:
+            await asyncio.sleep(0.02)
+            async with worker_b.conversation_lock("5491130002009"):
+                order.append("b")
+
+        await asyncio.gather(long_turn(), contender())
+        return order
+
+    try:
+        assert asyncio.run(scenario()) == ["a:start", "a:end", "b"]
+    finally:
+        worker_a.close()
+        worker_b.close()
+
+
+def test_conversation_lock_debug_route_requires_admin_token(client, monkeypatch) -> None:
+    from backend import globalVar
+
+    monkeypatch.setattr(globalVar, "RUN_ENV", "dev", raising=False)
+    monkeypatch.setattr(globalVar, "V360_ADMIN_TOKEN", "test", raising=False)
+    url = "/api/demo/vertice360-workflow/debug/conversation-locks"
+
+    assert client.get(url).status_code == 401
+    assert client.get(url, headers={"x-v360-admin-token": "test"}).status_code == 200
+
+
+class _BlockingLockConn:
+    """Stands in for a lock-pool connection whose FOR UPDATE waits on another holder."""
+
+    def __init__(self, unblock: threading.Event) -> None:
+        self.unblock = unblock
+        self.statements: list[str] = []
+
+    def execute(self, query: str, params: tuple = ()) -> None:  # noqa: ARG002
+        if "FOR UPDATE" in query:
+            self.unblock.wait(5)
+        self.statements.append(query.split()[0] if "lock_timeout" not in query else "SET lock_timeout")
+
+
+class _FakeLockPool:
+    def __init__(self, conn: _BlockingLockConn) -> None:
+        self.conn = conn
+        self.returned = threading.Event()
+
+    def getconn(self) -> _BlockingLockConn:
+        return self.conn
+
+    def putconn(self, conn: _BlockingLockConn) -> None:  # noqa: ARG002
+        self.returned.set()
+
+
+def test_postgres_row_lock_taken_after_the_waiter_is_cancelled_is_released() -> None:
+    unblock = threading.Event()
+    conn = _BlockingLockConn(unblock)
+    backend = PostgresTicketBackend.__new__(PostgresTicketBackend)
+    backend._lock_pool = _FakeLockPool(conn)
+    backend._locks = KeyedAsyncMutex("test.conversation_lock")
+    backend._lock_timeout = "30000ms"
+
+    async def scenario() -> None:
+        backend._lock_slots = asyncio.Semaphore(1)
+
+        async def turn() -> None:
+            async with backend.conversation_lock("5491130002001"):
+                pass
+
+        waiter = asyncio.create_task(turn())
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        unblock.set()
+        deadline = time.monotonic() + 2
+        while not backend._lock_pool.returned.is_set() and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+
+    assert backend._lock_pool.returned.is_set()
+    assert conn.statements == ["INSERT", "BEGIN", "SET lock_timeout", "SELECT", "COMMIT"]
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from backend.modules.vertice360_workflow_demo import store
+
+
+def _inbound(phone: str, text: str = "hola", **extra) -> dict:
+    payload = {
+        "provider": "gupshup_whatsapp",
+        "app": "vertice360dev",
+        "channel": "whatsapp",
+        "from": phone,
+        "timestamp": int(time.time() * 1000),
+        "text": text,
+        "customer": {"from": phone, "provider": "gupshup_whatsapp", "channel": "whatsapp"},
+    }
+    payload.update(extra)
+    return payload
+
+
+def _create(phone: str, text: str = "hola", **extra) -> dict:
+    return asyncio.run(store.create_or_get_ticket_from_inbound(_inbound(phone, text, **extra)))
+
+
+def test_lookup_by_phone_and_conversation_key_uses_indexes() -> None:
+    first = _create("5491130000001")
+    _create("5491130000002")
+
+    assert store._find_active_ticket_by_phone("+54 9 11 3000-0001") is first
+    assert (
+        store._find_active_ticket_by_conversation_key("gupshup_whatsapp:vertice360dev:5491130000001")
+        is first
+    )
+    assert store.ticket_ids_by_status("open") == [first["ticketId"], "VTX-0002"]
+    assert store.check_index_consistency() == []
+
+
+def test_session_reset_points_indexes_at_new_ticket() -> None:
+    first = _create("5491130000003")
+    second = _create("5491130000003", text="reiniciar")
+
+    assert second["ticketId"] != first["ticketId"]
+    assert store._find_active_ticket_by_phone("5491130000003") is second
+    assert store.check_index_consistency() == []
+
+
+def test_close_and_status_change_update_indexes() -> None:
+    first = _create("5491130000004")
+    second = _create("5491130000004", text="reiniciar")
+
+    asyncio.run(store.close_ticket(second["ticketId"], reason="done"))
+    assert store._find_active_ticket_by_phone("5491130000004") is first
+
+    asyncio.run(store.set_status(first["ticketId"], "IN_PROGRESS"))
+    assert store.ticket_ids_by_status("IN_PROGRESS") == [first["ticketId"]]
+    assert store.ticket_ids_by_status("CLOSED") == [second["ticketId"]]
+
+    asyncio.run(store.close_ticket(first["ticketId"]))
+    assert store._find_active_ticket_by_phone("5491130000004") is None
+    assert store.check_index_consistency() == []
+
+
+def test_direct_inserts_are_picked_up_and_drift_is_reported() -> None:
+    _create("5491130000005")
+    store.tickets["VTX-9100"] = {
+        "ticketId": "VTX-9100",
+        "status": "OPEN",
+        "customer": {"from": "5491130000006"},
+    }
+
+    assert store._find_active_ticket_by_phone("5491130000006")["ticketId"] == "VTX-9100"
+
+    store.tickets["VTX-9100"]["status"] = "CLOSED"
+    assert store.check_index_consistency()
+
+    store.reindex_ticket("VTX-9100")
+    assert store.check_index_consistency() == []
+    assert store._find_active_ticket_by_phone("5491130000006") is None
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from backend.modules.vertice360_workflow_demo import store
+
+
+@pytest.fixture()
+def archive(tmp_path):
+    archive = store.configure_archive(str(tmp_path / "tickets.sqlite3"))
+    yield archive
+    store.configure_archive(None)
+
+
+def _create(phone: str, text: str = "hola") -> dict:
+    return asyncio.run(
+        store.create_or_get_ticket_from_inbound(
+            {
+                "provider": "gupshup_whatsapp",
+                "app": "vertice360dev",
+                "channel": "whatsapp",
+                "from": phone,
+                "timestamp": int(time.time() * 1000),
+                "text": text,
+                "customer": {"from": phone, "provider": "gupshup_whatsapp"},
+            }
+        )
+    )
+
+
+def test_messages_and_timeline_are_capped_and_spilled(monkeypatch, archive) -> None:
+    monkeypatch.setattr(store, "TICKET_MAX_MESSAGES", 3)
+    monkeypatch.setattr(store, "TICKET_MAX_TIMELINE", 2)
+    ticket = _create("5491130001001")
+    ticket_id = ticket["ticketId"]
+
+    for index in range(5):
+        store.add_message(ticket_id, {"text": f"m{index}", "at": index})
+        asyncio.run(store.add_timeline_event(ticket_id, "note", {"n": index}))
+
+    assert [msg["text"] for msg in ticket["messages"]] == ["m2", "m3", "m4"]
+    assert len(ticket["timeline"]) == 2
+    assert ticket["messagesArchived"] == 2
+    assert [msg["text"] for msg in store.archived_history(ticket_id, "messages")] == ["m0", "m1"]
+    assert len(store.archived_history(ticket_id, "timeline")) == 4
+
+
+def test_caps_apply_without_archive(monkeypatch) -> None:
+    monkeypatch.setattr(store, "TICKET_MAX_MESSAGES", 2)
+    ticket = _create("5491130001002")
+    for index in range(4):
+        store.add_message(ticket["ticketId"], {"text": f"m{index}", "at": index})
+
+    assert len(ticket["messages"]) == 2
+    assert store.archived_history(ticket["ticketId"], "messages") == []
+
+
+def test_closed_ticket_is_evicted_and_lazily_reloaded(archive, client) -> None:
+    ticket = _create("5491130001003")
+    ticket_id = ticket["ticketId"]
+    asyncio.run(store.close_ticket(ticket_id, reason="done"))
+
+    assert store.evict_inactive_tickets(now_ms=ticket["updatedAt"] + 3_600_000) == 1
+    assert ticket_id not in store.tickets
+
+    response = client.get(f"/api/demo/vertice360-workflow/tickets/{ticket_id}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "CLOSED"
+    assert ticket_id in store.tickets
+    assert store.check_index_consistency() == []
+
+
+def test_idle_active_ticket_is_resumed_from_archive(archive) -> None:
+    ticket = _create("5491130001004")
+    ticket_id = ticket["ticketId"]
+    store.evict_inactive_tickets(now_ms=ticket["updatedAt"] + 10 * 86_400_000)
+    assert ticket_id not in store.tickets
+
+    resumed = _create("5491130001004", text="sigo interesado")
+
+    assert resumed["ticketId"] == ticket_id
+    assert store.check_index_consistency() == []
+
+
+def test_memory_report_lists_tickets(client, monkeypatch) -> None:
+    from backend import globalVar
+
+    monkeypatch.setattr(globalVar, "RUN_ENV", "dev", raising=False)
+    monkeypatch.setattr(globalVar, "V360_ADMIN_TOKEN", "test", raising=False)
+    _create("5491130001005")
+    url = "/api/demo/vertice360-workflow/tickets/memory"
+
+    assert client.get(url).status_code == 401
+    response = client.get(url, headers={"x-v360-admin-token": "test"})
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["ticketCount"] == 1
+    assert payload["tickets"][0]["approxBytes"] > 0
+    assert payload["caps"]["messages"] == store.TICKET_MAX_MESSAGES
+
+
+def test_ticket_ids_are_not_reused_after_restart(archive) -> None:
+    ticket = _create("5491130001006")
+    ticket_id = ticket["ticketId"]
+    asyncio.run(store.close_ticket(ticket_id, reason="done"))
+    store.evict_inactive_tickets(now_ms=ticket["updatedAt"] + 3_600_000)
+
+    # A new process: empty working set, sequence back at 1, same archive file.
+    store._backend.reset()
+    store.configure_archive(archive.path)
+    after_restart = _create("5491130001007")
+
+    # Sequence rewound without reseeding: the reservation loop skips archived ids.
+    store._backend.reset()
+    after_rewind = _create("5491130001008")
+
+    assert after_restart["ticketId"] != ticket_id
+    assert after_rewind["ticketId"] not in (ticket_id, after_restart["ticketId"])